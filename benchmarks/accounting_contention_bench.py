@@ -0,0 +1,91 @@
+"""
+Kontensi akuntansi budget: banyak thread add_spend + spent_today + log usage.
+
+  legacy : koneksi SQLite baru per call (CREATE TABLE, upsert, commit, close) + open JSONL per baris
+  batched: accounting.Accounting (writer latar belakang, cache read-through)
+
+    python -m benchmarks.accounting_contention_bench
+    python -m benchmarks.accounting_contention_bench --threads 64 --ops 500
+"""
+
+import argparse, datetime, json, os, sqlite3, tempfile, threading, time
+
+import numpy as np
+
+_DDL = """CREATE TABLE IF NOT EXISTS user_budget_daily(
+  user_id TEXT, day TEXT, spent_usd REAL NOT NULL DEFAULT 0, PRIMARY KEY(user_id, day))"""
+
+
+def _legacy(db: str, log: str):
+    def spend(uid, usd):
+        con = sqlite3.connect(db, timeout=30.0)
+        con.execute(_DDL)
+        con.execute(
+            "INSERT INTO user_budget_daily(user_id, day, spent_usd) VALUES (?,?,?) "
+            "ON CONFLICT(user_id, day) DO UPDATE SET spent_usd = spent_usd + excluded.spent_usd",
+            (uid, datetime.date.today().isoformat(), usd),
+        )
+        con.commit()
+        con.close()
+
+    def read(uid):
+        con = sqlite3.connect(db, timeout=30.0)
+        con.execute(_DDL)
+        row = con.execute(
+            "SELECT spent_usd FROM user_budget_daily WHERE user_id=? AND day=?",
+            (uid, datetime.date.today().isoformat()),
+        ).fetchone()
+        con.close()
+        return float(row[0]) if row else 0.0
+
+    def usage(row):
+        with open(log, "a", encoding="utf-8") as f:
+            f.write(json.dumps(row) + "\n")
+
+    return spend, read, usage, lambda: None
+
+
+def _batched(db: str, log: str):
+    from javu_agi.accounting import Accounting
+
+    acct = Accounting(db)
+    return acct.add_spend, acct.spent_today, lambda row: acct.log_usage(log, row), acct.close
+
+
+def _run(name, factory, threads, ops, users):
+    d = tempfile.mkdtemp()
+    spend, read, usage, close = factory(os.path.join(d, "budget.db"), os.path.join(d, "usage.jsonl"))
+    lat = [[] for _ in range(threads)]
+
+    def work(i):
+        mine = lat[i]
+        for j in range(ops):
+            uid = f"u{(i * ops + j) % users}"
+            t0 = time.perf_counter()
+            if read(uid) < 1e9:
+                spend(uid, 0.001)
+                usage({"user": uid, "cost_usd": 0.001})
+            mine.append(time.perf_counter() - t0)
+
+    ts = [threading.Thread(target=work, args=(i,)) for i in range(threads)]
+    t0 = time.perf_counter()
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    wall = time.perf_counter() - t0
+    close()
+    a = np.concatenate([np.asarray(x) for x in lat]) * 1000
+    print(f"{name:8s} {threads * ops / wall:9.0f} req/s  p50={np.percentile(a, 50):7.3f} ms  "
+          f"p99={np.percentile(a, 99):8.3f} ms")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--threads", type=int, default=32)
+    ap.add_argument("--ops", type=int, default=200)
+    ap.add_argument("--users", type=int, default=50)
+    a = ap.parse_args()
+    print(f"[BENCH] accounting contention: {a.threads} threads x {a.ops} ops, {a.users} users")
+    _run("legacy", _legacy, a.threads, a.ops, a.users)
+    _run("batched", _batched, a.threads, a.ops, a.users)
@@ -0,0 +1,58 @@
+"""
+Overhead gate contract per call (jalur execute_tool): enforce_contract(default_contracts(), ...).
+
+  rebuild : registry di-compose ulang tiap call + regex redaksi tidak dikompilasi (perilaku lama)
+  memo    : registry di-memo + GatePlan per tool + redaksi terkompilasi dengan jalur cepat
+
+    python -m benchmarks.contract_gate_bench
+    python -m benchmarks.contract_gate_bench --calls 20000
+"""
+
+import argparse, json, re, time
+
+import numpy as np
+
+from javu_agi.tools import tool_contracts as tc
+
+_CLEAN = {"input": "ringkas laporan kuartal ini dan buat tiga poin utama " * 4}
+_PII = {"input": "hubungi budi@contoh.co.id atau 0812-3456-7890 untuk detail " * 4}
+
+
+def _legacy_redact(payload):
+    s = json.dumps(payload, ensure_ascii=False)
+    for pat, rep in tc._PII.redact_rules.items():
+        s = re.sub(pat, rep, s)
+    return json.loads(s)
+
+
+def _rebuild(tool, args):
+    reg = tc._compose_contracts()
+    c = reg.get(tool)
+    for p in c.preconditions or []:
+        p(args)
+    return _legacy_redact(args)
+
+
+def _memo(tool, args):
+    return tc.enforce_contract(tc.default_contracts(), tool, args, user_region="ID")
+
+
+def _run(name, fn, tool, args, calls):
+    fn(tool, args)
+    lat = np.empty(calls)
+    for i in range(calls):
+        t0 = time.perf_counter()
+        fn(tool, args)
+        lat[i] = time.perf_counter() - t0
+    lat *= 1e6
+    print(f"{name:8s} {tool:12s} p50={np.percentile(lat, 50):8.1f} us  p99={np.percentile(lat, 99):8.1f} us")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--calls", type=int, default=5000)
+    a = ap.parse_args()
+    print(f"[BENCH] contract gate: {a.calls} calls per case")
+    for tool, args in (("web.get", {"url": "https://contoh.co.id", **_CLEAN}), ("file.write", {"path": "out/a.txt", "text": _PII["input"]})):
+        _run("rebuild", _rebuild, tool, args, a.calls)
+        _run("memo", _memo, tool, args, a.calls)
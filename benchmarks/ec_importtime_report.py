@@ -0,0 +1,131 @@
+"""
+Laporan cold-start import (python -X importtime) + budget check startup.
+
+    python -m benchmarks.ec_importtime_report                       # javu_agi.executive_controller
+    python -m benchmarks.ec_importtime_report javu_agi.api_server --top 40
+    python -m benchmarks.ec_importtime_report --budget-ms 2500      # exit 1 kalau lewat budget
+    python -m benchmarks.ec_importtime_report --save base.json      # simpan baseline
+    python -m benchmarks.ec_importtime_report --baseline base.json --tolerance 1.2
+
+Budget default dari env EC_IMPORT_BUDGET_MS (0 = tidak dicek). Setiap run di
+subprocess baru supaya benar-benar cold (tanpa sys.modules dari proses ini).
+Import gagal karena dependency pihak ketiga tidak terpasang -> MissingDependency
+(exit 2); gagal karena kode repo (siklus import, SyntaxError, ...) -> exit 1.
+"""
+
+import argparse, json, os, re, subprocess, sys, time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+DEFAULT_MODULE = "javu_agi.executive_controller"
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+_MISSING = re.compile(r"^ModuleNotFoundError: No module named '([^']+)'")
+
+
+class MissingDependency(RuntimeError):
+    """Import gagal karena modul di luar javu_agi tidak terpasang (bukan regresi repo)."""
+
+
+def measure(module: str = DEFAULT_MODULE, runs: int = 3) -> Dict:
+    """Import `module` di subprocess -X importtime; ambil run dengan total terkecil."""
+    best: Optional[Dict] = None
+    for _ in range(max(1, runs)):
+        t0 = time.perf_counter()
+        p = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True,
+            text=True,
+        )
+        wall_ms = (time.perf_counter() - t0) * 1000
+        if p.returncode != 0:
+            tail = (p.stderr.strip().splitlines()[-1:] or [""])[0]
+            m = _MISSING.match(tail)
+            if m and m.group(1).split(".")[0] != "javu_agi":
+                raise MissingDependency(f"import {module} gagal: {tail}")
+            raise RuntimeError(f"import {module} gagal: {tail}")
+        rows: List[Dict] = []
+        for line in p.stderr.splitlines():
+            m = _LINE.match(line)
+            if m:
+                rows.append(
+                    {
+                        "self_us": int(m.group(1)),
+                        "cum_us": int(m.group(2)),
+                        "depth": len(m.group(3)) // 2,
+                        "name": m.group(4),
+                    }
+                )
+        target = next((r for r in rows if r["name"] == module), None)
+        total_ms = (target["cum_us"] if target else sum(r["self_us"] for r in rows)) / 1000
+        res = {"module": module, "total_ms": total_ms, "wall_ms": wall_ms, "rows": rows}
+        if best is None or total_ms < best["total_ms"]:
+            best = res
+    return best
+
+
+def by_package(rows: List[Dict]) -> Dict[str, float]:
+    agg: Dict[str, float] = defaultdict(float)
+    for r in rows:
+        agg[r["name"].split(".")[0]] += r["self_us"] / 1000
+    return dict(sorted(agg.items(), key=lambda kv: kv[1], reverse=True))
+
+
+def check_budget(
+    res: Dict, budget_ms: float = 0.0, baseline: Optional[Dict] = None, tolerance: float = 1.2
+) -> List[str]:
+    """List pelanggaran (kosong = lolos)."""
+    errs = []
+    if budget_ms > 0 and res["total_ms"] > budget_ms:
+        errs.append(f"import {res['module']} {res['total_ms']:.0f} ms > budget {budget_ms:.0f} ms")
+    if baseline:
+        lim = float(baseline["total_ms"]) * tolerance
+        if res["total_ms"] > lim:
+            errs.append(
+                f"import {res['module']} {res['total_ms']:.0f} ms > baseline "
+                f"{baseline['total_ms']:.0f} ms x {tolerance:g}"
+            )
+    return errs
+
+
+def report(res: Dict, top: int = 25):
+    rows = res["rows"]
+    print(f"[BENCH] cold import {res['module']}: {res['total_ms']:.1f} ms "
+          f"(wall {res['wall_ms']:.1f} ms, {len(rows)} modul)")
+    print(f"\n-- top {top} cumulative --")
+    for r in sorted(rows, key=lambda r: r["cum_us"], reverse=True)[:top]:
+        print(f"{r['cum_us'] / 1000:9.1f} ms  {r['name']}")
+    print(f"\n-- top {top} self --")
+    for r in sorted(rows, key=lambda r: r["self_us"], reverse=True)[:top]:
+        print(f"{r['self_us'] / 1000:9.1f} ms  {r['name']}")
+    print("\n-- per package (self) --")
+    for pkg, ms in list(by_package(rows).items())[:top]:
+        print(f"{ms:9.1f} ms  {pkg}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("module", nargs="?", default=DEFAULT_MODULE)
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--top", type=int, default=25)
+    ap.add_argument("--budget-ms", type=float, default=float(os.getenv("EC_IMPORT_BUDGET_MS", "0")))
+    ap.add_argument("--baseline")
+    ap.add_argument("--tolerance", type=float, default=1.2)
+    ap.add_argument("--save")
+    a = ap.parse_args()
+    try:
+        res = measure(a.module, a.runs)
+    except MissingDependency as e:
+        print("[SKIP]", e)
+        sys.exit(2)
+    except RuntimeError as e:
+        print("[IMPORT FAIL]", e)
+        sys.exit(1)
+    report(res, a.top)
+    if a.save:
+        with open(a.save, "w", encoding="utf-8") as f:
+            json.dump({"module": res["module"], "total_ms": res["total_ms"]}, f, indent=2)
+    base = json.load(open(a.baseline, encoding="utf-8")) if a.baseline else None
+    errs = check_budget(res, a.budget_ms, base, a.tolerance)
+    for e in errs:
+        print("[BUDGET FAIL]", e)
+    sys.exit(1 if errs else 0)
@@ -0,0 +1,58 @@
+"""
+Benchmark latency request path: ExecutiveController() per request vs lease dari pool.
+
+    python -m benchmarks.ec_pool_bench             # 20 request, 1 thread
+    python -m benchmarks.ec_pool_bench 200 --threads 8 --pool 4
+"""
+
+import argparse, time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from javu_agi.runtime.controller_pool import ControllerPool
+
+
+def _pct(xs):
+    a = np.asarray(xs) * 1000
+    return f"p50={np.percentile(a, 50):9.2f} ms  p99={np.percentile(a, 99):9.2f} ms"
+
+
+def _timed(fn, n: int, threads: int):
+    def one(_):
+        t0 = time.perf_counter()
+        fn()
+        return time.perf_counter() - t0
+
+    with ThreadPoolExecutor(threads) as ex:
+        return list(ex.map(one, range(n)))
+
+
+def run(n: int = 20, threads: int = 1, pool_size: int = 4):
+    from javu_agi.executive_controller import ExecutiveController
+
+    print(f"[BENCH] ExecutiveController acquire n={n} threads={threads} pool={pool_size}")
+    # yang diukur murni biaya dapat controller siap pakai (bukan LLM call)
+    per_req = _timed(lambda: ExecutiveController(), n, threads)
+    print(f"per-request construct : {_pct(per_req)}")
+
+    pool = ControllerPool(ExecutiveController, size=pool_size)
+    pool.warm(pool_size)
+
+    def lease():
+        with pool.lease():
+            pass
+
+    pooled = _timed(lease, n, threads)
+    print(f"pool lease            : {_pct(pooled)}")
+    print(f"pool stats            : {pool.stats()}")
+    pool.close()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("n", nargs="?", type=int, default=20)
+    ap.add_argument("--threads", type=int, default=1)
+    ap.add_argument("--pool", type=int, default=4)
+    a = ap.parse_args()
+    run(a.n, a.threads, a.pool)
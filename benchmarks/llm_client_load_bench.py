@@ -0,0 +1,128 @@
+"""
+Load test LLMClient terhadap mock provider lokal (OpenAI-compatible, keep-alive).
+
+    python -m benchmarks.llm_client_load_bench                  # 50,200,1000 concurrent
+    python -m benchmarks.llm_client_load_bench 50 200 --requests 4000 --latency-ms 50
+
+Mode yang dibandingkan per level konkurensi:
+  async   : LLMClient.achat (httpx.AsyncClient pooled, semaphore per provider)
+  pooled  : LLMClient.chat di thread pool (requests.Session bersama)
+  bare    : requests.post per call di thread pool (jalur lama: handshake tiap call)
+"""
+
+import argparse, asyncio, json, os, threading, time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+async def _handle(reader, writer, latency_s: float):
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            n = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    n = int(line.split(b":", 1)[1])
+            req = json.loads(await reader.readexactly(n)) if n else {}
+            await asyncio.sleep(latency_s)
+            body = json.dumps(
+                {
+                    "choices": [{"message": {"content": f"ok {req.get('model', '')}"}}],
+                    "usage": {"prompt_tokens": 8, "completion_tokens": 2},
+                }
+            ).encode()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                b"Connection: keep-alive\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body)
+            )
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+def start_mock(latency_ms: float) -> int:
+    """Jalankan mock provider di thread terpisah; return port."""
+    ready, box = threading.Event(), {}
+
+    def run():
+        loop = asyncio.new_event_loop()
+        srv = loop.run_until_complete(
+            asyncio.start_server(
+                lambda r, w: _handle(r, w, latency_ms / 1000), "127.0.0.1", 0, backlog=4096
+            )
+        )
+        box["port"] = srv.sockets[0].getsockname()[1]
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    ready.wait()
+    return box["port"]
+
+
+def _report(name: str, conc: int, n: int, wall: float, lat):
+    a = np.asarray(lat) * 1000
+    print(
+        f"{name:7s} c={conc:5d}  {n / wall:9.0f} req/s  "
+        f"p50={np.percentile(a, 50):8.1f} ms  p99={np.percentile(a, 99):8.1f} ms"
+    )
+
+
+def run(levels=(50, 200, 1000), requests_per_level: int = 2000, latency_ms: float = 20.0):
+    port = start_mock(latency_ms)
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "mock")
+    os.environ["LLM_CONCURRENCY_OPENAI"] = str(max(levels))
+    os.environ["LLM_HTTP_POOL"] = str(max(levels))
+    import requests
+    from javu_agi.llm.client import LLMClient
+
+    msgs = [{"role": "user", "content": "halo"}]
+    print(f"[BENCH] LLMClient vs mock provider (latency {latency_ms:.0f} ms), {requests_per_level} req/level")
+    for conc in levels:
+        cli = LLMClient()
+
+        async def one(sem, lat):
+            async with sem:
+                t0 = time.perf_counter()
+                await cli.achat("openai", "gpt-4o", msgs)
+                lat.append(time.perf_counter() - t0)
+
+        async def burst():
+            sem, lat = asyncio.Semaphore(conc), []
+            t0 = time.perf_counter()
+            await asyncio.gather(*(one(sem, lat) for _ in range(requests_per_level)))
+            wall = time.perf_counter() - t0
+            await cli.aclose()
+            return wall, lat
+
+        wall, lat = asyncio.run(burst())
+        _report("async", conc, requests_per_level, wall, lat)
+
+        def timed(fn):
+            t0 = time.perf_counter()
+            fn()
+            return time.perf_counter() - t0
+
+        url = os.environ["OPENAI_BASE_URL"] + "/chat/completions"
+        payload = {"model": "gpt-4o", "messages": msgs}
+        for name, fn in (
+            ("pooled", lambda: cli.chat("openai", "gpt-4o", msgs)),
+            ("bare", lambda: requests.post(url, json=payload, timeout=30).json()),
+        ):
+            t0 = time.perf_counter()
+            with ThreadPoolExecutor(conc) as ex:
+                lat = list(ex.map(lambda _: timed(fn), range(requests_per_level)))
+            _report(name, conc, requests_per_level, time.perf_counter() - t0, lat)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("levels", nargs="*", type=int, default=[50, 200, 1000])
+    ap.add_argument("--requests", type=int, default=2000)
+    ap.add_argument("--latency-ms", type=float, default=20.0)
+    a = ap.parse_args()
+    run(tuple(a.levels), a.requests, a.latency_ms)
@@ -0,0 +1,102 @@
+"""
+Benchmark MemoryDB.recall dengan index in-process (100k & 1M episode).
+
+    python -m benchmarks.memory_recall_index_bench                 # 100k,1M dim=256
+    python -m benchmarks.memory_recall_index_bench 100000 --dim 1536
+"""
+
+import argparse, os, struct, tempfile, time
+
+import numpy as np
+
+from javu_agi.memory_db import MemoryDB, _pack, _unpack
+
+
+def _populate(db: MemoryDB, n: int, dim: int, users: int = 50):
+    rng = np.random.default_rng(0)
+    step = 50_000
+    with db.db:
+        for s in range(0, n, step):
+            m = min(step, n - s)
+            db.db.executemany(
+                "INSERT INTO episodic(id,ts,user,task,text,meta) VALUES(?,?,?,?,?,?)",
+                (
+                    (s + i + 1, 0, f"u{(s + i) % users}", "bench", f"ep {s + i}", "{}")
+                    for i in range(m)
+                ),
+            )
+    for s in range(0, n, step):
+        m = min(step, n - s)
+        db.add_vectors(
+            list(range(s + 1, s + m + 1)),
+            "episodic",
+            rng.standard_normal((m, dim), dtype=np.float32),
+        )
+
+
+def _legacy_recall(db: MemoryDB, q: np.ndarray, k: int = 5):
+    # jalur lama: scan penuh + struct.unpack per row
+    rows = db.db.execute("SELECT id,dim,vec FROM vectors WHERE kind=?", ("episodic",)).fetchall()
+    scored = []
+    for rid, dim, vecb in rows:
+        v = np.array(struct.unpack(f"{len(vecb) // 4}f", vecb), dtype=np.float32)
+        scored.append((rid, float(np.dot(q, v) / (np.linalg.norm(q) * np.linalg.norm(v) + 1e-9))))
+    scored.sort(key=lambda x: x[1], reverse=True)
+    return scored[:k]
+
+
+def _pack_bench(dim: int = 1536, n: int = 2000):
+    v = np.random.default_rng(2).standard_normal(dim).astype(np.float32)
+    t0 = time.perf_counter()
+    for _ in range(n):
+        struct.unpack(f"{dim}f", struct.pack(f"{dim}f", *v.tolist()))
+    legacy = (time.perf_counter() - t0) / n * 1e6
+    t0 = time.perf_counter()
+    for _ in range(n):
+        _unpack(_pack(v))
+    now = (time.perf_counter() - t0) / n * 1e6
+    print(f"pack+unpack dim={dim}: struct={legacy:8.1f} us  tobytes/frombuffer={now:8.1f} us")
+
+
+def run(sizes=(100_000, 1_000_000), dim: int = 256, reps: int = 20, legacy_max: int = 100_000):
+    print(f"[BENCH] MemoryDB.recall dim={dim}")
+    _pack_bench()
+    rng = np.random.default_rng(1)
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "memory.db")
+            db = MemoryDB(path)
+            _populate(db, n, dim)
+            q = rng.standard_normal(dim).astype(np.float32)
+            t0 = time.perf_counter()
+            db.recall(q, k=5)
+            cold = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            for _ in range(reps):
+                db.recall(rng.standard_normal(dim).astype(np.float32), k=5)
+            warm_ms = (time.perf_counter() - t0) / reps * 1000
+            t0 = time.perf_counter()
+            for _ in range(reps):
+                db.recall(q, k=5, user="u7")
+            user_ms = (time.perf_counter() - t0) / reps * 1000
+            db.save_index()
+            t0 = time.perf_counter()
+            MemoryDB(path).recall(q, k=5)
+            mmap_cold = time.perf_counter() - t0
+            line = (
+                f"n={n:>9,d}  cold_load={cold:6.2f}s  sidecar_load={mmap_cold:6.2f}s  "
+                f"recall={warm_ms:7.2f} ms  recall(user)={user_ms:7.2f} ms"
+            )
+            if n <= legacy_max:
+                t0 = time.perf_counter()
+                _legacy_recall(db, q)
+                line += f"  legacy_scan={(time.perf_counter() - t0) * 1000:9.1f} ms"
+            print(line)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("sizes", nargs="*", type=int, default=[100_000, 1_000_000])
+    ap.add_argument("--dim", type=int, default=256)
+    a = ap.parse_args()
+    run(tuple(a.sizes), dim=a.dim)
@@ -0,0 +1,48 @@
+"""
+Throughput token_counter.count_tokens (Indonesia / Inggris / kode), cold vs memo.
+
+    python -m benchmarks.token_count_bench
+    TOKENIZER_BACKEND=heuristic python -m benchmarks.token_count_bench --model claude-sonnet-3.5
+"""
+
+import argparse, time
+
+SAMPLES = {
+    "id": "Tolong buatkan ringkasan laporan keuangan perusahaan untuk kuartal ketiga, "
+    "sertakan perbandingannya dengan tahun sebelumnya dan rekomendasi penghematan biaya. ",
+    "en": "Please summarize the quarterly financial report and compare it with last year, "
+    "including recommendations to reduce operating costs. ",
+    "code": "def route(x: dict) -> list:\n    return [k for k, v in x.items() if v and k != '_'] \n",
+}
+
+
+def run(model: str = "gpt-4o", n: int = 20000):
+    from javu_agi import token_counter as T
+
+    c = T.get_counter(model)
+    print(f"[BENCH] count_tokens model={model} backend={c.name} encoding={c.encoding}")
+    for name, base in SAMPLES.items():
+        # pendek unik (tanpa memo) vs system prompt panjang berulang (memo)
+        short = [f"{base} #{i}" for i in range(n)]
+        t0 = time.perf_counter()
+        toks = sum(T.count_tokens(s, model) for s in short)
+        dt = time.perf_counter() - t0
+        mb = sum(map(len, short)) / 1e6
+        print(f"{name:5s} cold  {n / dt:10.0f} call/s  {toks / dt / 1e6:6.2f} Mtok/s  {mb / dt:6.1f} MB/s  "
+              f"(~{toks / n:.1f} tok/call, len//4={len(short[0]) // 4})")
+        sysp = base * 40
+        T.count_tokens(sysp, model)
+        t0 = time.perf_counter()
+        for _ in range(n):
+            T.count_tokens(sysp, model)
+        dt = time.perf_counter() - t0
+        print(f"{name:5s} memo  {n / dt:10.0f} call/s  ({len(sysp)} chars)")
+    print(T.stats())
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--model", default="gpt-4o")
+    ap.add_argument("-n", type=int, default=20000)
+    a = ap.parse_args()
+    run(a.model, a.n)
@@ -0,0 +1,92 @@
+"""
+Eksekusi tool pendek: proses baru per call (jalur lama _run_with_timeout) vs worker pool warm.
+
+  process: mp.Process + mp.Queue per call, hasil dibaca setelah join
+  pool   : runtime.tool_pool.ToolWorkerPool (worker fork sekali, Pipe)
+
+json_filter / summarize = salinan builtin tools.registry (di sana closure, tidak bisa di-pickle).
+
+    python -m benchmarks.tool_pool_bench
+    python -m benchmarks.tool_pool_bench --threads 8 --calls 400
+"""
+
+import argparse, json, multiprocessing as mp, re, threading, time
+
+import numpy as np
+
+from javu_agi.runtime.tool_pool import ToolWorkerPool
+
+_TEXT = "Harga naik tajam. Permintaan turun di kuartal ini! Tim menyiapkan rencana mitigasi. " * 20
+
+
+def json_filter(payload):
+    data = payload.get("data")
+    if data is None:
+        return {"error": "no data"}
+    json.dumps(data)
+    return {"result": data}
+
+
+def summarize(payload):
+    text = str(payload.get("text", ""))
+    n = int(payload.get("max_sentences", 2))
+    sents = [s.strip() for s in re.split(r"[.!?]\s+", text) if s.strip()]
+    return {"summary": ". ".join(sents[: max(1, n)])}
+
+
+def _legacy(fn, args, timeout_s=30):
+    q = mp.Queue()
+
+    def _target():
+        try:
+            q.put(("ok", fn(*args)))
+        except Exception as e:
+            q.put(("err", str(e)))
+
+    p = mp.get_context("fork").Process(target=_target, daemon=True)
+    p.start()
+    p.join(timeout_s)
+    if p.is_alive():
+        p.kill()
+        return "err", "timeout"
+    return q.get() if not q.empty() else ("err", "no result")
+
+
+def _run(name, call, threads, calls):
+    jobs = [
+        (json_filter, ({"data": {"text": _TEXT, "n": i}, "expr": "."},)) if i % 2 else
+        (summarize, ({"text": _TEXT, "max_sentences": 3},))
+        for i in range(calls)
+    ]
+    lat = [[] for _ in range(threads)]
+
+    def work(i):
+        for fn, args in jobs[i::threads]:
+            t0 = time.perf_counter()
+            status, _ = call(fn, args)
+            assert status == "ok"
+            lat[i].append(time.perf_counter() - t0)
+
+    ts = [threading.Thread(target=work, args=(i,)) for i in range(threads)]
+    t0 = time.perf_counter()
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    wall = time.perf_counter() - t0
+    a = np.concatenate([np.asarray(x) for x in lat]) * 1000
+    print(f"{name:8s} {calls / wall:8.0f} calls/s  p50={np.percentile(a, 50):7.2f} ms  "
+          f"p99={np.percentile(a, 99):7.2f} ms")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--threads", type=int, default=4)
+    ap.add_argument("--calls", type=int, default=400)
+    a = ap.parse_args()
+    print(f"[BENCH] tool exec: {a.calls} calls (json_filter/summarize), {a.threads} threads")
+    _run("process", _legacy, a.threads, a.calls)
+    pool = ToolWorkerPool(size=a.threads)
+    pool.warm()
+    _run("pool", lambda fn, args: pool.run(fn, args), a.threads, a.calls)
+    pool.close()
@@ -0,0 +1,50 @@
+"""
+Benchmark InMemoryVectorStore: latency search / search_many pada 1k..1M vector.
+
+    python -m benchmarks.vector_search_bench            # 1k,10k,100k,1M
+    python -m benchmarks.vector_search_bench 1000 50000
+"""
+
+import sys, time
+
+import numpy as np
+
+from javu_agi.vector.store import InMemoryVectorStore, _Collection
+
+
+def _fill(store: InMemoryVectorStore, n: int, collection: str = "bench"):
+    # isi langsung ke matrix (skip embedding) supaya yang diukur murni search
+    rng = np.random.default_rng(0)
+    col = _Collection(store.dim, capacity=max(1024, n))
+    step = 100_000
+    for s in range(0, n, step):
+        m = min(step, n - s)
+        rows = rng.standard_normal((m, store.dim), dtype=np.float32)
+        rows /= np.linalg.norm(rows, axis=1, keepdims=True)
+        col.append(rows, [f"doc-{s + i}" for i in range(m)], [{} for _ in range(m)])
+    store.db[collection] = col
+
+
+def run(sizes=(1_000, 10_000, 100_000, 1_000_000), k: int = 8, reps: int = 20):
+    print("[BENCH] InMemoryVectorStore search")
+    queries = [f"query nomor {i} tentang langit biru" for i in range(32)]
+    for n in sizes:
+        store = InMemoryVectorStore()
+        _fill(store, n)
+        store.search(queries[0], k, "bench")  # warmup
+        t0 = time.perf_counter()
+        for i in range(reps):
+            store.search(queries[i % len(queries)], k, "bench")
+        single_ms = (time.perf_counter() - t0) / reps * 1000
+        t0 = time.perf_counter()
+        store.search_many(queries, k, "bench")
+        batch_ms = (time.perf_counter() - t0) / len(queries) * 1000
+        print(
+            f"n={n:>9,d}  search={single_ms:8.3f} ms/q  "
+            f"search_many(32)={batch_ms:8.3f} ms/q"
+        )
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    run(tuple(args) if args else (1_000, 10_000, 100_000, 1_000_000))
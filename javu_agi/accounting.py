@@ -0,0 +1,367 @@
+"""
+Akuntansi spend/usage terpusat dengan satu writer latar belakang.
+
+  add_spend(user, usd)   -> dicatat di cache memori + journal (append-only) lalu
+                            di-batch ke SQLite user_budget_daily (satu transaksi per flush)
+  log_usage(path, row)   -> baris JSONL di-batch per file (satu open per flush)
+  spent_today(user)      -> read-through: cache (nilai DB + delta yang belum di-flush)
+
+Crash-safe: tiap proses menulis journal sendiri <ACCOUNTING_JOURNAL>.<jid> (jid = pid-acak,
+dikunci flock selama proses hidup) dengan seq naik. Kunci dedupe = (jid, seq): seq terakhir
+per jid disimpan di tabel acct_journal dalam transaksi yang sama dengan upsert, jadi
+beberapa proses (worker uvicorn) tidak saling menimpa. Saat start, journal milik proses
+yang sudah mati (flock bisa diambil) di-replay lalu dihapus; journal sendiri hanya
+dikosongkan setelah semua entrinya masuk DB. Nilai DB di cache paling lama
+ACCOUNTING_BASE_TTL_S lalu dibaca ulang (proses lain ikut menulis).
+Flush yang gagal tidak dianggap selesai: flush() -> False, delta dicoba lagi.
+
+Env:
+  BUDGET_SQLITE_PATH      path DB (default /data/budget.db)
+  ACCOUNTING_JOURNAL      path journal (default <db>.journal)
+  ACCOUNTING_FLUSH_ITEMS  flush kalau antrian >= N (default 256)
+  ACCOUNTING_FLUSH_MS     flush paling lambat tiap N ms (default 500)
+  ACCOUNTING_FSYNC        1 = fsync journal per delta (default 0: cukup untuk crash proses)
+  ACCOUNTING_BASE_TTL_S   umur cache nilai DB per (user, hari) (default 2)
+"""
+
+from __future__ import annotations
+import atexit, datetime, glob, json, logging, os, re, sqlite3, threading, time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except Exception:  # non-POSIX: journal proses lain tidak di-replay
+    fcntl = None
+
+logger = logging.getLogger("javu_agi.accounting")
+
+_LEGACY = "legacy"  # journal tunggal format lama (seq di acct_meta.applied_seq)
+_JID_RE = re.compile(r"^\d+-[0-9a-f]{8}$")
+_JOURNAL_KEEP_S = 7 * 86400
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_budget_daily(
+  user_id TEXT, day TEXT, spent_usd REAL NOT NULL DEFAULT 0,
+  PRIMARY KEY(user_id, day)
+);
+CREATE TABLE IF NOT EXISTS acct_meta(k TEXT PRIMARY KEY, v INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS acct_journal(jid TEXT PRIMARY KEY, seq INTEGER NOT NULL, ts REAL NOT NULL);
+"""
+
+
+def _today() -> str:
+    return datetime.date.today().isoformat()
+
+
+class Accounting:
+    def __init__(
+        self,
+        db_path: str,
+        journal_path: Optional[str] = None,
+        flush_items: int = 256,
+        flush_interval_s: float = 0.5,
+        fsync: bool = False,
+        base_ttl_s: float = 2.0,
+    ):
+        self.db_path = db_path
+        self.journal_path = journal_path if journal_path is not None else db_path + ".journal"
+        self.flush_items = max(1, int(flush_items))
+        self.flush_interval_s = float(flush_interval_s)
+        self.fsync = fsync
+        self.base_ttl_s = float(base_ttl_s)
+        self.jid = f"{os.getpid()}-{os.urandom(4).hex()}"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self.db = sqlite3.connect(db_path, check_same_thread=False, timeout=10.0)
+        except Exception as e:
+            # path tidak bisa ditulis (mis. /data di dev): tetap jalan, in-memory
+            logger.warning("accounting db unavailable (%s): %s; using memory", db_path, e)
+            self.db_path, self.journal_path = ":memory:", ""
+            self.db = sqlite3.connect(":memory:", check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self.db.commit()
+
+        self._lock = threading.Lock()  # antrian + delta belum di-flush
+        self._base_lock = threading.Lock()  # koneksi DB + nilai tersimpan
+        self._cv = threading.Condition(self._lock)
+        self._spend_q: List[Tuple[str, int, str, str, float]] = []
+        self._rows_q: List[Tuple[str, str]] = []
+        self._unflushed: Dict[Tuple[str, str], float] = defaultdict(float)
+        self._base: Dict[Tuple[str, str], Tuple[float, float]] = {}  # key -> (nilai DB, waktu baca)
+        self._enq = 0
+        self._done = 0
+        self._want = 0
+        self._fails = 0
+        self._closed = False
+        self.m = {"spend_adds": 0, "rows": 0, "flushes": 0, "cache_misses": 0, "replayed": 0, "errors": 0}
+
+        self._seq = 0
+        self._journal = None
+        self.journal_file = ""
+        if self.journal_path:
+            self._replay_orphans()
+            self.journal_file = f"{self.journal_path}.{self.jid}"
+            self._journal = open(self.journal_file, "a", encoding="utf-8")
+            if fcntl is not None:
+                fcntl.flock(self._journal.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        self._t = threading.Thread(target=self._run, name="accounting-writer", daemon=True)
+        self._t.start()
+
+    # ---------- public ----------
+    def add_spend(self, user_id: str, usd: float, day: Optional[str] = None):
+        if not usd:
+            return
+        key = (str(user_id), day or _today())
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+            if self._journal is not None:
+                self._journal.write(json.dumps([seq, key[0], key[1], usd]) + "\n")
+                self._journal.flush()
+                if self.fsync:
+                    os.fsync(self._journal.fileno())
+            self._spend_q.append((self.jid, seq, key[0], key[1], float(usd)))
+            self._unflushed[key] += float(usd)
+            self.m["spend_adds"] += 1
+            self._bump()
+
+    def log_usage(self, path: str, row: Dict[str, Any]):
+        line = json.dumps(row, ensure_ascii=False, default=str)
+        with self._lock:
+            self._rows_q.append((path, line))
+            self.m["rows"] += 1
+            self._bump()
+
+    def spent_today(self, user_id: str, day: Optional[str] = None) -> float:
+        key = (str(user_id), day or _today())
+        now = time.time()
+        with self._base_lock:
+            hit = self._base.get(key)
+            if hit is None or now - hit[1] > self.base_ttl_s:
+                row = self.db.execute(
+                    "SELECT spent_usd FROM user_budget_daily WHERE user_id=? AND day=?", key
+                ).fetchone()
+                hit = self._base[key] = (float(row[0]) if row else 0.0, now)
+                self.m["cache_misses"] += 1
+            with self._lock:
+                return hit[0] + self._unflushed.get(key, 0.0)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Tunggu sampai semua yang sudah di-enqueue tertulis. False kalau timeout / flush gagal."""
+        with self._cv:
+            target = self._want = self._enq
+            fails = self._fails
+            self._cv.notify_all()
+            self._cv.wait_for(lambda: self._done >= target or self._closed or self._fails != fails, timeout)
+            return self._done >= target
+
+    def close(self):
+        ok = self.flush()
+        with self._cv:
+            self._closed = True
+            self._cv.notify_all()
+        self._t.join(timeout=5.0)
+        if self._journal is not None:
+            self._journal.close()  # flock ikut lepas
+            with self._lock:
+                clean = ok and not self._spend_q
+            if clean:
+                try:
+                    os.remove(self.journal_file)
+                except OSError:
+                    pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self.m)
+            out["pending"] = len(self._spend_q) + len(self._rows_q)
+        out["db"] = self.db_path
+        return out
+
+    # ---------- writer ----------
+    def _bump(self):
+        self._enq += 1
+        if len(self._spend_q) + len(self._rows_q) >= self.flush_items:
+            self._cv.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cv:
+                self._cv.wait_for(
+                    lambda: self._closed or self._done < self._want
+                    or len(self._spend_q) + len(self._rows_q) >= self.flush_items,
+                    self.flush_interval_s,
+                )
+                if self._closed and not self._spend_q and not self._rows_q:
+                    return
+                spend, self._spend_q = self._spend_q, []
+                rows, self._rows_q = self._rows_q, []
+                target = self._enq
+            if not spend and not rows:
+                with self._cv:
+                    self._done = target
+                    self._cv.notify_all()
+                continue
+            try:
+                self._write_rows(rows)
+                self._write_spend(spend)
+                self.m["flushes"] += 1
+                ok = True
+            except Exception as e:
+                ok = False
+                logger.warning("accounting flush failed: %s", e)
+            with self._cv:
+                if ok:
+                    self._done = target
+                else:
+                    # kembalikan ke antrian (delta tetap di journal); _done tidak maju
+                    self._spend_q[:0] = spend
+                    self._fails += 1
+                    self.m["errors"] += 1
+                self._cv.notify_all()
+                if not ok:
+                    if self._closed:
+                        return  # sisa delta di-replay dari journal saat start berikutnya
+                    self._cv.wait(self.flush_interval_s)
+
+    def _write_rows(self, rows: List[Tuple[str, str]]):
+        by_path: Dict[str, List[str]] = defaultdict(list)
+        for path, line in rows:
+            by_path[path].append(line)
+        for path, lines in by_path.items():
+            try:
+                d = os.path.dirname(path)
+                if d:
+                    os.makedirs(d, exist_ok=True)
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+            except Exception as e:
+                self.m["errors"] += 1
+                logger.debug("usage log write failed %s: %s", path, e)
+
+    def _write_spend(self, spend: List[Tuple[str, int, str, str, float]], own: bool = True) -> int:
+        """Upsert aditif, dedupe per (jid, seq). Return jumlah entri yang benar-benar diterapkan."""
+        if not spend:
+            return 0
+        agg: Dict[Tuple[str, str], float] = defaultdict(float)
+        applied_n = 0
+        now = time.time()
+        with self._base_lock:
+            with self.db:
+                applied: Dict[str, int] = {}
+                top: Dict[str, int] = {}
+                for jid, seq, uid, day, usd in spend:
+                    if jid not in applied:
+                        applied[jid] = top[jid] = self._applied_seq(jid)
+                    if seq > applied[jid]:
+                        agg[(uid, day)] += usd
+                        top[jid] = max(top[jid], seq)
+                        applied_n += 1
+                self.db.executemany(
+                    "INSERT INTO user_budget_daily(user_id, day, spent_usd) VALUES (?,?,?) "
+                    "ON CONFLICT(user_id, day) DO UPDATE SET spent_usd = spent_usd + excluded.spent_usd",
+                    [(u, d, v) for (u, d), v in agg.items()],
+                )
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO acct_journal(jid, seq, ts) VALUES (?,?,?)",
+                    [(j, v, now) for j, v in top.items()],
+                )
+            for key in agg:
+                self._base.pop(key, None)  # baca ulang: proses lain juga menulis baris ini
+            if not own:
+                return applied_n
+            with self._lock:
+                for _jid, _seq, uid, day, usd in spend:
+                    key = (uid, day)
+                    self._unflushed[key] -= usd
+                    if abs(self._unflushed[key]) < 1e-12:
+                        del self._unflushed[key]
+                today = _today()
+                for key in [k for k in self._base if k[1] != today]:
+                    del self._base[key]
+                # semua delta proses ini sudah di DB -> journal sendiri boleh dikosongkan
+                if self._journal is not None and not self._journal.closed and not self._spend_q:
+                    self._journal.truncate(0)
+        return applied_n
+
+    def _applied_seq(self, jid: str) -> int:
+        row = self.db.execute("SELECT seq FROM acct_journal WHERE jid=?", (jid,)).fetchone()
+        if row is None and jid == _LEGACY:
+            row = self.db.execute("SELECT v FROM acct_meta WHERE k='applied_seq'").fetchone()
+        return int(row[0]) if row else 0
+
+    def _replay_orphans(self):
+        """Replay journal proses yang sudah mati (flock bisa diambil) + journal tunggal format lama."""
+        cands = [(_LEGACY, self.journal_path)] if os.path.exists(self.journal_path) else []
+        if fcntl is not None:
+            base = os.path.basename(self.journal_path) + "."
+            for p in glob.glob(glob.escape(self.journal_path) + ".*"):
+                jid = os.path.basename(p)[len(base):]
+                if _JID_RE.match(jid):
+                    cands.append((jid, p))
+        for jid, p in cands:
+            try:
+                f = open(p, "r+", encoding="utf-8")
+            except OSError:
+                continue
+            try:
+                if fcntl is not None:
+                    try:
+                        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except OSError:
+                        continue  # proses pemiliknya masih hidup
+                entries = []
+                for line in f:
+                    try:
+                        seq, uid, day, usd = json.loads(line)
+                    except Exception:
+                        continue  # baris terakhir terpotong saat crash
+                    entries.append((jid, int(seq), uid, day, float(usd)))
+                self.m["replayed"] += self._write_spend(entries, own=False)
+                os.remove(p)
+            except Exception as e:
+                self.m["errors"] += 1
+                logger.warning("accounting journal replay failed %s: %s", p, e)
+            finally:
+                f.close()
+        try:
+            with self.db:
+                self.db.execute(
+                    "DELETE FROM acct_journal WHERE ts < ? AND jid != ?", (time.time() - _JOURNAL_KEEP_S, _LEGACY)
+                )
+        except Exception:
+            pass
+
+
+_acct: Optional[Accounting] = None
+_acct_lock = threading.Lock()
+
+
+def get_accounting() -> Accounting:
+    global _acct
+    with _acct_lock:
+        if _acct is None:
+            db = os.getenv("BUDGET_SQLITE_PATH", "/data/budget.db")
+            _acct = Accounting(
+                db,
+                journal_path=os.getenv("ACCOUNTING_JOURNAL", db + ".journal"),
+                flush_items=int(os.getenv("ACCOUNTING_FLUSH_ITEMS", "256")),
+                flush_interval_s=float(os.getenv("ACCOUNTING_FLUSH_MS", "500")) / 1000.0,
+                fsync=os.getenv("ACCOUNTING_FSYNC", "0") == "1",
+                base_ttl_s=float(os.getenv("ACCOUNTING_BASE_TTL_S", "2")),
+            )
+            atexit.register(_acct.close)
+        return _acct
+
+
+def _after_fork_in_child():
+    # writer + journal (jid, flock) milik parent: child membuat Accounting sendiri saat dipakai
+    global _acct, _acct_lock
+    _acct, _acct_lock = None, threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
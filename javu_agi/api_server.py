@@ -39,6 +39,10 @@ from javu_agi.oversight_panel import build_router as build_oversight_router
 from javu_agi.audit_router import router as audit_router
 from javu_agi.incident_router import router as incident_router
 from javu_agi.runtime.sandbox_guard import preflight
+from javu_agi.runtime.controller_pool import get_pool, PoolTimeout
+from javu_agi.accounting import get_accounting
+from javu_agi.router.provider_health import get_health
+from javu_agi.cache.tool_cache import all_stats as tool_cache_stats
 from infra.budget_state import snapshot as budget_snapshot
 from scripts.repro_bundle import make_bundle as make_repro_bundle
 from javu_agi.hri.dialog_policy import safe_counter
@@ -161,10 +165,37 @@ API_TOKEN = os.getenv("API_TOKEN", "")
 try:
     _EC_SINGLETON = ExecutiveController()
     app.include_router(build_oversight_router(_EC_SINGLETON.oversight_queue))
+    # singleton ikut dipinjamkan ke request; tidak dibangun ulang per request
+    get_pool().adopt(_EC_SINGLETON)
 except Exception:
     pass
 
 
+def _ec_process(*args, **kw):
+    with get_pool().lease() as ec:
+        return ec.process(*args, **kw)
+
+
+def _ec_execute(task, inp, mods):
+    with get_pool().lease() as ctrl:
+        if hasattr(ctrl, "execute"):
+            return ctrl.execute(task, inp, mods)
+        if hasattr(ctrl, "process"):
+            return ctrl.process(task, inp)
+        return {"error": "no-exec"}
+
+
+@app.on_event("startup")
+async def _ec_pool_warm():
+    with contextlib.suppress(Exception):
+        await run_in_threadpool(get_pool().warm)
+
+
+@app.on_event("shutdown")
+def _ec_pool_close():
+    get_pool().close()
+
+
 def _auth(x_token: str | None = Header(default=None)):
     if API_TOKEN and (x_token or "") != API_TOKEN:
         raise HTTPException(status_code=401, detail="unauthorized")
@@ -210,7 +241,16 @@ def kill_status(_=Depends(_admin_gate)):
     return st
 
 
-app.include_router(admin_router)
+@admin_router.get("/provider_health")
+def provider_health(_=Depends(_admin_gate)):
+    # state breaker per provider (closed/open/half_open) + window error/latency, dibagi antar worker
+    return get_health().snapshot()
+
+
+@admin_router.get("/tool_cache")
+def tool_cache(_=Depends(_admin_gate)):
+    # hit/miss/bypass/evict per kelas tool + ukuran; counter juga ada di /metrics (tool_cache_*)
+    return tool_cache_stats()
 
 
 # Router hot-reload (admin)
@@ -218,13 +258,22 @@ app.include_router(admin_router)
 def reload_router(_=Depends(_admin_gate)):
     try:
         pol = load_router_policy()
-        _EC_SINGLETON.router.load_policy(pol)
-        _EC_SINGLETON.router.strict_caps = True
+
+        def _apply(ec):
+            ec.router.load_policy(pol)
+            ec.router.strict_caps = True
+
+        # semua controller di pool (termasuk singleton, yang sedang dipinjam saat release,
+        # dan yang dibuat nanti) memakai policy yang sama
+        get_pool().configure("router_policy", _apply)
         return {"status": "ok", "reloaded": True}
     except Exception as e:
         raise HTTPException(500, f"router_reload_failed: {e}")
 
 
+app.include_router(admin_router)
+
+
 # 429 handler (rate limit)
 async def http_exc_handler(request: Request, exc: HTTPException):
     if exc.status_code == 429:
@@ -243,6 +292,15 @@ async def http_exc_handler(request: Request, exc: HTTPException):
 
 app.add_exception_handler(HTTPException, http_exc_handler)
 
+
+# pool EC penuh / tertutup (get_pool().lease() di route atau threadpool) -> 503
+async def pool_timeout_handler(request: Request, exc: PoolTimeout):
+    inc_metric("ec_pool_timeout", 1)
+    return JSONResponse(status_code=503, content={"detail": "engine busy"})
+
+
+app.add_exception_handler(PoolTimeout, pool_timeout_handler)
+
 # Start Prometheus exporter
 serve(
     host=os.getenv("METRICS_HOST", "0.0.0.0"),
@@ -275,27 +333,9 @@ def _incr_window(user: str, gran: str, window_s: int, limit: int) -> None:
 
 
 def _user_spend_today(user: str) -> float:
-    import sqlite3, os, datetime
-
-    db = os.getenv("BUDGET_SQLITE_PATH", "/data/budget.db")
-    day = datetime.date.today().isoformat()
+    # cache read-through accounting (nilai DB + delta yang belum di-flush)
     try:
-        con = sqlite3.connect(db, timeout=2.0)
-        con.execute(
-            """
-                    CREATE TABLE IF NOT EXISTS user_budget_daily(
-                    user_id TEXT, day TEXT, spent_usd REAL NOT NULL DEFAULT 0,
-                    PRIMARY KEY(user_id, day)
-                    )
-                    """
-        )
-        cur = con.execute(
-            "SELECT spent_usd FROM user_budget_daily WHERE user_id=? AND day=?",
-            (user, day),
-        )
-        row = cur.fetchone()
-        con.close()
-        return float(row[0]) if row else 0.0
+        return get_accounting().spent_today(user)
     except Exception:
         return 0.0
 
@@ -437,8 +477,9 @@ def readyz():
         if not d or not os.path.isdir(d):
             return {"ok": False, "reason": f"dir:{k} missing"}
     try:
-        ExecutiveController()  # init saja
-        return {"ok": True}
+        with get_pool().lease():
+            pass
+        return {"ok": True, "ec_pool": get_pool().stats()}
     except Exception as e:
         return {"ok": False, "reason": str(e)}
 
@@ -470,15 +511,9 @@ async def execute_task_http(payload: ExecRequest, api_key: str = Depends(_rate_g
     # generic EC fallback
     if not EC_mod or not hasattr(EC_mod, "ExecutiveController"):
         raise HTTPException(500, "engine unavailable")
-    ctrl = EC_mod.ExecutiveController()
-    if hasattr(ctrl, "execute"):
-        out = await run_in_threadpool(
-            ctrl.execute, payload.task, payload.input, payload.modalities
-        )
-    elif hasattr(ctrl, "process"):
-        out = await run_in_threadpool(ctrl.process, payload.task, payload.input)
-    else:
-        out = {"error": "no-exec"}
+    out = await run_in_threadpool(
+        _ec_execute, payload.task, payload.input, payload.modalities
+    )
     return JSONResponse(out)
 
 
@@ -508,22 +543,34 @@ async def stream_task(ws: WebSocket):
         inc_metric("ws_active", 1)
         inp = task_spec.get("input", {})
         mods = task_spec.get("modalities", ["text"])
-        ctrl = (
-            EC_mod
-            and hasattr(EC_mod, "ExecutiveController")
-            and EC_mod.ExecutiveController()
-        )
-        if ctrl and hasattr(ctrl, "stream_execute"):
-            async for chunk in ctrl.stream_execute(task, inp, mods):
-                await ws.send_text(json.dumps(chunk))
-        else:
-            if ArenaExec and hasattr(ArenaExec, "execute_task"):
-                res = ArenaExec.execute_task(task, inp, mods)
-            elif ctrl and hasattr(ctrl, "execute"):
-                res = ctrl.execute(task, inp, mods)
+        pool = get_pool()
+        ctrl = await run_in_threadpool(pool.acquire)
+        broken = False
+        try:
+            # token di-stream hanya untuk task jawaban-langsung; sisanya tetap lewat ArenaExec/execute
+            if hasattr(ctrl, "stream_execute") and task in getattr(ctrl, "STREAM_TASKS", ()):
+                # identitas = api key yang sudah diautentikasi (sama dengan _rate_gate), bukan payload
+                if isinstance(inp, dict):
+                    inp = {k: v for k, v in inp.items() if k != "user_id"}
+                async for chunk in ctrl.stream_execute(task, inp, mods, user_id=key):
+                    await ws.send_text(json.dumps(chunk, ensure_ascii=False))
             else:
-                res = {"error": "stream not supported"}
-            await ws.send_text(json.dumps(res))
+                if ArenaExec and hasattr(ArenaExec, "execute_task"):
+                    fn, args = ArenaExec.execute_task, (task, inp, mods)
+                elif hasattr(ctrl, "execute"):
+                    fn, args = ctrl.execute, (task, inp, mods)
+                else:
+                    fn, args = (lambda: {"error": "stream not supported"}), ()
+                res = await run_in_threadpool(fn, *args)
+                await ws.send_text(json.dumps(res))
+        except BaseException:
+            broken = True
+            raise
+        finally:
+            pool.release(ctrl, broken=broken)
+    except PoolTimeout:
+        with contextlib.suppress(Exception):
+            await ws.send_text(json.dumps({"error": "engine busy"}))
     except WebSocketDisconnect:
         pass
     finally:
@@ -572,8 +619,7 @@ def metrics_daily(api_key: str = Depends(_rate_gate)):
 @app.get("/v0/selfcheck")
 def selfcheck():
     try:
-        ec = ExecutiveController()
-        resp, meta = ec.process("selfcheck", "echo hello")
+        resp, meta = _ec_process("selfcheck", "echo hello")
         ok = bool(resp and not meta.get("blocked"))
         return {"ok": ok, "result": {"response": resp, "meta": meta}}
     except Exception as e:
@@ -597,8 +643,7 @@ def qna(r: QnaReq, api_key: str = Depends(_rate_gate)):
     pol = _apply_dialog_policy_or_none(r.query)
     if pol is not None:
         return pol
-    ec = ExecutiveController()
-    resp, meta = ec.process(api_key, {"query": r.query, "context": r.context or ""})
+    resp, meta = _ec_process(api_key, {"query": r.query, "context": r.context or ""})
     return JSONResponse({"response": resp, "meta": meta})
 
 
@@ -607,8 +652,7 @@ def codegen(r: CodeReq, api_key: str = Depends(_rate_gate)):
     pol = _apply_dialog_policy_or_none(r.spec)
     if pol is not None:
         return pol
-    ec = ExecutiveController()
-    resp, meta = ec.process(api_key, {"spec": r.spec})
+    resp, meta = _ec_process(api_key, {"spec": r.spec})
     return JSONResponse({"response": resp, "meta": meta})
 
 
@@ -618,8 +662,7 @@ def automate(r: AutomateReq, api_key: str = Depends(_rate_gate)):
     pol = _apply_dialog_policy_or_none(goal)
     if pol is not None:
         return pol
-    ec = ExecutiveController()
-    resp, meta = ec.process(
+    resp, meta = _ec_process(
         api_key, {"goal": r.goal, "constraints": r.constraints or []}
     )
     return JSONResponse({"response": resp, "meta": meta})
@@ -678,8 +721,8 @@ def job_status(tid: str):
 
 @app.get("/v0/status")
 def status(api_key: str = Depends(_rate_gate)):
-    ec = ExecutiveController()
-    snap = ec.status.snapshot()
+    with get_pool().lease() as ec:
+        snap = ec.status.snapshot()
     return {"ok": True, "status": snap}
 
 
@@ -1,16 +1,84 @@
+"""
+Hash chain append-only (<log_dir>/<YYYYmmdd>.jsonl + audit_head.txt).
+
+Default: hash dihitung sinkron di bawah lock per log_dir (head di memori, dibagi semua
+instance AuditChain di proses ini), baris + head ditulis lewat group commit audit sink.
+append() tidak menunggu disk; pemanggil yang butuh durable memanggil flush() (atau
+append(..., durable=True)) yang menunggu sink selesai menulis.
+
+Env:
+  AUDIT_CHAIN_SYNC   1 = tulis langsung di bawah flock + head dibaca ulang dari file tiap
+                     append (beberapa proses berbagi satu log_dir); default 0
+  AUDIT_CHAIN_FSYNC  1 = mode sync: fsync baris + head sebelum append() kembali (default 0);
+                     mode sink memakai AUDIT_FSYNC
+"""
+
 import os, json, time, hashlib, threading
+from typing import Any, Dict, Optional
+
+try:
+    import fcntl
+except Exception:  # non-POSIX: mode sync hanya aman untuk satu proses
+    fcntl = None
+
+_SYNC = os.getenv("AUDIT_CHAIN_SYNC", "0") == "1"
+_FSYNC = os.getenv("AUDIT_CHAIN_FSYNC", "0") == "1"
+
+# state per log_dir: {"lock": Lock, "head": str | None}; None = baca dari file dulu
+_dirs: Dict[str, Dict[str, Any]] = {}
+_dirs_lock = threading.Lock()
+
+
+def _dir_state(log_dir: str) -> Dict[str, Any]:
+    key = os.path.realpath(log_dir)
+    with _dirs_lock:
+        st = _dirs.get(key)
+        if st is None:
+            st = _dirs[key] = {"lock": threading.Lock(), "head": None}
+        return st
+
+
+def _after_fork_in_child():
+    # child tidak mewarisi tulisan sink parent yang belum ter-flush: baca ulang head.
+    # dict state di-reset di tempat (instance AuditChain memegang referensinya)
+    global _dirs_lock
+    _dirs_lock = threading.Lock()
+    for st in _dirs.values():
+        st["lock"], st["head"] = threading.Lock(), None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
 
 
 class AuditChain:
-    def __init__(self, log_dir: str):
+    def __init__(self, log_dir: str, sink=None, sync: Optional[bool] = None):
         self.log_dir = log_dir
         os.makedirs(self.log_dir, exist_ok=True)
         self.head_path = os.path.join(self.log_dir, "audit_head.txt")
-        self.lock = threading.Lock()
+        self.lock_path = os.path.join(self.log_dir, "audit_head.lock")
+        self.sync = _SYNC if sync is None else sync
+        self._sink = sink
+        self._st = _dir_state(log_dir)
         self.observers = []
-        if not os.path.exists(self.head_path):
-            with open(self.head_path, "w", encoding="utf-8") as f:
+        try:
+            # "x": proses lain yang sudah membuat + memajukan head tidak ikut ter-truncate
+            with open(self.head_path, "x", encoding="utf-8") as f:
                 f.write("GENESIS")
+        except FileExistsError:
+            pass
+
+    @property
+    def lock(self) -> threading.Lock:
+        return self._st["lock"]
+
+    @property
+    def sink(self):
+        if self._sink is not None:
+            return self._sink
+        from javu_agi.audit.sink import get_audit_sink
+
+        return get_audit_sink()  # tidak di-cache: setelah fork child punya sink sendiri
 
     def subscribe(self, cb):
         self.observers.append(cb)
@@ -18,35 +86,70 @@ class AuditChain:
     def _head(self) -> str:
         try:
             with open(self.head_path, "r", encoding="utf-8") as f:
-                return f.read().strip()
+                return f.read().strip() or "GENESIS"  # baru dibuat, belum ditulis
         except Exception:
             return "GENESIS"
 
     def _set_head(self, h: str):
-        with open(self.head_path, "w", encoding="utf-8") as f:
+        tmp = self.head_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
             f.write(h)
+            if _FSYNC:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, self.head_path)
+
+    def _link(self, head: str, kind: str, payload: dict):
+        rec = {"ts": int(time.time()), "kind": kind, **(payload or {})}
+        raw = json.dumps(rec, ensure_ascii=False, sort_keys=True)
+        h = hashlib.sha256((head + raw).encode("utf-8")).hexdigest()
+        fn = os.path.join(self.log_dir, f"{time.strftime('%Y%m%d')}.jsonl")
+        line = json.dumps({"hash": h, "prev": head, "record": rec}, ensure_ascii=False)
+        return h, fn, line
+
+    def append(self, kind: str, payload: dict, durable: bool = False) -> dict:
+        if self.sync:
+            return self._append_sync(kind, payload)
+        st = self._st
+        with st["lock"]:
+            head = st["head"] or self._head()
+            h, fn, line = self._link(head, kind, payload)
+            # enqueue di bawah lock: urutan baris di file = urutan chain
+            # (file harian tidak dirotasi, verify() membaca per tanggal)
+            self.sink.log(fn, line, rotate=False)
+            self.sink.set_file(self.head_path, h)
+            st["head"] = h
+        if durable:
+            self.flush()
+        return {"hash": h, "prev": head}
 
-    def append(self, kind: str, payload: dict) -> dict:
-        with self.lock:
-            head = self._head()
-            rec = {"ts": int(time.time()), "kind": kind, **(payload or {})}
-            raw = json.dumps(rec, ensure_ascii=False, sort_keys=True)
-            h = hashlib.sha256((head + raw).encode("utf-8")).hexdigest()
-            fn = os.path.join(self.log_dir, f"{time.strftime('%Y%m%d')}.jsonl")
+    def _append_sync(self, kind: str, payload: dict) -> dict:
+        st = self._st
+        with st["lock"], open(self.lock_path, "a") as lk:
+            if fcntl is not None:
+                fcntl.flock(lk.fileno(), fcntl.LOCK_EX)  # dilepas saat lk ditutup
+            head = self._head()  # proses lain bisa sudah menambah
+            h, fn, line = self._link(head, kind, payload)
             with open(fn, "a", encoding="utf-8") as f:
-                f.write(
-                    json.dumps(
-                        {"hash": h, "prev": head, "record": rec}, ensure_ascii=False
-                    )
-                    + "\n"
-                )
+                f.write(line + "\n")
+                if _FSYNC:
+                    f.flush()
+                    os.fsync(f.fileno())
             self._set_head(h)
+            st["head"] = h
             return {"hash": h, "prev": head}
 
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Tunggu sampai semua append sebelumnya tertulis (ack durable)."""
+        if self.sync:
+            return True
+        return self.sink.flush(timeout)
+
     def commit(self, kind: str, record: dict) -> dict:
         return self.append(kind, record)
 
     def verify(self, date_str: str) -> bool:
+        self.flush()
         fn = os.path.join(self.log_dir, f"{date_str}.jsonl")
         try:
             head = "GENESIS"
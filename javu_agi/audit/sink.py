@@ -0,0 +1,288 @@
+"""
+Sink audit bersama: ring buffer di memori + satu writer latar belakang (group commit JSONL).
+
+  log(path, row)        -> baris JSONL; semua baris per file ditulis dengan satu open per flush
+  set_file(path, text)  -> isi file kecil (mis. head AuditChain) ditulis atomik (tmp + rename)
+                           SETELAH baris pada batch yang sama, jadi tidak pernah mendahului log
+
+Urutan per file = urutan enqueue. Backpressure: kalau ring penuh (disk lambat), producer
+menunggu ruang sampai AUDIT_BLOCK_MS; lewat dari itu AUDIT_OVERFLOW menentukan:
+  block -> tulis sinkron di thread pemanggil (tidak ada audit yang hilang, producer ikut lambat)
+  drop  -> buang record, dihitung di stats()["dropped"]
+Rotasi: file yang melewati AUDIT_SEGMENT_MB / AUDIT_SEGMENT_S ditutup jadi
+<path>.<YYYYmmdd-HHMMSS>.<n> lalu dikompres gzip di thread terpisah (AUDIT_COMPRESS).
+
+Env:
+  AUDIT_RING_SIZE      kapasitas ring (default 8192 record)
+  AUDIT_FLUSH_ITEMS    flush kalau antrian >= N (default 256)
+  AUDIT_FLUSH_MS       flush paling lambat tiap N ms (default 200)
+  AUDIT_FSYNC          none (default) | batch (fsync tiap file per group commit)
+  AUDIT_BLOCK_MS       lama producer menunggu ring kosong (default 1000)
+  AUDIT_OVERFLOW       block (default) | drop
+  AUDIT_SEGMENT_MB     rotasi segmen per ukuran (default 64, 0 = off)
+  AUDIT_SEGMENT_S      rotasi segmen per umur detik (default 0 = off)
+  AUDIT_COMPRESS       1 = gzip segmen tertutup (default 1)
+"""
+
+from __future__ import annotations
+import atexit, gzip, json, logging, os, queue, shutil, threading, time
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("javu_agi.audit.sink")
+
+_LOG, _SET = 0, 1
+
+
+class AuditSink:
+    def __init__(
+        self,
+        ring_size: int = 8192,
+        flush_items: int = 256,
+        flush_interval_s: float = 0.2,
+        fsync: str = "none",
+        block_s: float = 1.0,
+        overflow: str = "block",
+        segment_bytes: int = 64 * 1024 * 1024,
+        segment_s: float = 0.0,
+        compress: bool = True,
+    ):
+        self.ring_size = max(1, int(ring_size))
+        self.flush_items = max(1, int(flush_items))
+        self.flush_interval_s = float(flush_interval_s)
+        self.fsync = fsync
+        self.block_s = float(block_s)
+        self.overflow = overflow
+        self.segment_bytes = int(segment_bytes)
+        self.segment_s = float(segment_s)
+        self.compress = compress
+
+        self._lock = threading.Lock()
+        self._cv = threading.Condition(self._lock)  # writer: ada data / flush diminta
+        self._space = threading.Condition(self._lock)  # producer: ring ada ruang
+        self._q: Deque[Tuple[int, str, str, bool]] = deque()
+        self._io = threading.Lock()  # tulis file; selalu diambil sambil memegang _lock
+        self._opened: Dict[str, float] = {}
+        self._enq = 0
+        self._done = 0
+        self._want = 0
+        self._closed = False
+        self.m = {
+            "records": 0, "flushes": 0, "bytes": 0, "blocked": 0, "sync_writes": 0,
+            "dropped": 0, "rotated": 0, "compressed": 0, "errors": 0, "max_batch": 0,
+        }
+        self._gz: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._t = threading.Thread(target=self._run, name="audit-sink", daemon=True)
+        self._t.start()
+        self._tz = threading.Thread(target=self._compressor, name="audit-sink-gz", daemon=True)
+        self._tz.start()
+
+    # ---------- public ----------
+    def log(self, path: str, row: Any, rotate: bool = True):
+        line = row if isinstance(row, str) else json.dumps(row, ensure_ascii=False, default=str)
+        self._put((_LOG, path, line, rotate))
+
+    def set_file(self, path: str, text: str):
+        self._put((_SET, path, text, False))
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Tunggu sampai semua yang sudah di-enqueue tertulis."""
+        with self._cv:
+            target = self._want = self._enq
+            self._cv.notify_all()
+            return self._cv.wait_for(lambda: self._done >= target or self._closed, timeout)
+
+    def close(self):
+        self.flush()
+        with self._cv:
+            self._closed = True
+            self._cv.notify_all()
+            self._space.notify_all()
+        self._t.join(timeout=5.0)
+        self._gz.put(None)
+        self._tz.join(timeout=30.0)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self.m)
+            out["pending"] = len(self._q)
+        out["ring_size"] = self.ring_size
+        return out
+
+    # ---------- producer ----------
+    def _put(self, item: Tuple[int, str, str, bool]):
+        with self._cv:
+            if len(self._q) >= self.ring_size and not self._closed:
+                self.m["blocked"] += 1
+                self._cv.notify_all()
+                self._space.wait_for(lambda: len(self._q) < self.ring_size or self._closed, self.block_s)
+            if len(self._q) < self.ring_size and not self._closed:
+                self._q.append(item)
+                self._enq += 1
+                self.m["records"] += 1
+                if len(self._q) >= self.flush_items:
+                    self._cv.notify_all()
+                return
+            if self.overflow == "drop":
+                self.m["dropped"] += 1
+                return
+            self.m["sync_writes"] += 1
+            self.m["records"] += 1
+            # ring masih penuh setelah menunggu: tulis antrian + record ini langsung.
+            # _io diambil sebelum _lock dilepas -> urutan batch antar thread tetap.
+            pending = list(self._q)
+            self._q.clear()
+            self._enq += 1
+            self._space.notify_all()
+            self._io.acquire()
+        batch = pending + [item]
+        try:
+            n_bytes = self._write(batch)
+        finally:
+            self._io.release()
+        self._account(len(batch), n_bytes)
+
+    # ---------- writer ----------
+    def _run(self):
+        while True:
+            with self._cv:
+                self._cv.wait_for(
+                    lambda: self._closed or self._done < self._want or len(self._q) >= self.flush_items,
+                    self.flush_interval_s,
+                )
+                if self._closed and not self._q:
+                    return
+                batch = list(self._q)
+                self._q.clear()
+                target = self._enq
+                self._space.notify_all()
+                self._io.acquire()
+            n_bytes = 0
+            try:
+                if batch:
+                    n_bytes = self._write(batch)
+            finally:
+                self._io.release()
+            if batch:
+                self._account(len(batch), n_bytes)
+            with self._cv:
+                self._done = max(self._done, target)
+                self._cv.notify_all()
+
+    def _write(self, batch: List[Tuple[int, str, str, bool]]) -> int:
+        # dipanggil dengan _io dipegang (tanpa _lock: producer menunggu _io sambil memegang _lock)
+        lines: Dict[str, List[str]] = defaultdict(list)
+        rotate: Dict[str, bool] = {}
+        files: Dict[str, str] = {}
+        for kind, path, text, rot in batch:
+            if kind == _LOG:
+                lines[path].append(text)
+                rotate[path] = rotate.get(path, False) or rot
+            else:
+                files[path] = text
+        n_bytes = 0
+        for path, ls in lines.items():
+            try:
+                d = os.path.dirname(path)
+                if d:
+                    os.makedirs(d, exist_ok=True)
+                data = "\n".join(ls) + "\n"
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write(data)
+                    if self.fsync == "batch":
+                        f.flush()
+                        os.fsync(f.fileno())
+                n_bytes += len(data)
+                if rotate[path]:
+                    self._maybe_rotate(path)
+            except Exception as e:
+                self.m["errors"] += 1
+                logger.warning("audit write failed %s: %s", path, e)
+        for path, text in files.items():
+            try:
+                tmp = f"{path}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.write(text)
+                    if self.fsync == "batch":
+                        f.flush()
+                        os.fsync(f.fileno())
+                os.replace(tmp, path)
+            except Exception as e:
+                self.m["errors"] += 1
+                logger.warning("audit state write failed %s: %s", path, e)
+        return n_bytes
+
+    def _account(self, batch_len: int, n_bytes: int):
+        with self._lock:
+            self.m["flushes"] += 1
+            self.m["bytes"] += n_bytes
+            self.m["max_batch"] = max(self.m["max_batch"], batch_len)
+
+    def _maybe_rotate(self, path: str):
+        now = time.time()
+        opened = self._opened.setdefault(path, now)
+        size = os.path.getsize(path)
+        if not (
+            (self.segment_bytes and size >= self.segment_bytes)
+            or (self.segment_s and now - opened >= self.segment_s)
+        ):
+            return
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now))
+        n = 0
+        while os.path.exists(f"{path}.{stamp}.{n}") or os.path.exists(f"{path}.{stamp}.{n}.gz"):
+            n += 1
+        closed = f"{path}.{stamp}.{n}"
+        os.replace(path, closed)
+        self._opened[path] = now
+        self.m["rotated"] += 1
+        if self.compress:
+            self._gz.put(closed)
+
+    def _compressor(self):
+        while True:
+            p = self._gz.get()
+            if p is None:
+                return
+            try:
+                with open(p, "rb") as src, gzip.open(p + ".gz", "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+                os.remove(p)
+                with self._lock:
+                    self.m["compressed"] += 1
+            except Exception as e:
+                with self._lock:
+                    self.m["errors"] += 1
+                logger.warning("audit segment compress failed %s: %s", p, e)
+
+
+_sink: Optional[AuditSink] = None
+_sink_lock = threading.Lock()
+
+
+def get_audit_sink() -> AuditSink:
+    global _sink
+    with _sink_lock:
+        if _sink is None:
+            _sink = AuditSink(
+                ring_size=int(os.getenv("AUDIT_RING_SIZE", "8192")),
+                flush_items=int(os.getenv("AUDIT_FLUSH_ITEMS", "256")),
+                flush_interval_s=float(os.getenv("AUDIT_FLUSH_MS", "200")) / 1000.0,
+                fsync=os.getenv("AUDIT_FSYNC", "none"),
+                block_s=float(os.getenv("AUDIT_BLOCK_MS", "1000")) / 1000.0,
+                overflow=os.getenv("AUDIT_OVERFLOW", "block"),
+                segment_bytes=int(float(os.getenv("AUDIT_SEGMENT_MB", "64")) * 1024 * 1024),
+                segment_s=float(os.getenv("AUDIT_SEGMENT_S", "0")),
+                compress=os.getenv("AUDIT_COMPRESS", "1") == "1",
+            )
+            atexit.register(_sink.close)
+        return _sink
+
+
+def _after_fork_in_child():
+    # thread writer tidak ikut ter-fork: child membuat sink sendiri saat dipakai
+    global _sink, _sink_lock
+    _sink, _sink_lock = None, threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
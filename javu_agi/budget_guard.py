@@ -1,13 +1,13 @@
 import json, os, time
 # Import configuration constants from the local package rather than a top-level ``config`` module.
 from javu_agi.config import BUDGET_DAILY_USD, USAGE_LOG_PATH
+from javu_agi.token_counter import count_tokens
+from javu_agi.accounting import get_accounting
 
 
-# heuristik sangat sederhana (≈4 chars/token)
-def estimate_tokens_from_text(text: str) -> int:
-    if not text:
-        return 0
-    return max(1, len(text) // 4)
+# tokenizer per model (BPE kalau tersedia), lihat token_counter.py
+def estimate_tokens_from_text(text: str, model: str | None = None) -> int:
+    return count_tokens(text, model)
 
 
 def _load_usage():
@@ -18,9 +18,7 @@ def _load_usage():
 
 
 def _write(line: dict):
-    os.makedirs(os.path.dirname(USAGE_LOG_PATH), exist_ok=True)
-    with open(USAGE_LOG_PATH, "a", encoding="utf-8") as f:
-        f.write(json.dumps(line) + "\n")
+    get_accounting().log_usage(USAGE_LOG_PATH, line)
 
 
 def track_usage(
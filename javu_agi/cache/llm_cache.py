@@ -0,0 +1,264 @@
+"""
+Cache respons LLM bertingkat untuk llm_router.route_and_generate.
+
+  L1: in-process LRU + TTL, dibatasi jumlah item dan byte (size-aware eviction)
+  L2: opsional, shared antar proses: Redis (REDIS_URL) atau file SQLite lokal
+
+Key = _hash_payload(...) dari router (sudah memuat uid -> isolasi per user tetap).
+Value disimpan sebagai JSON bytes, jadi hit selalu mengembalikan dict baru.
+Hit L2 dipromosikan ke L1 dengan sisa TTL entri L2 (bukan TTL penuh), jadi entri tidak
+hidup lebih lama di L1 daripada di L2.
+
+Env:
+  LLM_CACHE_TTL         TTL detik (default 86400)
+  LLM_CACHE_MEM_ITEMS   maks item L1 (default 2048)
+  LLM_CACHE_MEM_MB      maks MB L1 (default 64)
+  LLM_CACHE_L2          auto|redis|sqlite|none (auto: redis kalau ada, else sqlite)
+  LLM_CACHE_SQLITE      path file SQLite L2 (default data/llm_cache.db)
+  LLM_CACHE_SQLITE_MB   maks MB L2 SQLite (default 512)
+"""
+
+from __future__ import annotations
+import json, os, sqlite3, threading, time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+def _encode(val: Dict[str, Any]) -> bytes:
+    return json.dumps(val, ensure_ascii=False, default=str).encode("utf-8")
+
+
+class MemoryTier:
+    def __init__(self, max_items: int = 2048, max_bytes: int = 64 << 20, ttl_s: int = 86400):
+        self.max_items = max(1, int(max_items))
+        self.max_bytes = max(1, int(max_bytes))
+        self.ttl_s = ttl_s
+        self._d: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        now = time.time()
+        with self._lock:
+            hit = self._d.get(key)
+            if hit is None:
+                return None
+            exp, blob = hit
+            if exp < now:
+                self._pop(key)
+                return None
+            self._d.move_to_end(key)
+            return blob
+
+    def set(self, key: str, blob: bytes, ttl_s: Optional[float] = None):
+        n = len(blob)
+        if n > self.max_bytes:
+            return
+        exp = time.time() + (self.ttl_s if ttl_s is None else ttl_s)
+        with self._lock:
+            if key in self._d:
+                self._pop(key)
+            self._d[key] = (exp, blob)
+            self._bytes += n
+            while len(self._d) > self.max_items or self._bytes > self.max_bytes:
+                self._pop(next(iter(self._d)))
+                self.evictions += 1
+
+    def _pop(self, key: str):
+        _, blob = self._d.pop(key)
+        self._bytes -= len(blob)
+
+    def clear(self):
+        with self._lock:
+            self._d.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"items": len(self._d), "bytes": self._bytes, "evictions": self.evictions}
+
+
+class RedisTier:
+    name = "redis"
+
+    def __init__(self, client, prefix: str = "llm:cache:"):
+        self.r = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[bytes]:
+        hit = self.get_ttl(key)
+        return None if hit is None else hit[0]
+
+    def get_ttl(self, key: str) -> Optional[Tuple[bytes, Optional[float]]]:
+        """(blob, sisa TTL detik atau None kalau tanpa expiry) dalam satu round-trip."""
+        p = self.r.pipeline()
+        p.get(self.prefix + key)
+        p.pttl(self.prefix + key)
+        v, pttl = p.execute()
+        if v is None:
+            return None
+        blob = v.encode("utf-8") if isinstance(v, str) else v
+        return blob, (pttl / 1000.0 if pttl is not None and pttl >= 0 else None)
+
+    def set(self, key: str, blob: bytes, ttl_s: int):
+        self.r.setex(self.prefix + key, int(ttl_s), blob)
+
+
+class SQLiteTier:
+    name = "sqlite"
+
+    SCHEMA = """
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    CREATE TABLE IF NOT EXISTS llm_cache(
+      k TEXT PRIMARY KEY,
+      v BLOB NOT NULL,
+      expires REAL NOT NULL,
+      atime REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_llm_cache_atime ON llm_cache(atime);
+    """
+
+    def __init__(self, path: str, max_bytes: int = 512 << 20, evict_every: int = 256):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_bytes = int(max_bytes)
+        self.evict_every = max(1, int(evict_every))
+        self.db = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        self._lock = threading.Lock()
+        self._writes = 0
+        with self.db:
+            self.db.executescript(self.SCHEMA)
+
+    def get(self, key: str) -> Optional[bytes]:
+        hit = self.get_ttl(key)
+        return None if hit is None else hit[0]
+
+    def get_ttl(self, key: str) -> Optional[Tuple[bytes, Optional[float]]]:
+        now = time.time()
+        with self._lock:
+            row = self.db.execute(
+                "SELECT v, expires FROM llm_cache WHERE k=? AND expires>=?", (key, now)
+            ).fetchone()
+            if row is None:
+                return None
+            # atime untuk eviction LRU; satu UPDATE kecil, bukan rewrite file
+            with self.db:
+                self.db.execute("UPDATE llm_cache SET atime=? WHERE k=?", (now, key))
+        return bytes(row[0]), float(row[1]) - now
+
+    def set(self, key: str, blob: bytes, ttl_s: int):
+        now = time.time()
+        with self._lock, self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO llm_cache(k,v,expires,atime) VALUES(?,?,?,?)",
+                (key, sqlite3.Binary(blob), now + ttl_s, now),
+            )
+            self._writes += 1
+            if self._writes % self.evict_every == 0:
+                self._evict(now)
+
+    def _evict(self, now: float):
+        self.db.execute("DELETE FROM llm_cache WHERE expires<?", (now,))
+        total = self.db.execute("SELECT COALESCE(SUM(LENGTH(v)),0) FROM llm_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # buang yang paling lama tidak diakses sampai di bawah 90% batas
+        excess = total - int(self.max_bytes * 0.9)
+        freed = 0
+        victims = []
+        for k, n in self.db.execute("SELECT k, LENGTH(v) FROM llm_cache ORDER BY atime"):
+            victims.append((k,))
+            freed += n
+            if freed >= excess:
+                break
+        self.db.executemany("DELETE FROM llm_cache WHERE k=?", victims)
+
+
+class TieredCache:
+    def __init__(self, l1: MemoryTier, l2=None, ttl_s: int = 86400):
+        self.l1 = l1
+        self.l2 = l2
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self.m = {
+            "hits_l1": 0,
+            "hits_l2": 0,
+            "misses": 0,
+            "sets": 0,
+            "l2_errors": 0,
+            "bytes_hit": 0,
+            "bytes_set": 0,
+        }
+
+    def _inc(self, **kw):
+        with self._lock:
+            for k, v in kw.items():
+                self.m[k] += v
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        blob = self.l1.get(key)
+        if blob is not None:
+            self._inc(hits_l1=1, bytes_hit=len(blob))
+            return json.loads(blob)
+        if self.l2 is not None:
+            left: Optional[float] = None
+            try:
+                if hasattr(self.l2, "get_ttl"):
+                    hit = self.l2.get_ttl(key)
+                    blob, left = hit if hit is not None else (None, None)
+                else:
+                    blob = self.l2.get(key)
+            except Exception:
+                blob = None
+                self._inc(l2_errors=1)
+            if blob is not None:
+                # sisa TTL L2 (None = tanpa expiry / tidak diketahui -> TTL default L1)
+                self.l1.set(key, blob, None if left is None else min(left, self.l1.ttl_s))
+                self._inc(hits_l2=1, bytes_hit=len(blob))
+                return json.loads(blob)
+        self._inc(misses=1)
+        return None
+
+    def set(self, key: str, val: Dict[str, Any], ttl_s: Optional[int] = None):
+        ttl_s = self.ttl_s if ttl_s is None else int(ttl_s)
+        blob = _encode(val)
+        self.l1.set(key, blob, ttl_s)
+        if self.l2 is not None:
+            try:
+                self.l2.set(key, blob, ttl_s)
+            except Exception:
+                self._inc(l2_errors=1)
+        self._inc(sets=1, bytes_set=len(blob))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self.m)
+        lookups = out["hits_l1"] + out["hits_l2"] + out["misses"]
+        out["hit_rate"] = (out["hits_l1"] + out["hits_l2"]) / lookups if lookups else 0.0
+        out["l1"] = self.l1.stats()
+        out["l2"] = getattr(self.l2, "name", None)
+        return out
+
+
+def build_cache(redis_client=None) -> TieredCache:
+    ttl = int(os.getenv("LLM_CACHE_TTL", "86400"))
+    l1 = MemoryTier(
+        max_items=int(os.getenv("LLM_CACHE_MEM_ITEMS", "2048")),
+        max_bytes=int(float(os.getenv("LLM_CACHE_MEM_MB", "64")) * (1 << 20)),
+        ttl_s=ttl,
+    )
+    mode = os.getenv("LLM_CACHE_L2", "auto").lower()
+    l2 = None
+    if mode in {"auto", "redis"} and redis_client is not None:
+        l2 = RedisTier(redis_client)
+    elif mode in {"auto", "sqlite"}:
+        try:
+            l2 = SQLiteTier(
+                os.getenv("LLM_CACHE_SQLITE", "data/llm_cache.db"),
+                max_bytes=int(float(os.getenv("LLM_CACHE_SQLITE_MB", "512")) * (1 << 20)),
+            )
+        except Exception:
+            l2 = None
+    return TieredCache(l1, l2, ttl_s=ttl)
@@ -0,0 +1,243 @@
+"""
+Tier cache semantik (opt-in per task_type) untuk llm_router.
+
+Prompt ter-normalisasi di-embed oleh vector store proyek (vector.router.get_store,
+collection llm_semcache_<task>_<hash scope>). Tier ini hanya memetakan prompt -> cache_key;
+jawaban tetap di TieredCache, jadi TTL/eviction ikut cache exact. Satu collection per scope
+(uid, system, max_tokens, temperature, tools, modalities): top-k tidak bisa dipenuhi entri
+user lain yang lalu dibuang filter scope. Hit hanya kalau token
+angka + entitas (kata berhuruf kapital di tengah kalimat, akronim, kode) sama persis:
+"cuaca Jakarta 3 hari" tidak boleh dijawab dengan entri "cuaca Bandung 5 hari".
+Entri yang jawaban exact-nya sudah kedaluwarsa / lewat LLM_SEMCACHE_TTL_S dipangkas:
+dihapus dari store kalau store mendukung delete(ids), selain itu di-tombstone.
+
+Kualitas hit dicatat (JSONL, lewat accounting writer): tiap hit dan near-miss
+(sim di [threshold - LLM_SEMCACHE_NEAR, threshold)) beserta prompt pasangan, untuk
+dilabeli eval lalu dipakai tune_threshold().
+
+Env:
+  LLM_SEMCACHE_TASKS        task_type yang aktif, koma (default kosong = off)
+  LLM_SEMCACHE_THRESHOLD    cosine minimum default (0.95)
+  LLM_SEMCACHE_THRESHOLDS   override per task, JSON {"autonomy": 0.9}
+  LLM_SEMCACHE_NEAR         lebar pita near-miss yang dicatat (0.05)
+  LLM_SEMCACHE_TTL_S        umur maksimum entri semantik, detik (default 0 = ikut TTL cache exact)
+  LLM_SEMCACHE_LOG          path log kualitas (logs/semantic_cache.jsonl)
+"""
+
+from __future__ import annotations
+import hashlib, json, os, re, threading, time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+_NUM = re.compile(r"\d+(?:[.,:/-]\d+)*")
+_SENT = re.compile(r"[.!?\n]+")
+_WORD = re.compile(r"[^\W_][\w-]*")
+
+
+def anchors(text: str) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+    """(angka, entitas) yang harus sama persis antara prompt dan entri cache."""
+    nums = frozenset(_NUM.findall(text or ""))
+    ents = set()
+    for sent in _SENT.split(text or ""):
+        for j, w in enumerate(_WORD.findall(sent)):
+            if w[0].isdigit():
+                continue
+            if any(c.isupper() or c.isdigit() for c in w[1:]) or (j > 0 and w[0].isupper()):
+                ents.add(w.lower())
+    return nums, frozenset(ents)
+
+
+class SemanticCache:
+    def __init__(
+        self,
+        store,
+        tasks: Iterable[str],
+        threshold: float = 0.95,
+        thresholds: Optional[Dict[str, float]] = None,
+        near: float = 0.05,
+        k: int = 8,
+        log: Optional[Callable[[Dict[str, Any]], None]] = None,
+        pending_max: int = 4096,
+        ttl_s: float = 0.0,
+    ):
+        self.store = store
+        self.tasks = {t for t in tasks if t}
+        self.threshold = float(threshold)
+        self.thresholds = {k_: float(v) for k_, v in (thresholds or {}).items()}
+        self.near = float(near)
+        self.k = int(k)
+        self.log = log
+        self.pending_max = int(pending_max)
+        self.ttl_s = float(ttl_s)
+        self._pending: "OrderedDict[str, Tuple[str, str, str]]" = OrderedDict()
+        self._ids: "OrderedDict[str, List[Any]]" = OrderedDict()  # cache_key -> id di store (kalau ada)
+        self._dead: "OrderedDict[str, None]" = OrderedDict()  # tombstone cache_key
+        self._lock = threading.Lock()
+        self.m = {"lookups": 0, "hits": 0, "stale": 0, "near_misses": 0, "adds": 0,
+                  "anchor_mismatch": 0, "pruned": 0}
+        self.sim_hist = [0] * 10  # sim terbaik per lookup, bucket 0.80..1.00 per 0.02
+
+    def enabled(self, task_type: str) -> bool:
+        return task_type in self.tasks
+
+    def threshold_for(self, task_type: str) -> float:
+        return self.thresholds.get(task_type, self.threshold)
+
+    @staticmethod
+    def _collection(task_type: str, scope: str) -> str:
+        h = hashlib.sha1((scope or "").encode("utf-8")).hexdigest()[:16]
+        return f"llm_semcache_{task_type}_{h}"
+
+    def _inc(self, k: str):
+        with self._lock:
+            self.m[k] += 1
+
+    def lookup(
+        self, prompt: str, task_type: str, scope: str, fetch: Callable[[str], Optional[Dict[str, Any]]]
+    ) -> Optional[Tuple[Dict[str, Any], float]]:
+        """Return (hasil_cache, similarity) atau None. fetch = cache_get exact."""
+        self._inc("lookups")
+        try:
+            hits = self.store.search(prompt, k=self.k, collection=self._collection(task_type, scope))
+        except Exception:
+            return None
+        thr = self.threshold_for(task_type)
+        best = None
+        want = None
+        now = time.time()
+        for text, sim, meta in hits:
+            meta = meta or {}
+            if meta.get("scope") != scope:  # tabrakan hash collection
+                continue
+            key = meta.get("key")
+            with self._lock:
+                dead = key in self._dead
+            if dead:
+                continue
+            if best is None:
+                best = (text, float(sim), meta)
+                b = int((float(sim) - 0.80) / 0.02)
+                if b >= 0:
+                    with self._lock:
+                        self.sim_hist[min(b, 9)] += 1
+            if sim < thr:
+                break
+            if self.ttl_s and now - float(meta.get("ts", now)) > self.ttl_s:
+                self._inc("stale")
+                self._prune(key, task_type, scope)
+                continue
+            if want is None:
+                want = anchors(prompt)
+            if anchors(text) != want:
+                self._inc("anchor_mismatch")  # angka/entitas beda -> jawaban lain
+                continue
+            res = fetch(key)
+            if res:
+                self._inc("hits")
+                self._record("hit", task_type, prompt, text, float(sim), thr)
+                return res, float(sim)
+            self._inc("stale")  # jawaban sudah kedaluwarsa di cache exact
+            self._prune(key, task_type, scope)
+        if best is not None and thr - self.near <= best[1] < thr:
+            self._inc("near_misses")
+            self._record("near_miss", task_type, prompt, best[0], best[1], thr)
+        return None
+
+    def remember(self, cache_key: str, prompt: str, task_type: str, scope: str):
+        """Catat prompt yang miss; ditambahkan ke index saat jawabannya masuk cache."""
+        with self._lock:
+            self._pending[cache_key] = (prompt, task_type, scope)
+            while len(self._pending) > self.pending_max:
+                self._pending.popitem(last=False)
+
+    def commit(self, cache_key: str):
+        with self._lock:
+            item = self._pending.pop(cache_key, None)
+        if item is None:
+            return
+        prompt, task_type, scope = item
+        try:
+            ids = self.store.add(
+                [prompt],
+                [{"key": cache_key, "scope": scope, "ts": int(time.time())}],
+                collection=self._collection(task_type, scope),
+            )
+            self._inc("adds")
+        except Exception:
+            return
+        with self._lock:
+            self._dead.pop(cache_key, None)
+            if isinstance(ids, list) and ids:
+                self._ids.setdefault(cache_key, []).extend(ids)
+                self._ids.move_to_end(cache_key)
+                while len(self._ids) > self.pending_max * 4:
+                    self._ids.popitem(last=False)
+
+    def _prune(self, cache_key: str, task_type: str, scope: str):
+        """Buang entri semantik yang jawabannya sudah tidak ada di cache exact."""
+        with self._lock:
+            ids = self._ids.pop(cache_key, None)
+            self._dead[cache_key] = None
+            while len(self._dead) > self.pending_max * 4:
+                self._dead.popitem(last=False)
+            self.m["pruned"] += 1
+        if ids and hasattr(self.store, "delete"):
+            try:
+                self.store.delete(ids, collection=self._collection(task_type, scope))
+            except Exception:
+                pass
+
+    def _record(self, kind: str, task_type: str, prompt: str, matched: str, sim: float, thr: float):
+        if self.log is None:
+            return
+        try:
+            self.log({
+                "ts": int(time.time()), "kind": kind, "task": task_type,
+                "sim": round(sim, 4), "threshold": thr,
+                "prompt": prompt[:1000], "matched": matched[:1000],
+            })
+        except Exception:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self.m)
+            out["sim_hist"] = {f"{0.80 + 0.02 * i:.2f}": n for i, n in enumerate(self.sim_hist)}
+        out["tasks"] = sorted(self.tasks)
+        out["hit_rate"] = out["hits"] / out["lookups"] if out["lookups"] else 0.0
+        return out
+
+
+def tune_threshold(rows: List[Dict[str, Any]], target_precision: float = 0.95) -> Optional[float]:
+    """
+    rows: log hit/near-miss yang sudah dilabeli eval ({"sim": float, "ok": bool}).
+    Return threshold terendah yang presisinya (ok / semua dengan sim >= t) >= target.
+    """
+    pts = sorted(((float(r["sim"]), bool(r["ok"])) for r in rows if "sim" in r and "ok" in r), reverse=True)
+    best, ok_n = None, 0
+    for n, (sim, ok) in enumerate(pts, 1):
+        ok_n += ok
+        if ok_n / n >= target_precision:
+            best = sim
+    return best
+
+
+def build_semantic_cache(log: Optional[Callable[[Dict[str, Any]], None]] = None) -> Optional[SemanticCache]:
+    tasks = [t.strip() for t in os.getenv("LLM_SEMCACHE_TASKS", "").split(",") if t.strip()]
+    if not tasks:
+        return None
+    from javu_agi.vector.router import get_store
+
+    try:
+        thresholds = json.loads(os.getenv("LLM_SEMCACHE_THRESHOLDS", "") or "{}")
+    except Exception:
+        thresholds = {}
+    return SemanticCache(
+        get_store(),
+        tasks,
+        threshold=float(os.getenv("LLM_SEMCACHE_THRESHOLD", "0.95")),
+        thresholds=thresholds,
+        near=float(os.getenv("LLM_SEMCACHE_NEAR", "0.05")),
+        log=log,
+        ttl_s=float(os.getenv("LLM_SEMCACHE_TTL_S", "0")),
+    )
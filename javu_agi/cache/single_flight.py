@@ -0,0 +1,214 @@
+"""
+Single-flight: gabungkan pemanggilan konkuren dengan key sama jadi satu eksekusi.
+
+In-process: caller pertama (leader) menjalankan fn; caller lain dengan key sama
+menunggu Event lalu menerima hasil (atau exception) yang sama.
+
+Cross-process (opsional): leader juga memegang lease di Redis (SET NX PX) atau
+SQLite (row dengan expiry). Proses lain yang gagal dapat lease mem-poll `peek`
+(biasanya cache_get) sampai hasil muncul; kalau lease lepas/kedaluwarsa tanpa
+hasil (mis. error tidak di-cache), proses itu jalan sendiri.
+
+Env:
+  LLM_SINGLEFLIGHT          1/0 (default 1)
+  LLM_SINGLEFLIGHT_LEASE    auto|redis|sqlite|none (auto: redis kalau ada, else none)
+  LLM_SINGLEFLIGHT_SQLITE   path lease SQLite (default data/llm_singleflight.db)
+  LLM_SINGLEFLIGHT_LEASE_S  TTL lease detik (default 60)
+  LLM_SINGLEFLIGHT_WAIT_S   batas tunggu waiter detik (default 60)
+"""
+
+from __future__ import annotations
+import os, sqlite3, threading, time, uuid
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class RedisLease:
+    name = "redis"
+
+    def __init__(self, client, prefix: str = "llm:flight:"):
+        self.r = client
+        self.prefix = prefix
+
+    def acquire(self, key: str, token: str, ttl_s: float) -> bool:
+        return bool(self.r.set(self.prefix + key, token, nx=True, px=int(ttl_s * 1000)))
+
+    def held(self, key: str) -> bool:
+        return bool(self.r.exists(self.prefix + key))
+
+    def release(self, key: str, token: str):
+        k = self.prefix + key
+        v = self.r.get(k)
+        if v is not None and (v.decode() if isinstance(v, bytes) else v) == token:
+            self.r.delete(k)
+
+
+class SQLiteLease:
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False, timeout=5.0, isolation_level=None)
+        self._lock = threading.Lock()
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS flight(k TEXT PRIMARY KEY, token TEXT, expires REAL)"
+        )
+
+    def acquire(self, key: str, token: str, ttl_s: float) -> bool:
+        now = time.time()
+        with self._lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                self.db.execute("DELETE FROM flight WHERE k=? AND expires<?", (key, now))
+                cur = self.db.execute(
+                    "INSERT OR IGNORE INTO flight(k,token,expires) VALUES(?,?,?)",
+                    (key, token, now + ttl_s),
+                )
+                self.db.execute("COMMIT")
+            except Exception:
+                self.db.execute("ROLLBACK")
+                raise
+            return cur.rowcount == 1
+
+    def held(self, key: str) -> bool:
+        with self._lock:
+            row = self.db.execute(
+                "SELECT 1 FROM flight WHERE k=? AND expires>=?", (key, time.time())
+            ).fetchone()
+        return row is not None
+
+    def release(self, key: str, token: str):
+        with self._lock:
+            self.db.execute("DELETE FROM flight WHERE k=? AND token=?", (key, token))
+
+
+class SingleFlight:
+    def __init__(
+        self,
+        lease=None,
+        lease_ttl_s: float = 60.0,
+        wait_s: float = 60.0,
+        poll_s: float = 0.05,
+    ):
+        self.lease = lease
+        self.lease_ttl_s = lease_ttl_s
+        self.wait_s = wait_s
+        self.poll_s = poll_s
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.m = {"leaders": 0, "coalesced": 0, "remote_hits": 0, "remote_fallbacks": 0, "errors": 0}
+
+    def _inc(self, k: str, n: int = 1):
+        with self._lock:
+            self.m[k] += n
+
+    def do(
+        self, key: str, fn: Callable[[], Any], peek: Optional[Callable[[str], Any]] = None
+    ) -> Tuple[Any, bool]:
+        """Return (hasil, leader). leader=False -> hasil milik caller lain (jangan dihitung ulang)."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.m["coalesced"] += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+        if not leader:
+            if not call.done.wait(self.wait_s):
+                raise TimeoutError(f"single-flight wait timeout: {key[:12]}")
+            if call.error is not None:
+                raise call.error
+            return call.result, False
+
+        try:
+            res, leader = self._lead(key, fn, peek)
+            call.result = res
+            return res, leader
+        except BaseException as e:
+            call.error = e
+            self._inc("errors")
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def _lead(self, key: str, fn, peek) -> Tuple[Any, bool]:
+        if self.lease is None:
+            self._inc("leaders")
+            return fn(), True
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.wait_s
+        while True:
+            try:
+                got = self.lease.acquire(key, token, self.lease_ttl_s)
+            except Exception:
+                got = True  # backend lease error: jangan blok request
+                token = None
+            if got:
+                try:
+                    # leader proses lain bisa baru saja selesai sebelum lease kita dapat
+                    hit = peek(key) if peek is not None else None
+                    if hit:
+                        self._inc("remote_hits")
+                        return hit, False
+                    self._inc("leaders")
+                    return fn(), True
+                finally:
+                    if token is not None:
+                        try:
+                            self.lease.release(key, token)
+                        except Exception:
+                            pass
+            # proses lain sedang memanggil provider: tunggu hasilnya di shared cache
+            while time.monotonic() < deadline:
+                if peek is not None:
+                    hit = peek(key)
+                    if hit:
+                        self._inc("remote_hits")
+                        return hit, False
+                try:
+                    if not self.lease.held(key):
+                        break  # lease lepas tanpa hasil: coba jadi leader
+                except Exception:
+                    break
+                time.sleep(self.poll_s)
+            if time.monotonic() >= deadline:
+                self._inc("remote_fallbacks")
+                self._inc("leaders")
+                return fn(), True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self.m)
+            out["inflight"] = len(self._calls)
+        out["lease"] = getattr(self.lease, "name", None)
+        return out
+
+
+def build_single_flight(redis_client=None) -> Optional[SingleFlight]:
+    if os.getenv("LLM_SINGLEFLIGHT", "1") != "1":
+        return None
+    mode = os.getenv("LLM_SINGLEFLIGHT_LEASE", "auto").lower()
+    lease = None
+    if mode in {"auto", "redis"} and redis_client is not None:
+        lease = RedisLease(redis_client)
+    elif mode == "sqlite":
+        lease = SQLiteLease(os.getenv("LLM_SINGLEFLIGHT_SQLITE", "data/llm_singleflight.db"))
+    return SingleFlight(
+        lease=lease,
+        lease_ttl_s=float(os.getenv("LLM_SINGLEFLIGHT_LEASE_S", "60")),
+        wait_s=float(os.getenv("LLM_SINGLEFLIGHT_WAIT_S", "60")),
+    )
@@ -0,0 +1,251 @@
+"""
+Engine cache hasil tool bersama (ResultCache + SkillGraph): satu file SQLite (WAL).
+
+- Content-addressed: key = sha256(tool \\n cmd ternormalisasi); tag "# cache:<id>" dari
+  SkillGraph.expand_and_cache dan whitespace diabaikan, jadi cmd yang sama berbagi entry.
+- Eviction LRU nyata (atime) dengan batas jumlah entry dan total byte.
+- TTL per kelas tool (prefix sebelum ".", mis. "web" untuk web.get).
+- Hanya tool pure yang di-cache: ToolContract.deterministic kalau diisi; kalau tidak,
+  tool dengan side effect selain file.read dianggap tidak pure. Tool tanpa contract (mis.
+  "shell") TIDAK di-cache kecuali ada di allowlist TOOL_CACHE_PURE_TOOLS. Memo kemurnian
+  ikut versi registry (default_contracts() dibangun ulang -> memo dibuang). Key penanda
+  internal ("__SEEN__") selalu boleh.
+- Hit/miss/bypass/evict per kelas tool -> stats() dan /metrics (utils.metrics_server).
+
+Env:
+  TOOL_CACHE_DB          path file bersama (default: <dir>/tool_cache.sqlite per pemakai)
+  TOOL_CACHE_MAX_ITEMS   batas entry (default 2000)
+  TOOL_CACHE_MAX_MB      batas total nilai, MB (default 256)
+  TOOL_CACHE_TTL_S       TTL default detik (default 3600)
+  TOOL_CACHE_TTL         TTL per tool/kelas, JSON {"web": 300, "search": 900}
+  TOOL_CACHE_MAX_VALUE   panjang nilai maksimum yang disimpan (default 32000)
+  TOOL_CACHE_PURE_TOOLS  tool tanpa contract yang boleh di-cache, koma
+                         (default search,summarize,json_filter,kb)
+"""
+
+from __future__ import annotations
+import hashlib, json, os, re, sqlite3, threading, time
+from typing import Any, Dict, Optional
+
+try:
+    from javu_agi.utils.metrics_server import inc_metric, set_metric
+except Exception:  # metrics opsional
+    inc_metric = set_metric = None
+
+_TAG = re.compile(r"\s+#\s*cache:[0-9a-f]+\s*$")
+_READ_ONLY = {"file.read"}
+_PURE_UNCONTRACTED = frozenset(
+    t.strip() for t in os.getenv("TOOL_CACHE_PURE_TOOLS", "search,summarize,json_filter,kb").split(",") if t.strip()
+)
+
+
+def normalize_cmd(cmd: str) -> str:
+    return _TAG.sub("", str(cmd or "")).strip()
+
+
+def cache_key(tool: str, cmd: str) -> str:
+    return hashlib.sha256(f"{tool or ''}\n{normalize_cmd(cmd)}".encode("utf-8", "ignore")).hexdigest()
+
+
+def tool_class(tool: str) -> str:
+    return (tool or "").lower().split(".", 1)[0] or "default"
+
+
+def _ttl_map() -> Dict[str, float]:
+    try:
+        return {str(k).lower(): float(v) for k, v in json.loads(os.getenv("TOOL_CACHE_TTL", "") or "{}").items()}
+    except Exception:
+        return {}
+
+
+class ToolCache:
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS tc_entry(
+      k TEXT PRIMARY KEY, tool TEXT, v TEXT, size INTEGER, created REAL, atime REAL, ttl REAL);
+    CREATE INDEX IF NOT EXISTS tc_entry_atime ON tc_entry(atime);
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_items: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        ttl_s: Optional[float] = None,
+        ttl_by_class: Optional[Dict[str, float]] = None,
+        contracts=None,
+    ):
+        self.path = path
+        self.max_items = int(max_items if max_items is not None else os.getenv("TOOL_CACHE_MAX_ITEMS", "2000"))
+        self.max_bytes = int(max_bytes if max_bytes is not None else float(os.getenv("TOOL_CACHE_MAX_MB", "256")) * 1024 * 1024)
+        self.ttl_s = float(ttl_s if ttl_s is not None else os.getenv("TOOL_CACHE_TTL_S", "3600"))
+        self.ttl_by_class = {k.lower(): float(v) for k, v in (ttl_by_class if ttl_by_class is not None else _ttl_map()).items()}
+        self.max_value = int(os.getenv("TOOL_CACHE_MAX_VALUE", "32000"))
+        self._contracts = contracts
+        self._pure: Dict[str, bool] = {}
+        self._pure_reg = None  # registry asal memo _pure
+        self._pid = None
+        self._con: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _db(self) -> sqlite3.Connection:
+        if self._con is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            con = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            con.executescript(self.SCHEMA)
+            self._con, self._pid = con, os.getpid()
+        return self._con
+
+    # ---- policy ----
+    def is_pure(self, tool: str) -> bool:
+        tool = tool or ""
+        try:
+            reg = self._contracts
+            if reg is None:
+                from javu_agi.tools.tool_contracts import default_contracts
+
+                reg = default_contracts()  # di-memo; objek baru kalau policy di-reload
+        except Exception:
+            reg = None
+        if reg is not self._pure_reg:
+            self._pure, self._pure_reg = {}, reg
+        hit = self._pure.get(tool)
+        if hit is not None:
+            return hit
+        pure = tool in _PURE_UNCONTRACTED
+        try:
+            c = reg.get(tool) if reg is not None else None
+            if c is not None:
+                det = getattr(c, "deterministic", None)
+                pure = bool(det) if det is not None else set(c.side_effects or []) <= _READ_ONLY
+        except Exception:
+            pure = False
+        self._pure[tool] = pure
+        return pure
+
+    def ttl_for(self, tool: str) -> float:
+        t = (tool or "").lower()
+        if t in self.ttl_by_class:
+            return self.ttl_by_class[t]
+        return self.ttl_by_class.get(tool_class(t), self.ttl_s)
+
+    def _count(self, tool: str, what: str, n: int = 1):
+        cls = tool_class(tool)
+        with self._lock:
+            st = self._stats.setdefault(cls, {"hit": 0, "miss": 0, "bypass": 0, "put": 0, "evict": 0})
+            st[what] += n
+        if inc_metric is not None:
+            try:
+                inc_metric(f"tool_cache_{what}", n)
+                inc_metric(f'tool_cache_{what}{{tool="{cls}"}}', n)
+            except Exception:
+                pass
+
+    # ---- public ----
+    def get(self, tool: str, cmd: str, marker: bool = False) -> Optional[str]:
+        if not marker and not self.is_pure(tool):
+            self._count(tool, "bypass")
+            return None
+        k, now = cache_key(tool, cmd), time.time()
+        try:
+            with self._lock:
+                db = self._db()
+                row = db.execute("SELECT v, created, ttl FROM tc_entry WHERE k=?", (k,)).fetchone()
+                if row and now - row[1] > row[2]:
+                    db.execute("DELETE FROM tc_entry WHERE k=?", (k,))
+                    row = None
+                if row:
+                    db.execute("UPDATE tc_entry SET atime=? WHERE k=?", (now, k))
+        except Exception:
+            row = None
+        if marker:
+            return row[0] if row else None
+        self._count(tool, "hit" if row else "miss")
+        return row[0] if row else None
+
+    def put(self, tool: str, cmd: str, value: Any, marker: bool = False) -> bool:
+        if not marker and not self.is_pure(tool):
+            return False
+        v = str(value)[: self.max_value]
+        now = time.time()
+        try:
+            with self._lock:
+                db = self._db()
+                db.execute(
+                    "INSERT OR REPLACE INTO tc_entry(k, tool, v, size, created, atime, ttl) VALUES (?,?,?,?,?,?,?)",
+                    (cache_key(tool, cmd), tool or "", v, len(v.encode("utf-8", "ignore")), now, now, self.ttl_for(tool)),
+                )
+                evicted = self._evict(db)
+        except Exception:
+            return False
+        if not marker:
+            self._count(tool, "put")
+        if evicted:
+            self._count(tool, "evict", evicted)
+        return True
+
+    def _evict(self, db: sqlite3.Connection) -> int:
+        n, size = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM tc_entry").fetchone()
+        if n <= self.max_items and size <= self.max_bytes:
+            return 0
+        # buang dari yang paling lama tidak dipakai sampai jumlah & total byte di bawah batas
+        drop = 0
+        for (sz,) in db.execute("SELECT size FROM tc_entry ORDER BY atime"):
+            if n <= self.max_items and size <= self.max_bytes:
+                break
+            n, size, drop = n - 1, size - sz, drop + 1
+        if drop:
+            db.execute("DELETE FROM tc_entry WHERE k IN (SELECT k FROM tc_entry ORDER BY atime LIMIT ?)", (drop,))
+        return drop
+
+    def reuse_ratio(self, window_s: float = 7 * 86400) -> float:
+        try:
+            with self._lock:
+                n, used = self._db().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(atime >= ?), 0) FROM tc_entry", (time.time() - window_s,)
+                ).fetchone()
+            return round(used / max(1, n), 3) if n else 0.0
+        except Exception:
+            return 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            by = {k: dict(v) for k, v in self._stats.items()}
+            try:
+                n, size = self._db().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM tc_entry").fetchone()
+            except Exception:
+                n, size = 0, 0
+        hit = sum(v["hit"] for v in by.values())
+        miss = sum(v["miss"] for v in by.values())
+        if set_metric is not None:
+            try:
+                set_metric("tool_cache_items", n)
+                set_metric("tool_cache_bytes", size)
+            except Exception:
+                pass
+        return {
+            "path": self.path, "items": n, "bytes": size, "max_items": self.max_items,
+            "max_bytes": self.max_bytes, "hit_rate": round(hit / max(1, hit + miss), 4), "by_class": by,
+        }
+
+
+_caches: Dict[str, ToolCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_tool_cache(dirpath: str = "data/result_cache", **kw) -> ToolCache:
+    """Satu engine per file; TOOL_CACHE_DB membuat semua pemakai berbagi satu file."""
+    path = os.path.abspath(os.getenv("TOOL_CACHE_DB") or os.path.join(dirpath, "tool_cache.sqlite"))
+    with _caches_lock:
+        c = _caches.get(path)
+        if c is None:
+            c = _caches[path] = ToolCache(path, **kw)
+        return c
+
+
+def all_stats() -> Dict[str, Any]:
+    with _caches_lock:
+        cs = list(_caches.values())
+    return {c.path: c.stats() for c in cs}
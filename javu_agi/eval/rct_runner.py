@@ -1,7 +1,9 @@
 from __future__ import annotations
 import json, time, random
-from typing import List, Dict, Any, Tuple
-from javu_agi.executive_controller import ExecutiveController
+from typing import TYPE_CHECKING, List, Dict, Any, Tuple
+
+if TYPE_CHECKING:  # import runtime di run_rct: executive_controller memuat modul ini (siklus)
+    from javu_agi.executive_controller import ExecutiveController
 
 
 def _run(exec: ExecutiveController, user: str, q: str) -> Dict[str, Any]:
@@ -15,6 +17,8 @@ def _toggle_ctx(exec: ExecutiveController, on: bool):
 
 
 def run_rct(queries: List[str], seed: int = 7, per_arm: int = 20) -> Dict[str, Any]:
+    from javu_agi.executive_controller import ExecutiveController
+
     random.seed(seed)
     exec = ExecutiveController()
     A, B = [], []
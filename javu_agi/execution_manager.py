@@ -3,6 +3,7 @@ from typing import List, Dict, Any, Optional
 import time, random
 import os, re
 
+from javu_agi.audit.sink import get_audit_sink
 from javu_agi.hmac_sign import sign_cmd
 from javu_agi.tools.contract_verifier import ContractVerifier
 from javu_agi.tools.tool_contracts import default_contracts
@@ -133,24 +134,18 @@ class ExecutionManager:
                 pass
         out = {**res, "step": step, "status": "ok", "cached": False}
         try:
-            import json as _json, time as _time
-
-            with open(self._ledger_path, "a", encoding="utf-8") as f:
-                f.write(
-                    _json.dumps(
-                        {
-                            "ts": int(_time.time()),
-                            "phase": "run_step",
-                            "tool": tool,
-                            "cmd": cmd,
-                            "status": "ok",
-                            "cached": out.get("cached", False),
-                            "stdout_len": len(str(out.get("stdout", ""))),
-                        },
-                        ensure_ascii=False,
-                    )
-                    + "\n"
-                )
+            get_audit_sink().log(
+                self._ledger_path,
+                {
+                    "ts": int(time.time()),
+                    "phase": "run_step",
+                    "tool": tool,
+                    "cmd": cmd,
+                    "status": "ok",
+                    "cached": out.get("cached", False),
+                    "stdout_len": len(str(out.get("stdout", ""))),
+                },
+            )
         except Exception:
             pass
         return out
@@ -182,22 +177,16 @@ class ExecutionManager:
                         pass
 
                     try:
-                        import json as _json, time as _time
-
-                        with open(self._ledger_path, "a", encoding="utf-8") as f:
-                            f.write(
-                                _json.dumps(
-                                    {
-                                        "ts": int(_time.time()),
-                                        "phase": "veto",
-                                        "step": s,
-                                        "reason": "planetary",
-                                        "flags": asses.get("flags", []),
-                                    },
-                                    ensure_ascii=False,
-                                )
-                                + "\n"
-                            )
+                        get_audit_sink().log(
+                            self._ledger_path,
+                            {
+                                "ts": int(time.time()),
+                                "phase": "veto",
+                                "step": s,
+                                "reason": "planetary",
+                                "flags": asses.get("flags", []),
+                            },
+                        )
                     except Exception:
                         pass
                     out.append(
@@ -1,11 +1,8 @@
 from __future__ import annotations
 from collections import defaultdict
 from dataclasses import dataclass, field
-from readline import insert_text
 from typing import Any, Dict, List, Optional, Tuple, Callable
-import os, time, threading, json, hashlib, math, re, pathlib
-
-from click import prompt
+import asyncio, importlib, os, time, threading, json, hashlib, math, re, pathlib
 
 # absolute imports 
 from javu_agi.eval.report_server import Payload
@@ -27,7 +24,6 @@ from javu_agi.safety.action_audit import record_action
 from javu_agi.safety.circuit_breaker import CB
 from javu_agi.self_reflection import reflect_outcome
 from javu_agi.self_model import SelfModel
-from javu_agi.social_cognition import SocialCognition
 from javu_agi.learn.skill_binder import SkillBinder
 from javu_agi.learn.skill_graph import SkillGraph
 from javu_agi.learn.credit_assign import CreditAssigner
@@ -43,8 +39,6 @@ from javu_agi.tools.policy_filter import PolicyFilter
 from javu_agi.tools.policy_filter_hard import PolicyFilterHard
 from javu_agi.tools.plan_optimizer import PlanOptimizer
 from javu_agi.tools.execution_budget import ExecutionBudget
-from javu_agi.tools.contract_verifier import ContractVerifier
-from javu_agi.tools.tool_contracts import default_contracts
 from javu_agi.cache.result_cache import ResultCache
 from javu_agi.utils.rng import seed_everything
 from javu_agi.utils.logger import log_system
@@ -56,6 +50,7 @@ from javu_agi.utils.sanitize import scrub, strip_ansi
 from javu_agi.utils.notify import notify as _op_notify
 from javu_agi.runtime.agent_trace import log_node, log_edge, begin_episode, end_episode
 from javu_agi.runtime.episode_workspace import make_workspace
+from javu_agi.runtime.step_dag import StepScheduler, infer_deps
 from javu_agi.grounding import GroundingLayer, Percept
 from javu_agi.goal_manager import GoalManager
 from javu_agi.goal_generator import generate_goal
@@ -67,14 +62,12 @@ from javu_agi.budget_guard import BudgetGuard
 from javu_agi.alignment_checker import AlignmentChecker
 from javu_agi.alignment_auditor import AlignmentAuditor
 from javu_agi.ops.distill_io import DistillIO
-from javu_agi.ops.incident_notifier import IncidentNotifier
 from javu_agi.ops.incident_engine import IncidentEngine
 from javu_agi.drive_system import DriveSystem
 from javu_agi.embodiment_pack.shim import Embodiment
 from javu_agi.execution_manager import ExecutionManager
 from javu_agi.ethics_deliberator import EthicsDeliberator
 from javu_agi.interpret.decision_tracer import DecisionTracer
-from javu_agi.interpret.calibration import Calibrator
 from javu_agi.interpret.evaluation_framework import EvaluationFramework
 from javu_agi.distill_deduper import DistillDeduper
 from javu_agi.founder_protection import FounderProtection
@@ -105,7 +98,6 @@ from javu_agi.security.adversarial_guard import AdversarialGuard
 from javu_agi.security.tool_acl import is_tool_allowed
 from javu_agi.security.effect_guard import EffectGuard
 from javu_agi.security.watermark import sign_output, verify_input
-from javu_agi.security.supply_chain_guard import SupplyChainGuard
 from javu_agi.serving.egress_filter import check_host
 from javu_agi.persist import CheckpointIO
 from javu_agi.robustness.self_healing import SelfHealing
@@ -117,47 +109,21 @@ from javu_agi.ethics_simulator import EthicsSimulator
 from javu_agi.interlocks.kill_switch import guard as killswitch_guard
 from javu_agi.ledger.intent_audit import record_intent
 from javu_agi.normative_framework import NormativeFramework
-from javu_agi.peace_objective import PeaceObjective
-from javu_agi.cultural_adapter import CulturalAdapter
-from javu_agi.sustainability_model import SustainabilityModel
-from javu_agi.commons_guard import CommonsGuard
 from javu_agi.explainability import explain_decision
-from javu_agi.moral_reasoning_engine import MoralReasoningEngine
-from javu_agi.deliberative_dialogue import DeliberativeDialogue
-from javu_agi.empathy_model import EmpathyModel, PersonModel
-from javu_agi.fairness_auditor import FairnessAuditor
-from javu_agi.planet.eco_guard import EcoGuard, PlanetaryGuardian
-from javu_agi.foresight_engine import ForesightEngine
-from javu_agi.conflict_mediator import ConflictMediator
-from javu_agi.meaning_framework import MeaningFramework
+from javu_agi.empathy_model import PersonModel
+from javu_agi.planet.eco_guard import EcoGuard
 from javu_agi.human_values_interface import HumanValuesInterface
-from javu_agi.collective_governance import CollectiveGovernance
-from javu_agi.transparency_dashboard import TransparencyDashboard
-from javu_agi.threat_modeler import ThreatModeler
 from javu_agi.ethics_update_manager import EthicsUpdateManager
-from javu_agi.cooperative_learning import CooperativeLearning
 from javu_agi.lifelong_learning_manager import LifelongLearningManager
 from javu_agi.moral_emotion_engine import MoralEmotionEngine
 from javu_agi.cyber_immune_core import CyberImmuneCore
 from javu_agi.provenance_guard import ProvenanceGuard
-from javu_agi.impact_assessor import ImpactAssessor
-from javu_agi.value_tradeoff_explainer import ValueTradeoffExplainer
 from javu_agi.sensorimotor_loop import SensorimotorLoop
 from javu_agi.body_schema import BodySchema
-from javu_agi.multi_agent_governance import MultiAgentGovernance
 from javu_agi.corrigibility_manager import CorrigibilityManager
-from javu_agi.aesthetic_judgment import AestheticJudgment
-from javu_agi.cross_domain_creator import CrossDomainCreator
-from javu_agi.collective_governance_hub import CollectiveGovernanceHub
-from javu_agi.privacy_data.dp_budget import DPBudget
-from javu_agi.privacy_data.data_retention_manager import DataRetentionManager
 from javu_agi.audit.audit_chain import AuditChain
 from javu_agi.oversight.queue import OversightQueue
-from javu_agi.xai.explaination_reporter import ExplanationReporter
-from javu_agi.peace_optimizer import PeaceOptimizer
-from javu_agi.resilience_manager import ResilienceManager
 from javu_agi.debate_engine import DebateEngine
-from javu_agi.meta_optimizer import MetaOptimizer
 from javu_agi.telemetry_pack.notify import notify as _tel_notify
 from javu_agi.self_repair_manager import SelfRepairManager
 from javu_agi.eco_guard import EcoGuard
@@ -506,10 +472,97 @@ def run_crosscheck(tool, args):
 def _evidence_gate(prompt, draft):
     raise NotImplementedError
 
+def _import_attr(target: str):
+    mod, _, attr = target.partition(":")
+    return getattr(importlib.import_module(mod), attr)
+
+_LAZY_LOCK = threading.RLock()
+
+class _lazy:
+    """
+    Subsystem yang dibangun (dan modulnya di-import) saat pertama diakses, bukan di
+    __init__ / saat import modul. Hasil disimpan di instance __dict__ (non-data
+    descriptor), jadi akses berikutnya = attribute lookup biasa dan `self.x = ...`
+    tetap bisa override. EC_LAZY=0 -> semua dibangun di __init__ seperti dulu.
+    """
+    def __init__(self, target: str, build: Optional[Callable[[Any, Any], Any]] = None):
+        self.target = target
+        self.build = build
+    def __set_name__(self, owner, name):
+        self.name = name
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        with _LAZY_LOCK:
+            d = obj.__dict__
+            if self.name not in d:
+                cls = _import_attr(self.target)
+                d[self.name] = self.build(obj, cls) if self.build else cls()
+            return d[self.name]
+
 class ExecutiveController:
     _daemon_started: bool = False
     _daemon_lock: threading.Lock = threading.Lock()
 
+    # === subsystem lazy (dibangun saat pertama dipakai) ===
+    peace = _lazy("javu_agi.peace_objective:PeaceObjective")
+    culture = _lazy("javu_agi.cultural_adapter:CulturalAdapter")
+    sustain = _lazy("javu_agi.sustainability_model:SustainabilityModel")
+    commons = _lazy("javu_agi.commons_guard:CommonsGuard")
+    moral = _lazy("javu_agi.moral_reasoning_engine:MoralReasoningEngine")
+    dialogue = _lazy(
+        "javu_agi.deliberative_dialogue:DeliberativeDialogue",
+        lambda ec, cls: cls(rounds=3),
+    )
+    empathy = _lazy("javu_agi.empathy_model:EmpathyModel")
+    fair = _lazy("javu_agi.fairness_auditor:FairnessAuditor")
+    planet = _lazy("javu_agi.planet.eco_guard:PlanetaryGuardian")
+    foresight = _lazy("javu_agi.foresight_engine:ForesightEngine", lambda ec, cls: cls(samples=200))
+    mediator = _lazy("javu_agi.conflict_mediator:ConflictMediator")
+    meaning = _lazy("javu_agi.meaning_framework:MeaningFramework")
+    governance = _lazy("javu_agi.collective_governance:CollectiveGovernance")
+    dashboard = _lazy("javu_agi.transparency_dashboard:TransparencyDashboard")
+    threat_modeler = _lazy("javu_agi.threat_modeler:ThreatModeler")
+    coop_learning = _lazy("javu_agi.cooperative_learning:CooperativeLearning")
+    dp_budget = _lazy("javu_agi.privacy_data.dp_budget:DPBudget")
+    expl_reporter = _lazy(
+        "javu_agi.xai.explaination_reporter:ExplanationReporter",
+        lambda ec, cls: cls(out_dir=os.getenv("XAI_REPORT_DIR", "reports")),
+    )
+    supply = _lazy(
+        "javu_agi.security.supply_chain_guard:SupplyChainGuard",
+        lambda ec, cls: cls(os.path.join(ec.metrics_dir, "sbom.json")),
+    )
+    soc_cog = _lazy("javu_agi.social_cognition:SocialCognition")
+    retention = _lazy(
+        "javu_agi.privacy_data.data_retention_manager:DataRetentionManager",
+        lambda ec, cls: cls(
+            [os.getenv("XAI_REPORT_DIR", "reports"), os.getenv("METRICS_DIR", "/data/metrics")],
+            ttl_days=int(os.getenv("DATA_TTL_DAYS", "14")),
+        ),
+    )
+    notifier = _lazy("javu_agi.ops.incident_notifier:IncidentNotifier")
+    peace_opt = _lazy("javu_agi.peace_optimizer:PeaceOptimizer")
+    resilience = _lazy("javu_agi.resilience_manager:ResilienceManager")
+    meta_opt = _lazy("javu_agi.meta_optimizer:MetaOptimizer")
+    calib = _lazy(
+        "javu_agi.interpret.calibration:Calibrator",
+        lambda ec, cls: cls(os.path.join(ec.metrics_dir, "calibration.prom")),
+    )
+    contracts = _lazy(
+        "javu_agi.tools.contract_verifier:ContractVerifier",
+        lambda ec, cls: cls(_import_attr("javu_agi.tools.tool_contracts:default_contracts")()),
+    )
+    impact = _lazy("javu_agi.impact_assessor:ImpactAssessor")
+    collective = _lazy(
+        "javu_agi.collective_governance_hub:CollectiveGovernanceHub",
+        lambda ec, cls: cls(stakeholders=["humanity", "ecology", "future_generations"]),
+    )
+    explainer = _lazy("javu_agi.value_tradeoff_explainer:ValueTradeoffExplainer")
+    aesthetics = _lazy("javu_agi.aesthetic_judgment:AestheticJudgment")
+    creator = _lazy("javu_agi.cross_domain_creator:CrossDomainCreator")
+    society = _lazy("javu_agi.multi_agent_governance:MultiAgentGovernance")
+
     def __init__(self, wm: Optional[WorkingMemory] = None):
         self.wm = wm or WorkingMemory()
         seed_everything()
@@ -642,24 +695,13 @@ class ExecutiveController:
         self.bandit = ToolBandit()
 
         # GUARDS & ALIGNMENT
-        import sqlite3, datetime, os
+        from javu_agi.accounting import get_accounting
         class _PerUserDailyBudget:
             def __init__(self, db_path: str, cap_usd: float):
                 self.db_path = db_path; self.cap = cap_usd
-                con = sqlite3.connect(self.db_path)
-                con.execute("""
-                            CREATE TABLE IF NOT EXISTS user_budget_daily(
-                            user_id TEXT, day TEXT, spent_usd REAL NOT NULL DEFAULT 0,
-                            PRIMARY KEY(user_id, day)
-                            )
-                            """)
-                con.commit(); con.close()
             def spent(self, user_id: str) -> float:
-                day = datetime.date.today().isoformat()
-                con = sqlite3.connect(self.db_path)
-                cur = con.execute("SELECT spent_usd FROM user_budget_daily WHERE user_id=? AND day=?", (user_id, day))
-                row = cur.fetchone(); con.close()
-                return float(row[0]) if row else 0.0
+                # read-through cache accounting: tanpa koneksi SQLite per cek
+                return get_accounting().spent_today(user_id)
             def allow_estimate(self, steps, user_id: str) -> bool:
                 return self.spent(user_id) < self.cap
             
@@ -759,47 +801,17 @@ class ExecutiveController:
         self.effect_guard = EffectGuard()
         self.consent = ConsentLedger()
         self.board = OversightBoard(self.align, self.delib, self.gov_guard)
-        self.calib = Calibrator(os.path.join(self.metrics_dir, "calibration.prom"))
         self.evaluator = EvaluationFramework()
         self.norms = NormativeFramework()
         self.human_values = HumanValuesInterface(self.memory, self.norms)
         self.alignment_auditor = AlignmentAuditor(self.memory, self.norms)
-        self.peace = PeaceObjective()
-        self.culture = CulturalAdapter()
-        self.sustain = SustainabilityModel()
-        self.commons = CommonsGuard()
-        self.moral = MoralReasoningEngine()
-        self.dialogue = DeliberativeDialogue(rounds=3)
-        self.empathy = EmpathyModel()
-        self.fair = FairnessAuditor()
-        self.planet = PlanetaryGuardian()
-        self.foresight = ForesightEngine(samples=200)
-        self.mediator = ConflictMediator()
-        self.meaning = MeaningFramework()
         self._ensure_learners()
-        self.governance = CollectiveGovernance()
-        self.dashboard = TransparencyDashboard()
-        self.threat_modeler = ThreatModeler()
         self.ethics_updater = EthicsUpdateManager(self.norms)
-        self.coop_learning = CooperativeLearning()
         self.audit_chain = AuditChain(log_dir=os.path.join(self.metrics_dir, "audit_chain"))
         self.oversight_queue = OversightQueue()
-        self.dp_budget = DPBudget()
-        self.expl_reporter = ExplanationReporter(out_dir=os.getenv("XAI_REPORT_DIR","reports"))
-        self.contracts = ContractVerifier(default_contracts())
-        self.supply = SupplyChainGuard(os.path.join(self.metrics_dir,"sbom.json"))
-        self.soc_cog    = SocialCognition()
         self.empathy_fn = add_empathy
         self.val_refine = _refine
         self.treport    = make_report
-        self.retention = DataRetentionManager(
-            [os.getenv("XAI_REPORT_DIR","reports"), os.getenv("METRICS_DIR","/data/metrics")],
-            ttl_days=int(os.getenv("DATA_TTL_DAYS","14"))
-         )
-        self.notifier = IncidentNotifier()
-        self.peace_opt = PeaceOptimizer()
-        self.resilience = ResilienceManager()
-        self.meta_opt = MetaOptimizer()
         self.self_repair = getattr(self, "self_repair", None) or SelfRepairManager()
         self.policy_engine = getattr(self, "policy_engine", None) or PolicyEngine(
             os.getenv("SAFETY_POLICY", "/opt/agi/safety/policy.yaml")
@@ -835,16 +847,7 @@ class ExecutiveController:
         # anomaly detector = self.anom (sudah ada)
         self.immune = CyberImmuneCore(self.watchdog, self.anom, self.provenance)
 
-        # Impact & collective governance
-        self.impact = ImpactAssessor()
-        self.collective = CollectiveGovernanceHub(stakeholders=["humanity","ecology","future_generations"])
-
-        # Explainability
-        self.explainer = ValueTradeoffExplainer()
-
-        # Creativity & aesthetics
-        self.aesthetics = AestheticJudgment()
-        self.creator = CrossDomainCreator()
+        # impact, explainability, creativity, governance hub dll: lihat _lazy di atas class
 
         # Embodiment loop
         self.body = BodySchema()
@@ -973,8 +976,7 @@ class ExecutiveController:
             risk = float(intent.get("risk", 0.0))
             return risk >= float(os.getenv("RISK_MAX", "0.55"))
 
-        # Society-of-AGIs + Corrigibility
-        self.society = MultiAgentGovernance()
+        # Corrigibility
         self.corrigible = CorrigibilityManager(self.consent, self.ethics)
 
         try:
@@ -1004,7 +1006,21 @@ class ExecutiveController:
             self._ensure_autonomy_feeder()
         except Exception:
             pass
-        
+
+        if os.getenv("EC_LAZY", "1") != "1":
+            self.warm_subsystems()
+
+    def warm_subsystems(self) -> Dict[str, str]:
+        """Bangun semua subsystem _lazy sekarang (mis. saat warm pool); return error per nama."""
+        errs = {}
+        for name, v in vars(type(self)).items():
+            if isinstance(v, _lazy):
+                try:
+                    getattr(self, name)
+                except Exception as e:
+                    errs[name] = str(e)
+        return errs
+
     def plan_route(self, query: str, domain: str | None = None):
         try:
             if domain:
@@ -1090,6 +1106,205 @@ class ExecutiveController:
             pass
         return out.get("text",""), meta                    
 
+    # task yang jawabannya satu langkah LLM -> token di-stream langsung dari router
+    STREAM_TASKS = {
+        t.strip() for t in os.getenv("EC_STREAM_TASKS", "default,chat,qna,text").split(",") if t.strip()
+    }
+    # token ditahan sampai akhir kalimat / jendela ini (char), baru dilepas setelah lolos output guard
+    STREAM_WINDOW = int(os.getenv("EC_STREAM_WINDOW", "240"))
+    _SENT_END = re.compile(r"[.!?\n]\s*$")
+
+    def _gov_verdict(self, text: str, output: bool):
+        g = getattr(self, "gov_guard", None)
+        if g is None:
+            return True, ""
+        try:
+            if hasattr(g, "check"):
+                return g.check(text)
+            v = g.guard_output(text) if output else g.guard_input(text)
+            return bool(getattr(v, "allow", True)), str(getattr(v, "category", "") or "")
+        except Exception:
+            return True, ""
+
+    def _stream_input_gate(self, user_id: str, text: str):
+        """Gate input yang sama dengan process(): None = lolos, else (teks_tolak, meta)."""
+        chk = self.adv_guard.scan_prompt(text)
+        if not chk.get("ok", True):
+            return "Prompt ditolak (deteksi jailbreak/secret).", {
+                "blocked": True, "block_category": "adv_prompt", "flags": chk.get("flags", [])}
+        gi = None
+        try:
+            if hasattr(self.align, "guard_input") and callable(self.align.guard_input):
+                gi = self.align.guard_input(text)
+        except Exception:
+            gi = None
+        if gi and not getattr(gi, "allow", True):
+            alt = ""
+            try:
+                if hasattr(self.align, "safe_alternative"):
+                    alt = self.align.safe_alternative(gi) or ""
+            except Exception:
+                alt = ""
+            return alt or "Permintaan diblokir sesuai kebijakan keselamatan.", {
+                "blocked": True, "block_category": getattr(gi, "category", "?"), "reason": getattr(gi, "reason", "?")}
+        try:
+            if violates_core_values(text):
+                return "Goal diblokir oleh moral core.", {"blocked": True, "block_category": "core_values"}
+        except Exception:
+            pass
+        mode = (os.getenv("GOV_INPUT_MODE", "enforce") or "enforce").lower()
+        if mode != "off":
+            ok, cat = self._gov_verdict(text, output=False)
+            if not ok and mode != "warn":
+                return "Permintaan ditolak sesuai tata kelola & keselamatan publik.", {
+                    "blocked": True, "block_category": f"gov:{cat}"}
+        return None
+
+    def _stream_output_gate(self, text: str):
+        """Gate output untuk teks kumulatif: None = boleh dilepas, else (teks_pengganti, meta)."""
+        ok, cat = self._gov_verdict(text, output=True)
+        if not ok:
+            return "Jawaban ditahan sesuai prinsip tata kelola & keselamatan publik.", {
+                "blocked_out": True, "block_category": f"gov:{cat}"}
+        try:
+            go = self.align.guard_output(text)
+        except Exception:
+            go = None
+        if go is not None and not getattr(go, "allow", True):
+            alt = ""
+            try:
+                if hasattr(self.align, "safe_alternative"):
+                    alt = self.align.safe_alternative(go) or ""
+            except Exception:
+                alt = ""
+            return alt or "Jawaban ditahan demi keselamatan/kebenaran.", {
+                "blocked_out": True, "block_category": getattr(go, "category", "?"), "reason": getattr(go, "reason", "?")}
+        try:
+            if is_leak(text):
+                return "Jawaban ditahan: terdeteksi kebocoran data sensitif.", {
+                    "blocked_out": True, "block_category": "pii_leak"}
+        except Exception:
+            pass
+        return None
+
+    async def stream_execute(self, task: str, inp: Any, mods: Optional[List[str]] = None, user_id: str = "anon"):
+        """
+        Untuk /v0/stream_task. Yield:
+          {"type": "token", "text": str}           potongan draft per kalimat/jendela, sudah lolos output guard
+          {"type": "final", "text": str, "meta"}   jawaban final (sesudah _finalize_reply)
+        Gate input process() jalan sebelum LLM dipanggil. Token ditahan sampai akhir kalimat atau
+        STREAM_WINDOW char; teks kumulatif dicek gov_guard + align.guard_output + is_leak sebelum dilepas.
+        user_id dari pemanggil (hasil auth), bukan dari payload.
+        Task di luar STREAM_TASKS / input non-teks -> process() di thread, satu event final.
+        """
+        t0 = time.time()
+        user_id = str(user_id or "anon")
+        if isinstance(inp, dict):
+            text = inp.get("prompt") or inp.get("text") or inp.get("query")
+        else:
+            text = inp
+        if task not in self.STREAM_TASKS or not isinstance(text, str) or (mods and set(mods) - {"text"}):
+            prompt = text if isinstance(text, str) else json.dumps(inp, ensure_ascii=False)
+            res = await asyncio.to_thread(self.process, user_id, prompt)
+            if isinstance(res, tuple):
+                out, meta = res[0], (res[1] if len(res) > 1 else {})
+            elif isinstance(res, dict):
+                out, meta = res.get("text", ""), res
+            else:
+                out, meta = str(res), {}
+            yield {"type": "final", "text": out, "meta": meta if isinstance(meta, dict) else {}}
+            return
+
+        safe_in = shield(text or "")
+        ok, why = self.limit_mgr.allow_request(user_id)
+        if not ok:
+            yield {"type": "final", "text": f"[RATE/BUDGET BLOCK] {why}", "meta": {"blocked": True, "reason": why}}
+            return
+        blocked = await asyncio.to_thread(self._stream_input_gate, user_id, safe_in)
+        if blocked:
+            msg, bmeta = blocked
+            bmeta["latency_s"] = round(time.time() - t0, 3)
+            yield {"type": "final", "text": msg, "meta": bmeta}
+            return
+        role = self.identity.infer_role(safe_in)
+        system = f"[ROLE:{getattr(role, 'name', 'generalist')}] tone={getattr(role, 'tone', 'neutral')}"
+        try:
+            kb_ctx = await asyncio.to_thread(kb_retrieve, safe_in, 6)
+        except Exception:
+            kb_ctx = ""
+        if kb_ctx:
+            safe_in = f"KB_CONTEXT:\n{kb_ctx}\n\nTASK:\n{safe_in}"
+
+        done: Dict[str, Any] = {}
+        ttft = None
+        released, pending = "", ""
+        held = None
+        async for ev in self.router.astream(safe_in, user_id=user_id, task_type=task, system=system):
+            if ev.get("type") == "delta":
+                pending += ev["text"]
+                if not (self._SENT_END.search(pending) or len(pending) >= self.STREAM_WINDOW):
+                    continue
+                held = self._stream_output_gate(released + pending)
+                if held:
+                    break
+                if ttft is None:
+                    ttft = time.time() - t0
+                released += pending
+                yield {"type": "token", "text": pending}
+                pending = ""
+            elif ev.get("type") == "done":
+                done = ev
+        if held is None:
+            held = self._stream_output_gate(done.get("text") or (released + pending))
+        if held:
+            alt, hmeta = held
+            hmeta.update({"episode_ts": int(t0), "streamed_chars": len(released),
+                          "latency_s": round(time.time() - t0, 3)})
+            yield {"type": "final", "text": alt, "meta": hmeta}
+            return
+
+        def _post(text_out: str) -> dict:
+            try:
+                if self.fair and hasattr(self.fair, "rewrite_if_needed"):
+                    text_out = self.fair.rewrite_if_needed(text_out)
+            except Exception:
+                pass
+            try:
+                if self.tom:
+                    text_out = self.empathy_fn(text_out)
+            except Exception:
+                pass
+            return self._finalize_reply(text_out)
+
+        out = await asyncio.to_thread(_post, done.get("text", ""))
+        held = self._stream_output_gate(out.get("text", ""))
+        if held:
+            alt, hmeta = held
+            hmeta.update({"episode_ts": int(t0), "streamed_chars": len(released),
+                          "latency_s": round(time.time() - t0, 3)})
+            yield {"type": "final", "text": alt, "meta": hmeta}
+            return
+        meta = {
+            "episode_ts": int(t0),
+            "role": getattr(role, "name", "generalist"),
+            "model": done.get("model"),
+            "usage": done.get("usage"),
+            "cost_usd": done.get("cost_usd", 0.0),
+            "cached": bool(done.get("cached")),
+            "ttft_s": round(ttft or 0.0, 3),
+            "latency_s": round(time.time() - t0, 3),
+            "runtime_breaker": 0,
+        }
+        for k in ("truncated", "partial", "error"):
+            if done.get(k):
+                meta[k] = done[k]
+        self._append_metrics(meta, is_gov=False, prompt=safe_in)
+        try:
+            self.status.record(meta)
+        except Exception:
+            pass
+        yield {"type": "final", "text": out.get("text", ""), "meta": meta}
+
     def get_eval_snapshot(self) -> dict:
         return {
             "ts": int(time.time()),
@@ -2662,6 +2877,176 @@ class ExecutiveController:
         except Exception:
             pass
         
+        # --- STEP DAG ---
+        # Step read-only yang dependensinya sudah ter-commit dieksekusi konkuren (runtime.step_dag);
+        # gating tetap per step berurutan, commit hasil (audit, journal, tamper hash) tetap urut indeks.
+        sched = StepScheduler()
+        deps = infer_deps(steps)
+
+        def _commit(i, tool, cmd, res, deferred=False):
+            """Post-exec satu step. Return None / "continue" / "break" untuk loop step."""
+            nonlocal errors, miss
+            code  = int(res.get("code", -1))
+            stdout = res.get("stdout", "")
+            stderr = res.get("stderr", "")
+
+            # --- SCRUB OUTPUT ---
+            try:
+                stdout = strip_ansi(scrub(stdout))
+                stderr = strip_ansi(scrub(stderr))
+            except Exception:
+                pass
+
+            # === SANITIZE POTENSI HTML/JS INJECTION ===
+            if isinstance(stdout, str) and ("<script" in stdout.lower() or "onerror=" in stdout.lower()):
+                self.tracer.log("sanitize_html", {"i": i})
+                stdout = strip_ansi(scrub(stdout))
+
+            if code == 0:
+                # --- POST-EXEC AUDIT (record outcome) ---
+                try:
+                    res_meta = {"rc": int(code), "stdout": (stdout or "")[:2000], "stderr": (stderr or "")[:2000]}
+                    try:
+                        record_action(user_id or "anon", {"cmd": cmd, "tool": tool}, {"outcome": res_meta})
+                    except Exception:
+                        self.tracer.log("postexec_audit_err", {"tool": tool, "cmd": cmd})
+                except Exception:
+                    try:
+                        self.tracer.log("postexec_record_err", {"tool": tool, "cmd": cmd})
+                    except Exception:
+                        pass
+
+                # Circuit-breaker on repeated failures
+                try:
+                    if int(code) != 0:
+                        CB.record_failure()
+                        if CB.should_trip():
+                            out_lines.append("[TRIP] Circuit breaker tripped — halting autonomous execution.")
+                            # surface immediate stop
+                            return "break"
+                except Exception:
+                    try:
+                         self.tracer.log("cb_handling_err", {"tool": tool, "cmd": cmd})
+                    except Exception:
+                        pass
+                # --- PII gate ---
+                if is_leak(stdout):
+                    out_lines.append("[BLOCK] output contains PII (suppressed)")
+                    try:
+                        th.feed({"stage":"step","tool":tool,"cmd":cmd,"code":code,"pii":True})
+                    except Exception:
+                        pass
+                    try:
+                        write_journal(jpath, {"i": i, "tool": tool, "cmd": cmd, "code": code, "pii": True, "ts": int(time.time()*1000)})
+                    except Exception:
+                        pass
+                    try:
+                        self.consent.record(episode_id or "ep", user_id, "pii_or_secret_detected", {"tool": tool, "cmd": cmd[:160]})
+                    except Exception:
+                        pass
+                    return "continue"
+
+                if has_secret(stdout):
+                    out_lines.append("[BLOCK] output contains credential-like secret (suppressed)")
+                    miss += 1; self._miss_ctr = miss
+                    try:
+                        th.feed({"stage":"step","tool":tool,"cmd":cmd,"code":code,"secret":True})
+                    except Exception:
+                        pass
+                    try:
+                        write_journal(jpath, {"i": i, "tool": tool, "cmd": cmd, "code": code, "secret": True, "ts": int(time.time()*1000)})
+                    except Exception:
+                        pass
+                    return "continue"
+                       
+                # cache + observe
+                try:
+                    self.result_cache.put(tool, cmd, stdout)
+                except Exception:
+                    pass
+                try:
+                    self.world.observe_tool(tool, stdout)
+                except Exception:
+                    pass
+                try:
+                    self.result_cache.put(tool, "__SEEN__", "1")
+                    self.wm.put(f"seen:{tool}", True, priority=0.4, ttl=24)
+                except Exception:
+                    pass
+                out_lines.append(f"{tool}: code=0 out={stdout.strip()[:200]}")  
+            else:
+                errors += 1
+                out_lines.append(f"{tool}: code={code} err={stderr[:200]}")
+                # sukses → reset miss
+                miss = 0
+                self._miss_ctr = 0
+
+            # >>> REPAIR-PLANNING <<< (step tertunda: step sesudahnya sudah jalan, tidak disisipi)
+            if errors < self.budget.max_errors and not deferred:
+                try:
+                    repair = self._repair_plan(prompt, steps, i, res.get("stderr","") or res.get("stdout",""))
+                    if repair:
+                        steps[i+1:i+1] = repair
+                        out_lines.append(f"[REPAIR] inserted {len(repair)} step(s)")
+                        return "continue"
+                except Exception:
+                    pass
+
+            # budget check
+            if errors >= self.budget.max_errors:
+                return "break"
+                
+            if not self.budget.allow(i, errors):
+                out_lines.append(f"[BUDGET] stop at step {i} (errors={errors})")
+                return "break"
+
+            # --- TAMPER HASH: STEP ---
+            th.feed({"stage": "step", "tool": tool, "cmd": cmd, "code": code})
+
+            # --- JOURNAL (resume) ---
+            try:
+                write_journal(jpath, {
+                    "i": i, "tool": tool, "cmd": cmd, "code": code,
+                    "ts": int(time.time()*1000)
+                })
+            except Exception:
+                pass
+
+            # FALLBACK REMOTE
+            if code != 0 and worker:
+                last_err = None
+                for attempt in range(3):
+                    try:
+                        r2 = self.tools.run_remote(cmd, worker)
+                        c2 = int(r2.get("code", -1))
+                        if c2 == 0:
+                            so2 = scrub(r2.get("stdout", ""))
+                            try:
+                                self.result_cache.put(tool, cmd, so2)
+                            except Exception:
+                                pass
+                            sid = _step_id(f"{tool}:{cmd}")
+                            _enqueue_step(sid, {"tool": tool, "cmd": cmd, "t": int(time.time()*1000)})
+                            try:
+                                self.world.observe_tool(tool, so2)
+                            except Exception:
+                                pass
+                            out_lines.append(f"{tool}: code=0 out={so2.strip()[:200]} [REMOTE]")
+                            code, stdout, stderr = 0, so2, ""
+                            break
+                        else:
+                            last_err = f"code={c2} err={r2.get('stderr','')[:160]}"
+                    except Exception as e:
+                        last_err = str(e)
+                    time.sleep(min(1.5, 0.25*(2**attempt)) + _random.random()*0.05)
+                if code != 0 and last_err:
+                    out_lines.append(f"{tool}: ERROR {last_err} [REMOTE]")
+            return None
+
+        def _drain():
+            """Commit semua step tertunda urut indeks. True kalau loop harus berhenti."""
+            return sched.settle(lambda j, t, c, r: _commit(j, t, c, r, deferred=True))
+
         for i in range(resume_i, len(steps)):
             s = steps[i]
             tool = (s.get("tool","?") or "").lower()
@@ -2707,6 +3092,7 @@ class ExecutiveController:
             if not self.dp_budget.allow(dp_cost):
                 self.tracer.log("dp_block", {"tool": tool, "cost": dp_cost})
                 status = "pre_execute"
+                _drain()  # step yang sudah jalan tetap masuk audit/journal sebelum keluar
                 return {"status": "blocked", "reason": "dp_budget_exceeded"}
 
             # ANCHOR: sebelum menjalankan worker.run/tool.execute pada tiap step
@@ -2935,166 +3321,29 @@ class ExecutiveController:
             pol = self.policy_filter.check(steps)
             if getattr(pol, "blocked", False):
                 self.tracer.log("policy_block", {"reason": pol.reason if hasattr(pol,"reason") else "policy"})
+                _drain()
                 return {"status":"blocked", "reason": getattr(pol, "reason", "policy")}
 
             # --- EXECUTE ---
-            res   = self.executor.run(tool, cmd)
-            code  = int(res.get("code", -1))
-            stdout = res.get("stdout", "")
-            stderr = res.get("stderr", "")
-
-            # --- SCRUB OUTPUT ---
-            try:
-                stdout = strip_ansi(scrub(stdout))
-                stderr = strip_ansi(scrub(stderr))
-            except Exception:
-                pass
-
-            # === SANITIZE POTENSI HTML/JS INJECTION ===
-            if isinstance(stdout, str) and ("<script" in stdout.lower() or "onerror=" in stdout.lower()):
-                self.tracer.log("sanitize_html", {"i": i})
-                stdout = strip_ansi(scrub(stdout))
-
-            if code == 0:
-                # --- POST-EXEC AUDIT (record outcome) ---
-                try:
-                    res_meta = {"rc": int(code), "stdout": (stdout or "")[:2000], "stderr": (stderr or "")[:2000]}
-                    try:
-                        record_action(user_id or "anon", {"cmd": cmd, "tool": tool}, {"outcome": res_meta})
-                    except Exception:
-                        self.tracer.log("postexec_audit_err", {"tool": tool, "cmd": cmd})
-                except Exception:
-                    try:
-                        self.tracer.log("postexec_record_err", {"tool": tool, "cmd": cmd})
-                    except Exception:
-                        pass
-
-                # Circuit-breaker on repeated failures
-                try:
-                    if int(code) != 0:
-                        CB.record_failure()
-                        if CB.should_trip():
-                            out_lines.append("[TRIP] Circuit breaker tripped — halting autonomous execution.")
-                            # surface immediate stop
-                            break
-                except Exception:
-                    try:
-                         self.tracer.log("cb_handling_err", {"tool": tool, "cmd": cmd})
-                    except Exception:
-                        pass
-                # --- PII gate ---
-                if is_leak(stdout):
-                    out_lines.append("[BLOCK] output contains PII (suppressed)")
-                    try:
-                        th.feed({"stage":"step","tool":tool,"cmd":cmd,"code":code,"pii":True})
-                    except Exception:
-                        pass
-                    try:
-                        write_journal(jpath, {"i": i, "tool": tool, "cmd": cmd, "code": code, "pii": True, "ts": int(time.time()*1000)})
-                    except Exception:
-                        pass
-                    try:
-                        self.consent.record(episode_id or "ep", user_id, "pii_or_secret_detected", {"tool": tool, "cmd": cmd[:160]})
-                    except Exception:
-                        pass
-                    continue
-
-                if has_secret(stdout):
-                    out_lines.append("[BLOCK] output contains credential-like secret (suppressed)")
-                    miss += 1; self._miss_ctr = miss
-                    try:
-                        th.feed({"stage":"step","tool":tool,"cmd":cmd,"code":code,"secret":True})
-                    except Exception:
-                        pass
-                    try:
-                        write_journal(jpath, {"i": i, "tool": tool, "cmd": cmd, "code": code, "secret": True, "ts": int(time.time()*1000)})
-                    except Exception:
-                        pass
-                    continue
-                       
-                # cache + observe
-                try:
-                    self.result_cache.put(tool, cmd, stdout)
-                except Exception:
-                    pass
-                try:
-                    self.world.observe_tool(tool, stdout)
-                except Exception:
-                    pass
-                try:
-                    self.result_cache.put(tool, "__SEEN__", "1")
-                    self.wm.put(f"seen:{tool}", True, priority=0.4, ttl=24)
-                except Exception:
-                    pass
-                out_lines.append(f"{tool}: code=0 out={stdout.strip()[:200]}")  
-            else:
-                errors += 1
-                out_lines.append(f"{tool}: code={code} err={stderr[:200]}")
-                # sukses → reset miss
-                miss = 0
-                self._miss_ctr = 0
-
-            # >>> REPAIR-PLANNING <<<
-            if errors < self.budget.max_errors:
-                try:
-                    repair = self._repair_plan(prompt, steps, i, res.get("stderr","") or res.get("stdout",""))
-                    if repair:
-                        steps[i+1:i+1] = repair
-                        out_lines.append(f"[REPAIR] inserted {len(repair)} step(s)")
-                        continue
-                except Exception:
-                    pass
-
-            # budget check
-            if errors >= self.budget.max_errors:
+            if len(deps) != len(steps):
+                # steps disisip saat gating -> indeks bergeser: commit yang tertunda dulu
+                if _drain():
+                    break
+                deps = infer_deps(steps)
+            if sched.can_defer(i, s, deps):
+                sched.submit(i, tool, cmd, self.executor.run, tool, cmd)
+                continue
+            if _drain():
                 break
-                
-            if not self.budget.allow(i, errors):
-                out_lines.append(f"[BUDGET] stop at step {i} (errors={errors})")
+            res = self.executor.run(tool, cmd)
+            flow = _commit(i, tool, cmd, res)
+            if flow == "break":
                 break
+            if flow == "continue":
+                continue
 
-            # --- TAMPER HASH: STEP ---
-            th.feed({"stage": "step", "tool": tool, "cmd": cmd, "code": code})
-
-            # --- JOURNAL (resume) ---
-            try:
-                write_journal(jpath, {
-                    "i": i, "tool": tool, "cmd": cmd, "code": code,
-                    "ts": int(time.time()*1000)
-                })
-            except Exception:
-                pass
+        _drain()
 
-            # FALLBACK REMOTE
-            if code != 0 and worker:
-                last_err = None
-                for attempt in range(3):
-                    try:
-                        r2 = self.tools.run_remote(cmd, worker)
-                        c2 = int(r2.get("code", -1))
-                        if c2 == 0:
-                            so2 = scrub(r2.get("stdout", ""))
-                            try:
-                                self.result_cache.put(tool, cmd, so2)
-                            except Exception:
-                                pass
-                            sid = _step_id(f"{tool}:{cmd}")
-                            _enqueue_step(sid, {"tool": tool, "cmd": cmd, "t": int(time.time()*1000)})
-                            try:
-                                self.world.observe_tool(tool, so2)
-                            except Exception:
-                                pass
-                            out_lines.append(f"{tool}: code=0 out={so2.strip()[:200]} [REMOTE]")
-                            code, stdout, stderr = 0, so2, ""
-                            break
-                        else:
-                            last_err = f"code={c2} err={r2.get('stderr','')[:160]}"
-                    except Exception as e:
-                        last_err = str(e)
-                    time.sleep(min(1.5, 0.25*(2**attempt)) + _random.random()*0.05)
-                if code != 0 and last_err:
-                    out_lines.append(f"{tool}: ERROR {last_err} [REMOTE]")
-                
         exec_text = "[EXEC]\n" + "\n".join(out_lines)
 
         # learning/drive
@@ -3553,7 +3802,7 @@ class ExecutiveController:
 
         # === Meta-cognition: pre-think ===
         try:
-            pre = self.meta_cog.pre_think(insert_text, meta=meta)
+            pre = self.meta_cog.pre_think(prompt, meta=meta)
             if pre and pre.get("clarify"):
                 self.tracer.log("meta_preclarify", pre)
                 meta.setdefault("preclarify", pre["clarify"])
@@ -1,7 +1,9 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
 from typing import Dict, List, Any, Tuple
-import hashlib, json, os, time
+import hashlib, time
+
+from javu_agi.cache.tool_cache import get_tool_cache
 
 
 def _hash(s: str) -> str:
@@ -18,32 +20,21 @@ class SkillNode:
 class SkillGraph:
     """
     Komposisi langkah (linear/DAG kecil) + cache hasil eksekusi.
-    Cache level: per-cmd hash -> output (stdout).
+    Cache: engine bersama cache.tool_cache (key sama dengan ResultCache; tag "# cache:" diabaikan).
     """
 
     def __init__(self, cache_dir: str = "data/skill_cache"):
         self.cache_dir = cache_dir
-        os.makedirs(self.cache_dir, exist_ok=True)
+        self.cache = get_tool_cache(cache_dir)
 
     def _key(self, cmd: str, tool: str = "") -> str:
         return _hash(f"{tool}::{cmd}")
 
     def cache_get(self, cmd: str, tool: str = "") -> str | None:
-        k = os.path.join(self.cache_dir, self._key(cmd, tool) + ".json")
-        if not os.path.exists(k):
-            return None
-        try:
-            o = json.load(open(k, "r", encoding="utf-8"))
-            return o.get("stdout", "")
-        except Exception:
-            return None
+        return self.cache.get(tool, cmd)
 
     def cache_put(self, cmd: str, stdout: str, tool: str = ""):
-        k = os.path.join(self.cache_dir, self._key(cmd, tool) + ".json")
-        try:
-            json.dump({"stdout": stdout[:32000]}, open(k, "w", encoding="utf-8"))
-        except Exception:
-            pass
+        self.cache.put(tool, cmd, stdout)
 
     def expand_and_cache(self, steps: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         out = []
@@ -58,18 +49,4 @@ class SkillGraph:
         return out
 
     def reuse_ratio(self) -> float:
-        try:
-            files = [f for f in os.listdir(self.cache_dir) if f.endswith(".json")]
-            if not files:
-                return 0.0
-            import time
-
-            now = time.time()
-            used = sum(
-                1
-                for f in files
-                if now - os.path.getmtime(os.path.join(self.cache_dir, f)) < 7 * 86400
-            )
-            return round(used / max(1, len(files)), 3)
-        except Exception:
-            return 0.0
+        return self.cache.reuse_ratio(7 * 86400)
@@ -1,5 +1,6 @@
 from typing import Tuple
 import time, math
+
 # Import configuration from the local package.  Using an absolute import avoids shadowing
 # the external ``config`` package when this module is executed outside the package context.
 from javu_agi.config import (
@@ -11,6 +12,7 @@ from javu_agi.config import (
 from javu_agi.llm_router import get_route
 from javu_agi.memory.memory import recall_from_memory
 from javu_agi.budget_guard import estimate_tokens_from_text, track_usage
+from javu_agi.accounting import get_accounting
 from javu_agi.model_usage import estimate_cost_usd
 
 _openai = None
@@ -77,10 +79,13 @@ def _call_openai_chat(model: str, sys: str, usr: str, temp: float, maxtok: int):
 
 
 def _call_anthropic_chat(model: str, sys: str, usr: str, temp: float, maxtok: int):
+    from javu_agi.llm.prompt_prefix import get_prefix
+
     cli = _ensure_anthropic()
+    pfx = get_prefix(sys or "You are a powerful reasoning model. Be precise.")
     resp = cli.messages.create(
         model=model,
-        system=sys or "You are a powerful reasoning model. Be precise.",
+        system=pfx.anthropic_blocks() if pfx.hint(model) else pfx.text,
         max_tokens=maxtok,
         temperature=temp,
         messages=[{"role": "user", "content": [{"type": "text", "text": usr}]}],
@@ -120,6 +125,14 @@ def _retry_loop(
     raise RuntimeError(last_err or "llm_failed")
 
 
+def _prompt_tokens(system_prompt: str, prompt: str, model: str) -> int:
+    # system prompt berulang: token diambil dari memo prefix, hanya prompt yang dihitung
+    from javu_agi.llm.prompt_prefix import get_prefix
+
+    p = get_prefix(system_prompt)
+    return (p.tokens(model) if p else 0) + estimate_tokens_from_text(prompt, model)
+
+
 def call_llm(
     prompt: str,
     system_prompt: str = "",
@@ -137,15 +150,19 @@ def call_llm(
     ctx = export_router_context()
     chain = [primary] + [m for m in ctx["policy"]["fallback_order"] if m != primary]
     # Estimasi biaya (tanpa gate harian/global)
-    prompt_tokens_est = estimate_tokens_from_text((system_prompt or "") + "\n" + prompt)
+    prompt_tokens_est = _prompt_tokens(system_prompt, prompt, primary)
     completion_tokens_est = min(need_ctx, max(256, need_ctx // 2))
     # eksekusi
     try:
         out, model_used = _retry_loop(
             chain, system_prompt, prompt, temperature, need_ctx
         )
-        used_prompt_toks = prompt_tokens_est
-        used_completion_toks = estimate_tokens_from_text(out or "")
+        used_prompt_toks = (
+            prompt_tokens_est
+            if model_used == primary
+            else _prompt_tokens(system_prompt, prompt, model_used)
+        )
+        used_completion_toks = estimate_tokens_from_text(out or "", model_used)
         spent = estimate_cost_usd(model_used, used_prompt_toks, used_completion_toks)
         track_usage(
             model_used,
@@ -155,28 +172,8 @@ def call_llm(
             user_id=user_id or "system",
         )
         try:
-            import sqlite3, os, datetime
-
-            db = os.getenv("BUDGET_SQLITE_PATH", "/data/budget.db")
-            day = datetime.date.today().isoformat()
-            con = sqlite3.connect(db, timeout=2.0)
-            con.execute(
-                """
-                        CREATE TABLE IF NOT EXISTS user_budget_daily(
-                        user_id TEXT, day TEXT, spent_usd REAL NOT NULL DEFAULT 0,
-                        PRIMARY KEY(user_id, day)
-                        )
-                        """
-            )
-            con.execute(
-                """
-                        INSERT INTO user_budget_daily(user_id, day, spent_usd) VALUES (?,?,?)
-                        ON CONFLICT(user_id, day) DO UPDATE SET spent_usd = spent_usd + excluded.spent_usd
-            """,
-                (user_id or "system", day, float(spent)),
-            )
-            con.commit()
-            con.close()
+            # di-batch writer latar belakang (accounting.py), bukan koneksi SQLite per call
+            get_accounting().add_spend(user_id or "system", float(spent))
         except Exception:
             pass
         return out
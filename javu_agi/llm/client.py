@@ -1,39 +1,79 @@
 from __future__ import annotations
-import os, time
-from typing import Dict, Any, Optional, List
+import asyncio, importlib, json, os, threading, weakref
+from typing import Dict, Any, Optional, List, Tuple, Iterator, AsyncIterator
 import requests
+from requests.adapters import HTTPAdapter
+
+# Koneksi HTTP dipakai ulang (keep-alive): session requests bersama untuk jalur sync,
+# httpx.AsyncClient per event loop (ditutup saat loop selesai) untuk achat(). Base URL bisa diarahkan ke mock/proxy.
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/")
+ANTHROPIC_BASE_URL = os.getenv("ANTHROPIC_BASE_URL", "https://api.anthropic.com/v1").rstrip("/")
+HTTP_POOL = int(os.getenv("LLM_HTTP_POOL", "100"))
+PROVIDER_CONCURRENCY = {
+    "openai": int(os.getenv("LLM_CONCURRENCY_OPENAI", "64")),
+    "anthropic": int(os.getenv("LLM_CONCURRENCY_ANTHROPIC", "64")),
+}
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Session requests bersama (thread-safe untuk request paralel) dengan pool ukuran HTTP_POOL."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            _session = s
+        return _session
 
 
 class LLMError(Exception): ...
 
 
+class _LoopHTTP:
+    """AsyncClient + semaphore per provider milik satu event loop."""
+
+    __slots__ = ("http", "sems", "keeper")
+
+    def __init__(self, http, sems: Dict[str, asyncio.Semaphore]):
+        self.http, self.sems, self.keeper = http, sems, None
+
+
+async def _loop_keeper(http, forget):
+    # async generator yang ditahan suspended di loop pemiliknya: asyncio.run() ->
+    # loop.shutdown_asyncgens() menutupnya di loop itu, jadi AsyncClient ikut ditutup
+    try:
+        yield
+    finally:
+        forget()
+        await http.aclose()
+
+
 class LLMClient:
     def __init__(self):
         self.openai_key = os.getenv("OPENAI_API_KEY")
         self.anthropic_key = os.getenv("ANTHROPIC_API_KEY")
         self.timeout = int(os.getenv("LLM_TIMEOUT_S", "30"))
         self.per_req_cap = float(os.getenv("LLM_PER_REQ_USD_LIMIT", "0.10"))
-        self.cb = {
-            "openai": {"fail": 0, "trip_until": 0},
-            "anthropic": {"fail": 0, "trip_until": 0},
-        }
+        # per event loop (client + semaphore terikat ke loop pembuatnya); entri dilepas saat loop
+        # selesai (shutdown_asyncgens) atau saat loop lain mendapati loop-nya sudah closed
+        self._loops: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopHTTP]" = weakref.WeakKeyDictionary()
+        self._loops_lock = threading.Lock()
 
-    def _tripped(self, prov: str) -> bool:
-        return time.time() < self.cb[prov]["trip_until"]
+    @staticmethod
+    def _tripped(prov: str) -> bool:
+        # breaker bersama (router/provider_health.py); hasil call dicatat oleh llm_router
+        from javu_agi.router.provider_health import get_health
 
-    def _trip(self, prov: str):
-        self.cb[prov]["fail"] += 1
-        backoff = min(60, 2 ** min(6, self.cb[prov]["fail"]))
-        self.cb[prov]["trip_until"] = time.time() + backoff
+        return get_health().is_open(prov)
 
-    def _reset(self, prov: str):
-        self.cb[prov] = {"fail": 0, "trip_until": 0}
-
-    # --- providers ---
-    def _openai_chat(self, model: str, messages: List[Dict[str, str]], **kw) -> str:
-        if self._tripped("openai"):
-            raise LLMError("openai circuit open")
-        url = "https://api.openai.com/v1/chat/completions"
+    # --- providers (request/parse dipakai jalur sync & async) ---
+    def _openai_request(self, model: str, messages: List[Dict[str, str]], **kw):
+        url = f"{OPENAI_BASE_URL}/chat/completions"
         payload = {
             "model": model,
             "messages": messages,
@@ -42,24 +82,42 @@ class LLMClient:
                 "max_tokens", int(os.getenv("LLM_MAX_TOKENS", "2048"))
             ),
         }
-        try:
-            r = requests.post(
-                url,
-                json=payload,
-                timeout=self.timeout,
-                headers={"Authorization": f"Bearer {self.openai_key}"},
-            )
-            r.raise_for_status()
-            self._reset("openai")
-            return r.json()["choices"][0]["message"]["content"]
-        except Exception as e:
-            self._trip("openai")
-            raise LLMError(f"openai: {e}")
+        if kw.get("cache_prefix"):
+            payload["prompt_cache_key"] = kw["cache_prefix"]
+        if kw.get("stream"):
+            payload["stream"] = True
+            payload["stream_options"] = {"include_usage": True}
+        return url, payload, {"Authorization": f"Bearer {self.openai_key}"}
 
-    def _anthropic_chat(self, model: str, messages: List[Dict[str, str]], **kw) -> str:
-        if self._tripped("anthropic"):
-            raise LLMError("anthropic circuit open")
-        url = "https://api.anthropic.com/v1/messages"
+    @staticmethod
+    def _openai_usage(u: Dict[str, Any]) -> Dict[str, int]:
+        # prompt_tokens sudah termasuk token yang dibaca dari prompt cache
+        cached = int((u.get("prompt_tokens_details") or {}).get("cached_tokens", 0) or 0)
+        out = {"in": int(u.get("prompt_tokens", 0)), "out": int(u.get("completion_tokens", 0))}
+        if cached:
+            out["cached_in"] = cached
+        return out
+
+    @staticmethod
+    def _openai_parse(data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "text": data["choices"][0]["message"]["content"],
+            "usage": LLMClient._openai_usage(data.get("usage") or {}),
+        }
+
+    @staticmethod
+    def _openai_event(ev: Dict[str, Any]) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        ch = ev.get("choices") or []
+        if ch and (ch[0].get("delta") or {}).get("content"):
+            out["delta"] = ch[0]["delta"]["content"]
+        u = ev.get("usage")
+        if u:
+            out["usage"] = LLMClient._openai_usage(u)
+        return out
+
+    def _anthropic_request(self, model: str, messages: List[Dict[str, str]], **kw):
+        url = f"{ANTHROPIC_BASE_URL}/messages"
         # convert messages -> Anthropic format (system + user/assistant turns)
         system = (
             "\n".join(m["content"] for m in messages if m["role"] == "system") or ""
@@ -69,6 +127,10 @@ class LLMClient:
             for m in messages
             if m["role"] != "system"
         ]
+        if system and kw.get("cache_prefix"):
+            from javu_agi.llm.prompt_prefix import get_prefix
+
+            system = get_prefix(system).anthropic_blocks()
         payload = {
             "model": model,
             "system": system,
@@ -78,30 +140,185 @@ class LLMClient:
             ),
             "temperature": kw.get("temperature", 0.2),
         }
-        try:
-            r = requests.post(
-                url,
-                json=payload,
-                timeout=self.timeout,
-                headers={
-                    "x-api-key": self.anthropic_key,
-                    "anthropic-version": "2023-06-01",
-                },
-            )
-            r.raise_for_status()
-            self._reset("anthropic")
-            return r.json()["content"][0]["text"]
-        except Exception as e:
-            self._trip("anthropic")
-            raise LLMError(f"anthropic: {e}")
+        if kw.get("stream"):
+            payload["stream"] = True
+        headers = {
+            "x-api-key": self.anthropic_key,
+            "anthropic-version": "2023-06-01",
+        }
+        return url, payload, headers
 
-    # --- public ---
-    def chat(
-        self, provider: str, model: str, messages: List[Dict[str, str]], **kw
-    ) -> str:
+    @staticmethod
+    def _anthropic_usage(u: Dict[str, Any]) -> Dict[str, int]:
+        # input_tokens Anthropic TIDAK termasuk token cache (read/creation) -> dijumlah
+        read = int(u.get("cache_read_input_tokens", 0) or 0)
+        write = int(u.get("cache_creation_input_tokens", 0) or 0)
+        out = {"in": int(u.get("input_tokens", 0)) + read + write}
+        if read:
+            out["cached_in"] = read
+        if write:
+            out["cache_write"] = write
+        return out
+
+    @staticmethod
+    def _anthropic_parse(data: Dict[str, Any]) -> Dict[str, Any]:
+        u = data.get("usage") or {}
+        usage = LLMClient._anthropic_usage(u)
+        usage["out"] = int(u.get("output_tokens", 0))
+        return {"text": data["content"][0]["text"], "usage": usage}
+
+    @staticmethod
+    def _anthropic_event(ev: Dict[str, Any]) -> Dict[str, Any]:
+        # input_tokens datang di message_start, output_tokens di message_delta
+        t = ev.get("type")
+        if t == "content_block_delta" and (ev.get("delta") or {}).get("text"):
+            return {"delta": ev["delta"]["text"]}
+        if t == "message_start":
+            u = (ev.get("message") or {}).get("usage") or {}
+            return {"usage": LLMClient._anthropic_usage(u)}
+        if t == "message_delta" and ev.get("usage"):
+            return {"usage": {"out": int(ev["usage"].get("output_tokens", 0))}}
+        return {}
+
+    def _prepare(self, provider: str, model: str, messages, **kw) -> Tuple[str, Tuple, Any]:
+        stream = bool(kw.get("stream"))
         if provider == "openai":
-            return self._openai_chat(model, messages, **kw)
+            prov, req = "openai", self._openai_request
+            parse = self._openai_event if stream else self._openai_parse
         elif provider in ("anthropic", "claude"):
-            return self._anthropic_chat(model, messages, **kw)
+            prov, req = "anthropic", self._anthropic_request
+            parse = self._anthropic_event if stream else self._anthropic_parse
         else:
             raise LLMError(f"unknown provider: {provider}")
+        if self._tripped(prov):
+            raise LLMError(f"{prov} circuit open")
+        return prov, req(model, messages, **kw), parse
+
+    # --- public ---
+    def chat(
+        self, provider: str, model: str, messages: List[Dict[str, str]], full: bool = False, **kw
+    ):
+        """Sync: pakai session keep-alive bersama. full=True -> {"text", "usage"}."""
+        prov, (url, payload, headers), parse = self._prepare(provider, model, messages, **kw)
+        try:
+            r = get_session().post(url, json=payload, timeout=self.timeout, headers=headers)
+            r.raise_for_status()
+            out = parse(r.json())
+        except Exception as e:
+            raise LLMError(f"{prov}: {e}")
+        return out if full else out["text"]
+
+    async def _aclient(self) -> _LoopHTTP:
+        loop = asyncio.get_running_loop()
+        with self._loops_lock:
+            st = self._loops.get(loop)
+        if st is not None:
+            return st
+        # tanpa await sampai entri terpasang: coroutine lain di loop ini tidak bisa menyela
+        httpx = importlib.import_module("httpx")
+        st = _LoopHTTP(
+            httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=HTTP_POOL, max_keepalive_connections=HTTP_POOL),
+            ),
+            {p: asyncio.Semaphore(n) for p, n in PROVIDER_CONCURRENCY.items()},
+        )
+        with self._loops_lock:
+            # loop yang ditutup tanpa shutdown_asyncgens: keeper-nya (memegang loop) tidak
+            # pernah jalan, buang di sini supaya loop + client bisa di-GC
+            for old in [lp for lp in self._loops.keys() if lp.is_closed()]:
+                self._loops.pop(old, None)
+            self._loops[loop] = st
+        st.keeper = _loop_keeper(st.http, lambda: self._forget(loop, st))
+        await st.keeper.__anext__()
+        return st
+
+    def _forget(self, loop, st: _LoopHTTP):
+        with self._loops_lock:
+            if self._loops.get(loop) is st:
+                del self._loops[loop]
+
+    async def achat(
+        self, provider: str, model: str, messages: List[Dict[str, str]], full: bool = False, **kw
+    ):
+        """Async: AsyncClient keep-alive bersama, dibatasi semaphore per provider."""
+        prov, (url, payload, headers), parse = self._prepare(provider, model, messages, **kw)
+        st = await self._aclient()
+        async with st.sems[prov]:
+            try:
+                r = await st.http.post(url, json=payload, headers=headers)
+                r.raise_for_status()
+                out = parse(r.json())
+            except Exception as e:
+                raise LLMError(f"{prov}: {e}")
+        return out if full else out["text"]
+
+    @staticmethod
+    def _sse(line: str) -> Optional[Dict[str, Any]]:
+        if not line or not line.startswith("data:"):
+            return None
+        data = line[5:].strip()
+        if not data or data == "[DONE]":
+            return None
+        return json.loads(data)
+
+    def stream(
+        self, provider: str, model: str, messages: List[Dict[str, str]], **kw
+    ) -> Iterator[Dict[str, Any]]:
+        """Sync SSE: yield {"delta": str} per potongan teks dan {"usage": {...}} bila provider melapor."""
+        prov, (url, payload, headers), parse = self._prepare(provider, model, messages, stream=True, **kw)
+        try:
+            with get_session().post(
+                url, json=payload, timeout=self.timeout, headers=headers, stream=True
+            ) as r:
+                r.raise_for_status()
+                for line in r.iter_lines(decode_unicode=True):
+                    ev = self._sse(line)
+                    if ev is not None:
+                        out = parse(ev)
+                        if out:
+                            yield out
+        except GeneratorExit:
+            raise
+        except Exception as e:
+            raise LLMError(f"{prov}: {e}")
+
+    async def astream(
+        self, provider: str, model: str, messages: List[Dict[str, str]], **kw
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Async SSE lewat AsyncClient bersama; slot semaphore dipegang selama stream."""
+        prov, (url, payload, headers), parse = self._prepare(provider, model, messages, stream=True, **kw)
+        st = await self._aclient()
+        async with st.sems[prov]:
+            try:
+                async with st.http.stream("POST", url, json=payload, headers=headers) as r:
+                    r.raise_for_status()
+                    async for line in r.aiter_lines():
+                        ev = self._sse(line)
+                        if ev is not None:
+                            out = parse(ev)
+                            if out:
+                                yield out
+            except GeneratorExit:
+                raise
+            except Exception as e:
+                raise LLMError(f"{prov}: {e}")
+
+    async def aclose(self):
+        """Tutup AsyncClient milik event loop yang sedang berjalan."""
+        with self._loops_lock:
+            st = self._loops.get(asyncio.get_running_loop())
+        if st is not None:
+            await st.keeper.aclose()  # finally keeper -> lepas entri + http.aclose()
+
+
+_client: Optional[LLMClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> LLMClient:
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = LLMClient()
+        return _client
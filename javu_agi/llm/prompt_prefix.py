@@ -0,0 +1,80 @@
+"""
+Prefix prompt yang stabil (system prompt, konstitusi/guidance).
+
+Teks yang sama dipakai berulang kali per call; di sini bentuk jadinya di-memo sekali
+per digest: id stabil, jumlah token per encoding, dan blok system siap kirim.
+Prefix yang cukup panjang (>= PROMPT_CACHE_MIN_TOKENS, batas minimum caching di sisi
+provider) ditandai `hint` -> client mengirim penanda prompt caching:
+  anthropic  system sebagai blok text dengan cache_control ephemeral
+  openai     prompt_cache_key = id prefix (caching prefix otomatis, key memperbaiki routing)
+
+Env:
+  PROMPT_CACHE             1 = kirim hint ke provider (default 1)
+  PROMPT_CACHE_MIN_TOKENS  token minimum agar di-hint (default 1024)
+  PROMPT_PREFIX_ITEMS      ukuran LRU prefix (default 256)
+"""
+
+from __future__ import annotations
+import hashlib, os, threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from javu_agi.token_counter import count_tokens, encoding_for
+
+PROMPT_CACHE = os.getenv("PROMPT_CACHE", "1") == "1"
+MIN_TOKENS = int(os.getenv("PROMPT_CACHE_MIN_TOKENS", "1024"))
+PREFIX_ITEMS = int(os.getenv("PROMPT_PREFIX_ITEMS", "256"))
+
+
+class Prefix:
+    __slots__ = ("id", "text", "_tokens", "_blocks")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.id = hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+        self._tokens: Dict[str, int] = {}
+        self._blocks: Optional[List[Dict[str, Any]]] = None
+
+    def tokens(self, model: Optional[str] = None) -> int:
+        enc = encoding_for(model)
+        n = self._tokens.get(enc)
+        if n is None:
+            n = self._tokens[enc] = count_tokens(self.text, model)
+        return n
+
+    def hint(self, model: Optional[str] = None) -> bool:
+        return PROMPT_CACHE and self.tokens(model) >= MIN_TOKENS
+
+    def anthropic_blocks(self) -> List[Dict[str, Any]]:
+        if self._blocks is None:
+            self._blocks = [{"type": "text", "text": self.text, "cache_control": {"type": "ephemeral"}}]
+        return self._blocks
+
+
+_prefixes: "OrderedDict[str, Prefix]" = OrderedDict()
+_lock = threading.Lock()
+_m = {"hits": 0, "misses": 0}
+
+
+def get_prefix(text: Optional[str]) -> Optional[Prefix]:
+    """Prefix ter-memo untuk teks system/tools; None kalau kosong."""
+    if not text:
+        return None
+    with _lock:
+        p = _prefixes.get(text)
+        if p is not None:
+            _prefixes.move_to_end(text)
+            _m["hits"] += 1
+            return p
+        _m["misses"] += 1
+    p = Prefix(text)
+    with _lock:
+        _prefixes[text] = p
+        while len(_prefixes) > PREFIX_ITEMS:
+            _prefixes.popitem(last=False)
+    return p
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        return {**_m, "items": len(_prefixes), "enabled": PROMPT_CACHE, "min_tokens": MIN_TOKENS}
@@ -1,10 +1,18 @@
 from __future__ import annotations
-import os, time, json, hashlib, math, random, pathlib, subprocess, threading, shutil, tempfile
-from typing import Optional, Dict, Any, List, Tuple
+import asyncio, os, time, json, hashlib, math, random, pathlib, subprocess, threading, shutil, tempfile, weakref
+from typing import Optional, Dict, Any, List, Tuple, Iterator, AsyncIterator
 
 from pathlib import Path
 from urllib import request
 from javu_agi.config import load_models_cfg, load_router_policy
+from javu_agi.cache.llm_cache import build_cache as build_llm_cache
+from javu_agi.cache.single_flight import build_single_flight
+from javu_agi.cache.semantic_cache import build_semantic_cache
+from javu_agi.obs.model_latency import ModelLatency
+from javu_agi.router.provider_health import get_health
+from javu_agi.token_counter import count_tokens
+from javu_agi.accounting import get_accounting
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutTimeout, as_completed
 from javu_agi.utils.degrade import text_image_stub, subtitles_from_text, text_slideshow_video, enqueue_ticket
 
 # ====== CONFIG (ENV) ======
@@ -80,6 +88,25 @@ LLM_POLICY = {
     "fallback_order": [m.strip() for m in os.getenv("POLICY_FALLBACK", "gpt-5,gpt-4o,claude-opus-3,claude-sonnet-3.5,gpt-5-mini").split(",")]
 }
 
+# latency-aware routing + hedging (lihat obs/model_latency.py)
+ROUTER_LATENCY_AWARE = os.getenv("ROUTER_LATENCY_AWARE", "1") in {"1","true","yes"}
+ROUTER_LATENCY_RATIO = float(os.getenv("ROUTER_LATENCY_RATIO", "1.5"))
+ROUTER_HEDGE = os.getenv("ROUTER_HEDGE", "0") in {"1","true","yes"}
+ROUTER_HEDGE_Q = float(os.getenv("ROUTER_HEDGE_Q", "0.95"))
+ROUTER_HEDGE_MIN_S = float(os.getenv("ROUTER_HEDGE_MIN_S", "0.3"))
+ROUTER_HEDGE_DEFAULT_S = float(os.getenv("ROUTER_HEDGE_DEFAULT_S", "3.0"))
+_lat = ModelLatency(
+    window_s=float(os.getenv("ROUTER_LATENCY_WINDOW_S", "300")),
+    min_samples=int(os.getenv("ROUTER_LATENCY_MIN_SAMPLES", "20")),
+)
+_hedge_pool = ThreadPoolExecutor(int(os.getenv("ROUTER_HEDGE_WORKERS", "32")), thread_name_prefix="llm-hedge")
+_hedge_stats = {"fired": 0, "backup_won": 0, "skipped_cap": 0}
+_hedge_lock = threading.Lock()  # counter di-update dari banyak thread request
+
+def _hedge_inc(key: str):
+    with _hedge_lock:
+        _hedge_stats[key] += 1
+
 # === Provider daily caps (fixed keys) ===
 PROVIDER_CAP = {
     "openai":        float(os.getenv("PROVIDER_CAP_OPENAI_USD_DAILY", "1e9")),
@@ -145,9 +172,7 @@ def _hash_payload(obj: Any) -> str:
 def _log_jsonl(path: str, row: Dict[str, Any]):
     if not ROUTER_LOGGING_ENABLED:
         return
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "a", encoding="utf-8") as f:
-        f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    get_accounting().log_usage(path, row)  # batched, satu open per flush
 
 def _now_s() -> int:
     return int(time.time())
@@ -185,45 +210,30 @@ if REDIS_URL:
     except Exception:
         _redis = None
 
+# L1 in-process LRU/TTL di depan L2 (Redis kalau ada, else SQLite lokal); lihat cache/llm_cache.py
+_llm_cache = build_llm_cache(_redis)
+
 def cache_get(key: str) -> Optional[Dict[str, Any]]:
-    if _redis:
-        v = _redis.get(f"llm:cache:{key}")
-        return json.loads(v) if v else None
-    return None
+    return _llm_cache.get(key)
 
 def cache_set(key: str, val: Dict[str, Any], ttl: int = CACHE_TTL):
-    if _redis:
-        _redis.setex(f"llm:cache:{key}", ttl, json.dumps(val))
+    _llm_cache.set(key, val, ttl)
 
-_budget_state: Dict[str, float] = {}
-_provider_break = {
-    "window_s": int(os.getenv("PROVIDER_BREAK_WINDOW_S","60")),
-    "max_fails": int(os.getenv("PROVIDER_BREAK_FAILS","5")),
-    "cooldown_s": int(os.getenv("PROVIDER_BREAK_COOLDOWN_S","90")),
-}
-_provider_state: Dict[str, Dict[str, Any]] = {}
+def cache_stats() -> Dict[str, Any]:
+    out = _llm_cache.stats()
+    out["single_flight"] = _flight.stats() if _flight is not None else None
+    out["semantic"] = _sem.stats() if _sem is not None else None
+    return out
 
-def _cb_trip(provider: str) -> bool:
-    st = _provider_state.setdefault(provider, {"fails":[], "until":0})
-    now = _now_s()
-    if now < st.get("until",0):
-        return True
-    st["fails"] = [t for t in st["fails"] if now - t <= _provider_break["window_s"]]
-    return False
+# single-flight per cache_key (in-process; cross-process via lease Redis/SQLite)
+_flight = build_single_flight(_redis)
 
-def _cb_record(provider: str, ok: bool):
-    now = _now_s()
-    st = _provider_state.setdefault(provider, {"fails":[], "until":0})
-    if ok:
-        st["fails"].clear()
-        st["until"] = 0
-    else:
-        st["fails"].append(now)
-        window = _provider_break["window_s"]
-        maxf   = _provider_break["max_fails"]
-        if len([t for t in st["fails"] if now - t <= window]) >= maxf:
-            st["until"] = now + _provider_break["cooldown_s"]
+# tier semantik opt-in per task_type (LLM_SEMCACHE_TASKS); log kualitas lewat accounting writer
+_sem = build_semantic_cache(
+    log=lambda row: get_accounting().log_usage(os.getenv("LLM_SEMCACHE_LOG", "logs/semantic_cache.jsonl"), row)
+)
 
+_budget_state: Dict[str, float] = {}
 def budget_inc_usd(delta: float) -> float:
     """increase today spend; return current total"""
     day = time.strftime("%Y-%m-%d")
@@ -245,10 +255,20 @@ def budget_get_today() -> float:
         return float(v) if v else 0.0
     return float(_budget_state.get("total", 0.0))
 
-def _est_cost_usd(model, in_tok, out_tok):
+# harga token input yang dibaca dari prompt cache / ditulis ke cache, relatif ke harga input biasa
+PRICE_CACHED_IN_FACTOR = {
+    "openai": float(os.getenv("PRICE_CACHED_IN_FACTOR_OPENAI", "0.5")),
+    "anthropic": float(os.getenv("PRICE_CACHED_IN_FACTOR_ANTHROPIC", "0.1")),
+}
+PRICE_CACHE_WRITE_FACTOR = float(os.getenv("PRICE_CACHE_WRITE_FACTOR", "1.25"))
+
+def _est_cost_usd(model, in_tok, out_tok, cached_in=0, cache_write=0):
     ipk = float(os.getenv("PRICE_IN_PER_1K", "0.002"))
     opk = float(os.getenv("PRICE_OUT_PER_1K","0.006"))
-    return (in_tok/1000.0)*ipk + (out_tok/1000.0)*opk
+    f_read = PRICE_CACHED_IN_FACTOR.get(MODEL_META.get(model, {}).get("provider"), 1.0)
+    fresh = max(0, in_tok - cached_in - cache_write)
+    billed_in = fresh + cached_in * f_read + cache_write * PRICE_CACHE_WRITE_FACTOR
+    return (billed_in/1000.0)*ipk + (out_tok/1000.0)*opk
 
 def _normalize_router_result(prompt, raw):
     txt = ""
@@ -261,10 +281,11 @@ def _normalize_router_result(prompt, raw):
         usage = {}
         in_tok = out_tok = 0
 
+    model = str(raw.get("model","")) if isinstance(raw, dict) else ""
     if in_tok == 0:
-        in_tok = max(1, len(prompt)//4)
+        in_tok = max(1, count_tokens(prompt, model))
     if out_tok == 0:
-        out_tok = max(1, len(txt)//4)
+        out_tok = max(1, count_tokens(txt, model))
 
     usage = {
         "in": in_tok,
@@ -291,14 +312,14 @@ def _normalize_prompt(p: str) -> str:
 
 # Wrap a provider call with breaker+log (use inside router send)
 def _provider_call(fn, provider: str, *a, **k):
-    if _cb_trip(provider):
+    if not cb_allow(provider):
         raise RuntimeError(f"provider_circuit_open:{provider}")
     try:
          res = fn(*a, **k)
-         _cb_record(provider, True)
+         cb_record_success(provider)
          return res
     except Exception as e:
-        _cb_record(provider, False)
+        cb_record_error(provider)
         raise
 
 def budget_inc_usd_user(user_id: Optional[str], delta: float) -> float:
@@ -322,33 +343,17 @@ def budget_get_today_user(user_id: Optional[str]) -> float:
         return float(v) if v else 0.0
     return float(_budget_state.get(f"user_{user_id}_total", 0.0))
 
-# --- Provider circuit breaker ---
-CB_ERR_LIMIT = int(os.getenv("LLM_CB_ERR_LIMIT", "5"))
-CB_COOLDOWN_S = int(os.getenv("LLM_CB_COOLDOWN_S", "60"))
-
-def _cb_key(prov: str, suffix: str): return f"llm:cb:{prov}:{suffix}"
+# --- Provider circuit breaker: state dibagi antar worker (Redis / SQLite lokal), lihat router/provider_health.py ---
+_health = get_health()
 
 def cb_allow(prov: str) -> bool:
-    if not _redis or not prov:
-        return True
-    open_until = _redis.get(_cb_key(prov, "open_until"))
-    return (not open_until) or (int(open_until) <= int(time.time()))
+    return _health.allow(prov)
 
 def cb_record_success(prov: str):
-    if not _redis or not prov:
-        return
-    pipe = _redis.pipeline()
-    pipe.delete(_cb_key(prov, "err"))
-    pipe.delete(_cb_key(prov, "open_until"))
-    pipe.execute()
+    _health.record(prov, True)
 
 def cb_record_error(prov: str):
-    if not _redis or not prov:
-        return
-    err = int(_redis.incr(_cb_key(prov, "err")))
-    _redis.expire(_cb_key(prov, "err"), CB_COOLDOWN_S)
-    if err >= CB_ERR_LIMIT:
-        _redis.setex(_cb_key(prov, "open_until"), CB_COOLDOWN_S, int(time.time()) + CB_COOLDOWN_S)
+    _health.record(prov, False)
 
 INFLIGHT_LIMIT = int(os.getenv("LLM_INFLIGHT_PER_USER", "3"))
 RPM_LIMIT = int(os.getenv("LLM_RPM_PER_USER", "60"))
@@ -408,9 +413,10 @@ def get_route(task_type: str = "default",
         cand = _USER_MODEL_OVERRIDE[user_id]
         if _supports(modalities, cand) and MODEL_META.get(cand, {}).get("ctx", 0) >= need_ctx:
             _log_route(task_type, cand, modalities, need_ctx, user_id); return cand
-    # 2) policy route-by-task
+    # 2) policy route-by-task (+ model policy lain kalau pilihan ini sedang lambat/error)
     cand = LLM_POLICY["route_by_task"].get(task_type, LLM_DEFAULT_MODEL)
     if _supports(modalities, cand) and MODEL_META.get(cand, {}).get("ctx", 0) >= need_ctx:
+        cand = _prefer_fast(cand, modalities, need_ctx)
         _log_route(task_type, cand, modalities, need_ctx, user_id); return cand
     # 3) fallback list
     for m in LLM_POLICY["fallback_order"]:
@@ -420,17 +426,48 @@ def get_route(task_type: str = "default",
     _log_route(task_type, LLM_DEFAULT_MODEL, modalities, need_ctx, user_id)
     return LLM_DEFAULT_MODEL
 
+def _prefer_fast(cand: str, modalities: Optional[set], need_ctx: int) -> str:
+    if not ROUTER_LATENCY_AWARE:
+        return cand
+    pool = [m for m in LLM_POLICY["fallback_order"]
+            if m != cand and _supports(modalities, m)
+            and (MODEL_META.get(m, {}).get("ctx") or 0) >= need_ctx and not _provider_overcap(m)]
+    return _lat.pick(cand, pool, ratio=ROUTER_LATENCY_RATIO)
+
 def get_model_stats():
-    return {"available": list(MODEL_META.keys()), "override_users": list(_USER_MODEL_OVERRIDE.keys())}
+    return {"available": list(MODEL_META.keys()), "override_users": list(_USER_MODEL_OVERRIDE.keys()),
+            "latency": _lat.stats(), "hedge": _hedge_snapshot(),
+            "health": _health.snapshot()}
 
 # ====== ADAPTERS (OpenAI / Anthropic) ======
+# Satu LLMClient per proses: session HTTP keep-alive (sync) + pool async bersama.
+def _messages(prompt: str, system: Optional[str]) -> List[Dict[str, str]]:
+    msgs = [{"role": "system", "content": system}] if system else []
+    return msgs + [{"role": "user", "content": prompt}]
+
+def _prefix(system: Optional[str]):
+    from javu_agi.llm.prompt_prefix import get_prefix
+    return get_prefix(system)
+
+def _in_tokens(prompt: str, system: Optional[str], model: str) -> int:
+    # token system prompt dari memo prefix, bukan dihitung ulang per call
+    p = _prefix(system)
+    return count_tokens(prompt, model) + (p.tokens(model) if p else 0)
+
+def _client_kw(kw: Dict[str, Any], model: Optional[str] = None) -> Dict[str, Any]:
+    out = {k: kw[k] for k in ("max_tokens", "temperature") if kw.get(k) is not None}
+    p = _prefix(kw.get("system"))
+    if p is not None and p.hint(model):
+        out["cache_prefix"] = p.id
+    return out
+
 def _openai_generate(model: str, prompt: str, **kw) -> Dict[str, Any]:
-    from javu_agi.llm import generate as openai_gen
-    return openai_gen(prompt, model=model, **kw)
+    from javu_agi.llm.client import get_client
+    return get_client().chat("openai", model, _messages(prompt, kw.get("system")), full=True, **_client_kw(kw, model))
 
 def _anthropic_generate(model: str, prompt: str, **kw) -> Dict[str, Any]:
-    from javu_agi.llm import generate as anth_gen
-    return anth_gen(prompt, model=model, **kw)
+    from javu_agi.llm.client import get_client
+    return get_client().chat("anthropic", model, _messages(prompt, kw.get("system")), full=True, **_client_kw(kw, model))
 
 def _call_provider(model: str, prompt: str, **kw) -> Dict[str, Any]:
     provider = MODEL_META.get(model, {}).get("provider")
@@ -441,6 +478,138 @@ def _call_provider(model: str, prompt: str, **kw) -> Dict[str, Any]:
     # fallback asumsi OpenAI
     return _openai_generate(model, prompt, **kw)
 
+async def _acall_provider(model: str, prompt: str, **kw) -> Dict[str, Any]:
+    from javu_agi.llm.client import get_client
+    provider = "anthropic" if MODEL_META.get(model, {}).get("provider") == "anthropic" else "openai"
+    return await get_client().achat(provider, model, _messages(prompt, kw.get("system")), full=True, **_client_kw(kw, model))
+
+# ====== HEDGING: backup model setelah delay ~p95 model utama, ambil jawaban pertama ======
+def _timed_call(model: str, prompt: str, **kw) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    try:
+        out = _call_provider(model, prompt, **kw)
+    except Exception:
+        _lat.record(model, time.perf_counter() - t0, ok=False)
+        raise
+    dt = time.perf_counter() - t0
+    _lat.record(model, dt, ok=True)
+    _health.observe_latency(MODEL_META.get(model, {}).get("provider"), dt)
+    return out
+
+async def _atimed_call(model: str, prompt: str, **kw) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    try:
+        out = await _acall_provider(model, prompt, **kw)
+    except asyncio.CancelledError:
+        raise  # kalah hedge: bukan sinyal latency/error
+    except Exception:
+        _lat.record(model, time.perf_counter() - t0, ok=False)
+        raise
+    dt = time.perf_counter() - t0
+    _lat.record(model, dt, ok=True)
+    _health.observe_latency(MODEL_META.get(model, {}).get("provider"), dt)
+    return out
+
+def _hedge_snapshot() -> Dict[str, Any]:
+    with _hedge_lock:
+        return dict(_hedge_stats, enabled=ROUTER_HEDGE)
+
+def _hedge_affordable(model: str, backup: str, prompt: str, user_id: Optional[str],
+                      max_tokens: int) -> bool:
+    # backup = call kedua yang ditagih juga: sisa cap user harus cukup untuk primary + backup
+    # (ambang sama dengan _user_cap_check); kalau tidak, tunggu primary saja
+    est = _est_call_usd(prompt, model, max_tokens) + _est_call_usd(prompt, backup, max_tokens)
+    if _user_cap_left(user_id) >= 0.5 * est:
+        return True
+    _hedge_inc("skipped_cap")
+    return False
+
+def _hedge_delay(model: str) -> float:
+    q = _lat.quantile(model, ROUTER_HEDGE_Q)
+    return max(ROUTER_HEDGE_MIN_S, ROUTER_HEDGE_DEFAULT_S if q is None else q)
+
+def _bill_loser(model: str, prompt: str, user_id: Optional[str], fut, system: Optional[str] = None):
+    # call sync yang kalah tidak bisa dibatalkan di tengah HTTP -> biayanya tetap dicatat
+    try:
+        out = fut.result()
+        u = out.get("usage") or {}
+        cost = _est_cost_usd(model, int(u.get("in") or max(1, _in_tokens(prompt, system, model))),
+                             int(u.get("out") or 0), int(u.get("cached_in", 0)), int(u.get("cache_write", 0)))
+        _charge(MODEL_META.get(model, {}).get("provider"), user_id, cost)
+    except Exception:
+        pass
+
+def _hedged_call(model: str, backup: str, prompt: str, user_id: Optional[str],
+                 tried: set, **kw) -> Tuple[str, Dict[str, Any]]:
+    """Return (model_pemenang, out). Error primary sebelum delay diteruskan apa adanya."""
+    tried.add(model)
+    f1 = _hedge_pool.submit(_timed_call, model, prompt, **kw)
+    try:
+        return model, f1.result(timeout=_hedge_delay(model))
+    except FutTimeout:
+        pass
+    if (not _hedge_affordable(model, backup, prompt, user_id, kw.get("max_tokens") or 1024)
+            or not cb_allow(MODEL_META.get(backup, {}).get("provider"))):
+        return model, f1.result()  # cap user / backup open / slot probe habis: tunggu primary saja
+    tried.add(backup)
+    _hedge_inc("fired")
+    f2 = _hedge_pool.submit(_timed_call, backup, prompt, **kw)
+    futs = {f1: model, f2: backup}
+    errs: Dict[str, Exception] = {}
+    for f in as_completed(futs):
+        try:
+            out = f.result()
+        except Exception as e:
+            errs[futs[f]] = e
+            continue
+        for m in errs:
+            cb_record_error(MODEL_META.get(m, {}).get("provider"))
+        other = f2 if f is f1 else f1
+        if not other.cancel():
+            other.add_done_callback(lambda fu, m=futs[other]: _bill_loser(m, prompt, user_id, fu, kw.get("system")))
+        if f is f2:
+            _hedge_inc("backup_won")
+        return futs[f], out
+    # dua-duanya gagal: backup dicatat di sini, primary oleh caller
+    cb_record_error(MODEL_META.get(backup, {}).get("provider"))
+    raise errs[model]
+
+async def _ahedged_call(model: str, backup: str, prompt: str, user_id: Optional[str],
+                        tried: set, **kw) -> Tuple[str, Dict[str, Any]]:
+    """Versi async: yang kalah benar-benar dibatalkan (request httpx diputus)."""
+    tried.add(model)
+    t1 = asyncio.ensure_future(_atimed_call(model, prompt, **kw))
+    pending = {t1: model}
+    try:
+        done, _ = await asyncio.wait({t1}, timeout=_hedge_delay(model))
+        if done:
+            return model, t1.result()
+        if (not _hedge_affordable(model, backup, prompt, user_id, kw.get("max_tokens") or 1024)
+                or not cb_allow(MODEL_META.get(backup, {}).get("provider"))):
+            return model, await t1
+        tried.add(backup)
+        _hedge_inc("fired")
+        t2 = asyncio.ensure_future(_atimed_call(backup, prompt, **kw))
+        pending[t2] = backup
+        errs: Dict[str, BaseException] = {}
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for t in done:
+                m = pending.pop(t)
+                if t.exception() is not None:
+                    errs[m] = t.exception()
+                    continue
+                for em in errs:
+                    cb_record_error(MODEL_META.get(em, {}).get("provider"))
+                if t is t2:
+                    _hedge_inc("backup_won")
+                return m, t.result()
+        cb_record_error(MODEL_META.get(backup, {}).get("provider"))
+        raise errs[model]
+    finally:
+        for t in pending:
+            t.cancel()
+
 def _local_generate(model: str, prompt: str, **kw) -> dict:
     """
     Load pipeline dari ckpt_dir yang teregistrasi paling baru.
@@ -584,30 +753,22 @@ def call_model(model: str, prompt: str) -> Any:
     return out
 
 # ====== MAIN ENTRYPOINT: route + cache + budget + retry ======
-def route_and_generate(prompt: str,
-                       task_type: str = "default",
-                       modalities: Optional[set] = None,
-                       need_ctx: int = 8_000,
-                       user_id: Optional[str] = None,
-                       max_tokens: int = 1024,
-                       temperature: float = 0.2,
-                       tools: Optional[List[Dict[str, Any]]] = None,
-                       system: Optional[str] = None,
-                       distill_log: bool = False) -> Dict[str, Any]:
-    """
-    Kembalikan:
-      {"text": ..., "model": ..., "usage": {"in": int, "out": int}, "cost_usd": float, "cached": bool}
-    """
+def _limit_result(prompt: str, text: str, model: str) -> Dict[str, Any]:
+    return _normalize_router_result(prompt, {
+        "text": text,
+        "model": model,
+        "usage": {"in": 0, "out": 0},
+        "cost_usd": 0.0,
+        "cached": False
+    })
+
+def _prepare(prompt, task_type, modalities, need_ctx, user_id, max_tokens, temperature, tools, system):
+    """Normalisasi prompt + cache key. Return (prompt, cache_key, hasil_awal|None)."""
     prompt = _normalize_prompt(prompt)
     if os.getenv("KILL_SWITCH", "0").lower() in {"1","true","yes"}:
-        return _normalize_router_result(prompt, {
-            "text": "(router disabled by kill-switch)",
-            "model": get_route(task_type, modalities, need_ctx, user_id),
-            "usage": {"in": 0, "out": 0},
-            "cost_usd": 0.0,
-            "cached": False
-        })
-    
+        return prompt, None, _limit_result(prompt, "(router disabled by kill-switch)",
+                                           get_route(task_type, modalities, need_ctx, user_id))
+
     # ---- cache key (+ early return jika hit) ----
     cache_key = _hash_payload({
         "p": prompt,
@@ -620,29 +781,67 @@ def route_and_generate(prompt: str,
         "sys": system,
         "uid": user_id,  # ← isolasi cache
     })
-    
+
     cached = cache_get(cache_key)
     if cached:
-        return {**_normalize_router_result(prompt, cached), "cached": True}
-    
+        return prompt, cache_key, {**_normalize_router_result(prompt, cached), "cached": True}
+
+    # ---- near-duplicate: tetangga terdekat dengan scope (uid + parameter) sama ----
+    if _sem is not None and _sem.enabled(task_type):
+        scope = _hash_payload({
+            "task": task_type,
+            "mods": sorted(list(modalities)) if modalities else [],
+            "mx": max_tokens, "temp": temperature, "tools": tools, "sys": system, "uid": user_id,
+        })
+        hit = _sem.lookup(prompt, task_type, scope, cache_get)
+        if hit is not None:
+            res, sim = hit
+            return prompt, cache_key, {**_normalize_router_result(prompt, res), "cached": True,
+                                       "semantic": round(sim, 4)}
+        _sem.remember(cache_key, prompt, task_type, scope)
+    return prompt, cache_key, None
+
+def route_and_generate(prompt: str,
+                       task_type: str = "default",
+                       modalities: Optional[set] = None,
+                       need_ctx: int = 8_000,
+                       user_id: Optional[str] = None,
+                       max_tokens: int = 1024,
+                       temperature: float = 0.2,
+                       tools: Optional[List[Dict[str, Any]]] = None,
+                       system: Optional[str] = None,
+                       distill_log: bool = False) -> Dict[str, Any]:
+    """
+    Kembalikan:
+      {"text": ..., "model": ..., "usage": {"in": int, "out": int}, "cost_usd": float, "cached": bool}
+    """
+    prompt, cache_key, early = _prepare(prompt, task_type, modalities, need_ctx, user_id,
+                                        max_tokens, temperature, tools, system)
+    if early is not None:
+        return early
+
+    # ---- single-flight: request identik yang sedang in-flight -> satu provider call ----
+    def _gen():
+        return _route_uncached(prompt, cache_key, task_type, modalities, need_ctx, user_id,
+                               max_tokens, temperature, tools, system, distill_log)
+    if _flight is None:
+        return _gen()
+    res, leader = _flight.do(cache_key, _gen, peek=cache_get)
+    if leader:
+        return res
+    # hasil milik caller lain: biaya sudah dihitung di leader
+    return {**_normalize_router_result(prompt, res), "cached": True, "coalesced": True}
+
+def _route_gate(prompt, task_type, modalities, need_ctx, user_id):
+    """Guard per-user sebelum provider dipanggil. Return (picked, kandidat, hasil_blok|None)."""
     # ---- per-user RPM guard (router-level) ----
     if not rpm_allow(user_id):
-        return _normalize_router_result(prompt, {
-            "text": "(limit tercapai untuk plan Anda hari ini)",
-            "model": get_route(task_type, modalities, need_ctx, user_id),
-            "usage": {"in": 0, "out": 0},
-            "cost_usd": 0.0,
-            "cached": False
-        })
+        return None, [], _limit_result(prompt, "(limit tercapai untuk plan Anda hari ini)",
+                                       get_route(task_type, modalities, need_ctx, user_id))
 
     if not inflight_allow(user_id):
-        return _normalize_router_result(prompt, {
-            "text": "(terlalu banyak request bersamaan, coba lagi nanti)",
-            "model": get_route(task_type, modalities, need_ctx, user_id),
-            "usage": {"in": 0, "out": 0},
-            "cost_usd": 0.0,
-            "cached": False
-        })
+        return None, [], _limit_result(prompt, "(terlalu banyak request bersamaan, coba lagi nanti)",
+                                       get_route(task_type, modalities, need_ctx, user_id))
 
     # ---- routing ----
     picked = get_route(task_type, modalities, need_ctx, user_id)
@@ -650,102 +849,241 @@ def route_and_generate(prompt: str,
     # ---- kandidat + filter provider over-cap + circuit breaker ----
     providers_try = [picked] + [m for m in LLM_POLICY["fallback_order"] if m != picked]
     providers_try = [m for m in providers_try if not _provider_overcap(m)] or [picked]
-    providers_try = [m for m in providers_try if cb_allow(MODEL_META.get(m, {}).get("provider",""))] or [picked]
+    # filter tanpa mengambil slot probe; slot half_open diklaim (cb_allow) tepat sebelum dispatch
+    providers_try = [m for m in providers_try if not _health.is_open(MODEL_META.get(m, {}).get("provider",""))] or [picked]
+    return picked, providers_try, None
+
+def _est_call_usd(prompt, model, max_tokens) -> float:
+    # kira biaya worst-case kasar untuk precheck
+    return _est_cost_usd(model, max(1, count_tokens(prompt, model)), max_tokens)
+
+def _user_cap_check(prompt, model, user_id, max_tokens) -> Optional[Dict[str, Any]]:
+    # ---- user budget precheck (TEXT) ----
+    left = _user_cap_left(user_id)
+    est_cost = _est_call_usd(prompt, model, max_tokens)
+    if left < (0.5 * est_cost):
+        if HIDE_CAP_ERRORS:
+            return _limit_result(prompt, "(limit tercapai untuk plan Anda hari ini)", model)
+        raise UserCapExceeded(f"user daily cap reached; left=${left:.3f}")
+    return None
+
+def _charge(prov, user_id, delta):
+    total_global = budget_inc_usd(delta)
+    try: total_user = budget_inc_usd_user(user_id, delta)
+    except Exception: total_user = None
+    try:
+        if prov in {"openai","anthropic","openai_image","elevenlabs","local_video"}:
+            provider_spend_inc(prov, delta)
+    except Exception:
+        pass
+    return total_global, total_user
+
+def _finish(prompt, cache_key, model, prov, out, task_type, user_id, distill_log,
+            charged: float = 0.0, cacheable: bool = True, system: Optional[str] = None) -> Dict[str, Any]:
+    """Akuntansi biaya, cache, log; dipakai jalur sync, async & stream.
+    charged: biaya yang sudah dicatat bertahap (stream) -> hanya selisihnya yang ditagih."""
+    # ---- usage & cost ----
+    usage   = out.get("usage") or {}
+    in_tok  = int(usage.get("in",  usage.get("prompt_tokens", 0)))
+    out_tok = int(usage.get("out", usage.get("completion_tokens", 0)))
+    cached_in   = int(usage.get("cached_in", 0) or 0)
+    cache_write = int(usage.get("cache_write", 0) or 0)
+    cost    = _est_cost_usd(model, in_tok, out_tok, cached_in, cache_write)
+
+    # ---- akuntansi ----
+    total_global, total_user = _charge(prov, user_id, cost - charged)
+
+    # ---- normalize + fallback usage ----
+    txt = (out.get("text") or out.get("output") or "") if isinstance(out, dict) else ""
+    usage = out.get("usage") or {}
+    in_tok  = int(usage.get("in",  usage.get("prompt_tokens", 0)) or 0)
+    out_tok = int(usage.get("out", usage.get("completion_tokens", 0)) or 0)
+
+    # Fallback kasar jika adapter tidak isi usage
+    if in_tok == 0:
+        in_tok = max(1, _in_tokens(prompt, system, model))
+    if out_tok == 0:
+        out_tok = max(1, count_tokens(txt, model))
+    usage = {"in": in_tok, "out": out_tok}
+    if cached_in:
+        usage["cached_in"] = cached_in
+    if cache_write:
+        usage["cache_write"] = cache_write
+    cost  = _est_cost_usd(model, in_tok, out_tok, cached_in, cache_write)
+
+    result = {
+        "text": out.get("text") or out.get("output") or "",
+        "model": model,
+        "usage": usage,
+        "cost_usd": cost
+    }
+
+    # ---- cache (jawaban terpotong/parsial tidak di-cache) ----
+    if cacheable:
+        cache_set(cache_key, result, CACHE_TTL)
+        if _sem is not None:
+            _sem.commit(cache_key)
+
+    # ---- optional: raw router distill log ----
+    if distill_log or ROUTER_DISTILL_LOG:
+        try:
+            os.makedirs(DISTILL_DIR, exist_ok=True)
+            with open(os.path.join(DISTILL_DIR, f"{int(time.time()*1000)}.json"), "w", encoding="utf-8") as f:
+                json.dump({
+                    "prompt": prompt, "model": model,
+                    "output": result["text"], "usage": result["usage"],
+                    "cost": cost
+                }, f, ensure_ascii=False)
+        except Exception:
+            pass
+
+    # ---- router usage trace ----
+    pfx = _prefix(system)
+    _log_jsonl(USAGE_LOG_PATH, {
+        "ts": _now_s(), "user": user_id, "task": task_type, "model": model,
+        "cost_usd": cost, "usage": result["usage"],
+        "input": {"cached": cached_in, "fresh": max(0, in_tok - cached_in)},
+        **({"prefix": pfx.id} if pfx is not None else {}),
+        "budget_today_global": total_global,
+        **({"budget_today_user": total_user} if total_user is not None else {})
+    })
+
+    cb_record_success(prov)
+    return {**result, "cached": False}
+
+def _route_failure(prompt, picked, task_type, user_id, err_last) -> Dict[str, Any]:
+    # ---- total failure ----
+    _log_jsonl(USAGE_LOG_PATH, {"ts": _now_s(), "user": user_id, "task": task_type, "error": err_last, "picked": picked})
+    return _limit_result(prompt, "(router failure; try later)", picked)
+
+def _route_uncached(prompt: str, cache_key: str, task_type: str, modalities: Optional[set],
+                    need_ctx: int, user_id: Optional[str], max_tokens: int, temperature: float,
+                    tools: Optional[List[Dict[str, Any]]], system: Optional[str],
+                    distill_log: bool) -> Dict[str, Any]:
+    picked, providers_try, blocked = _route_gate(prompt, task_type, modalities, need_ctx, user_id)
+    if blocked is not None:
+        return blocked
 
     err_last = None
-    for model in providers_try:
+    tried: set = set()
+    for i, model in enumerate(providers_try):
+        if model in tried:
+            continue
         prov = MODEL_META.get(model, {}).get("provider")
         try:
-            # ---- user budget precheck (TEXT) ----
-            left = _user_cap_left(user_id)
-            # kira biaya worst-case kasar untuk precheck
-            est_in  = max(1, len(prompt)//4)
-            est_out = max_tokens
-            est_cost = _est_cost_usd(model, est_in, est_out)
-            if left < (0.5 * est_cost):
-                if HIDE_CAP_ERRORS:
-                    return _normalize_router_result(prompt, {
-                        "text": "(limit tercapai untuk plan Anda hari ini)",
-                        "model": model,
-                        "usage": {"in": 0, "out": 0},
-                        "cost_usd": 0.0,
-                        "cached": False
-                    })
-                else:
-                    raise UserCapExceeded(f"user daily cap reached; left=${left:.3f}")
+            capped = _user_cap_check(prompt, model, user_id, max_tokens)
+            if capped is not None:
+                return capped
 
             # ---- in-flight guard per user ----
             inflight_inc(user_id)
+            if not cb_allow(prov):
+                err_last = f"provider_circuit_open:{prov}"
+                continue
+
+            # ---- panggil provider (opsional hedged ke kandidat berikutnya) ----
+            kw = dict(max_tokens=max_tokens, temperature=temperature, tools=tools, system=system)
+            backup = next((m for m in providers_try[i + 1:] if m not in tried), None) if ROUTER_HEDGE else None
+            if backup is not None:
+                model, out = _hedged_call(model, backup, prompt, user_id, tried, **kw)
+                prov = MODEL_META.get(model, {}).get("provider")
+            else:
+                tried.add(model)
+                out = _timed_call(model, prompt, **kw)
+            return _finish(prompt, cache_key, model, prov, out, task_type, user_id, distill_log,
+                           system=system)
 
-            # ---- panggil provider ----
-            out = _call_provider(model, prompt,
-                                 max_tokens=max_tokens, temperature=temperature,
-                                 tools=tools, system=system)
-
-            # ---- usage & cost ----
-            usage   = out.get("usage") or {}
-            in_tok  = int(usage.get("in",  usage.get("prompt_tokens", 0)))
-            out_tok = int(usage.get("out", usage.get("completion_tokens", 0)))
-            cost    = _est_cost_usd(model, in_tok, out_tok)
-
-            # ---- akuntansi ----
-            total_global = budget_inc_usd(cost)
-            try: total_user = budget_inc_usd_user(user_id, cost)
-            except Exception: total_user = None
-            try:
-                if prov in {"openai","anthropic","openai_image","elevenlabs","local_video"}:
-                    provider_spend_inc(prov, cost)
-            except Exception:
-                pass
-            
-            # ---- normalize + fallback usage ----
-            txt = (out.get("text") or out.get("output") or "") if isinstance(out, dict) else ""
-            usage = out.get("usage") or {}
-            in_tok  = int(usage.get("in",  usage.get("prompt_tokens", 0)) or 0)
-            out_tok = int(usage.get("out", usage.get("completion_tokens", 0)) or 0)
-
-            # Fallback kasar jika adapter tidak isi usage
-            if in_tok == 0:
-                in_tok = max(1, len(prompt) // 4)
-            if out_tok == 0:
-                out_tok = max(1, len(txt) // 4)
-            usage = {"in": in_tok, "out": out_tok}
-            cost  = _est_cost_usd(model, in_tok, out_tok)
-
-            result = {
-                "text": out.get("text") or out.get("output") or "",
-                "model": model,
-                "usage": {"in": in_tok, "out": out_tok},
-                "cost_usd": cost
-            }
-
-            # ---- cache ----
-            cache_set(cache_key, result, CACHE_TTL)
-
-            # ---- optional: raw router distill log ----
-            if distill_log or ROUTER_DISTILL_LOG:
-                try:
-                    os.makedirs(DISTILL_DIR, exist_ok=True)
-                    with open(os.path.join(DISTILL_DIR, f"{int(time.time()*1000)}.json"), "w", encoding="utf-8") as f:
-                        json.dump({
-                            "prompt": prompt, "model": model,
-                            "output": result["text"], "usage": result["usage"],
-                            "cost": cost
-                        }, f, ensure_ascii=False)
-                except Exception:
-                    pass
-
-            # ---- router usage trace ----
-            _log_jsonl(USAGE_LOG_PATH, {
-                "ts": _now_s(), "user": user_id, "task": task_type, "model": model,
-                "cost_usd": cost, "usage": result["usage"],
-                "budget_today_global": total_global,
-                **({"budget_today_user": total_user} if total_user is not None else {})
-            })
-
-            cb_record_success(prov)
-            return {**result, "cached": False}
+        except InflightExceeded:
+            err_last = "inflight_limit"
+            continue
+        except UserCapExceeded as e:
+            err_last = str(e)
+            break
+        except Exception as e:
+            err_last = str(e)
+            cb_record_error(prov)
+            time.sleep(0.2)
+            continue
+        finally:
+            inflight_dec(user_id)
+
+    return _route_failure(prompt, picked, task_type, user_id, err_last)
+
+# ====== ASYNC ENTRYPOINT (native asyncio, HTTP pooled) ======
+# single-flight per event loop: future hanya boleh di-await di loop pembuatnya
+# (tiap worker thread bisa punya loop sendiri); entri hilang saat loop di-GC
+_aflight: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Future]]" = weakref.WeakKeyDictionary()
+_aflight_lock = threading.Lock()
+
+async def aroute_and_generate(prompt: str,
+                              task_type: str = "default",
+                              modalities: Optional[set] = None,
+                              need_ctx: int = 8_000,
+                              user_id: Optional[str] = None,
+                              max_tokens: int = 1024,
+                              temperature: float = 0.2,
+                              tools: Optional[List[Dict[str, Any]]] = None,
+                              system: Optional[str] = None,
+                              distill_log: bool = False) -> Dict[str, Any]:
+    """
+    Versi async route_and_generate: guard/budget/cache sama, provider dipanggil lewat
+    LLMClient.achat (keep-alive pool + limit konkurensi per provider), tanpa threadpool.
+    Request identik yang in-flight di event loop yang sama digabung (single-flight).
+    """
+    prompt, cache_key, early = _prepare(prompt, task_type, modalities, need_ctx, user_id,
+                                        max_tokens, temperature, tools, system)
+    if early is not None:
+        return early
+    loop = asyncio.get_running_loop()
+    with _aflight_lock:
+        flights = _aflight.setdefault(loop, {})
+    fut = flights.get(cache_key)
+    if fut is not None:
+        res = await asyncio.shield(fut)
+        return {**_normalize_router_result(prompt, res), "cached": True, "coalesced": True}
+    fut = flights[cache_key] = loop.create_future()
+    try:
+        res = await _aroute_uncached(prompt, cache_key, task_type, modalities, need_ctx, user_id,
+                                     max_tokens, temperature, tools, system, distill_log)
+        fut.set_result(res)
+        return res
+    except BaseException as e:
+        fut.set_exception(e)
+        fut.exception()  # tandai sudah diambil kalau tidak ada waiter
+        raise
+    finally:
+        flights.pop(cache_key, None)
+
+async def _aroute_uncached(prompt, cache_key, task_type, modalities, need_ctx, user_id,
+                           max_tokens, temperature, tools, system, distill_log) -> Dict[str, Any]:
+    picked, providers_try, blocked = _route_gate(prompt, task_type, modalities, need_ctx, user_id)
+    if blocked is not None:
+        return blocked
 
+    err_last = None
+    tried: set = set()
+    for i, model in enumerate(providers_try):
+        if model in tried:
+            continue
+        prov = MODEL_META.get(model, {}).get("provider")
+        try:
+            capped = _user_cap_check(prompt, model, user_id, max_tokens)
+            if capped is not None:
+                return capped
+            inflight_inc(user_id)
+            if not cb_allow(prov):
+                err_last = f"provider_circuit_open:{prov}"
+                continue
+            kw = dict(max_tokens=max_tokens, temperature=temperature, tools=tools, system=system)
+            backup = next((m for m in providers_try[i + 1:] if m not in tried), None) if ROUTER_HEDGE else None
+            if backup is not None:
+                model, out = await _ahedged_call(model, backup, prompt, user_id, tried, **kw)
+                prov = MODEL_META.get(model, {}).get("provider")
+            else:
+                tried.add(model)
+                out = await _atimed_call(model, prompt, **kw)
+            return _finish(prompt, cache_key, model, prov, out, task_type, user_id, distill_log,
+                           system=system)
         except InflightExceeded:
             err_last = "inflight_limit"
             continue
@@ -755,20 +1093,235 @@ def route_and_generate(prompt: str,
         except Exception as e:
             err_last = str(e)
             cb_record_error(prov)
+            await asyncio.sleep(0.2)
+            continue
+        finally:
+            inflight_dec(user_id)
+
+    return _route_failure(prompt, picked, task_type, user_id, err_last)
+
+# ====== STREAMING ENTRYPOINT (token per token) ======
+STREAM_ACCOUNT_TOKENS = int(os.getenv("LLM_STREAM_ACCOUNT_TOKENS", "256"))
+
+class _StreamMeter:
+    """Kumpulkan potongan teks + catat biaya bertahap (token dihitung per delta) selama stream."""
+
+    def __init__(self, prompt: str, model: str, prov: Optional[str], user_id: Optional[str],
+                 system: Optional[str] = None):
+        self.prompt, self.model, self.prov, self.user_id = prompt, model, prov, user_id
+        self.system = system
+        self.parts: List[str] = []
+        self.chars = 0
+        self.out_tok = 0
+        self.usage: Dict[str, int] = {}
+        self.charged = 0.0
+        self.truncated = False
+        self._est_in = max(1, _in_tokens(prompt, system, model))
+        self._mark = 0
+
+    def feed(self, ev: Dict[str, Any]) -> Optional[str]:
+        """Return potongan teks (atau None). Set truncated kalau cap user habis."""
+        for k, v in (ev.get("usage") or {}).items():
+            if v:
+                self.usage[k] = int(v)
+        delta = ev.get("delta")
+        if not delta:
+            return None
+        self.parts.append(delta)
+        self.chars += len(delta)
+        self.out_tok += count_tokens(delta, self.model)
+        if self.out_tok - self._mark >= STREAM_ACCOUNT_TOKENS:
+            self._mark = self.out_tok
+            est = _est_cost_usd(self.model, self.usage.get("in", self._est_in), self.out_tok,
+                                self.usage.get("cached_in", 0), self.usage.get("cache_write", 0))
+            if est > self.charged:
+                _charge(self.prov, self.user_id, est - self.charged)
+                self.charged = est
+            if self.user_id and _user_cap_left(self.user_id) <= 0:
+                self.truncated = True
+        return delta
+
+    def finish(self, cache_key, task_type, distill_log, partial: bool = False) -> Dict[str, Any]:
+        out = {
+            "text": "".join(self.parts),
+            "usage": {
+                **self.usage,
+                "in": self.usage.get("in") or self._est_in,
+                "out": self.usage.get("out") or max(1, self.out_tok),
+            },
+        }
+        res = _finish(self.prompt, cache_key, self.model, self.prov, out, task_type, self.user_id,
+                      distill_log, charged=self.charged, cacheable=not (partial or self.truncated),
+                      system=self.system)
+        if self.truncated:
+            res["truncated"] = True
+        if partial:
+            res["partial"] = True
+        return res
+
+def _stream_whole(res: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # cache hit / hasil blok: kirim utuh sebagai satu delta
+    return [{"type": "delta", "text": res.get("text", "")}, {"type": "done", **res}]
+
+def _stream_provider(model: str, prompt: str, **kw) -> Iterator[Dict[str, Any]]:
+    from javu_agi.llm.client import get_client
+    provider = "anthropic" if MODEL_META.get(model, {}).get("provider") == "anthropic" else "openai"
+    return get_client().stream(provider, model, _messages(prompt, kw.get("system")), **_client_kw(kw, model))
+
+def _astream_provider(model: str, prompt: str, **kw) -> AsyncIterator[Dict[str, Any]]:
+    from javu_agi.llm.client import get_client
+    provider = "anthropic" if MODEL_META.get(model, {}).get("provider") == "anthropic" else "openai"
+    return get_client().astream(provider, model, _messages(prompt, kw.get("system")), **_client_kw(kw, model))
+
+def stream_and_generate(prompt: str,
+                        task_type: str = "default",
+                        modalities: Optional[set] = None,
+                        need_ctx: int = 8_000,
+                        user_id: Optional[str] = None,
+                        max_tokens: int = 1024,
+                        temperature: float = 0.2,
+                        tools: Optional[List[Dict[str, Any]]] = None,
+                        system: Optional[str] = None,
+                        distill_log: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    Versi streaming route_and_generate. Yield:
+      {"type": "delta", "text": str}                  potongan jawaban
+      {"type": "done", **hasil_route_and_generate}    sekali di akhir (text lengkap, usage, cost)
+    Cache hit / blok guard -> satu delta berisi teks penuh lalu done.
+    Biaya dicatat tiap LLM_STREAM_ACCOUNT_TOKENS token, direkonsiliasi dengan usage
+    provider di akhir; stream dipotong (truncated) kalau cap user habis.
+    Fallback ke model lain hanya sebelum token pertama terkirim.
+    """
+    prompt, cache_key, early = _prepare(prompt, task_type, modalities, need_ctx, user_id,
+                                        max_tokens, temperature, tools, system)
+    picked = None
+    if early is None:
+        picked, providers_try, early = _route_gate(prompt, task_type, modalities, need_ctx, user_id)
+    if early is not None:
+        yield from _stream_whole(early)
+        return
+
+    err_last = None
+    for model in providers_try:
+        prov = MODEL_META.get(model, {}).get("provider")
+        meter = None
+        try:
+            capped = _user_cap_check(prompt, model, user_id, max_tokens)
+            if capped is not None:
+                yield from _stream_whole(capped)
+                return
+            inflight_inc(user_id)
+            if not cb_allow(prov):
+                err_last = f"provider_circuit_open:{prov}"
+                continue
+            meter = _StreamMeter(prompt, model, prov, user_id, system)
+            gen = _stream_provider(model, prompt, max_tokens=max_tokens, temperature=temperature,
+                                   tools=tools, system=system)
+            try:
+                for ev in gen:
+                    delta = meter.feed(ev)
+                    if delta:
+                        yield {"type": "delta", "text": delta}
+                    if meter.truncated:
+                        break
+            finally:
+                gen.close()  # lepas koneksi HTTP walau consumer berhenti di tengah
+            res = meter.finish(cache_key, task_type, distill_log)
+            yield {"type": "done", **res, "cached": False}
+            return
+        except InflightExceeded:
+            err_last = "inflight_limit"
+            continue
+        except UserCapExceeded as e:
+            err_last = str(e)
+            break
+        except Exception as e:
+            err_last = str(e)
+            if meter is not None and meter.parts:
+                # token sudah terkirim: jangan ganti model di tengah jawaban
+                res = meter.finish(cache_key, task_type, distill_log, partial=True)
+                cb_record_error(prov)
+                yield {"type": "done", **res, "cached": False, "error": err_last}
+                return
+            cb_record_error(prov)
             time.sleep(0.2)
             continue
         finally:
             inflight_dec(user_id)
 
-    # ---- total failure ----
-    _log_jsonl(USAGE_LOG_PATH, {"ts": _now_s(), "user": user_id, "task": task_type, "error": err_last, "picked": picked})
-    return _normalize_router_result(prompt, {
-        "text": "(router failure; try later)",
-        "model": picked,
-        "usage": {"in": 0, "out": 0},
-        "cost_usd": 0.0,
-        "cached": False
-    })
+    yield from _stream_whole(_route_failure(prompt, picked, task_type, user_id, err_last))
+
+async def astream_and_generate(prompt: str,
+                               task_type: str = "default",
+                               modalities: Optional[set] = None,
+                               need_ctx: int = 8_000,
+                               user_id: Optional[str] = None,
+                               max_tokens: int = 1024,
+                               temperature: float = 0.2,
+                               tools: Optional[List[Dict[str, Any]]] = None,
+                               system: Optional[str] = None,
+                               distill_log: bool = False) -> AsyncIterator[Dict[str, Any]]:
+    """Versi async stream_and_generate (LLMClient.astream); event sama."""
+    prompt, cache_key, early = _prepare(prompt, task_type, modalities, need_ctx, user_id,
+                                        max_tokens, temperature, tools, system)
+    picked = None
+    if early is None:
+        picked, providers_try, early = _route_gate(prompt, task_type, modalities, need_ctx, user_id)
+    if early is not None:
+        for ev in _stream_whole(early):
+            yield ev
+        return
+
+    err_last = None
+    for model in providers_try:
+        prov = MODEL_META.get(model, {}).get("provider")
+        meter = None
+        try:
+            capped = _user_cap_check(prompt, model, user_id, max_tokens)
+            if capped is not None:
+                for ev in _stream_whole(capped):
+                    yield ev
+                return
+            inflight_inc(user_id)
+            if not cb_allow(prov):
+                err_last = f"provider_circuit_open:{prov}"
+                continue
+            meter = _StreamMeter(prompt, model, prov, user_id, system)
+            agen = _astream_provider(model, prompt, max_tokens=max_tokens, temperature=temperature,
+                                     tools=tools, system=system)
+            try:
+                async for ev in agen:
+                    delta = meter.feed(ev)
+                    if delta:
+                        yield {"type": "delta", "text": delta}
+                    if meter.truncated:
+                        break
+            finally:
+                await agen.aclose()
+            res = meter.finish(cache_key, task_type, distill_log)
+            yield {"type": "done", **res, "cached": False}
+            return
+        except InflightExceeded:
+            err_last = "inflight_limit"
+            continue
+        except UserCapExceeded as e:
+            err_last = str(e)
+            break
+        except Exception as e:
+            err_last = str(e)
+            if meter is not None and meter.parts:
+                res = meter.finish(cache_key, task_type, distill_log, partial=True)
+                cb_record_error(prov)
+                yield {"type": "done", **res, "cached": False, "error": err_last}
+                return
+            cb_record_error(prov)
+            await asyncio.sleep(0.2)
+            continue
+        finally:
+            inflight_dec(user_id)
+
+    for ev in _stream_whole(_route_failure(prompt, picked, task_type, user_id, err_last)):
+        yield ev
 
 def run_multimodal_task(task: str) -> dict:
     """
@@ -915,6 +1468,25 @@ class LLMRouter:
 
         return res
 
+    def stream(self, prompt: str, **kw) -> Iterator[Dict[str, Any]]:
+        """Event delta/done dari stream_and_generate."""
+        kw["task_type"] = kw.get("task_type") or self.default_task
+        return stream_and_generate(prompt, **kw)
+
+    def astream(self, prompt: str, **kw) -> AsyncIterator[Dict[str, Any]]:
+        kw["task_type"] = kw.get("task_type") or self.default_task
+        return astream_and_generate(prompt, **kw)
+
+    async def acall(self, prompt: str, **kw) -> Dict[str, Any]:
+        """Versi async call(): aroute_and_generate, tanpa threadpool."""
+        kw["task_type"] = kw.get("task_type") or self.default_task
+        res = await aroute_and_generate(prompt, **kw)
+        u = dict(res.get("usage") or {})
+        u.setdefault("prompt_tokens", int(u.get("in", 0)))
+        u.setdefault("completion_tokens", int(u.get("out", 0)))
+        res["usage"] = u
+        return res
+
 def post_refine(text: str, constitution: list[str], guidance: str) -> str:
     if not text:
         return text
@@ -929,3 +1501,17 @@ def route_and_generate(*a, **kw):
     kw.pop("distill_log", None)
     return _orig_route_and_generate(*a, distill_log=False, **kw)
 
+_orig_aroute_and_generate = aroute_and_generate
+async def aroute_and_generate(*a, **kw):
+    kw.pop("distill_log", None)
+    return await _orig_aroute_and_generate(*a, distill_log=False, **kw)
+
+_orig_stream_and_generate = stream_and_generate
+def stream_and_generate(*a, **kw):
+    kw.pop("distill_log", None)
+    return _orig_stream_and_generate(*a, distill_log=False, **kw)
+
+_orig_astream_and_generate = astream_and_generate
+def astream_and_generate(*a, **kw):
+    kw.pop("distill_log", None)
+    return _orig_astream_and_generate(*a, distill_log=False, **kw)
@@ -2,23 +2,14 @@ from __future__ import annotations
 import math, random, time, json, os
 from typing import Dict, List, Tuple, Any
 
-_DIM = 128
-
+from javu_agi.vector.embedder import get_embedder
 
-def _h(s: str) -> int:
-    x = 2166136261
-    for c in s or "":
-        x = (x ^ ord(c)) * 16777619 & 0xFFFFFFFF
-    return x
+_DIM = 128
 
 
 def _feat(text: str) -> List[float]:
-    v = [0.0] * _DIM
-    for tok in (text or "").lower().split():
-        i = _h(tok) % _DIM
-        v[i] += 1.0
-    n = math.sqrt(sum(t * t for t in v)) or 1.0
-    return [t / n for t in v]
+    # bag-of-token FNV (embedder bersama, cached)
+    return get_embedder(_DIM, mode="token").embed(text or "").tolist()
 
 
 def _dot(a: List[float], b: List[float]) -> float:
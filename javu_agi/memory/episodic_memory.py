@@ -1,30 +1,138 @@
-import json
+import json, os, sqlite3, sys, threading, time
 from pathlib import Path
-from typing import List
-from .schemas import Episode
+from typing import List, Optional
+from .memory_schemas import Episode
 from datetime import datetime
 
-EPISODIC_DIR = Path("data/memory/episodic")
+EPISODIC_DIR = Path("data/memory/episodic")  # format lama: satu file JSON per episode
+EPISODIC_DB = Path(os.getenv("EPISODIC_DB", "data/memory/episodic.db"))
 EPISODIC_DIR.mkdir(parents=True, exist_ok=True)
 
+SCHEMA = """
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+CREATE TABLE IF NOT EXISTS episodes(
+  episode_id TEXT PRIMARY KEY,
+  ts REAL NOT NULL,
+  user_id TEXT,
+  prompt TEXT,
+  data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_episodes_ts ON episodes(ts);
+CREATE INDEX IF NOT EXISTS idx_episodes_prompt ON episodes(prompt);
+CREATE TABLE IF NOT EXISTS meta(k TEXT PRIMARY KEY, v TEXT);
+"""
+
 
 class EpisodicMemory:
-    def __init__(self):
-        self.path = EPISODIC_DIR
+    """
+    Episode di SQLite (WAL) dengan index ts/prompt: recall_recent, recall_by_id,
+    list dan delete_text jadi lookup index (O(log n)), bukan glob + stat semua file.
+    Folder JSON lama di-import sekali (import_dir) saat DB masih kosong.
+    """
+
+    def __init__(self, path: Optional[Path] = None, legacy_dir: Optional[Path] = None):
+        self.path = Path(path or EPISODIC_DB)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self.db:
+            self.db.executescript(SCHEMA)
+        if legacy_dir is None and path is None:
+            legacy_dir = EPISODIC_DIR
+        if legacy_dir and os.getenv("EPISODIC_AUTO_IMPORT", "1") == "1":
+            self._auto_import(Path(legacy_dir))
+
+    @staticmethod
+    def _row(episode: Episode, ts: Optional[float] = None):
+        data = json.dumps(episode.dict(), ensure_ascii=False, default=str)
+        return (
+            episode.episode_id,
+            time.time() if ts is None else ts,
+            episode.user_id,
+            episode.prompt,
+            data,
+        )
 
     def store(self, episode: Episode):
-        file = self.path / f"{episode.episode_id}.json"
-        with open(file, "w", encoding="utf-8") as f:
-            json.dump(episode.dict(), f, ensure_ascii=False, indent=2)
+        with self._lock, self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO episodes(episode_id,ts,user_id,prompt,data) "
+                "VALUES(?,?,?,?,?)",
+                self._row(episode),
+            )
+
+    def _query(self, sql: str, args=()) -> List[Episode]:
+        with self._lock:
+            rows = self.db.execute(sql, args).fetchall()
+        return [Episode(**json.loads(r[0])) for r in rows]
 
     def recall_recent(self, limit=5) -> List[Episode]:
-        files = sorted(
-            self.path.glob("*.json"), key=lambda x: x.stat().st_mtime, reverse=True
-        )[:limit]
-        return [Episode(**json.load(open(f))) for f in files]
+        return self._query(
+            "SELECT data FROM episodes ORDER BY ts DESC, rowid DESC LIMIT ?", (int(limit),)
+        )
+
+    def list(self, limit=500) -> List[Episode]:
+        return self.recall_recent(limit=limit)
 
     def recall_by_id(self, episode_id: str) -> Episode:
-        file = self.path / f"{episode_id}.json"
-        if file.exists():
-            return Episode(**json.load(open(file)))
-        return None
+        out = self._query("SELECT data FROM episodes WHERE episode_id=?", (episode_id,))
+        return out[0] if out else None
+
+    def delete_text(self, text: str) -> int:
+        with self._lock, self.db:
+            return self.db.execute("DELETE FROM episodes WHERE prompt=?", (text,)).rowcount
+
+    # ---- import folder JSON lama ----
+    def import_dir(self, src: Path = EPISODIC_DIR, batch: int = 2000) -> int:
+        """Bulk import *.json (ts = mtime file, supaya urutan recent tetap). Idempotent."""
+        src = Path(src)
+        if not src.is_dir():
+            return 0
+        n = 0
+        rows = []
+
+        def flush():
+            with self._lock, self.db:
+                self.db.executemany(
+                    "INSERT OR IGNORE INTO episodes(episode_id,ts,user_id,prompt,data) "
+                    "VALUES(?,?,?,?,?)",
+                    rows,
+                )
+            rows.clear()
+
+        with os.scandir(src) as it:
+            for entry in it:
+                if not entry.name.endswith(".json"):
+                    continue
+                try:
+                    with open(entry.path, encoding="utf-8") as f:
+                        ep = Episode(**json.load(f))
+                    rows.append(self._row(ep, ts=entry.stat().st_mtime))
+                except Exception:
+                    continue
+                n += 1
+                if len(rows) >= batch:
+                    flush()
+        if rows:
+            flush()
+        return n
+
+    def _auto_import(self, src: Path):
+        with self._lock:
+            done = self.db.execute("SELECT v FROM meta WHERE k='legacy_imported'").fetchone()
+        if done:
+            return
+        self.import_dir(src)
+        with self._lock, self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO meta(k,v) VALUES('legacy_imported',?)",
+                (datetime.utcnow().isoformat(),),
+            )
+
+
+if __name__ == "__main__":
+    # python -m javu_agi.memory.episodic_memory [dir_json_lama]
+    src = Path(sys.argv[1]) if len(sys.argv) > 1 else EPISODIC_DIR
+    os.environ["EPISODIC_AUTO_IMPORT"] = "0"
+    print("imported:", EpisodicMemory().import_dir(src))
@@ -1,26 +1,136 @@
 from javu_agi.memory.memory_schemas import SemanticFact
-from typing import List
+from typing import List, Optional
 from datetime import datetime
-import json
+import json, os, re, sqlite3, threading
 from pathlib import Path
 
-SEMANTIC_FILE = Path("data/memory/semantic.json")
+SEMANTIC_FILE = Path("data/memory/semantic.json")  # format lama; dimigrasi sekali ke SQLite
+SEMANTIC_DB = Path(os.getenv("SEMANTIC_DB", "data/memory/semantic.db"))
 SEMANTIC_FILE.parent.mkdir(parents=True, exist_ok=True)
 
+SCHEMA = """
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+CREATE TABLE IF NOT EXISTS facts(
+  fact_id TEXT PRIMARY KEY,
+  content TEXT NOT NULL,
+  source TEXT,
+  confidence REAL,
+  timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_facts_content ON facts(content);
+CREATE INDEX IF NOT EXISTS idx_facts_ts ON facts(timestamp);
+CREATE VIRTUAL TABLE IF NOT EXISTS facts_fts USING fts5(
+  content, content='facts', content_rowid='rowid',
+  tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS facts_ai AFTER INSERT ON facts BEGIN
+  INSERT INTO facts_fts(rowid, content) VALUES (new.rowid, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS facts_ad AFTER DELETE ON facts BEGIN
+  INSERT INTO facts_fts(facts_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS facts_au AFTER UPDATE OF content ON facts BEGIN
+  INSERT INTO facts_fts(facts_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+  INSERT INTO facts_fts(rowid, content) VALUES (new.rowid, new.content);
+END;
+"""
+
+_COLS = "f.fact_id, f.content, f.source, f.confidence, f.timestamp"
+
+
+def _fts_query(query: str) -> str:
+    # token -> prefix term ber-quote, digabung OR; bm25 yang urutkan relevansi
+    toks = re.findall(r"\w+", (query or "").lower())
+    return " OR ".join(f'"{t}"*' for t in dict.fromkeys(toks))
+
 
 class SemanticMemory:
-    def __init__(self):
-        if not SEMANTIC_FILE.exists():
-            json.dump([], open(SEMANTIC_FILE, "w"))
+    """
+    Fakta semantik di SQLite (WAL) + index FTS5 (ranking BM25).
+    store = satu INSERT (bukan rewrite file), search = query FTS.
+    """
+
+    def __init__(self, path: Optional[Path] = None, legacy_file: Optional[Path] = None):
+        self.path = Path(path or SEMANTIC_DB)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self.db:
+            self.db.executescript(SCHEMA)
+        if legacy_file is None and path is None:
+            legacy_file = SEMANTIC_FILE
+        self._migrate_json(legacy_file)
+
+    def _migrate_json(self, legacy: Optional[Path]):
+        legacy = Path(legacy) if legacy else None
+        if legacy is None or not legacy.exists():
+            return
+        try:
+            data = json.load(open(legacy, encoding="utf-8")) or []
+        except Exception:
+            return
+        rows = []
+        for f in data:
+            try:
+                rows.append(self._row(SemanticFact(**f)))
+            except Exception:
+                continue
+        with self._lock, self.db:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO facts(fact_id,content,source,confidence,timestamp) "
+                "VALUES(?,?,?,?,?)",
+                rows,
+            )
+        legacy.rename(legacy.with_name(legacy.name + ".migrated"))
+
+    @staticmethod
+    def _row(fact: SemanticFact):
+        ts = fact.timestamp.isoformat() if isinstance(fact.timestamp, datetime) else fact.timestamp
+        return (fact.fact_id, fact.content, fact.source, float(fact.confidence), ts)
+
+    @staticmethod
+    def _fact(r) -> SemanticFact:
+        return SemanticFact(
+            fact_id=r[0], content=r[1], source=r[2] or "", confidence=r[3] or 0.0, timestamp=r[4]
+        )
 
     def store(self, fact: SemanticFact):
-        data = json.load(open(SEMANTIC_FILE))
-        data.append(fact.dict())
-        json.dump(data, open(SEMANTIC_FILE, "w"), ensure_ascii=False, indent=2)
+        # upsert (bukan REPLACE): REPLACE menghapus baris tanpa memicu trigger delete
+        # (recursive_triggers off) -> isi lama tertinggal di index FTS
+        with self._lock, self.db:
+            self.db.execute(
+                "INSERT INTO facts(fact_id,content,source,confidence,timestamp) VALUES(?,?,?,?,?) "
+                "ON CONFLICT(fact_id) DO UPDATE SET content=excluded.content, source=excluded.source, "
+                "confidence=excluded.confidence, timestamp=excluded.timestamp",
+                self._row(fact),
+            )
 
     def search(self, query: str, limit=5) -> List[SemanticFact]:
-        data = json.load(open(SEMANTIC_FILE))
-        # Simple BM25-like scoring
-        scored = [(f, query.lower() in f["content"].lower()) for f in data]
-        results = [SemanticFact(**f) for f, match in scored if match][:limit]
-        return results
+        q = _fts_query(query)
+        if not q:
+            return self.list(limit=limit)
+        sql = (
+            f"SELECT {_COLS} FROM facts_fts JOIN facts f ON f.rowid = facts_fts.rowid "
+            "WHERE facts_fts MATCH ? ORDER BY bm25(facts_fts) LIMIT ?"
+        )
+        with self._lock:
+            rows = self.db.execute(sql, (q, int(limit))).fetchall()
+        return [self._fact(r) for r in rows]
+
+    def list(self, limit=500) -> List[SemanticFact]:
+        with self._lock:
+            rows = self.db.execute(
+                f"SELECT {_COLS} FROM facts f ORDER BY f.timestamp DESC LIMIT ?", (int(limit),)
+            ).fetchall()
+        return [self._fact(r) for r in rows]
+
+    def update_text(self, old: str, new: str) -> int:
+        with self._lock, self.db:
+            return self.db.execute(
+                "UPDATE facts SET content=? WHERE content=?", (new, old)
+            ).rowcount
+
+    def delete_text(self, text: str) -> int:
+        with self._lock, self.db:
+            return self.db.execute("DELETE FROM facts WHERE content=?", (text,)).rowcount
@@ -1,10 +1,11 @@
-import os, sqlite3, time, json, math, struct
-from typing import List, Dict, Any, Optional
+import atexit, os, sqlite3, time, json, math, threading, weakref
+from typing import List, Dict, Any, Optional, Tuple
 import numpy as np
 
 DATA_DIR = os.getenv("DATA_DIR", "data")
 DB_PATH = os.getenv("MEMORY_DB", os.path.join(DATA_DIR, "memory.db"))
 EMB_DIM = int(os.getenv("EMBED_DIM", "1536"))
+INDEX_SAVE_EVERY = int(os.getenv("MEMORY_INDEX_SAVE_EVERY", "1000"))
 
 SCHEMA = """
 PRAGMA journal_mode=WAL;
@@ -25,18 +26,22 @@ CREATE TABLE IF NOT EXISTS vectors(
 );
 CREATE INDEX IF NOT EXISTS idx_ep_ts ON episodic(ts);
 CREATE INDEX IF NOT EXISTS idx_sem ON semantic(subj, pred, obj);
+CREATE TABLE IF NOT EXISTS vec_version(
+  kind TEXT PRIMARY KEY,
+  version INTEGER      -- naik tiap add_vector; validasi index in-process + sidecar
+);
 CREATE INDEX IF NOT EXISTS idx_vec_kind ON vectors(kind);
 """
 
 
 def _pack(v: np.ndarray) -> bytes:
-    v = v.astype(np.float32, copy=False).ravel()
-    return struct.pack(f"{len(v)}f", *v.tolist())
+    # layout sama dgn struct "f" lama (float32 native), tanpa list Python perantara
+    return np.ascontiguousarray(v, dtype=np.float32).reshape(-1).tobytes()
 
 
 def _unpack(b: bytes) -> np.ndarray:
-    n = len(b) // 4
-    return np.array(struct.unpack(f"{n}f", b), dtype=np.float32)
+    """View float32 read-only di atas blob (zero-copy); .copy() kalau mau dimodifikasi."""
+    return np.frombuffer(b, dtype=np.float32)
 
 
 def _cos(a: np.ndarray, b: np.ndarray) -> float:
@@ -45,12 +50,138 @@ def _cos(a: np.ndarray, b: np.ndarray) -> float:
     return float(np.dot(a, b) / (na * nb))
 
 
+class _VecIndex:
+    """
+    Index in-process untuk satu (kind, dim): matrix float32 ter-normalisasi + id + user.
+    Di-load sekali dari tabel vectors (atau sidecar .npy via mmap), lalu di-update
+    inkremental oleh add_vector. Row yang ditimpa ke kind lain ditandai mati (alive=False).
+    """
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.n = 0
+        self.mat = np.zeros((0, dim), dtype=np.float32)
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.ucodes = np.zeros(0, dtype=np.int32)
+        self.alive = np.zeros(0, dtype=bool)
+        self.pos: Dict[int, int] = {}
+        self.users: Dict[Optional[str], int] = {}
+        self.version = 0
+        self.dirty = 0
+
+    def _code(self, user: Optional[str]) -> int:
+        c = self.users.get(user)
+        if c is None:
+            c = self.users[user] = len(self.users)
+        return c
+
+    def _reserve(self, extra: int):
+        need = self.n + extra
+        cap = self.mat.shape[0]
+        if need <= cap and self.mat.flags.writeable:
+            return
+        cap = max(cap, 1024)
+        while cap < need:
+            cap *= 2
+        for name in ("mat", "ids", "ucodes", "alive"):
+            old = getattr(self, name)
+            grown = np.zeros((cap,) + old.shape[1:], dtype=old.dtype)
+            grown[: self.n] = old[: self.n]
+            setattr(self, name, grown)
+
+    def load(
+        self,
+        ids: np.ndarray,
+        mat: np.ndarray,
+        users: List[Optional[str]],
+        ucodes: Optional[np.ndarray] = None,
+    ):
+        """users = user per row, atau (kalau ucodes diisi) daftar user per kode."""
+        self.n = len(ids)
+        self.ids, self.mat = ids, mat
+        if ucodes is None:
+            ucodes = np.fromiter((self._code(u) for u in users), dtype=np.int32, count=self.n)
+        else:
+            self.users = {u: c for c, u in enumerate(users)}
+        self.ucodes = np.asarray(ucodes, dtype=np.int32)
+        self.alive = np.ones(self.n, dtype=bool)
+        self.pos = {int(i): r for r, i in enumerate(ids.tolist())}
+
+    def upsert(self, rid: int, vec: np.ndarray, user: Optional[str]):
+        r = self.pos.get(rid)
+        if r is None or not self.mat.flags.writeable:
+            self._reserve(1)
+        if r is None:
+            r = self.n
+            self.n += 1
+            self.pos[rid] = r
+            self.ids[r] = rid
+        self.mat[r] = vec
+        self.ucodes[r] = self._code(user)
+        self.alive[r] = True
+        self.dirty += 1
+
+    def drop(self, rid: int):
+        r = self.pos.get(rid)
+        if r is not None and self.alive[r]:
+            self.alive[r] = False
+            self.dirty += 1
+
+    def topk(self, q: np.ndarray, k: int, user: Optional[str] = None) -> List[Tuple[int, float]]:
+        if self.n == 0 or k <= 0:
+            return []
+        scores = self.mat[: self.n] @ q
+        mask = self.alive[: self.n]
+        if user is not None:
+            code = self.users.get(user)
+            if code is None:
+                return []
+            mask = mask & (self.ucodes[: self.n] == code)
+        cand = np.flatnonzero(mask)
+        if cand.size == 0:
+            return []
+        s = scores[cand]
+        k = min(k, cand.size)
+        top = np.argpartition(s, s.size - k)[s.size - k :]
+        top = top[np.argsort(-s[top], kind="stable")]
+        return [(int(self.ids[cand[i]]), float(s[i])) for i in top]
+
+
+_OPEN_DBS: "weakref.WeakSet[MemoryDB]" = weakref.WeakSet()
+
+
+@atexit.register
+def _save_open_indexes():
+    # shutdown: sisa update yang belum mencapai MEMORY_INDEX_SAVE_EVERY ikut ditulis
+    for db in list(_OPEN_DBS):
+        try:
+            db.save_index()
+        except Exception:
+            pass
+
+
+def _normalize(m: np.ndarray) -> np.ndarray:
+    m = np.asarray(m, dtype=np.float32)
+    norms = np.linalg.norm(m, axis=-1, keepdims=True) + 1e-9
+    return m / norms
+
+
 class MemoryDB:
     def __init__(self, path: str = DB_PATH):
         os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
         self.db = sqlite3.connect(path, check_same_thread=False)
         with self.db:
             self.db.executescript(SCHEMA)
+        self._lock = threading.RLock()
+        self._idx: Dict[Tuple[str, int], _VecIndex] = {}
+        # sidecar periodik ditulis thread latar; add_vector tidak pernah menunggu disk
+        self._save_io = threading.Lock()
+        self._save_cv = threading.Condition(threading.Lock())
+        self._save_want: set = set()
+        self._saver: Optional[threading.Thread] = None
+        self._saver_pid = 0
+        _OPEN_DBS.add(self)
 
     # ---- episodic ----
     def add_episode(self, user: str, task: str, text: str, meta: Dict[str, Any]) -> int:
@@ -63,11 +194,194 @@ class MemoryDB:
         return int(cur.lastrowid)
 
     def add_vector(self, row_id: int, kind: str, emb: np.ndarray):
-        with self.db:
-            self.db.execute(
+        self.add_vectors([row_id], kind, np.asarray(emb).reshape(1, -1))
+
+    def add_vectors(self, ids: List[int], kind: str, matrix: np.ndarray):
+        """Tulis banyak vector (N, dim) dalam satu transaksi (executemany)."""
+        ids = [int(i) for i in ids]
+        mat = np.ascontiguousarray(matrix, dtype=np.float32)
+        if mat.ndim != 2 or mat.shape[0] != len(ids):
+            raise ValueError("matrix must be (len(ids), dim)")
+        if not ids:
+            return
+        dim = int(mat.shape[1])
+        with self._lock, self.db:
+            moved = set()
+            for s in range(0, len(ids), 900):
+                chunk = ids[s : s + 900]
+                q = f"SELECT DISTINCT kind FROM vectors WHERE id IN ({','.join('?'*len(chunk))})"
+                moved.update(k for (k,) in self.db.execute(q, tuple(chunk)).fetchall())
+            self.db.executemany(
                 "INSERT OR REPLACE INTO vectors(id,kind,dim,vec) VALUES(?,?,?,?)",
-                (row_id, kind, len(emb), _pack(emb)),
+                ((rid, kind, dim, row.tobytes()) for rid, row in zip(ids, mat)),
             )
+            bumped = self._bump(kind)
+            for other in moved - {kind}:
+                self._bump(other)
+        self._index_upsert(ids, kind, _normalize(mat), bumped)
+
+    def load_vectors(self, kind: str, dim: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Semua vector satu kind sebagai (ids int64 (N,), matrix float32 (N, dim)) read-only.
+        dim=None -> dim yang paling banyak dipakai kind tsb.
+        """
+        if dim is None:
+            r = self.db.execute(
+                "SELECT dim FROM vectors WHERE kind=? GROUP BY dim ORDER BY COUNT(*) DESC LIMIT 1",
+                (kind,),
+            ).fetchone()
+            dim = int(r[0]) if r else EMB_DIM
+        rows = self.db.execute(
+            "SELECT id,vec FROM vectors WHERE kind=? AND dim=? ORDER BY id", (kind, dim)
+        ).fetchall()
+        ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+        mat = np.frombuffer(b"".join(r[1] for r in rows), dtype=np.float32)
+        return ids, mat.reshape(len(rows), dim)
+
+    # ---- vector index (in-process) ----
+    def _bump(self, kind: str) -> int:
+        """Naikkan versi tabel vectors per kind (dipakai validasi index/sidecar)."""
+        self.db.execute(
+            "INSERT INTO vec_version(kind,version) VALUES(?,1) "
+            "ON CONFLICT(kind) DO UPDATE SET version=version+1",
+            (kind,),
+        )
+        return self._version(kind)
+
+    def _version(self, kind: str) -> int:
+        r = self.db.execute("SELECT version FROM vec_version WHERE kind=?", (kind,)).fetchone()
+        return int(r[0]) if r else 0
+
+    def _sidecar(self, kind: str, dim: int) -> Optional[str]:
+        if self.path == ":memory:" or self.path.startswith("file:"):
+            return None
+        return f"{self.path}.{kind}.{dim}"
+
+    def _users_for(self, kind: str, ids: List[int]) -> List[Optional[str]]:
+        if kind != "episodic" or not ids:
+            return [None] * len(ids)
+        users: Dict[int, str] = {}
+        for s in range(0, len(ids), 900):
+            chunk = ids[s : s + 900]
+            q = f"SELECT id,user FROM episodic WHERE id IN ({','.join('?'*len(chunk))})"
+            users.update(self.db.execute(q, tuple(chunk)).fetchall())
+        return [users.get(i) for i in ids]
+
+    def _index(self, kind: str, dim: int) -> _VecIndex:
+        key = (kind, dim)
+        version = self._version(kind)
+        idx = self._idx.get(key)
+        if idx is not None and idx.version == version:
+            return idx
+        # belum di-load, atau proses lain menulis vectors -> load ulang
+        idx = _VecIndex(dim)
+        idx.version = version
+        side = self._sidecar(kind, dim)
+        loaded = False
+        if side and os.path.exists(side + ".json"):
+            try:
+                with open(side + ".json", "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+                if meta.get("version") == version:
+                    ids = np.load(side + ".ids.npy")
+                    ucodes = np.load(side + ".users.npy")
+                    mat = np.load(side + ".npy", mmap_mode="r")
+                    idx.load(ids, mat, meta["users"], ucodes=ucodes)
+                    loaded = True
+            except Exception:
+                loaded = False
+        if not loaded:
+            ids, mat = self.load_vectors(kind, dim)
+            idx.load(ids, _normalize(mat), self._users_for(kind, ids.tolist()))
+            idx.dirty = len(ids)
+        self._idx[key] = idx
+        return idx
+
+    def _index_upsert(self, ids: List[int], kind: str, mat: np.ndarray, version: int):
+        dim = int(mat.shape[1])
+        with self._lock:
+            # id vectors = PRIMARY KEY: kalau pindah kind/dim, matikan row lama
+            for key, other in self._idx.items():
+                if key != (kind, dim):
+                    for rid in ids:
+                        other.drop(rid)
+            idx = self._idx.get((kind, dim))
+            if idx is None:
+                return  # belum pernah di-load; load pertama baca dari DB
+            if idx.version != version - 1:
+                self._idx.pop((kind, dim), None)  # ada writer lain; reload saat recall
+                return
+            for rid, vec, user in zip(ids, mat, self._users_for(kind, ids)):
+                idx.upsert(rid, vec, user)
+            idx.version = version
+            if INDEX_SAVE_EVERY > 0 and idx.dirty >= INDEX_SAVE_EVERY:
+                self._schedule_save((kind, dim))
+
+    def _snapshot(self, kind: str, dim: int, idx: _VecIndex):
+        # dipanggil dengan _lock dipegang: salin row hidup (fancy index = copy), tanpa I/O
+        side = self._sidecar(kind, dim)
+        if not side:
+            return None
+        live = idx.alive[: idx.n]
+        users = [u for u, _c in sorted(idx.users.items(), key=lambda t: t[1])]
+        parts = {
+            ".npy": np.ascontiguousarray(idx.mat[: idx.n][live]),
+            ".ids.npy": idx.ids[: idx.n][live],
+            ".users.npy": idx.ucodes[: idx.n][live],
+        }
+        idx.dirty = 0
+        return side, parts, {"version": idx.version, "users": users}
+
+    def _write_snapshot(self, snap):
+        side, parts, meta = snap
+        with self._save_io:
+            for ext, arr in parts.items():
+                np.save(side + ".tmp" + ext, arr)
+                os.replace(side + ".tmp" + ext, side + ext)
+            # meta ditulis terakhir; versi beda -> rebuild dari DB
+            with open(side + ".json.tmp", "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(side + ".json.tmp", side + ".json")
+
+    def _schedule_save(self, key: Tuple[str, int]):
+        with self._save_cv:
+            self._save_want.add(key)
+            if self._saver is None or self._saver_pid != os.getpid():
+                # thread tidak ikut ter-fork: child memulai saver sendiri
+                self._saver_pid = os.getpid()
+                self._saver = threading.Thread(
+                    target=self._save_loop, name="memory-index-save", daemon=True
+                )
+                self._saver.start()
+            self._save_cv.notify()
+
+    def _save_loop(self):
+        while True:
+            with self._save_cv:
+                self._save_cv.wait_for(lambda: self._save_want)
+                keys = list(self._save_want)
+                self._save_want.clear()
+            for key in keys:
+                with self._lock:
+                    idx = self._idx.get(key)
+                    snap = self._snapshot(key[0], key[1], idx) if idx is not None else None
+                if snap is not None:
+                    try:
+                        self._write_snapshot(snap)
+                    except Exception:
+                        pass  # sidecar hanya cache; load berikutnya rebuild dari DB
+
+    def save_index(self):
+        """Tulis sidecar .npy (dibaca via mmap saat start) untuk index yang sudah di-load."""
+        with self._lock:
+            snaps = [
+                self._snapshot(kind, dim, idx)
+                for (kind, dim), idx in self._idx.items()
+                if idx.dirty
+            ]
+        for snap in snaps:
+            if snap is not None:
+                self._write_snapshot(snap)
 
     def recent_episodes(self, limit: int = 20) -> List[Dict[str, Any]]:
         q = "SELECT id,ts,user,task,text,meta FROM episodic ORDER BY id DESC LIMIT ?"
@@ -129,21 +443,20 @@ class MemoryDB:
 
     # ---- vector recall ----
     def recall(
-        self, qvec: np.ndarray, kind: str = "episodic", k: int = 5
+        self,
+        qvec: np.ndarray,
+        kind: str = "episodic",
+        k: int = 5,
+        user: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
-        rows = self.db.execute(
-            "SELECT id,dim,vec FROM vectors WHERE kind=?", (kind,)
-        ).fetchall()
-        scored = []
-        for rid, dim, vecb in rows:
-            v = _unpack(vecb)
-            if v.shape[0] != qvec.shape[0]:
-                continue
-            scored.append((rid, _cos(qvec, v)))
-        scored.sort(key=lambda x: x[1], reverse=True)
-        ids = [rid for rid, _ in scored[:k]]
+        q = np.asarray(qvec, dtype=np.float32).ravel()
+        q = q / (np.linalg.norm(q) + 1e-9)
+        with self._lock:
+            hits = self._index(kind, int(q.shape[0])).topk(q, k, user=user)
+        ids = [rid for rid, _ in hits]
         if not ids:
             return []
+        score = dict(hits)
         q = f"SELECT id,ts,user,task,text,meta FROM episodic WHERE id IN ({','.join('?'*len(ids))})"
         out = []
         for r in self.db.execute(q, tuple(ids)).fetchall():
@@ -155,6 +468,8 @@ class MemoryDB:
                     "task": r[3],
                     "text": r[4],
                     "meta": json.loads(r[5] or "{}"),
+                    "score": score[r[0]],
                 }
             )
+        out.sort(key=lambda d: d["score"], reverse=True)
         return out
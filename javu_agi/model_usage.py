@@ -24,10 +24,18 @@ def _normalize_model(model: str) -> str:
 
 def estimate_cost_usd(model: str, prompt_tokens: int, completion_tokens: int) -> float:
     key = _normalize_model(model)
-    p = PRICES.get(model, PRICES["gpt-4o"])
+    p = PRICES.get(key, PRICES["gpt-4o"])
     return prompt_tokens * p["prompt"] + completion_tokens * p["completion"]
 
 
+def estimate_cost_from_text(model: str, prompt: str, completion: str = "") -> dict:
+    """Token dihitung dengan tokenizer model (bukan len//4) lalu dihargai."""
+    from javu_agi.token_counter import count_tokens
+
+    pt, ct = count_tokens(prompt, model), count_tokens(completion, model)
+    return {"prompt_tokens": pt, "completion_tokens": ct, "cost_usd": estimate_cost_usd(model, pt, ct)}
+
+
 def price_profile(model: str) -> dict:
     key = _normalize_model(model)
     return {"model_key": key, **PRICES.get(key, PRICES["gpt-4o"])}
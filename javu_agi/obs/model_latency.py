@@ -0,0 +1,89 @@
+"""
+Histogram latency/error bergulir per model untuk llm_router.
+
+Sampel (ts, latency, ok) disimpan per model, dibatasi jumlah (max_samples) dan umur
+(window_s). Dipakai untuk:
+  - delay hedging: kuantil latency model utama (mis. p95)
+  - get_route: pilih model policy yang sedang lebih cepat/sehat
+"""
+
+from __future__ import annotations
+import math, threading, time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Optional, Tuple
+
+
+class ModelLatency:
+    def __init__(self, window_s: float = 300.0, max_samples: int = 512, min_samples: int = 20):
+        self.window_s = float(window_s)
+        self.max_samples = max(1, int(max_samples))
+        self.min_samples = max(1, int(min_samples))
+        self._d: Dict[str, Deque[Tuple[float, float, bool]]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model: str, latency_s: float, ok: bool = True):
+        with self._lock:
+            q = self._d.get(model)
+            if q is None:
+                q = self._d[model] = deque(maxlen=self.max_samples)
+            q.append((time.time(), float(latency_s), bool(ok)))
+
+    def _window(self, model: str):
+        cut = time.time() - self.window_s
+        with self._lock:
+            q = self._d.get(model)
+            if not q:
+                return []
+            while q and q[0][0] < cut:
+                q.popleft()
+            return list(q)
+
+    def quantile(self, model: str, q: float) -> Optional[float]:
+        """Kuantil latency request sukses; None kalau sampel < min_samples."""
+        lat = sorted(l for _, l, ok in self._window(model) if ok)
+        if len(lat) < self.min_samples:
+            return None
+        return lat[min(len(lat) - 1, int(math.ceil(q * len(lat))) - 1)]
+
+    def error_rate(self, model: str) -> float:
+        s = self._window(model)
+        return sum(1 for _, _, ok in s if not ok) / len(s) if s else 0.0
+
+    def score(self, model: str) -> Optional[float]:
+        """p50 dibagi porsi sukses (error tinggi -> skor buruk). None = belum cukup data."""
+        s = self._window(model)
+        if len(s) < self.min_samples:
+            return None
+        lat = sorted(l for _, l, ok in s if ok)
+        if not lat:
+            return math.inf
+        err = 1.0 - len(lat) / len(s)
+        return lat[len(lat) // 2] / max(0.05, 1.0 - err)
+
+    def pick(self, cand: str, pool: Iterable[str], ratio: float = 1.5) -> str:
+        """Ganti cand dengan model tercepat di pool hanya kalau cand > ratio x lebih lambat."""
+        cs = self.score(cand)
+        if cs is None:
+            return cand
+        best, bs = cand, cs
+        for m in pool:
+            s = self.score(m)
+            if s is not None and s < bs:
+                best, bs = m, s
+        return best if best != cand and bs * ratio < cs else cand
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            models = list(self._d)
+        out = {}
+        for m in models:
+            s = self._window(m)
+            if not s:
+                continue
+            out[m] = {
+                "n": len(s),
+                "p50": self.quantile(m, 0.5),
+                "p95": self.quantile(m, 0.95),
+                "error_rate": round(self.error_rate(m), 4),
+            }
+        return out
@@ -1,28 +1,480 @@
-import time, os
-from collections import deque, defaultdict
+"""
+Circuit breaker + health provider LLM, state dibagi antar worker.
 
-FAILS = defaultdict(lambda: deque(maxlen=64))
-OPEN = {}  # provider -> until_ts
+Satu-satunya breaker untuk llm_router & LLMClient. Per provider:
+  closed     semua request lewat; hasil dicatat di bucket waktu (PROVIDER_BUCKET_S)
+  open       ditolak sampai cooldown habis (trip: error rate / slow-call rate di window)
+  half_open  setelah cooldown: maksimal PROVIDER_PROBES request percobaan (lease
+             PROVIDER_PROBE_LEASE_S); sukses -> closed, gagal -> open lagi dengan
+             cooldown x2 (maks PROVIDER_BREAK_COOLDOWN_MAX_S)
 
+Backend state (PROVIDER_HEALTH_BACKEND=auto|redis|sqlite|memory):
+  redis   kalau REDIS_URL ada (multi-host)
+  sqlite  file lokal PROVIDER_HEALTH_DB (default di tempdir) -> semua proses di host sama
+  memory  per proses (test)
+Baca state di-cache lokal PROVIDER_HEALTH_CACHE_MS; worker yang men-trip langsung
+melihat state baru, worker lain paling lambat setelah TTL itu.
 
-def _now():
-    return time.time()
+Env window/threshold:
+  PROVIDER_BREAK_WINDOW_S    lebar window (60)
+  PROVIDER_BREAK_FAILS       error minimum di window untuk trip (5)
+  PROVIDER_BREAK_ERR_RATE    rasio error minimum untuk trip (0.5)
+  PROVIDER_BREAK_COOLDOWN_S  cooldown awal (90)
+  PROVIDER_SLOW_CALL_S       call >= ini dihitung lambat (20)
+  PROVIDER_SLOW_RATE         rasio call lambat untuk trip (0.8, min PROVIDER_BREAK_FAILS sampel)
+"""
 
+from __future__ import annotations
+import importlib, os, sqlite3, tempfile, threading, time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
 
+FIELDS = ("n", "fails", "lat_n", "lat_sum", "slow")
+_CLOSED = {"state": "closed", "until": 0.0, "cooldown": 0.0, "since": 0.0}
+
+
+class _MemoryBackend:
+    name = "memory"
+
+    def __init__(self):
+        self._b: Dict[str, Dict[int, Dict[str, float]]] = defaultdict(dict)
+        self._s: Dict[str, Dict[str, Any]] = {}
+        self._probes: Dict[str, List[float]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def add(self, p: str, b: int, inc: Dict[str, float]):
+        with self._lock:
+            row = self._b[p].setdefault(b, dict.fromkeys(FIELDS, 0.0))
+            for k, v in inc.items():
+                row[k] += v
+
+    def window(self, p: str, b_from: int) -> Dict[str, float]:
+        out = dict.fromkeys(FIELDS, 0.0)
+        with self._lock:
+            for b in [b for b in self._b[p] if b < b_from]:
+                del self._b[p][b]
+            for row in self._b[p].values():
+                for k in FIELDS:
+                    out[k] += row[k]
+        return out
+
+    def clear(self, p: str):
+        with self._lock:
+            self._b.pop(p, None)
+            self._probes.pop(p, None)
+
+    def get(self, p: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            st = self._s.get(p)
+            return dict(st) if st else None
+
+    def put(self, p: str, st: Dict[str, Any]):
+        with self._lock:
+            self._s[p] = dict(st)
+
+    def claim(self, p: str, max_probes: int, lease_s: float) -> bool:
+        now = time.time()
+        with self._lock:
+            live = [t for t in self._probes[p] if t > now]
+            if len(live) >= max_probes:
+                self._probes[p] = live
+                return False
+            self._probes[p] = live + [now + lease_s]
+            return True
+
+    def release(self, p: str):
+        with self._lock:
+            if self._probes.get(p):
+                self._probes[p].pop(0)
+
+    def providers(self) -> List[str]:
+        with self._lock:
+            return sorted(set(self._b) | set(self._s))
+
+
+class _SqliteBackend:
+    """Satu file untuk semua proses di host; koneksi per proses (aman setelah fork)."""
+
+    name = "sqlite"
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS ph_bucket(
+      p TEXT, b INTEGER, n REAL DEFAULT 0, fails REAL DEFAULT 0, lat_n REAL DEFAULT 0,
+      lat_sum REAL DEFAULT 0, slow REAL DEFAULT 0, PRIMARY KEY(p, b));
+    CREATE TABLE IF NOT EXISTS ph_state(
+      p TEXT PRIMARY KEY, state TEXT, until REAL, cooldown REAL, since REAL);
+    CREATE TABLE IF NOT EXISTS ph_probe(p TEXT, until REAL);
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._pid = None
+        self._con: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._con is None or self._pid != os.getpid():
+            d = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(d, exist_ok=True)
+            con = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            con.executescript(self.SCHEMA)
+            self._con, self._pid = con, os.getpid()
+        return self._con
+
+    def add(self, p: str, b: int, inc: Dict[str, float]):
+        cols = [k for k in FIELDS if k in inc]
+        sql = (
+            f"INSERT INTO ph_bucket(p, b, {', '.join(cols)}) VALUES (?, ?, {', '.join('?' * len(cols))}) "
+            f"ON CONFLICT(p, b) DO UPDATE SET {', '.join(f'{k} = {k} + excluded.{k}' for k in cols)}"
+        )
+        with self._lock:
+            self._db().execute(sql, (p, b, *[inc[k] for k in cols]))
+
+    def window(self, p: str, b_from: int) -> Dict[str, float]:
+        with self._lock:
+            db = self._db()
+            db.execute("DELETE FROM ph_bucket WHERE p=? AND b<?", (p, b_from))
+            row = db.execute(
+                f"SELECT {', '.join(f'COALESCE(SUM({k}), 0)' for k in FIELDS)} FROM ph_bucket WHERE p=?", (p,)
+            ).fetchone()
+        return dict(zip(FIELDS, map(float, row)))
+
+    def clear(self, p: str):
+        with self._lock:
+            db = self._db()
+            db.execute("DELETE FROM ph_bucket WHERE p=?", (p,))
+            db.execute("DELETE FROM ph_probe WHERE p=?", (p,))
+
+    def get(self, p: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db().execute(
+                "SELECT state, until, cooldown, since FROM ph_state WHERE p=?", (p,)
+            ).fetchone()
+        return dict(zip(("state", "until", "cooldown", "since"), row)) if row else None
+
+    def put(self, p: str, st: Dict[str, Any]):
+        with self._lock:
+            self._db().execute(
+                "INSERT OR REPLACE INTO ph_state(p, state, until, cooldown, since) VALUES (?,?,?,?,?)",
+                (p, st["state"], st["until"], st["cooldown"], st["since"]),
+            )
+
+    def claim(self, p: str, max_probes: int, lease_s: float) -> bool:
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")  # hitung + insert atomik antar proses
+            try:
+                db.execute("DELETE FROM ph_probe WHERE p=? AND until<=?", (p, now))
+                (live,) = db.execute("SELECT COUNT(*) FROM ph_probe WHERE p=?", (p,)).fetchone()
+                ok = live < max_probes
+                if ok:
+                    db.execute("INSERT INTO ph_probe(p, until) VALUES (?, ?)", (p, now + lease_s))
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        return ok
+
+    def release(self, p: str):
+        with self._lock:
+            self._db().execute(
+                "DELETE FROM ph_probe WHERE rowid = (SELECT MIN(rowid) FROM ph_probe WHERE p=?)", (p,)
+            )
+
+    def providers(self) -> List[str]:
+        with self._lock:
+            rows = self._db().execute("SELECT p FROM ph_state UNION SELECT p FROM ph_bucket").fetchall()
+        return sorted(r[0] for r in rows)
+
+
+class _RedisBackend:
+    name = "redis"
+
+    def __init__(self, r, prefix: str = "llm:health", ttl_s: int = 3600):
+        self.r, self.prefix, self.ttl_s = r, prefix, ttl_s
+
+    def _k(self, p: str, *parts) -> str:
+        return ":".join((self.prefix, p) + tuple(str(x) for x in parts))
+
+    def add(self, p: str, b: int, inc: Dict[str, float]):
+        k = self._k(p, "b", b)
+        pipe = self.r.pipeline()
+        for f, v in inc.items():
+            pipe.hincrbyfloat(k, f, v)
+        pipe.expire(k, self.ttl_s)
+        pipe.zadd(self._k(p, "buckets"), {str(b): b})
+        pipe.sadd(f"{self.prefix}:providers", p)
+        pipe.execute()
+
+    def window(self, p: str, b_from: int) -> Dict[str, float]:
+        zk = self._k(p, "buckets")
+        self.r.zremrangebyscore(zk, "-inf", b_from - 1)
+        out = dict.fromkeys(FIELDS, 0.0)
+        bs = self.r.zrange(zk, 0, -1)
+        if not bs:
+            return out
+        pipe = self.r.pipeline()
+        for b in bs:
+            pipe.hgetall(self._k(p, "b", b.decode() if isinstance(b, bytes) else b))
+        for row in pipe.execute():
+            for f, v in (row or {}).items():
+                f = f.decode() if isinstance(f, bytes) else f
+                if f in out:
+                    out[f] += float(v)
+        return out
+
+    def clear(self, p: str):
+        self.r.delete(self._k(p, "buckets"), *self.r.scan_iter(match=self._k(p, "probes", "*")))
+
+    def get(self, p: str) -> Optional[Dict[str, Any]]:
+        row = self.r.hgetall(self._k(p, "state"))
+        if not row:
+            return None
+        row = {(k.decode() if isinstance(k, bytes) else k): v for k, v in row.items()}
+        st = row["state"]
+        return {
+            "state": st.decode() if isinstance(st, bytes) else st,
+            "until": float(row["until"]), "cooldown": float(row["cooldown"]), "since": float(row["since"]),
+        }
+
+    def put(self, p: str, st: Dict[str, Any]):
+        self.r.hset(self._k(p, "state"), mapping={k: st[k] for k in ("state", "until", "cooldown", "since")})
+        self.r.sadd(f"{self.prefix}:providers", p)
+
+    def claim(self, p: str, max_probes: int, lease_s: float) -> bool:
+        # satu key per slot, SET NX PX: klaim + lease atomik (tidak ada counter tanpa TTL kalau crash)
+        px = max(1, int(lease_s * 1000))
+        for i in range(max(1, max_probes)):
+            if self.r.set(self._k(p, "probes", i), 1, nx=True, px=px):
+                return True
+        return False
+
+    def release(self, p: str):
+        for k in self.r.scan_iter(match=self._k(p, "probes", "*")):
+            if self.r.delete(k):
+                return
+
+    def providers(self) -> List[str]:
+        return sorted(x.decode() if isinstance(x, bytes) else x for x in self.r.smembers(f"{self.prefix}:providers"))
+
+
+class ProviderHealth:
+    def __init__(
+        self,
+        backend,
+        window_s: float = 60.0,
+        bucket_s: float = 5.0,
+        max_fails: int = 5,
+        err_rate: float = 0.5,
+        cooldown_s: float = 90.0,
+        cooldown_max_s: float = 600.0,
+        slow_call_s: float = 20.0,
+        slow_rate: float = 0.8,
+        probes: int = 1,
+        probe_lease_s: float = 10.0,
+        cache_ms: float = 50.0,
+    ):
+        self.backend = backend
+        self.window_s, self.bucket_s = float(window_s), max(0.1, float(bucket_s))
+        self.max_fails, self.err_rate = int(max_fails), float(err_rate)
+        self.cooldown_s, self.cooldown_max_s = float(cooldown_s), float(cooldown_max_s)
+        self.slow_call_s, self.slow_rate = float(slow_call_s), float(slow_rate)
+        self.probes, self.probe_lease_s = max(1, int(probes)), float(probe_lease_s)
+        self.cache_s = float(cache_ms) / 1000.0
+        self._cache: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self.m = defaultdict(int)
+
+    # ---------- state ----------
+    def _bucket(self, now: float) -> int:
+        return int(now // self.bucket_s)
+
+    def _state(self, p: str, fresh: bool = False) -> Dict[str, Any]:
+        now = time.time()
+        c = self._cache.get(p)
+        if c is not None and not fresh and now - c[0] < self.cache_s:
+            return c[1]
+        try:
+            st = self.backend.get(p) or dict(_CLOSED)
+        except Exception:
+            self.m["backend_errors"] += 1
+            st = c[1] if c is not None else dict(_CLOSED)
+        self._cache[p] = (now, st)
+        return st
+
+    def _set(self, p: str, st: Dict[str, Any]):
+        self._cache[p] = (time.time(), st)
+        try:
+            self.backend.put(p, st)
+        except Exception:
+            self.m["backend_errors"] += 1
+
+    # ---------- public ----------
+    def allow(self, p: str) -> bool:
+        """Boleh kirim request? Di half_open hanya pemegang slot probe yang boleh."""
+        if not p:
+            return True
+        st = self._state(p)
+        if st["state"] == "closed":
+            return True
+        if time.time() < st["until"]:
+            self.m["shed"] += 1
+            return False
+        try:
+            ok = self.backend.claim(p, self.probes, self.probe_lease_s)
+        except Exception:
+            self.m["backend_errors"] += 1
+            ok = False
+        if not ok:
+            self.m["shed"] += 1
+            return False
+        if st["state"] == "open":
+            self._set(p, {**st, "state": "half_open"})
+        self.m["probes"] += 1
+        return True
+
+    def is_open(self, p: str) -> bool:
+        """Open dan cooldown belum habis (tanpa mengambil slot probe)."""
+        st = self._state(p)
+        return st["state"] != "closed" and time.time() < st["until"]
+
+    def record(self, p: str, ok: bool):
+        """Hasil satu request (sukses/gagal). Di half_open = hasil probe."""
+        if not p:
+            return
+        now = time.time()
+        st = self._state(p)
+        if st["state"] != "closed":
+            st = self._state(p, fresh=True)
+        if st["state"] != "closed" and now >= st["until"]:
+            self._probe_result(p, st, ok, now)
+            return
+        self._add(p, now, {"n": 1.0, "fails": 0.0 if ok else 1.0}, trip=not ok and st["state"] == "closed")
+
+    def observe_latency(self, p: str, latency_s: float):
+        """Latency call sukses; call >= slow_call_s ikut dihitung untuk trip slow-rate."""
+        if not p:
+            return
+        slow = latency_s >= self.slow_call_s
+        self._add(p, time.time(), {"lat_n": 1.0, "lat_sum": float(latency_s), "slow": 1.0 if slow else 0.0},
+                  trip=slow and self._state(p)["state"] == "closed")
+
+    def _add(self, p: str, now: float, inc: Dict[str, float], trip: bool):
+        try:
+            self.backend.add(p, self._bucket(now), inc)
+            if trip:
+                self._maybe_trip(p, now)
+        except Exception:
+            self.m["backend_errors"] += 1
+
+    def _maybe_trip(self, p: str, now: float):
+        w = self.backend.window(p, self._bucket(now - self.window_s))
+        bad = w["fails"] >= self.max_fails and w["fails"] / max(1.0, w["n"]) >= self.err_rate
+        slow = w["lat_n"] >= self.max_fails and w["slow"] / w["lat_n"] >= self.slow_rate
+        if bad or slow:
+            self._open(p, self.cooldown_s, now, "slow" if slow and not bad else "errors")
+
+    def _open(self, p: str, cooldown: float, now: float, why: str):
+        self._set(p, {"state": "open", "until": now + cooldown, "cooldown": cooldown, "since": now})
+        self.m[f"trips_{why}"] += 1
+
+    def _probe_result(self, p: str, st: Dict[str, Any], ok: bool, now: float):
+        try:
+            self.backend.release(p)
+            if ok:
+                self.backend.clear(p)  # mulai window baru
+        except Exception:
+            self.m["backend_errors"] += 1
+        if ok:
+            self._set(p, {**_CLOSED, "since": now})
+            self.m["recovered"] += 1
+        else:
+            self._open(p, min(self.cooldown_max_s, max(self.cooldown_s, st["cooldown"] * 2)), now, "probe")
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.time()
+        out: Dict[str, Any] = {}
+        try:
+            provs = self.backend.providers()
+        except Exception:
+            provs = []
+        for p in provs:
+            st = self._state(p, fresh=True)
+            try:
+                w = self.backend.window(p, self._bucket(now - self.window_s))
+            except Exception:
+                w = dict.fromkeys(FIELDS, 0.0)
+            state = st["state"]
+            if state != "closed" and now >= st["until"]:
+                state = "half_open"
+            out[p] = {
+                "state": state,
+                "retry_in_s": round(max(0.0, st["until"] - now), 3) if state == "open" else 0.0,
+                "cooldown_s": st["cooldown"],
+                "since": st["since"],
+                "window": {
+                    "requests": int(w["n"]),
+                    "error_rate": round(w["fails"] / w["n"], 4) if w["n"] else 0.0,
+                    "avg_latency_s": round(w["lat_sum"] / w["lat_n"], 4) if w["lat_n"] else None,
+                    "slow_rate": round(w["slow"] / w["lat_n"], 4) if w["lat_n"] else 0.0,
+                },
+            }
+        return {"backend": self.backend.name, "providers": out, "counters": dict(self.m)}
+
+
+def _backend():
+    kind = os.getenv("PROVIDER_HEALTH_BACKEND", "auto")
+    url = os.getenv("REDIS_URL", "")
+    if kind in ("auto", "redis") and url:
+        try:
+            r = importlib.import_module("redis").Redis.from_url(url)
+            r.ping()
+            return _RedisBackend(r)
+        except Exception:
+            if kind == "redis":
+                raise
+    if kind == "memory":
+        return _MemoryBackend()
+    path = os.getenv("PROVIDER_HEALTH_DB", os.path.join(tempfile.gettempdir(), "javu_provider_health.db"))
+    try:
+        be = _SqliteBackend(path)
+        be._db()
+        return be
+    except Exception:
+        return _MemoryBackend()
+
+
+_health: Optional[ProviderHealth] = None
+_health_lock = threading.Lock()
+
+
+def get_health() -> ProviderHealth:
+    global _health
+    with _health_lock:
+        if _health is None:
+            _health = ProviderHealth(
+                _backend(),
+                window_s=float(os.getenv("PROVIDER_BREAK_WINDOW_S", "60")),
+                bucket_s=float(os.getenv("PROVIDER_BUCKET_S", "5")),
+                max_fails=int(os.getenv("PROVIDER_BREAK_FAILS", os.getenv("LLM_CB_ERR_LIMIT", "5"))),
+                err_rate=float(os.getenv("PROVIDER_BREAK_ERR_RATE", "0.5")),
+                cooldown_s=float(os.getenv("PROVIDER_BREAK_COOLDOWN_S", "90")),
+                cooldown_max_s=float(os.getenv("PROVIDER_BREAK_COOLDOWN_MAX_S", "600")),
+                slow_call_s=float(os.getenv("PROVIDER_SLOW_CALL_S", "20")),
+                slow_rate=float(os.getenv("PROVIDER_SLOW_RATE", "0.8")),
+                probes=int(os.getenv("PROVIDER_PROBES", "1")),
+                probe_lease_s=float(os.getenv("PROVIDER_PROBE_LEASE_S", "10")),
+                cache_ms=float(os.getenv("PROVIDER_HEALTH_CACHE_MS", "50")),
+            )
+        return _health
+
+
+# API lama modul ini
 def allow(provider: str) -> bool:
-    t = OPEN.get(provider, 0)
-    return _now() >= t
+    return get_health().allow(provider)
 
 
 def record(provider: str, ok: bool):
-    w = int(os.getenv("PROVIDER_BREAK_WINDOW_S", "60"))
-    n = int(os.getenv("PROVIDER_BREAK_FAILS", "5"))
-    cd = int(os.getenv("PROVIDER_BREAK_COOLDOWN_S", "90"))
-    dq = FAILS[provider]
-    dq.append((_now(), ok))
-    # window filter
-    while dq and _now() - dq[0][0] > w:
-        dq.popleft()
-    fails = sum(1 for t, okv in dq if not okv)
-    if fails >= n:
-        OPEN[provider] = _now() + cd
+    get_health().record(provider, ok)
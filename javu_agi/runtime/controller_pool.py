@@ -0,0 +1,317 @@
+"""
+Pool ExecutiveController yang sudah warm untuk jalur request HTTP/WS.
+
+Konstruksi ExecutiveController mahal (MemoryManager, WorldModel, tracer, startup
+checks, puluhan subsystem) dan process() memutasi state instance, jadi satu
+instance dipinjam eksklusif per request (lease), bukan dibagi antar thread.
+Per lease, state per-request (WorkingMemory, counter miss plan) di-reset lewat hook
+on_release. State lintas request (rate limit/kuota per user, cooldown tool) dibagi satu
+objek untuk semua controller, supaya limit tidak terpecah jadi N instance.
+configure(name, fn) menerapkan perubahan konfigurasi (mis. reload policy router) ke
+semua controller di bawah lock pool.
+
+Env:
+  EC_POOL_SIZE      jumlah maksimum controller (default 4)
+  EC_POOL_WARM      jumlah controller yang dibuat saat warm() (default 1)
+  EC_POOL_MAX_USES  recycle controller setelah N lease (0 = tidak pernah)
+  EC_POOL_TIMEOUT_S batas tunggu lease saat semua sibuk (default 30)
+"""
+
+from __future__ import annotations
+import os, threading, time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+
+def _default_factory():
+    from javu_agi.executive_controller import ExecutiveController
+
+    return ExecutiveController()
+
+
+# state per request -> nilai awal; diset ulang tiap release
+_REQUEST_ATTRS: Dict[str, Callable[[], Any]] = {"_miss_ctr": lambda: 0}
+# state lintas request yang thread-safe; satu objek dibagi semua controller di pool
+_SHARED_ATTRS = ("quota", "ratelimit", "limit_mgr", "_rl", "_last_call")
+
+
+def _reset_request_state(ctrl: Any):
+    # WorkingMemory = konteks per request; jangan bocor antar user.
+    # Gagal reset -> release() membuang controller (tidak dipakai ulang dengan state kotor)
+    wm = getattr(ctrl, "wm", None)
+    if wm is not None:
+        ctrl.wm = type(wm)()
+    for name, init in _REQUEST_ATTRS.items():
+        if hasattr(ctrl, name):
+            setattr(ctrl, name, init())
+
+
+class PoolTimeout(RuntimeError):
+    pass
+
+
+class ControllerPool:
+    def __init__(
+        self,
+        factory: Optional[Callable[[], Any]] = None,
+        size: Optional[int] = None,
+        max_uses: Optional[int] = None,
+        timeout_s: Optional[float] = None,
+        on_create: Optional[Callable[[Any], None]] = None,
+        on_acquire: Optional[Callable[[Any], None]] = None,
+        on_release: Optional[Callable[[Any], None]] = _reset_request_state,
+        on_close: Optional[Callable[[Any], None]] = None,
+        shared_attrs: Tuple[str, ...] = _SHARED_ATTRS,
+    ):
+        self.factory = factory or _default_factory
+        self.size = max(1, int(size if size is not None else os.getenv("EC_POOL_SIZE", "4")))
+        self.max_uses = int(max_uses if max_uses is not None else os.getenv("EC_POOL_MAX_USES", "0"))
+        self.timeout_s = float(
+            timeout_s if timeout_s is not None else os.getenv("EC_POOL_TIMEOUT_S", "30")
+        )
+        self.on_create = on_create
+        self.on_acquire = on_acquire
+        self.on_release = on_release
+        self.on_close = on_close
+        self.shared_attrs = tuple(shared_attrs)
+        self._shared: Dict[str, Any] = {}
+        self._config: Dict[str, Callable[[Any], None]] = {}
+        self._cfg_ver = 0
+        self._cfg_of: Dict[int, int] = {}
+        self._idle: Deque[Any] = deque()
+        self._uses: Dict[int, int] = {}
+        self._gen: Dict[int, int] = {}
+        self._generation = 0
+        self._total = 0  # idle + in use + sedang dibuat
+        self._cv = threading.Condition()
+        self._closed = False
+        self.stats_: Dict[str, float] = {
+            "created": 0,
+            "recycled": 0,
+            "leases": 0,
+            "waits": 0,
+            "wait_ms_total": 0.0,
+            "create_ms_total": 0.0,
+        }
+
+    # ---- shared state / config (dipanggil dengan _cv dipegang) ----
+    def _share(self, ctrl: Any):
+        for name in self.shared_attrs:
+            if name in self._shared:
+                setattr(ctrl, name, self._shared[name])
+            elif hasattr(ctrl, name):
+                # atribut lazy (mis. _rl) ikut dibagi begitu controller pertama membuatnya
+                self._shared[name] = getattr(ctrl, name)
+
+    def _apply_config(self, ctrl: Any):
+        if self._cfg_of.get(id(ctrl)) == self._cfg_ver:
+            return
+        for fn in self._config.values():
+            fn(ctrl)
+        self._cfg_of[id(ctrl)] = self._cfg_ver
+
+    def configure(self, name: str, fn: Callable[[Any], None]):
+        """
+        Daftarkan fn(ctrl) dan terapkan ke semua controller di bawah lock pool: yang idle
+        sekarang, yang sedang dipinjam saat release, yang baru saat dibuat. fn harus
+        idempoten (diputar ulang bersama config lain). Controller yang gagal dibuang.
+        """
+        bad = []
+        with self._cv:
+            self._config[name] = fn
+            self._cfg_ver += 1
+            for ctrl in list(self._idle):
+                try:
+                    self._apply_config(ctrl)
+                except Exception:
+                    self._idle.remove(ctrl)
+                    bad.append(ctrl)
+            self.stats_["recycled"] += len(bad)
+        for ctrl in bad:
+            self._discard(ctrl)
+
+    # ---- lifecycle ----
+    def _create(self) -> Any:
+        t0 = time.perf_counter()
+        ctrl = self.factory()
+        if self.on_create:
+            self.on_create(ctrl)
+        with self._cv:
+            self._share(ctrl)
+            self._apply_config(ctrl)
+            self.stats_["created"] += 1
+            self.stats_["create_ms_total"] += (time.perf_counter() - t0) * 1000
+            self._uses[id(ctrl)] = 0
+            self._gen[id(ctrl)] = self._generation
+        return ctrl
+
+    def adopt(self, ctrl: Any) -> bool:
+        """Masukkan controller yang sudah dibuat (mis. singleton modul) ke pool."""
+        with self._cv:
+            if self._closed or self._total >= self.size:
+                return False
+            self._share(ctrl)
+            self._apply_config(ctrl)
+            self._total += 1
+            self._uses[id(ctrl)] = 0
+            self._gen[id(ctrl)] = self._generation
+            self._idle.append(ctrl)
+            self._cv.notify()
+            return True
+
+    def warm(self, n: Optional[int] = None) -> int:
+        n = int(n if n is not None else os.getenv("EC_POOL_WARM", "1"))
+        made = 0
+        while made < n:
+            with self._cv:
+                if self._closed or self._total >= self.size:
+                    break
+                self._total += 1
+            try:
+                ctrl = self._create()
+            except Exception:
+                with self._cv:
+                    self._total -= 1
+                raise
+            with self._cv:
+                self._idle.append(ctrl)
+                self._cv.notify()
+            made += 1
+        return made
+
+    def _discard(self, ctrl: Any):
+        with self._cv:
+            self._total -= 1
+            self._uses.pop(id(ctrl), None)
+            self._gen.pop(id(ctrl), None)
+            self._cfg_of.pop(id(ctrl), None)
+            self._cv.notify()
+        if self.on_close:
+            try:
+                self.on_close(ctrl)
+            except Exception:
+                pass
+
+    def invalidate(self):
+        """Buang controller idle; yang sedang dipakai dibuang saat release (mis. reload policy)."""
+        with self._cv:
+            self._generation += 1
+            idle = list(self._idle)
+            self._idle.clear()
+            self.stats_["recycled"] += len(idle)
+        for ctrl in idle:
+            self._discard(ctrl)
+
+    def close(self):
+        with self._cv:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._cv.notify_all()
+        for ctrl in idle:
+            self._discard(ctrl)
+
+    # ---- lease ----
+    def acquire(self, timeout_s: Optional[float] = None) -> Any:
+        timeout_s = self.timeout_s if timeout_s is None else timeout_s
+        deadline = time.monotonic() + timeout_s
+        t0 = time.perf_counter()
+        waited = False
+        with self._cv:
+            while True:
+                if self._closed:
+                    raise PoolTimeout("controller pool closed")
+                if self._idle:
+                    ctrl = self._idle.popleft()
+                    create = False
+                    break
+                if self._total < self.size:
+                    self._total += 1
+                    create = True
+                    break
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    raise PoolTimeout("no ExecutiveController available")
+                waited = True
+                self._cv.wait(left)
+            self.stats_["leases"] += 1
+            if waited:
+                self.stats_["waits"] += 1
+                self.stats_["wait_ms_total"] += (time.perf_counter() - t0) * 1000
+        if create:
+            try:
+                ctrl = self._create()
+            except Exception:
+                with self._cv:
+                    self._total -= 1
+                    self._cv.notify()
+                raise
+        if self.on_acquire:
+            self.on_acquire(ctrl)
+        return ctrl
+
+    def release(self, ctrl: Any, broken: bool = False):
+        if not broken and self.on_release:
+            try:
+                self.on_release(ctrl)
+            except Exception:
+                broken = True
+        with self._cv:
+            n = self._uses.get(id(ctrl), 0) + 1
+            self._uses[id(ctrl)] = n
+            recycle = (
+                broken
+                or self._closed
+                or self._gen.get(id(ctrl)) != self._generation
+                or (self.max_uses > 0 and n >= self.max_uses)
+            )
+            if not recycle:
+                try:
+                    self._share(ctrl)
+                    self._apply_config(ctrl)  # config yang berubah selama dipinjam
+                except Exception:
+                    recycle = True
+            if not recycle:
+                self._idle.append(ctrl)
+                self._cv.notify()
+                return
+            self.stats_["recycled"] += 1
+        self._discard(ctrl)
+
+    @contextmanager
+    def lease(self, timeout_s: Optional[float] = None):
+        ctrl = self.acquire(timeout_s)
+        broken = False
+        try:
+            yield ctrl
+        except BaseException:
+            # state controller bisa setengah jalan; buang, jangan dipakai ulang
+            broken = True
+            raise
+        finally:
+            self.release(ctrl, broken=broken)
+
+    def run(self, method: str, *args, **kwargs):
+        """Helper untuk run_in_threadpool: lease -> ctrl.<method>(*args) -> release."""
+        with self.lease() as ctrl:
+            return getattr(ctrl, method)(*args, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cv:
+            out: Dict[str, Any] = dict(self.stats_)
+            out.update(size=self.size, total=self._total, idle=len(self._idle))
+            out["in_use"] = self._total - len(self._idle)
+        return out
+
+
+_POOL: Optional[ControllerPool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_pool() -> ControllerPool:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ControllerPool()
+        return _POOL
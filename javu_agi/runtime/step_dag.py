@@ -0,0 +1,170 @@
+"""
+Dependensi antar step rencana + scheduler eksekusi konkuren untuk ExecutiveController.
+
+Dependensi step j:
+  - eksplisit: step["depends_on"] = [indeks | id step]
+  - inferensi (kalau tidak eksplisit):
+      * referensi output step lain: {{step_2}}, $step2, {{prev}} / $prev
+      * path file yang sama disebut di dua step (urutan baca/tulis dipertahankan)
+      * tool di luar PARALLEL_TOOLS = barrier: bergantung ke semua step sebelumnya
+        dan semua step sesudahnya bergantung padanya
+
+Scheduler hanya menjalankan bagian eksekusi tool; gating (preflight/approval/guard)
+tetap berurutan per step di controller, dan commit hasil (audit, journal, tamper hash)
+dilakukan urut indeks lewat drain()/settle(), jadi journal resume tetap monoton. Setiap
+jalur keluar loop (break maupun return blocked) wajib settle() dulu.
+
+Env:
+  EC_STEP_PARALLELISM   step konkuren maksimum (default 4; 1 = sekuensial seperti dulu)
+  EC_PARALLEL_TOOLS     tool yang boleh jalan paralel (read-only), koma
+  EC_TOOL_CONCURRENCY   batas per tool per proses (semua plan berbagi semaphore), JSON {"search": 2}
+"""
+
+from __future__ import annotations
+import json, os, re, threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+PARALLEL_TOOLS = {
+    t.strip().lower()
+    for t in os.getenv(
+        "EC_PARALLEL_TOOLS", "search,summarize,fetch,http_get,json_filter,kb,web,read,eval"
+    ).split(",")
+    if t.strip()
+}
+
+_REF = re.compile(r"\{\{\s*step[_ ]?(\d+)\s*\}\}|\$step_?(\d+)", re.I)
+_PREV = re.compile(r"\{\{\s*prev\s*\}\}|\$prev\b", re.I)
+_PATH = re.compile(r"(?:^|\s)((?:\.{0,2}/)?[\w.-]+(?:/[\w.-]+)+|[\w-]+\.(?:json|csv|txt|md|py|yaml|yml|html|log))\b")
+
+
+def _text(step: Dict[str, Any]) -> str:
+    return " ".join(str(step.get(k, "") or "") for k in ("cmd", "args", "desc", "out_path", "in_path"))
+
+
+def is_parallel_safe(step: Dict[str, Any]) -> bool:
+    return (step.get("tool", "") or "").lower() in PARALLEL_TOOLS
+
+
+def infer_deps(steps: List[Dict[str, Any]]) -> List[Set[int]]:
+    """deps[j] = indeks step yang harus selesai (ter-commit) sebelum step j dieksekusi."""
+    ids = {str(s.get("id")): i for i, s in enumerate(steps) if isinstance(s, dict) and s.get("id") is not None}
+    deps: List[Set[int]] = []
+    paths_seen: Dict[str, int] = {}
+    last_barrier = -1
+    for j, s in enumerate(steps):
+        s = s if isinstance(s, dict) else {}
+        d: Set[int] = set()
+        explicit = s.get("depends_on")
+        if explicit is not None:
+            for x in explicit if isinstance(explicit, (list, tuple)) else [explicit]:
+                k = ids.get(str(x), x if isinstance(x, int) else None)
+                if isinstance(k, int) and 0 <= k < j:
+                    d.add(k)
+        else:
+            txt = _text(s)
+            for a, b in _REF.findall(txt):
+                k = int(a or b)
+                if 0 <= k < j:
+                    d.add(k)
+            if j > 0 and _PREV.search(txt):
+                d.add(j - 1)
+            for p in _PATH.findall(txt):
+                if p in paths_seen:
+                    d.add(paths_seen[p])
+        for p in _PATH.findall(_text(s)):
+            paths_seen[p] = j
+        if not is_parallel_safe(s):
+            d.update(range(j))
+            last_barrier = j
+        elif last_barrier >= 0:
+            d.add(last_barrier)
+        deps.append(d)
+    return deps
+
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+_tool_sems: Dict[Tuple[str, int], threading.Semaphore] = {}
+
+
+def _tool_sem(tool: str, limit: int) -> threading.Semaphore:
+    # global per proses: batas EC_TOOL_CONCURRENCY berlaku lintas request, bukan per plan
+    with _pool_lock:
+        sem = _tool_sems.get((tool, limit))
+        if sem is None:
+            sem = _tool_sems[(tool, limit)] = threading.Semaphore(limit)
+        return sem
+
+
+def _executor() -> ThreadPoolExecutor:
+    # satu pool per proses; scheduler per-plan hanya membatasi jumlah step in-flight
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            n = max(1, int(os.getenv("EC_STEP_PARALLELISM", "4")))
+            _pool = ThreadPoolExecutor(max_workers=n * 2, thread_name_prefix="ec-step")
+        return _pool
+
+
+class StepScheduler:
+    def __init__(self, parallelism: Optional[int] = None, tool_limits: Optional[Dict[str, int]] = None):
+        self.parallelism = max(1, int(parallelism if parallelism is not None else os.getenv("EC_STEP_PARALLELISM", "4")))
+        if tool_limits is None:
+            try:
+                tool_limits = json.loads(os.getenv("EC_TOOL_CONCURRENCY", "") or "{}")
+            except Exception:
+                tool_limits = {}
+        self._sems = {str(k).lower(): _tool_sem(str(k).lower(), max(1, int(v))) for k, v in tool_limits.items()}
+        self._pending: List[Tuple[int, str, str, Future]] = []
+
+    @property
+    def enabled(self) -> bool:
+        return self.parallelism > 1
+
+    def pending(self) -> Set[int]:
+        return {i for i, _, _, _ in self._pending}
+
+    def can_defer(self, i: int, step: Dict[str, Any], deps: List[Set[int]]) -> bool:
+        """Boleh jalan di latar: paralel-safe, ada slot, & tidak bergantung ke step yang belum ter-commit."""
+        if not self.enabled or not is_parallel_safe(step) or len(self._pending) >= self.parallelism:
+            return False
+        d = deps[i] if i < len(deps) else set(range(i))
+        return not (d & self.pending())
+
+    def _call(self, tool: str, fn: Callable, args: Tuple) -> Any:
+        sem = self._sems.get(tool)
+        if sem is None:
+            return fn(*args)
+        with sem:
+            return fn(*args)
+
+    def submit(self, i: int, tool: str, cmd: str, fn: Callable, *args):
+        self._pending.append((i, tool, cmd, _executor().submit(self._call, tool, fn, args)))
+
+    def drain(self) -> Iterator[Tuple[int, str, str, Dict[str, Any]]]:
+        """Yield hasil step tertunda urut indeks (urutan commit). Exception tool -> code -1."""
+        self._pending.sort(key=lambda x: x[0])
+        while self._pending:
+            i, tool, cmd, fut = self._pending.pop(0)
+            try:
+                res = fut.result()
+            except Exception as e:
+                res = {"code": -1, "stdout": "", "stderr": f"{type(e).__name__}: {e}"}
+            if not isinstance(res, dict):
+                res = {"code": -1, "stdout": "", "stderr": "bad result"}
+            yield i, tool, cmd, res
+
+    def settle(self, commit: Callable[[int, str, str, Dict[str, Any]], Optional[str]]) -> bool:
+        """Commit semua step tertunda urut indeks; commit() -> "break" membuang sisanya. True = loop berhenti."""
+        for i, tool, cmd, res in self.drain():
+            if commit(i, tool, cmd, res) == "break":
+                self.discard()
+                return True
+        return False
+
+    def discard(self):
+        """Buang step yang belum di-commit (loop berhenti lebih awal); tidak masuk journal -> diulang saat resume."""
+        for _, _, _, fut in self._pending:
+            fut.cancel()
+        self._pending.clear()
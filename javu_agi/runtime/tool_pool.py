@@ -0,0 +1,287 @@
+"""
+Pool proses worker tool yang sudah warm (pengganti mp.Process + mp.Queue per call).
+
+Worker di-fork sekali lalu dipakai ulang; satu task per worker pada satu waktu.
+Task (fn, args) dan hasil dikirim lewat Pipe; parent menunggu dengan poll(timeout)
+lalu recv, jadi payload besar tidak macet menunggu join. Worker:
+  - dibunuh + diganti kalau task melewati timeout atau worker mati
+  - di-recycle setelah TOOL_POOL_MAX_TASKS task atau pertumbuhan RSS >= TOOL_POOL_MAX_RSS_MB
+    (RSS saat ini dari /proc/self/statm dikurangi baseline saat worker start; ru_maxrss
+    tidak dipakai karena ikut mewarisi puncak parent saat fork)
+  - dibatasi RLIMIT_AS (TOOL_POOL_MEM_MB) dan CPU per task (TOOL_POOL_CPU_S)
+fn harus bisa di-pickle by reference (fungsi level modul); kalau tidak, run() raise
+ToolNotPicklable SEBELUM task dikirim dan caller memakai jalur proses per call. Hasil
+yang gagal di-unpickle di parent -> ("err", ...), tool tidak dijalankan ulang.
+
+Env:
+  TOOL_POOL_SIZE         jumlah worker maksimum (default 4)
+  TOOL_POOL_MAX_TASKS    recycle worker setelah N task (default 200, 0 = tidak pernah)
+  TOOL_POOL_MAX_RSS_MB   recycle kalau RSS worker tumbuh >= N MB dari baseline (default 512, 0 = off)
+  TOOL_POOL_MEM_MB       RLIMIT_AS worker (default 0 = off)
+  TOOL_POOL_CPU_S        batas CPU detik per task (default 0 = off)
+  TOOL_POOL_START        start method multiprocessing (default fork)
+"""
+
+from __future__ import annotations
+import multiprocessing as mp
+import atexit, os, pickle, signal, threading, time, traceback
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+try:
+    import resource
+except Exception:  # non-posix
+    resource = None
+
+
+class ToolTimeout(RuntimeError):
+    pass
+
+
+class ToolNotPicklable(pickle.PicklingError):
+    """Task (fn/args) tidak bisa dikirim ke worker; belum ada yang dijalankan."""
+
+
+_PAGE_MB = (os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096) / (1024.0 * 1024.0)
+
+
+def _rss_mb() -> float:
+    """RSS saat ini (bukan puncak)."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGE_MB
+    except Exception:
+        pass
+    if resource is None:
+        return 0.0
+    # tanpa /proc: ru_maxrss (KB di Linux) sebagai pendekatan
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def _worker_main(conn, mem_mb: int, cpu_s: int):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl-C ditangani parent
+    if resource is not None and mem_mb > 0:
+        lim = mem_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (lim, lim))
+    base = _rss_mb()  # halaman warisan parent tidak dihitung sebagai pertumbuhan worker
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError):
+            return
+        if msg is None:
+            return
+        fn, args, kwargs = msg
+        if resource is not None and cpu_s > 0:
+            # RLIMIT_CPU kumulatif per proses -> geser batas dari pemakaian saat ini
+            ru = resource.getrusage(resource.RUSAGE_SELF)
+            used = int(ru.ru_utime + ru.ru_stime) + 1
+            resource.setrlimit(resource.RLIMIT_CPU, (used + cpu_s, resource.RLIM_INFINITY))
+        try:
+            out = ("ok", fn(*args, **kwargs))
+        except BaseException as e:
+            out = ("err", f"{e}\n{traceback.format_exc()}")
+        try:
+            conn.send(out + (_rss_mb() - base,))
+        except Exception as e:  # hasil tidak bisa di-pickle
+            conn.send(("err", f"unpicklable result: {e}", _rss_mb() - base))
+
+
+class _Worker:
+    __slots__ = ("proc", "conn", "tasks")
+
+    def __init__(self, ctx, mem_mb: int, cpu_s: int):
+        parent, child = ctx.Pipe(duplex=True)
+        self.proc = ctx.Process(target=_worker_main, args=(child, mem_mb, cpu_s), daemon=True)
+        self.proc.start()
+        child.close()
+        self.conn = parent
+        self.tasks = 0
+
+    def alive(self) -> bool:
+        return self.proc.is_alive()
+
+    def stop(self, kill: bool = False):
+        try:
+            if kill:
+                self.proc.kill()
+            else:
+                self.conn.send(None)
+        except Exception:
+            pass
+        self.proc.join(0.5 if not kill else 2.0)
+        if self.proc.is_alive():
+            self.proc.kill()
+            self.proc.join(1.0)
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+
+
+class ToolWorkerPool:
+    def __init__(
+        self,
+        size: Optional[int] = None,
+        max_tasks: Optional[int] = None,
+        max_rss_mb: Optional[float] = None,
+        mem_mb: Optional[int] = None,
+        cpu_s: Optional[int] = None,
+        start_method: Optional[str] = None,
+    ):
+        self.size = max(1, int(size if size is not None else os.getenv("TOOL_POOL_SIZE", "4")))
+        self.max_tasks = int(max_tasks if max_tasks is not None else os.getenv("TOOL_POOL_MAX_TASKS", "200"))
+        self.max_rss_mb = float(max_rss_mb if max_rss_mb is not None else os.getenv("TOOL_POOL_MAX_RSS_MB", "512"))
+        self.mem_mb = int(mem_mb if mem_mb is not None else os.getenv("TOOL_POOL_MEM_MB", "0"))
+        self.cpu_s = int(cpu_s if cpu_s is not None else os.getenv("TOOL_POOL_CPU_S", "0"))
+        method = start_method or os.getenv("TOOL_POOL_START", "fork")
+        try:
+            self._ctx = mp.get_context(method)
+        except ValueError:
+            self._ctx = mp.get_context()
+        self._idle: Deque[_Worker] = deque()
+        self._total = 0
+        self._cv = threading.Condition()
+        self._closed = False
+        self.stats_: Dict[str, float] = {
+            "spawned": 0, "tasks": 0, "timeouts": 0, "crashed": 0, "recycled": 0, "waits": 0,
+        }
+
+    # ---- lifecycle ----
+    def _spawn(self) -> _Worker:
+        w = _Worker(self._ctx, self.mem_mb, self.cpu_s)
+        with self._cv:
+            self.stats_["spawned"] += 1
+        return w
+
+    def warm(self, n: Optional[int] = None) -> int:
+        n = self.size if n is None else n
+        made = 0
+        while made < n:
+            with self._cv:
+                if self._closed or self._total >= self.size:
+                    break
+                self._total += 1
+            try:
+                w = self._spawn()
+            except Exception:
+                with self._cv:
+                    self._total -= 1
+                raise
+            with self._cv:
+                self._idle.append(w)
+                self._cv.notify()
+            made += 1
+        return made
+
+    def _acquire(self, timeout_s: float) -> _Worker:
+        deadline = time.monotonic() + timeout_s
+        with self._cv:
+            while True:
+                if self._closed:
+                    raise RuntimeError("tool pool closed")
+                while self._idle:
+                    w = self._idle.popleft()
+                    if w.alive():
+                        return w
+                    self._total -= 1  # mati saat idle (mis. OOM): buang
+                    self.stats_["crashed"] += 1
+                if self._total < self.size:
+                    self._total += 1
+                    break
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    raise ToolTimeout("no tool worker available")
+                self.stats_["waits"] += 1
+                self._cv.wait(left)
+        try:
+            return self._spawn()
+        except Exception:
+            with self._cv:
+                self._total -= 1
+                self._cv.notify()
+            raise
+
+    def _release(self, w: _Worker, ok: bool, rss_mb: float = 0.0):
+        recycle = not ok or not w.alive()
+        if ok and self.max_tasks and w.tasks >= self.max_tasks:
+            recycle = True
+        if ok and self.max_rss_mb and rss_mb >= self.max_rss_mb:
+            recycle = True
+        with self._cv:
+            if recycle or self._closed:
+                self._total -= 1
+                if ok:
+                    self.stats_["recycled"] += 1
+            else:
+                self._idle.append(w)
+            self._cv.notify()
+        if recycle or self._closed:
+            w.stop(kill=not ok)
+
+    # ---- public ----
+    def run(self, fn: Callable, args: Tuple = (), kwargs: Optional[Dict[str, Any]] = None,
+            timeout_s: float = 30.0) -> Tuple[str, Any]:
+        """Return ("ok", hasil) / ("err", pesan). Timeout -> ToolTimeout, worker dibunuh."""
+        try:
+            msg = pickle.dumps((fn, tuple(args), dict(kwargs or {})))
+        except Exception as e:
+            raise ToolNotPicklable(str(e)) from e
+        deadline = time.monotonic() + timeout_s
+        w = self._acquire(timeout_s)
+        try:
+            w.conn.send_bytes(msg)
+            w.tasks += 1
+            if not w.conn.poll(max(0.0, deadline - time.monotonic())):
+                with self._cv:
+                    self.stats_["timeouts"] += 1
+                self._release(w, ok=False)
+                raise ToolTimeout("tool timeout")
+            raw = w.conn.recv_bytes()
+        except ToolTimeout:
+            raise
+        except (EOFError, OSError, BrokenPipeError) as e:
+            # worker mati di tengah task (segfault, RLIMIT, kill)
+            with self._cv:
+                self.stats_["crashed"] += 1
+            self._release(w, ok=False)
+            return "err", f"worker died: {e or w.proc.exitcode}"
+        except BaseException:
+            self._release(w, ok=False)
+            raise
+        with self._cv:
+            self.stats_["tasks"] += 1
+        try:
+            status, payload, rss = pickle.loads(raw)
+        except Exception as e:
+            # tool SUDAH jalan; hasil tidak bisa dibaca parent -> error, jangan dijalankan ulang
+            self._release(w, ok=True)
+            return "err", f"unpicklable result: {type(e).__name__}: {e}"
+        self._release(w, ok=True, rss_mb=rss)
+        return status, payload
+
+    def close(self):
+        with self._cv:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._total -= len(idle)
+            self._cv.notify_all()
+        for w in idle:
+            w.stop()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cv:
+            return {**self.stats_, "size": self.size, "live": self._total, "idle": len(self._idle)}
+
+
+_pool: Optional[ToolWorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_tool_pool() -> ToolWorkerPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ToolWorkerPool()
+            atexit.register(_pool.close)
+        return _pool
@@ -0,0 +1,198 @@
+"""
+Hitung token per model (pengganti estimasi len(text)//4).
+
+Backend:
+  bpe        tiktoken; vocab dibaca offline dari TOKENIZER_VOCAB_DIR/<encoding>.tiktoken.
+             File tidak ada -> langsung heuristic (tidak pernah download di jalur request).
+             TOKENIZER_ALLOW_DOWNLOAD=1: tiktoken.get_encoding (cache TIKTOKEN_CACHE_DIR /
+             download) dijalankan di thread latar; counter diganti ke bpe setelah siap.
+  heuristic  tanpa dependency: regex per kata/angka/simbol, lebih dekat ke BPE untuk
+             teks Indonesia & kode dibanding len//4 (dipakai kalau bpe tidak tersedia)
+
+Model -> encoding lewat MODEL_ENCODING (prefix match), override env TOKENIZER_MAP
+(JSON {"prefix": "encoding"}). Model Anthropic memakai cl100k_base sebagai proxy.
+
+Hasil hitung teks panjang (>= TOKEN_MEMO_MIN_CHARS, mis. system prompt berulang)
+di-memo per (backend, encoding, digest teks) dalam LRU TOKEN_MEMO_ITEMS.
+"""
+
+from __future__ import annotations
+import hashlib, importlib, json, math, os, re, threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+VOCAB_DIR = os.getenv(
+    "TOKENIZER_VOCAB_DIR", os.path.join(os.path.dirname(__file__), "assets", "tokenizers")
+)
+MEMO_ITEMS = int(os.getenv("TOKEN_MEMO_ITEMS", "4096"))
+MEMO_MIN_CHARS = int(os.getenv("TOKEN_MEMO_MIN_CHARS", "256"))
+
+MODEL_ENCODING: Dict[str, str] = {
+    "gpt-5": "o200k_base",
+    "gpt-4o": "o200k_base",
+    "gpt-4": "cl100k_base",
+    "gpt-3.5": "cl100k_base",
+    "claude": "cl100k_base",
+    "local": "cl100k_base",
+}
+DEFAULT_ENCODING = os.getenv("TOKENIZER_DEFAULT", "o200k_base")
+try:
+    MODEL_ENCODING.update(json.loads(os.getenv("TOKENIZER_MAP", "") or "{}"))
+except Exception:
+    pass
+
+# pola pre-tokenizer o200k/cl100k (tanpa \p{..}, cukup untuk estimasi)
+_PAT = re.compile(
+    r"""'(?:[sdmt]|ll|ve|re)| ?[^\W\d_]+| ?\d{1,3}| ?[^\s\w]+|\s+(?!\S)|\s+""", re.UNICODE
+)
+_CJK = re.compile(r"[぀-ヿ㐀-鿿가-힯]")
+
+
+def _heuristic_count(text: str) -> int:
+    n = 0
+    for piece in _PAT.findall(text):
+        c = piece[-1]
+        if c.isalpha():
+            w = len(piece.lstrip())
+            if _CJK.search(piece):
+                n += w
+            elif not piece.isascii():
+                n += max(1, math.ceil(w / 2))
+            else:
+                # kata Inggris umum 1 token; kata berimbuhan (meng-/-kan/-nya) pecah ~4 huruf
+                n += 1 if w <= 6 else math.ceil(w / 4)
+        elif c.isdigit():
+            n += 1
+        elif c.isspace():
+            n += 1 if "\n" in piece or len(piece) > 1 else 0
+        else:
+            # simbol/operator kode: sebagian besar gabung 1-2 karakter per token
+            n += math.ceil(len(piece.strip()) / 2) or 1
+    return n
+
+
+class _Heuristic:
+    name = "heuristic"
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+
+    def count(self, text: str) -> int:
+        return _heuristic_count(text)
+
+
+def _vocab_path(encoding: str) -> str:
+    return os.path.join(VOCAB_DIR, f"{encoding}.tiktoken")
+
+
+class _BPE:
+    name = "bpe"
+
+    def __init__(self, encoding: str, download: bool = False):
+        tk = importlib.import_module("tiktoken")
+        path = _vocab_path(encoding)
+        if os.path.exists(path):
+            # konstruksi dari file lokal: tanpa akses jaringan. spec openai_public hanya
+            # dipakai untuk pat_str/special_tokens (tidak membaca vocab dari URL-nya).
+            ref = importlib.import_module("tiktoken_ext.openai_public")
+            spec = getattr(ref, encoding)()
+            ranks = importlib.import_module("tiktoken.load").load_tiktoken_bpe(path)
+            self.enc = tk.Encoding(
+                name=encoding,
+                pat_str=spec["pat_str"],
+                mergeable_ranks=ranks,
+                special_tokens=spec["special_tokens"],
+            )
+        elif download:
+            self.enc = tk.get_encoding(encoding)  # bisa download: hanya dari thread latar
+        else:
+            raise FileNotFoundError(path)
+        self.encoding = encoding
+
+    def count(self, text: str) -> int:
+        return len(self.enc.encode(text, disallowed_special=()))
+
+
+_counters: Dict[str, Any] = {}
+_lock = threading.Lock()
+_memo: "OrderedDict[bytes, int]" = OrderedDict()
+_m = {"calls": 0, "memo_hits": 0, "chars": 0}
+
+
+def encoding_for(model: Optional[str]) -> str:
+    m = (model or "").lower()
+    best = ""
+    for prefix in MODEL_ENCODING:
+        if m.startswith(prefix) and len(prefix) > len(best):
+            best = prefix
+    return MODEL_ENCODING[best] if best else DEFAULT_ENCODING
+
+
+def _load_bpe_bg(enc: str):
+    try:
+        c = _BPE(enc, download=True)
+    except Exception:
+        return
+    with _lock:
+        _counters[enc] = c
+
+
+def get_counter(model: Optional[str] = None):
+    enc = encoding_for(model)
+    c = _counters.get(enc)
+    if c is not None:
+        return c
+    # dibangun di luar _lock: parse vocab lokal tidak menahan count_tokens encoding lain
+    c, bg = None, False
+    if os.getenv("TOKENIZER_BACKEND", "auto") != "heuristic":
+        try:
+            c = _BPE(enc)
+        except Exception:
+            bg = os.getenv("TOKENIZER_ALLOW_DOWNLOAD", "0") == "1"
+    with _lock:
+        cur = _counters.get(enc)
+        if cur is not None:
+            return cur
+        _counters[enc] = c = c or _Heuristic(enc)
+    if bg:
+        threading.Thread(target=_load_bpe_bg, args=(enc,), name=f"tok-{enc}", daemon=True).start()
+    return c
+
+
+def count_tokens(text: Optional[str], model: Optional[str] = None) -> int:
+    if not text:
+        return 0
+    c = get_counter(model)
+    _m["calls"] += 1
+    _m["chars"] += len(text)
+    if len(text) < MEMO_MIN_CHARS:
+        return max(1, c.count(text))
+    person = f"{c.name[0]}:{c.encoding}".encode()[:16]  # heuristic -> bpe: memo tidak tercampur
+    key = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16, person=person).digest()
+    with _lock:
+        n = _memo.get(key)
+        if n is not None:
+            _memo.move_to_end(key)
+            _m["memo_hits"] += 1
+            return n
+    n = max(1, c.count(text))
+    with _lock:
+        _memo[key] = n
+        if len(_memo) > MEMO_ITEMS:
+            _memo.popitem(last=False)
+    return n
+
+
+def count_messages(messages: List[Dict[str, Any]], model: Optional[str] = None) -> int:
+    """Token input chat: isi + overhead format ~3 token/pesan + 3 token priming jawaban."""
+    n = 3
+    for msg in messages or []:
+        n += 3 + count_tokens(str(msg.get("content") or ""), model)
+    return n
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        out: Dict[str, Any] = dict(_m, memo_items=len(_memo))
+    out["backends"] = {enc: c.name for enc, c in _counters.items()}
+    return out
@@ -1,7 +1,6 @@
 from __future__ import annotations
 import yaml
 import os
-import json
 import re
 import time
 import traceback
@@ -9,14 +8,17 @@ import multiprocessing as mp
 import subprocess
 import jsonschema
 from pathlib import Path
-from typing import Callable, Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional, Tuple
 
 from javu_agi.llm import call_llm
 from javu_agi.utils.logger import log_user
 from javu_agi.tools.tool_contracts import default_contracts, enforce_contract
+from javu_agi.runtime.tool_pool import ToolNotPicklable, ToolTimeout, get_tool_pool
+from javu_agi.audit.sink import get_audit_sink
 
 # Policy, Limits, Audit, RateLimit
 _DEFAULT_TIMEOUT_S = int(os.getenv("TOOL_TIMEOUT_S", "30"))
+_TOOL_POOL = os.getenv("TOOL_POOL", "1") == "1"  # 0 = proses baru per call (jalur lama)
 _ALLOWED = {t.strip() for t in os.getenv("ALLOWED_TOOLS", "").split(",") if t.strip()}
 _GITHUB_ENABLED = os.getenv("GITHUB_PUSH_ENABLED", "false").lower() in {
     "1",
@@ -50,11 +52,13 @@ def validate_tool_args(tool_name: str, args: Dict[str, Any]):
     jsonschema.validate(args, schema)
 
 
+_AUDIT_LOG = os.path.join(_AUDIT_DIR, "tool_audit.jsonl")
+
+
 def _audit(entry: Dict[str, Any]):
-    """Write one audit record (JSON) per tool invocation/decision."""
-    p = Path(_AUDIT_DIR) / f"{int(time.time()*1000)}.json"
+    """Satu record audit (JSONL) per invocation/keputusan tool; ditulis batch oleh audit sink."""
     try:
-        p.write_text(json.dumps(entry, ensure_ascii=False))
+        get_audit_sink().log(_AUDIT_LOG, {"ts_ms": int(time.time() * 1000), **entry})
     except Exception:
         pass
 
@@ -81,13 +85,7 @@ Path(os.path.dirname(AUDIT_PATH)).mkdir(parents=True, exist_ok=True)
 
 
 def _audit_tool(event: str, payload: dict):
-    with open(AUDIT_PATH, "a", encoding="utf-8") as f:
-        f.write(
-            json.dumps(
-                {"ts": int(time.time()), "event": event, **payload}, ensure_ascii=False
-            )
-            + "\n"
-        )
+    get_audit_sink().log(AUDIT_PATH, {"ts": int(time.time()), "event": event, **payload})
 
 
 def _allowed(tool_name: str) -> bool:
@@ -344,28 +342,51 @@ Balas HANYA dengan nama tool valid (satu per baris) dari set ini:
     return seq
 
 
-def _run_with_timeout(
-    fn: Callable, args: tuple, timeout_s: int = _DEFAULT_TIMEOUT_S
-) -> str:
-    """
-    Eksekusi tool di proses terpisah + timeout. Kalau hang/bermasalah → bunuh.
-    """
-    q: mp.Queue = mp.Queue()
+def _run_in_process(fn: Callable, args: tuple, timeout_s: int) -> Tuple[str, Any]:
+    """Jalur lama (proses baru per call) untuk fn yang tidak bisa dikirim ke pool."""
+    rx, tx = mp.Pipe(duplex=False)
 
     def _target():
         try:
-            q.put(("ok", fn(*args)))
+            tx.send(("ok", fn(*args)))
         except Exception as e:
-            q.put(("err", f"{e}\n{traceback.format_exc()}"))
+            tx.send(("err", f"{e}\n{traceback.format_exc()}"))
 
     p = mp.Process(target=_target, daemon=True)
     p.start()
-    p.join(timeout_s)
-    if p.is_alive():
-        p.kill()
+    tx.close()
+    try:
+        # baca sebelum join: payload besar tidak macet di pipe
+        if not rx.poll(timeout_s):
+            raise ToolTimeout("tool timeout")
+        return rx.recv()
+    except EOFError:
+        return "err", "no result"
+    finally:
+        if p.is_alive():
+            p.kill()
+        p.join(1.0)
+        rx.close()
+
+
+def _run_with_timeout(
+    fn: Callable, args: tuple, timeout_s: int = _DEFAULT_TIMEOUT_S
+) -> str:
+    """
+    Eksekusi tool di worker pool warm (runtime/tool_pool.py) + timeout. Kalau hang → worker dibunuh.
+    """
+    try:
+        if _TOOL_POOL:
+            try:
+                status, payload = get_tool_pool().run(fn, args, timeout_s=timeout_s)
+            except ToolNotPicklable:
+                # hanya gagal kirim task (belum jalan) yang boleh diulang di proses per call
+                status, payload = _run_in_process(fn, args, timeout_s)
+        else:
+            status, payload = _run_in_process(fn, args, timeout_s)
+    except ToolTimeout:
         _audit({"allow": False, "reason": "timeout", "tool_proc": fn.__name__})
         return "[TOOL ERROR] timeout"
-    status, payload = q.get() if not q.empty() else ("err", "no result")
     return payload if status == "ok" else f"[TOOL ERROR] {payload}"
 
 
@@ -1,7 +1,7 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import Dict, List, Callable, Any, Optional
-import os
+from typing import Dict, List, Callable, Any, Optional, Tuple
+import os, threading
 import re, json, time
 
 
@@ -21,6 +21,8 @@ class ToolContract:
     max_output_bytes: int = 2_000_000
     allow_hosts: List[str] = field(default_factory=list)
     deny_hosts: List[str] = field(default_factory=list)
+    # hasil boleh di-cache (pure); None = turunkan dari side_effects (cache.tool_cache)
+    deterministic: Optional[bool] = None
 
     def to_dict(self):
         return {
@@ -34,20 +36,66 @@ class ToolContract:
                 "max_output_bytes",
                 "allow_hosts",
                 "deny_hosts",
+                "deterministic",
             )
         }
 
 
+@dataclass(frozen=True)
+class GatePlan:
+    """Rencana gate per tool yang sudah dikompilasi (dipakai enforce_contract)."""
+
+    contract: ToolContract
+    preconditions: Tuple[Callable[[Dict[str, Any]], bool], ...]
+    approval_required: bool
+    gen: int
+
+
 class ContractRegistry:
     def __init__(self):
         self._c: Dict[str, ToolContract] = {}
+        self._plans: Dict[str, GatePlan] = {}
+        self._frozen = False
 
     def register(self, c: ToolContract):
+        if self._frozen:
+            # registry bersama (default_contracts) dipakai semua thread + memo tool_cache;
+            # mutasi di sini hilang diam-diam saat policy di-reload
+            raise RuntimeError(
+                "shared contract registry is read-only; use default_contracts().copy()"
+            )
         self._c[c.name] = c
+        self._plans.pop(c.name, None)
+
+    def freeze(self) -> "ContractRegistry":
+        self._frozen = True
+        return self
+
+    def copy(self) -> "ContractRegistry":
+        """Salinan yang bisa di-register (tidak ikut hot-reload)."""
+        r = ContractRegistry()
+        r._c = dict(self._c)
+        return r
 
     def get(self, name: str) -> Optional[ToolContract]:
         return self._c.get(name)
 
+    def plan(self, name: str) -> Optional[GatePlan]:
+        p = self._plans.get(name)
+        if p is not None and p.gen == _KNOBS_GEN:
+            return p
+        c = self._c.get(name)
+        if c is None:
+            return None
+        p = GatePlan(
+            contract=c,
+            preconditions=tuple(c.preconditions or ()),
+            approval_required=_APPROVAL.require_human_approval and "physical" in (c.side_effects or []),
+            gen=_KNOBS_GEN,
+        )
+        self._plans[name] = p
+        return p
+
     def all(self):
         return list(self._c.values())
 
@@ -73,6 +121,7 @@ def default_contracts() -> ContractRegistry:
         ToolContract(
             name="web.get",
             inputs_schema={"url": {"type": "string"}, "timeout_s": {"type": "integer"}},
+            deterministic=True,  # GET/HEAD: aman di-cache dengan TTL kelas "web"
             preconditions=[
                 lambda a: a.get("url", "").startswith(("http://", "https://"))
             ],
@@ -88,6 +137,7 @@ def default_contracts() -> ContractRegistry:
         ToolContract(
             name="web.head",
             inputs_schema={"url": {"type": "string"}, "timeout_s": {"type": "integer"}},
+            deterministic=True,  # GET/HEAD: aman di-cache dengan TTL kelas "web"
             preconditions=[
                 lambda a: a.get("url", "").startswith(("http://", "https://"))
             ],
@@ -130,7 +180,7 @@ def default_contracts() -> ContractRegistry:
             side_effects=["net.egress"],
         )
     )
-    r.register(ToolContract("slack.list_messages"))
+    r.register(ToolContract("slack.list_messages", deterministic=False))
     r.register(
         ToolContract(
             "discord.post",
@@ -138,7 +188,7 @@ def default_contracts() -> ContractRegistry:
             side_effects=["net.egress"],
         )
     )
-    r.register(ToolContract("discord.fetch"))
+    r.register(ToolContract("discord.fetch", deterministic=False))
     r.register(
         ToolContract(
             "telegram.send",
@@ -146,7 +196,7 @@ def default_contracts() -> ContractRegistry:
             side_effects=["net.egress"],
         )
     )
-    r.register(ToolContract("telegram.get_updates"))
+    r.register(ToolContract("telegram.get_updates", deterministic=False))
 
     # GitHub
     r.register(
@@ -238,7 +288,7 @@ def default_contracts() -> ContractRegistry:
     r.register(ToolContract("gcontacts.list"))
 
     # MS Graph - Mail/Calendar/Files/Teams
-    r.register(ToolContract("ms.mail.list_messages"))
+    r.register(ToolContract("ms.mail.list_messages", deterministic=False))
     r.register(
         ToolContract(
             "ms.mail.send",
@@ -246,7 +296,7 @@ def default_contracts() -> ContractRegistry:
             side_effects=["net.egress"],
         )
     )
-    r.register(ToolContract("ms.calendar.list_events"))
+    r.register(ToolContract("ms.calendar.list_events", deterministic=False))
     r.register(
         ToolContract(
             "ms.calendar.create_event",
@@ -283,7 +333,7 @@ def default_contracts() -> ContractRegistry:
             side_effects=["net.egress"],
         )
     )
-    r.register(ToolContract("ms.teams.list_messages"))
+    r.register(ToolContract("ms.teams.list_messages", deterministic=False))
 
     # Notion
     r.register(
@@ -550,34 +600,109 @@ def _compose_contracts() -> ContractRegistry:
     return r
 
 
+# Global governance knobs (dibaca ulang oleh _reload saat env/file policy berubah)
+_PII = PiiPolicy()
+_REGION = RegionPolicy()
+_APPROVAL = ApprovalPolicy()
+_REDACT: List[Tuple["re.Pattern[str]", str, Optional["re.Pattern[str]"]]] = []
+_KNOBS_GEN = 0
+
+# Registry hasil compose di-memo; dibangun ulang hanya kalau fingerprint berubah:
+# mtime file policy (CONTRACT_POLICY_FILES) + env knob di bawah. Dicek paling sering
+# tiap CONTRACTS_RELOAD_CHECK_S detik (default 2; 0 = tiap panggilan).
+_KNOB_ENVS = (
+    "ALLOW_PII", "REGIONS_ALLOWED", "REGIONS_DENIED", "REQUIRE_APPROVAL",
+    "APPROVAL_REASON", "EGRESS_ALLOWLIST",
+)
+_RELOAD_CHECK_S = float(os.getenv("CONTRACTS_RELOAD_CHECK_S", "2"))
+_reg_lock = threading.Lock()
+_reg_state: Dict[str, Any] = {"fp": None, "reg": None, "checked": 0.0}
+
+
+def _policy_files() -> List[str]:
+    raw = os.getenv("CONTRACT_POLICY_FILES")
+    if raw is None:
+        return [
+            os.getenv("POLICY_FILE", "/opt/agi/safety/policy.yaml"),
+            os.getenv("PERMISSIONS_FILE", "javu_agi/tools/permission.yaml"),
+        ]
+    return [x.strip() for x in raw.split(",") if x.strip()]
+
+
+def _fingerprint() -> Tuple:
+    mt = []
+    for f in _policy_files():
+        try:
+            mt.append(os.stat(f).st_mtime_ns)
+        except OSError:
+            mt.append(None)
+    return tuple(mt) + tuple(os.getenv(k, "") for k in _KNOB_ENVS)
+
+
+def _required_chars(pat: str) -> Optional["re.Pattern[str]"]:
+    if "@" in pat:
+        return re.compile("@")
+    if pat.startswith(("\\b\\d", "\\d")):
+        return re.compile(r"\d")
+    return None
+
+
+def _load_knobs():
+    global _PII, _REGION, _APPROVAL, _REDACT, _KNOBS_GEN
+    _PII = PiiPolicy(
+        allow=(os.getenv("ALLOW_PII", "0") in {"1", "true", "TRUE"}),
+    )
+    _REGION = RegionPolicy(
+        regions_allowed=[x for x in os.getenv("REGIONS_ALLOWED", "").split(",") if x],
+        regions_denied=[x for x in os.getenv("REGIONS_DENIED", "").split(",") if x],
+    )
+    _APPROVAL = ApprovalPolicy(
+        require_human_approval=(
+            os.getenv("REQUIRE_APPROVAL", "0") in {"1", "true", "TRUE"}
+        ),
+        reason=os.getenv("APPROVAL_REASON", ""),
+    )
+    # urutan sub dipertahankan (card -> phone -> email); tiap rule dilewati kalau karakter
+    # wajibnya tidak ada di payload (regex email backtracking di tiap posisi = mahal)
+    _REDACT = [(re.compile(pat), rep, _required_chars(pat)) for pat, rep in _PII.redact_rules.items()]
+    _KNOBS_GEN += 1
+
+
+def reload_contracts(force: bool = False) -> ContractRegistry:
+    with _reg_lock:
+        fp = _fingerprint()
+        if force or _reg_state["reg"] is None or fp != _reg_state["fp"]:
+            _load_knobs()
+            _reg_state["reg"] = _compose_contracts().freeze()
+            _reg_state["fp"] = fp
+        _reg_state["checked"] = time.monotonic()
+        return _reg_state["reg"]
+
+
 # Export: make composed registry the default
 def default_contracts() -> ContractRegistry:
-    return _compose_contracts()
+    """Registry bersama, read-only (register() raise; pakai .copy()); hot-reload saat policy berubah."""
+    reg = _reg_state["reg"]
+    if reg is None or time.monotonic() - _reg_state["checked"] >= _RELOAD_CHECK_S:
+        reg = reload_contracts()
+    return reg
 
 
-# Global governance knobs
-_PII = PiiPolicy(
-    allow=(os.getenv("ALLOW_PII", "0") in {"1", "true", "TRUE"}),
-)
-_REGION = RegionPolicy(
-    regions_allowed=[x for x in os.getenv("REGIONS_ALLOWED", "").split(",") if x],
-    regions_denied=[x for x in os.getenv("REGIONS_DENIED", "").split(",") if x],
-)
-_APPROVAL = ApprovalPolicy(
-    require_human_approval=(
-        os.getenv("REQUIRE_APPROVAL", "0") in {"1", "true", "TRUE"}
-    ),
-    reason=os.getenv("APPROVAL_REASON", ""),
-)
+_load_knobs()
 
 
 def _redact_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    # selalu objek baru: args_sanitized tidak boleh alias ke args milik caller
     if _PII.allow:
-        return payload
+        return dict(payload)
     s = json.dumps(payload, ensure_ascii=False)
-    for pat, rep in _PII.redact_rules.items():
-        s = re.sub(pat, rep, s)
-    return json.loads(s)
+    out = s
+    for pat, rep, need in _REDACT:
+        if need is None or need.search(out):
+            out = pat.sub(rep, out)
+    if out == s:
+        return dict(payload)
+    return json.loads(out)
 
 
 def enforce_contract(
@@ -590,7 +715,8 @@ def enforce_contract(
     """
     Validasi + sanitasi sebelum eksekusi tool. Return {ok, reason, args_sanitized, approval_required}.
     """
-    c = registry.get(tool)
+    plan = registry.plan(tool) if hasattr(registry, "plan") else None
+    c = plan.contract if plan is not None else registry.get(tool)
     if not c:
         return {
             "ok": False,
@@ -618,7 +744,7 @@ def enforce_contract(
 
     # Preconditions
     try:
-        for p in c.preconditions or []:
+        for p in plan.preconditions if plan is not None else (c.preconditions or []):
             if not p(args):
                 return {
                     "ok": False,
@@ -638,9 +764,12 @@ def enforce_contract(
     args_sanitized = _redact_payload(args)
 
     # Approval
-    approval_required = _APPROVAL.require_human_approval and (
-        "physical" in (c.side_effects or [])
-    )
+    if plan is not None:
+        approval_required = plan.approval_required
+    else:
+        approval_required = _APPROVAL.require_human_approval and (
+            "physical" in (c.side_effects or [])
+        )
 
     return {
         "ok": True,
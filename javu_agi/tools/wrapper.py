@@ -4,7 +4,7 @@ from typing import Any, Callable, Dict, Optional, Tuple, List
 
 # ---- global governance hooks (already in your codebase) ----
 try:
-    from javu_agi.audit_chain import AuditChain
+    from javu_agi.audit.audit_chain import AuditChain
 except Exception:  # fallback if import path differs
 
     class AuditChain:
@@ -27,6 +27,15 @@ except Exception:
 
     EthicsGate = SustainabilityGuard = PrivacyGuard = _Null
 
+try:
+    from javu_agi.audit.sink import get_audit_sink
+
+    _SINK = get_audit_sink()
+except Exception:
+    _SINK = None
+
+# commit chain di jalur request: hash sinkron, tulis file di-batch oleh audit sink
+# (AUDIT.flush() kalau butuh durable)
 AUDIT = AuditChain(log_dir=os.getenv("AUDIT_CHAIN_DIR", "logs/audit_chain"))
 QUALITY_LOG = os.getenv("QUALITY_LOG", "logs/quality.jsonl")
 os.makedirs(os.path.dirname(QUALITY_LOG), exist_ok=True)
@@ -81,6 +90,9 @@ def _log_quality(kind: str, score: float, warnings: List[str], meta: Dict[str, A
         "warnings": warnings,
         "meta": meta,
     }
+    if _SINK is not None:
+        _SINK.log(QUALITY_LOG, row)
+        return
     with open(QUALITY_LOG, "a", encoding="utf-8") as f:
         f.write(json.dumps(row, ensure_ascii=False) + "\n")
 
@@ -1,7 +1,7 @@
 from __future__ import annotations
 import importlib, logging
 
-logger = logging.getLogger("javu_agi.utils")
+_log = logging.getLogger("javu_agi.utils")  # jangan "logger": tertimpa submodul utils.logger
 __all__ = []
 mods = ["logger", "io", "timing", "text", "ids"]
 for _m in mods:
@@ -10,9 +10,9 @@ for _m in mods:
         globals()[_m] = m
         __all__.append(_m)
     except ModuleNotFoundError:
-        logger.debug("utils optional missing: %s", _m)
+        _log.debug("utils optional missing: %s", _m)
     except Exception as e:
-        logger.warning("utils import error %s: %s", _m, e)
+        _log.warning("utils import error %s: %s", _m, e)
 
 # lift common logger helpers if present
 for sym in ("log_user", "log_system"):
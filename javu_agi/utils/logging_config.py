@@ -1,4 +1,4 @@
-"""# centralized logging configuration and helpers
+# centralized logging configuration and helpers
 import logging
 import re
 from typing import Any, Dict
@@ -38,7 +38,7 @@ def configure_logging(level: int = logging.INFO) -> None:
     if root.handlers:
         return
     handler = logging.StreamHandler()
-    fmt = "%\(asctime\)s %\(levelname\)s %\(name\)s: %\(message\)s"
+    fmt = "%(asctime)s %(levelname)s %(name)s: %(message)s"
     handler.setFormatter(logging.Formatter(fmt))
     root.addHandler(handler)
     root.setLevel(level)
@@ -46,4 +46,3 @@ def configure_logging(level: int = logging.INFO) -> None:
 def get_logger(name: str):
     configure_logging()
     return logging.getLogger(name)
-"""
\ No newline at end of file
@@ -0,0 +1,156 @@
+"""
+Hashing embedder bersama untuk semua backend vector (memory/faiss/pgvector) + mbrl.
+
+- Hash stabil FNV-1a 32-bit atas code point (bukan hash() Python yang di-salt),
+  jadi embedding identik lintas proses/restart -> index persisten reproducible.
+- mode "char4": bag of 4-gram karakter (default store); mode "token": bag of token
+  whitespace (dipakai mbrl).
+- embed_many() dihitung vektorized (numpy + np.bincount), plus LRU cache per digest teks.
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Tuple
+import hashlib, os, threading
+
+import numpy as np
+
+FNV_OFFSET = 2166136261
+FNV_PRIME = 16777619
+_MASK = 0xFFFFFFFF
+
+
+def fnv1a_32(s: str) -> int:
+    x = FNV_OFFSET
+    for c in s or "":
+        x = (x ^ ord(c)) * FNV_PRIME & _MASK
+    return x
+
+
+@lru_cache(maxsize=65536)
+def _token_hash(tok: str) -> int:
+    return fnv1a_32(tok)
+
+
+def _codepoints(t: str) -> np.ndarray:
+    return np.frombuffer(t.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+
+
+def _digest(text: str) -> bytes:
+    return hashlib.blake2b(
+        text.encode("utf-8", "surrogatepass"), digest_size=16
+    ).digest()
+
+
+class HashingEmbedder:
+    """Embedding hashing ter-normalisasi L2, float32 (dim,)."""
+
+    def __init__(self, dim: int = 256, mode: str = "char4", cache_size: int | None = None):
+        if mode not in ("char4", "token"):
+            raise ValueError(f"unknown embedder mode: {mode}")
+        self.dim = int(dim)
+        self.mode = mode
+        self.cache_size = int(
+            cache_size
+            if cache_size is not None
+            else os.getenv("EMBED_CACHE_SIZE", "4096")
+        )
+        self._cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # ---- raw (tanpa cache) ----
+    def _counts_char4(self, texts: List[str]) -> np.ndarray:
+        n, dim = len(texts), self.dim
+        cps = [_codepoints((t or "").lower()) for t in texts]
+        lens = np.fromiter((len(c) for c in cps), dtype=np.int64, count=n)
+        total = int(lens.sum())
+        if total < 4:
+            return np.zeros((n, dim), dtype=np.float32)
+        allc = np.concatenate(cps)
+        L = total - 3
+        h = np.full(L, FNV_OFFSET, dtype=np.uint32)
+        for j in range(4):
+            h ^= allc[j : j + L]
+            h *= np.uint32(FNV_PRIME)  # overflow uint32 == mod 2^32
+        starts = np.concatenate(([0], np.cumsum(lens)[:-1]))
+        rows = np.repeat(np.arange(n), lens)[:L]
+        local = np.arange(L) - starts[rows]
+        valid = local <= (lens[rows] - 4)
+        flat = rows[valid] * dim + (h[valid] % dim).astype(np.int64)
+        return np.bincount(flat, minlength=n * dim).reshape(n, dim).astype(np.float32)
+
+    def _counts_token(self, texts: List[str]) -> np.ndarray:
+        n, dim = len(texts), self.dim
+        rows: List[int] = []
+        hs: List[int] = []
+        for r, t in enumerate(texts):
+            toks = (t or "").lower().split()
+            rows.extend([r] * len(toks))
+            hs.extend(_token_hash(tok) for tok in toks)
+        if not hs:
+            return np.zeros((n, dim), dtype=np.float32)
+        flat = np.asarray(rows, dtype=np.int64) * dim + np.asarray(hs, dtype=np.int64) % dim
+        return np.bincount(flat, minlength=n * dim).reshape(n, dim).astype(np.float32)
+
+    def _compute(self, texts: List[str]) -> np.ndarray:
+        if self.mode == "token":
+            m = self._counts_token(texts)
+        else:
+            m = self._counts_char4(texts)
+        norms = np.linalg.norm(m, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        m /= norms
+        return m
+
+    # ---- public ----
+    def embed(self, text: str) -> np.ndarray:
+        return self.embed_many([text])[0]
+
+    def embed_many(self, texts: List[str]) -> np.ndarray:
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        if not texts:
+            return out
+        keys = [_digest(t or "") for t in texts]
+        miss: Dict[bytes, List[int]] = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                v = self._cache.get(key)
+                if v is not None:
+                    self._cache.move_to_end(key)
+                    out[i] = v
+                    self.hits += 1
+                else:
+                    miss.setdefault(key, []).append(i)
+                    self.misses += 1
+        if miss:
+            order = list(miss.items())
+            mat = self._compute([texts[idx[0]] for _, idx in order])
+            with self._lock:
+                for (key, idx), row in zip(order, mat):
+                    out[idx] = row
+                    if self.cache_size > 0:
+                        row = row.copy()
+                        row.setflags(write=False)
+                        self._cache[key] = row
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return out
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._cache)}
+
+
+_EMBEDDERS: Dict[Tuple[int, str], HashingEmbedder] = {}
+_EMB_LOCK = threading.Lock()
+
+
+def get_embedder(dim: int = 256, mode: str = "char4") -> HashingEmbedder:
+    """Instance bersama per (dim, mode) supaya cache dipakai lintas backend."""
+    key = (int(dim), mode)
+    with _EMB_LOCK:
+        e = _EMBEDDERS.get(key)
+        if e is None:
+            e = _EMBEDDERS[key] = HashingEmbedder(dim, mode)
+        return e
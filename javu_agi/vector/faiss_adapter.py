@@ -1,68 +1,461 @@
 from __future__ import annotations
-from typing import List, Dict, Any, Tuple
-import math
+from typing import List, Dict, Any, Tuple, Optional
+import json, os, re, threading
+
+import numpy as np
+
+from javu_agi.vector.embedder import get_embedder
 
 try:
     import faiss  # type: ignore
 except Exception as e:
     faiss = None
 
+INDEX_TYPES = ("flat", "ivf", "hnsw")
+
+
+def _write_atomic(path: str, content: str):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _safe_name(collection: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", collection) or "default"
+
+
+class _FaissCollection:
+    """
+    Satu collection = index ber-id (IndexIDMap2 atas Flat/HNSW, IVF native)
+    + docs {id: (text, meta)}.
+
+    Persistensi (opsional, per folder collection):
+      snap-<seq>.faiss / snap-<seq>.docs.jsonl  -> snapshot penuh
+      CURRENT                                   -> pointer snapshot aktif (ditulis atomik terakhir)
+      wal.jsonl                                 -> op add/del setelah snapshot (teks, bukan vector;
+                                                   embedder stabil jadi replay = re-embed);
+                                                   di-fsync per op kalau wal_fsync
+
+    HNSW tidak punya remove: tiap vector diberi label sendiri (labels: doc id -> label).
+    Upsert/delete cukup menandai label lama mati (dead) lalu add label baru (inkremental);
+    graph dipadatkan (rebuild) hanya saat snapshot kalau label mati > 20%.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        index_type: str,
+        path: Optional[str] = None,
+        nlist: int = 256,
+        hnsw_m: int = 32,
+        snapshot_every: int = 5000,
+        mmap: bool = False,
+        nprobe: Optional[int] = None,
+        wal_fsync: bool = True,
+    ):
+        self.dim = dim
+        self.index_type = index_type
+        self.path = path
+        self.nlist = nlist
+        self.nprobe = nprobe or max(1, nlist // 16)
+        self.hnsw_m = hnsw_m
+        self.snapshot_every = snapshot_every
+        self.mmap = mmap
+        self.wal_fsync = wal_fsync
+        self.embedder = get_embedder(dim)
+        self.docs: Dict[int, Tuple[str, Dict[str, Any]]] = {}
+        self.dead: set[int] = set()  # label mati utk index tanpa remove_ids (HNSW)
+        self.labels: Dict[int, int] = {}  # HNSW: doc id -> label hidup
+        self.owner: Dict[int, int] = {}  # HNSW: label hidup -> doc id
+        self.next_label = 1
+        self.next_id = 1
+        self.seq = 0
+        self.snap_seq = 0
+        self.wal_ops = 0
+        self.read_only = False
+        self.kind = "flat" if index_type == "ivf" else index_type
+        self.index = self._new_index(self.kind)
+        if path:
+            os.makedirs(path, exist_ok=True)
+            self._load()
+
+    # ---- index ----
+    def _new_index(self, kind: str, train: Optional[np.ndarray] = None):
+        if kind == "hnsw":
+            base = faiss.IndexHNSWFlat(self.dim, self.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        elif kind == "ivf":
+            quant = faiss.IndexFlatIP(self.dim)
+            base = faiss.IndexIVFFlat(quant, self.dim, self.nlist, faiss.METRIC_INNER_PRODUCT)
+            base.train(train)
+            base.nprobe = self.nprobe
+            return base  # IVF simpan id sendiri; IDMap + remove_ids di IVF merusak mapping
+        else:
+            base = faiss.IndexFlatIP(self.dim)
+        return faiss.IndexIDMap2(base)
+
+    def _rebuild(self, kind: Optional[str] = None):
+        """Bangun ulang index dari docs (buang label mati, train IVF)."""
+        self.dead.clear()
+        ids = sorted(self.docs)
+        mat = self.embedder.embed_many([self.docs[i][0] for i in ids])
+        kind = kind or self.kind
+        self.index = self._new_index(kind, train=mat if kind == "ivf" else None)
+        self.kind = kind
+        self.read_only = False
+        if kind == "hnsw":
+            self.labels = {i: i for i in ids}
+            self.owner = dict(self.labels)
+            self.next_label = max([self.next_label] + [i + 1 for i in ids])
+        if ids:
+            self.index.add_with_ids(mat, np.asarray(ids, dtype=np.int64))
+
+    def _new_labels(self, ids: List[int]) -> List[int]:
+        # HNSW: label lama dimatikan (setara mark_deleted), vector baru dapat label baru
+        out = []
+        for i in ids:
+            old = self.labels.pop(i, None)
+            if old is not None:
+                self.owner.pop(old, None)
+                self.dead.add(old)
+            lab = self.next_label
+            self.next_label += 1
+            self.labels[i], self.owner[lab] = lab, i
+            out.append(lab)
+        return out
+
+    def _writable(self):
+        # index hasil load mmap read-only; baca ulang penuh sekali saat mutasi pertama
+        if self.read_only:
+            snap = os.path.join(self.path, f"snap-{self.snap_seq}.faiss")
+            self.index = self._tune(faiss.read_index(snap))
+            self.read_only = False
+
+    def _tune(self, index):
+        if self.kind == "ivf":
+            faiss.extract_index_ivf(index).nprobe = self.nprobe
+        return index
+
+    def _maybe_train(self):
+        if self.index_type == "ivf" and self.kind != "ivf":
+            if self.size() >= self.nlist * 39:
+                self._rebuild("ivf")
+
+    # ---- mutasi (tanpa WAL) ----
+    def _apply_add(self, items: List[Tuple[int, str, Dict[str, Any]]]):
+        if not items:
+            return
+        self._writable()
+        ids = [i for i, _, _ in items]
+        if self.kind == "hnsw":
+            ids = self._new_labels(ids)
+        else:
+            existing = [i for i in ids if i in self.docs]
+            if existing:
+                self._apply_del(existing)
+        mat = self.embedder.embed_many([t for _, t, _ in items])
+        self.index.add_with_ids(mat, np.asarray(ids, dtype=np.int64))
+        for i, t, m in items:
+            self.docs[i] = (t, m)
+            self.next_id = max(self.next_id, i + 1)
+        self._maybe_train()
+
+    def _apply_del(self, ids: List[int]):
+        ids = [i for i in ids if i in self.docs]
+        if not ids:
+            return
+        self._writable()
+        if self.kind == "hnsw":
+            for i in ids:
+                lab = self.labels.pop(i, i)
+                self.owner.pop(lab, None)
+                self.dead.add(lab)
+        else:
+            self.index.remove_ids(np.asarray(ids, dtype=np.int64))
+        for i in ids:
+            self.docs.pop(i, None)
+
+    # ---- public ----
+    def add(self, items: List[Tuple[Optional[int], str, Dict[str, Any]]]) -> List[int]:
+        rows = []
+        for i, t, m in items:
+            if i is None:
+                i = self.next_id
+            self.next_id = max(self.next_id, int(i) + 1)
+            rows.append((int(i), t, m))
+        self._log({"op": "add", "items": [list(r) for r in rows]})
+        self._apply_add(rows)
+        self._maybe_snapshot()
+        return [r[0] for r in rows]
+
+    def delete(self, ids: List[int]) -> int:
+        ids = [i for i in (int(i) for i in ids) if i in self.docs]
+        if not ids:
+            return 0
+        self._log({"op": "del", "ids": ids})
+        self._apply_del(ids)
+        self._maybe_snapshot()
+        return len(ids)
+
+    def size(self) -> int:
+        return len(self.docs)
+
+    def search_many(
+        self, q: np.ndarray, k: int
+    ) -> List[List[Tuple[int, str, float, Dict[str, Any]]]]:
+        if self.size() == 0:
+            return [[] for _ in range(q.shape[0])]
+        kk = min(k + len(self.dead), self.index.ntotal)
+        scores, ids = self.index.search(q, kk)
+        hnsw = self.kind == "hnsw"
+        out = []
+        for srow, irow in zip(scores, ids):
+            hits = []
+            for i, sc in zip(irow.tolist(), srow.tolist()):
+                if hnsw:
+                    i = self.owner.get(i, -1)  # label mati -> tidak punya owner
+                if i < 0 or i not in self.docs:
+                    continue
+                t, m = self.docs[i]
+                hits.append((i, t, float(sc), m))
+                if len(hits) >= k:
+                    break
+            out.append(hits)
+        return out
+
+    # ---- persistensi ----
+    def _log(self, rec: Dict[str, Any]):
+        self.seq += 1
+        if not self.path:
+            return
+        rec["seq"] = self.seq
+        with open(os.path.join(self.path, "wal.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            if self.wal_fsync:
+                # op dianggap durable sebelum add()/delete() kembali
+                f.flush()
+                os.fsync(f.fileno())
+        self.wal_ops += 1
+
+    def _maybe_snapshot(self):
+        if self.path and self.snapshot_every > 0 and self.wal_ops >= self.snapshot_every:
+            self.snapshot()
+
+    def snapshot(self):
+        if not self.path or self.seq == self.snap_seq:
+            return
+        if self.dead and len(self.dead) * 5 > len(self.docs):
+            self._rebuild()
+        seq = self.seq
+        base = os.path.join(self.path, f"snap-{seq}")
+        faiss.write_index(self.index, base + ".faiss.tmp")
+        os.replace(base + ".faiss.tmp", base + ".faiss")
+        if self.kind == "hnsw":
+            rows = ([i, t, m, self.labels.get(i, i)] for i, (t, m) in self.docs.items())
+        else:
+            rows = ([i, t, m] for i, (t, m) in self.docs.items())
+        lines = [json.dumps(r, ensure_ascii=False) for r in rows]
+        _write_atomic(base + ".docs.jsonl", "\n".join(lines) + ("\n" if lines else ""))
+        cur = {"seq": seq, "kind": self.kind, "next_id": self.next_id, "dead": sorted(self.dead),
+               "next_label": self.next_label}
+        _write_atomic(os.path.join(self.path, "CURRENT"), json.dumps(cur))
+        # WAL <= seq sudah masuk snapshot; kalau crash sebelum truncate, replay skip by seq
+        _write_atomic(os.path.join(self.path, "wal.jsonl"), "")
+        old, self.snap_seq, self.wal_ops = self.snap_seq, seq, 0
+        if old:
+            for ext in (".faiss", ".docs.jsonl"):
+                try:
+                    os.remove(os.path.join(self.path, f"snap-{old}{ext}"))
+                except OSError:
+                    pass
+
+    def _load(self):
+        cur_p = os.path.join(self.path, "CURRENT")
+        if os.path.exists(cur_p):
+            with open(cur_p, "r", encoding="utf-8") as f:
+                cur = json.load(f)
+            seq = int(cur["seq"])
+            base = os.path.join(self.path, f"snap-{seq}")
+            self.index = None
+            if self.mmap:
+                try:
+                    flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+                    self.index = faiss.read_index(base + ".faiss", flags)
+                    self.read_only = True
+                except Exception:
+                    self.index = None
+            if self.index is None:
+                self.index = faiss.read_index(base + ".faiss")
+            with open(base + ".docs.jsonl", "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        row = json.loads(line)
+                        i = int(row[0])
+                        self.docs[i] = (row[1], row[2])
+                        # snapshot lama tanpa kolom label: label = doc id
+                        lab = int(row[3]) if len(row) > 3 else i
+                        self.labels[i], self.owner[lab] = lab, i
+            self.kind = cur.get("kind", self.kind)
+            self.index = self._tune(self.index)
+            self.next_id = int(cur.get("next_id", 1))
+            self.dead = set(cur.get("dead", []))
+            for lab in self.dead:
+                # format lama: doc yang dihapus masih ada di docs.jsonl
+                i = self.owner.pop(lab, None)
+                if i is not None:
+                    self.labels.pop(i, None)
+                    self.docs.pop(i, None)
+            if self.kind != "hnsw":
+                self.labels, self.owner = {}, {}
+            self.next_label = int(cur.get("next_label", 0)) or max(
+                [self.next_id] + [lab + 1 for lab in self.owner] + [lab + 1 for lab in self.dead]
+            )
+            self.seq = self.snap_seq = seq
+        wal_p = os.path.join(self.path, "wal.jsonl")
+        if not os.path.exists(wal_p):
+            return
+        with open(wal_p, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except Exception:
+                    continue  # baris terakhir bisa terpotong saat crash
+                if int(rec.get("seq", 0)) <= self.seq:
+                    continue
+                self.seq = int(rec["seq"])
+                self.wal_ops += 1
+                if rec.get("op") == "add":
+                    rows = [(int(i), t, m) for i, t, m in rec.get("items", [])]
+                    for i, _, _ in rows:
+                        self.next_id = max(self.next_id, i + 1)
+                    self._apply_add(rows)
+                elif rec.get("op") == "del":
+                    self._apply_del([int(i) for i in rec.get("ids", [])])
+
 
 class FaissVectorStore:
     """
-    FAISS FlatIP dengan embedding hashing 4-gram (dim=256) supaya kompatibel
-    dengan InMemory fallback. Simpel & cepat.
+    FAISS per-collection (Flat/IVF/HNSW ber-id, inner product) dengan
+    embedding hashing 4-gram (dim=256) supaya kompatibel dengan InMemory fallback.
+
+    - add() mengembalikan id; add(ids=...) = upsert, delete(ids) hapus by id.
+    - path=None -> murni in-memory; path diisi -> snapshot atomik + WAL, warm start saat restart.
+    - index_type "ivf" mulai sebagai flat lalu di-train otomatis setelah data cukup (nlist*39).
+    - wal_fsync=True (default): tiap op WAL di-fsync; False = lebih cepat, op terakhir bisa hilang saat crash.
     """
 
-    def __init__(self, dim: int = 256):
+    def __init__(
+        self,
+        dim: int = 256,
+        index_type: str = "flat",
+        path: Optional[str] = None,
+        nlist: int = 256,
+        hnsw_m: int = 32,
+        snapshot_every: int = 5000,
+        mmap: bool = False,
+        nprobe: Optional[int] = None,
+        wal_fsync: bool = True,
+    ):
         if faiss is None:
             raise RuntimeError("FAISS not available")
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"unknown faiss index_type: {index_type}")
         self.dim = dim
-        self.index = faiss.IndexFlatIP(dim)
-        self.vecs = []  # list[List[float]]
-        self.texts: List[str] = []
-        self.metas: List[Dict[str, Any]] = []
+        self.index_type = index_type
+        self.path = path
+        self.nlist = nlist
+        self.hnsw_m = hnsw_m
+        self.snapshot_every = snapshot_every
+        self.mmap = mmap
+        self.nprobe = nprobe
+        self.wal_fsync = wal_fsync
+        self.embedder = get_embedder(dim)
+        self.cols: Dict[str, _FaissCollection] = {}
+        self._lock = threading.RLock()
+
+    def _col(self, collection: str, create: bool = True) -> Optional[_FaissCollection]:
+        name = _safe_name(collection)
+        col = self.cols.get(name)
+        if col is not None:
+            return col
+        cpath = os.path.join(self.path, name) if self.path else None
+        if not create and not (cpath and os.path.isdir(cpath)):
+            return None
+        col = _FaissCollection(
+            self.dim,
+            self.index_type,
+            path=cpath,
+            nlist=self.nlist,
+            hnsw_m=self.hnsw_m,
+            snapshot_every=self.snapshot_every,
+            mmap=self.mmap,
+            nprobe=self.nprobe,
+            wal_fsync=self.wal_fsync,
+        )
+        self.cols[name] = col
+        return col
 
     def _embed(self, text: str) -> List[float]:
-        dim = self.dim
-        v = [0.0] * dim
-        t = text.lower()
-        for i in range(len(t) - 3):
-            h = hash(t[i : i + 4]) % dim
-            v[h] += 1.0
-        n = math.sqrt(sum(x * x for x in v)) or 1.0
-        return [x / n for x in v]
+        return self.embedder.embed(text).tolist()
 
     def add(
         self,
         texts: List[str],
         metas: List[Dict[str, Any]] | None = None,
         collection: str = "default",
-    ):
+        ids: Optional[List[int]] = None,
+    ) -> List[int]:
         metas = metas or [{} for _ in texts]
-        for txt, meta in zip(texts, metas):
-            v = self._embed(txt[:4000])
-            self.vecs.append(v)
-            self.texts.append(txt[:4000])
-            self.metas.append(meta)
-        import numpy as np
+        ids = ids or [None] * len(texts)
+        items = [(i, txt[:4000], m) for i, txt, m in zip(ids, texts, metas)]
+        if not items:
+            return []
+        with self._lock:
+            return self._col(collection).add(items)
 
-        arr = np.array(self.vecs[-len(texts) :], dtype="float32")
-        self.index.add(arr)
+    def delete(self, ids: List[int], collection: str = "default") -> int:
+        with self._lock:
+            col = self._col(collection, create=False)
+            return col.delete(ids) if col else 0
 
     def search(
         self, query: str, k: int = 8, collection: str = "default"
     ) -> List[Tuple[str, float, Dict[str, Any]]]:
-        if len(self.texts) == 0:
+        return self.search_many([query], k, collection)[0]
+
+    def search_many(
+        self, queries: List[str], k: int = 8, collection: str = "default"
+    ) -> List[List[Tuple[str, float, Dict[str, Any]]]]:
+        if not queries:
             return []
-        import numpy as np
+        q = self.embedder.embed_many(queries)
+        with self._lock:
+            col = self._col(collection, create=False)
+            if col is None:
+                return [[] for _ in queries]
+            res = col.search_many(q, k)
+        return [[(t, sc, m) for _i, t, sc, m in row] for row in res]
 
-        qv = self._embed(query)
-        q = np.array([qv], dtype="float32")
-        scores, ids = self.index.search(q, min(k, len(self.texts)))
-        out = []
-        for idx, sc in zip(ids[0], scores[0]):
-            if int(idx) < 0:
-                continue
-            out.append((self.texts[int(idx)], float(sc), self.metas[int(idx)]))
-        return out
+    def count(self, collection: str = "default") -> int:
+        with self._lock:
+            col = self._col(collection, create=False)
+            return col.size() if col else 0
+
+    def snapshot(self):
+        with self._lock:
+            for col in self.cols.values():
+                col.snapshot()
+
+    def warm_start(self) -> int:
+        """Load semua collection di disk (snapshot + replay WAL) sebelum melayani search."""
+        if not self.path or not os.path.isdir(self.path):
+            return 0
+        n = 0
+        with self._lock:
+            for name in sorted(os.listdir(self.path)):
+                if os.path.isdir(os.path.join(self.path, name)) and name not in self.cols:
+                    self._col(name)
+                    n += 1
+        return n
@@ -1,77 +1,226 @@
 from __future__ import annotations
-from typing import List, Dict, Any, Tuple
-import math, json, psycopg2
+from contextlib import contextmanager
+from typing import List, Dict, Any, Tuple, Optional
+import csv, io, json, re, threading
 
-# NOTE: butuh ekstensi pgvector terpasang di DB target.
+import psycopg2
+from psycopg2 import pool as pg_pool
+from psycopg2.extras import execute_values
+
+from javu_agi.vector.embedder import get_embedder
+
+# NOTE: butuh ekstensi pgvector terpasang di DB target (hnsw butuh pgvector >= 0.5).
+
+INDEX_TYPES = ("none", "ivfflat", "hnsw")
+INGEST_MODES = ("copy", "values")
+
+
+def _vec_literal(row) -> str:
+    return "[" + ",".join(f"{x:.7g}" for x in row) + "]"
 
 
 class PGVectorStore:
     """
-    PGVector simple wrapper. Simpan vector (dim=256) + text + meta JSON.
+    PGVector wrapper. Simpan vector (dim=256) + collection + text + meta JSON.
     Pencarian pakai cosine <=> operator (pgvector >=0.5). Jika tidak ada, fallback L2.
+
+    - Koneksi dari ThreadedConnectionPool (bukan connect per call).
+    - add() bulk: COPY (csv) atau execute_values, per batch `batch_size`, satu transaksi.
+    - search_many(): banyak query dalam satu round-trip (unnest + LATERAL).
+    - index_type ivfflat/hnsw dibuat otomatis; probes / ef_search di-SET LOCAL saat query.
+    - ivfflat: centroid di-train dari data yang ada saat CREATE INDEX, jadi index ditunda
+      sampai tabel punya >= ivf_min_rows (default lists*39); sebelum itu query = exact scan.
     """
 
     def __init__(
-        self, dsn: str, table: str = "vectors", dim: int = 256, use_cosine: bool = True
+        self,
+        dsn: str,
+        table: str = "vectors",
+        dim: int = 256,
+        use_cosine: bool = True,
+        index_type: str = "none",
+        lists: int = 100,
+        probes: int = 10,
+        hnsw_m: int = 16,
+        ef_construction: int = 64,
+        ef_search: int = 40,
+        batch_size: int = 1000,
+        ingest_mode: str = "copy",
+        pool_min: int = 1,
+        pool_max: int = 8,
+        ivf_min_rows: Optional[int] = None,
     ):
+        if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", table):
+            raise ValueError(f"invalid table name: {table}")
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"unknown pgvector index_type: {index_type}")
+        if ingest_mode not in INGEST_MODES:
+            raise ValueError(f"unknown pgvector ingest_mode: {ingest_mode}")
         self.dsn = dsn
         self.table = table
         self.dim = dim
         self.use_cosine = use_cosine
+        self.index_type = index_type
+        self.lists = lists
+        self.probes = probes
+        self.hnsw_m = hnsw_m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.batch_size = max(1, int(batch_size))
+        self.ingest_mode = ingest_mode
+        self.ivf_min_rows = int(ivf_min_rows if ivf_min_rows is not None else self.lists * 39)
+        self._index_pending = False
+        self._rows = 0  # perkiraan jumlah row (count awal + add() proses ini)
+        self.embedder = get_embedder(dim)
+        self._pool = pg_pool.ThreadedConnectionPool(pool_min, pool_max, dsn)
+        self._pool_sem = threading.BoundedSemaphore(pool_max)
         self._ensure_table()
+        self.ensure_index()
 
+    @contextmanager
     def _conn(self):
-        return psycopg2.connect(self.dsn)
+        # semaphore: pool psycopg2 raise (bukan block) kalau habis
+        with self._pool_sem:
+            c = self._pool.getconn()
+            try:
+                yield c
+                c.commit()
+            except Exception:
+                c.rollback()
+                raise
+            finally:
+                self._pool.putconn(c)
+
+    def close(self):
+        self._pool.closeall()
+
+    @property
+    def _op(self) -> str:
+        return "<=>" if self.use_cosine else "<->"
 
     def _ensure_table(self):
         sql = f"""
         CREATE EXTENSION IF NOT EXISTS vector;
         CREATE TABLE IF NOT EXISTS {self.table} (
           id BIGSERIAL PRIMARY KEY,
+          collection TEXT NOT NULL DEFAULT 'default',
           v vector({self.dim}) NOT NULL,
           text TEXT NOT NULL,
           meta JSONB
         );
+        ALTER TABLE {self.table} ADD COLUMN IF NOT EXISTS collection TEXT NOT NULL DEFAULT 'default';
+        CREATE INDEX IF NOT EXISTS {self.table}_collection_idx ON {self.table} (collection);
         """
         with self._conn() as c, c.cursor() as cur:
             cur.execute(sql)
 
+    def ensure_index(self):
+        if self.index_type == "none":
+            return
+        if self.index_type == "ivfflat":
+            with self._conn() as c, c.cursor() as cur:
+                cur.execute(f"SELECT count(*) FROM {self.table}")
+                self._rows = int(cur.fetchone()[0])
+            # index ivfflat di tabel (hampir) kosong = centroid jelek, recall turun permanen
+            self._index_pending = self._rows < self.ivf_min_rows
+            if self._index_pending:
+                return
+        ops = "vector_cosine_ops" if self.use_cosine else "vector_l2_ops"
+        name = f"{self.table}_v_{self.index_type}_idx"
+        if self.index_type == "hnsw":
+            params = f"m = {int(self.hnsw_m)}, ef_construction = {int(self.ef_construction)}"
+        else:
+            params = f"lists = {int(self.lists)}"
+        sql = (
+            f"CREATE INDEX IF NOT EXISTS {name} ON {self.table} "
+            f"USING {self.index_type} (v {ops}) WITH ({params})"
+        )
+        with self._conn() as c, c.cursor() as cur:
+            cur.execute(sql)
+
+    def _tune(self, cur):
+        if self.index_type == "hnsw":
+            cur.execute(f"SET LOCAL hnsw.ef_search = {int(self.ef_search)}")
+        elif self.index_type == "ivfflat" and not self._index_pending:
+            cur.execute(f"SET LOCAL ivfflat.probes = {int(self.probes)}")
+
     def _embed(self, text: str) -> List[float]:
-        dim = self.dim
-        v = [0.0] * dim
-        t = text.lower()
-        for i in range(len(t) - 3):
-            h = hash(t[i : i + 4]) % dim
-            v[h] += 1.0
-        n = math.sqrt(sum(x * x for x in v)) or 1.0
-        return [x / n for x in v]
+        return self.embedder.embed(text).tolist()
 
     def add(
         self,
         texts: List[str],
         metas: List[Dict[str, Any]] | None = None,
         collection: str = "default",
+        batch_size: Optional[int] = None,
     ):
         metas = metas or [{} for _ in texts]
-        sql = f"INSERT INTO {self.table} (v, text, meta) VALUES (%s, %s, %s)"
+        pairs = list(zip(texts, metas))
+        if not pairs:
+            return
+        bs = max(1, int(batch_size or self.batch_size))
         with self._conn() as c, c.cursor() as cur:
-            for txt, meta in zip(texts, metas):
-                v = self._embed(txt[:4000])
-                cur.execute(sql, (v, txt[:4000], json.dumps(meta)))
+            for s in range(0, len(pairs), bs):
+                chunk = pairs[s : s + bs]
+                clipped = [txt[:4000] for txt, _ in chunk]
+                mat = self.embedder.embed_many(clipped)
+                rows = [
+                    (collection, _vec_literal(v), txt, json.dumps(meta or {}))
+                    for v, txt, (_t, meta) in zip(mat, clipped, chunk)
+                ]
+                if self.ingest_mode == "copy":
+                    self._copy_rows(cur, rows)
+                else:
+                    execute_values(
+                        cur,
+                        f"INSERT INTO {self.table} (collection, v, text, meta) VALUES %s",
+                        rows,
+                        template="(%s, %s::vector, %s, %s::jsonb)",
+                        page_size=bs,
+                    )
+        if self._index_pending:
+            self._rows += len(pairs)
+            if self._rows >= self.ivf_min_rows:
+                self.ensure_index()  # hitung ulang (writer lain) lalu buat index
+
+    def _copy_rows(self, cur, rows):
+        buf = io.StringIO()
+        csv.writer(buf).writerows(rows)
+        buf.seek(0)
+        cur.copy_expert(
+            f"COPY {self.table} (collection, v, text, meta) FROM STDIN WITH (FORMAT csv)",
+            buf,
+        )
 
     def search(
         self, query: str, k: int = 8, collection: str = "default"
     ) -> List[Tuple[str, float, Dict[str, Any]]]:
-        v = self._embed(query)
+        return self.search_many([query], k, collection)[0]
+
+    def search_many(
+        self, queries: List[str], k: int = 8, collection: str = "default"
+    ) -> List[List[Tuple[str, float, Dict[str, Any]]]]:
+        if not queries:
+            return []
+        qv = [_vec_literal(v) for v in self.embedder.embed_many(queries)]
+        op = self._op
+        score = f"1 - (t.v {op} q.v)" if self.use_cosine else f"(1.0 - (t.v {op} q.v))"
+        sql = f"""
+        SELECT q.ord, r.text, r.score, r.meta
+        FROM unnest(%s::vector[]) WITH ORDINALITY AS q(v, ord)
+        CROSS JOIN LATERAL (
+          SELECT t.text, {score} AS score, t.meta
+          FROM {self.table} t
+          WHERE t.collection = %s
+          ORDER BY t.v {op} q.v ASC
+          LIMIT %s
+        ) r
+        ORDER BY q.ord, r.score DESC
+        """
+        out: List[List[Tuple[str, float, Dict[str, Any]]]] = [[] for _ in queries]
         with self._conn() as c, c.cursor() as cur:
-            if self.use_cosine:
-                sql = f"SELECT text, 1 - (v <=> %s) AS score, meta FROM {self.table} ORDER BY v <=> %s ASC LIMIT %s"
-                cur.execute(sql, (v, v, k))
-            else:
-                sql = f"SELECT text, (1.0 - (v <-> %s)) AS score, meta FROM {self.table} ORDER BY v <-> %s ASC LIMIT %s"
-                cur.execute(sql, (v, v, k))
-            rows = cur.fetchall()
-        out = []
-        for text, score, meta in rows:
-            out.append((text, float(score), meta or {}))
+            self._tune(cur)
+            cur.execute(sql, (qv, collection, int(k)))
+            for ord_, text, sc, meta in cur.fetchall():
+                out[int(ord_) - 1].append((text, float(sc), meta or {}))
         return out
@@ -1,6 +1,9 @@
 from __future__ import annotations
 from typing import List, Dict, Any, Tuple, Optional
-import math
+
+import numpy as np
+
+from javu_agi.vector.embedder import get_embedder
 
 
 class VectorStore:
@@ -15,23 +18,75 @@ class VectorStore:
     def search(
         self, query: str, k: int = 8, collection: str = "default"
     ) -> List[Tuple[str, float, Dict[str, Any]]]: ...
+    def search_many(
+        self, queries: List[str], k: int = 8, collection: str = "default"
+    ) -> List[List[Tuple[str, float, Dict[str, Any]]]]:
+        return [self.search(q, k, collection) for q in queries]
+
+
+class _Collection:
+    """
+    Matrix float32 kontigu per collection (row = vector ter-normalisasi).
+    Kapasitas tumbuh 2x supaya append amortized O(1).
+    """
+
+    def __init__(self, dim: int, capacity: int = 1024):
+        self.dim = dim
+        self.mat = np.zeros((capacity, dim), dtype=np.float32)
+        self.n = 0
+        self.texts: List[str] = []
+        self.metas: List[Dict[str, Any]] = []
+
+    def _reserve(self, extra: int):
+        need = self.n + extra
+        cap = self.mat.shape[0]
+        if need <= cap:
+            return
+        while cap < need:
+            cap *= 2
+        grown = np.zeros((cap, self.dim), dtype=np.float32)
+        grown[: self.n] = self.mat[: self.n]
+        self.mat = grown
 
+    def append(self, rows: np.ndarray, texts: List[str], metas: List[Dict[str, Any]]):
+        m = rows.shape[0]
+        self._reserve(m)
+        self.mat[self.n : self.n + m] = rows
+        self.n += m
+        self.texts.extend(texts)
+        self.metas.extend(metas)
 
-# ---- In-memory fallback (ringan, tanpa dep) ----
+    def view(self) -> np.ndarray:
+        return self.mat[: self.n]
+
+
+def _topk(scores: np.ndarray, k: int) -> np.ndarray:
+    """Index top-k (desc) per baris; argpartition dulu baru sort k elemen saja."""
+    n = scores.shape[-1]
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(scores.shape[:-1] + (0,), dtype=np.int64)
+    if k < n:
+        part = np.argpartition(scores, n - k, axis=-1)[..., n - k :]
+    else:
+        part = np.broadcast_to(np.arange(n), scores.shape).copy()
+    order = np.argsort(-np.take_along_axis(scores, part, axis=-1), axis=-1, kind="stable")
+    return np.take_along_axis(part, order, axis=-1)
+
+
+# ---- In-memory fallback (ringan, cukup numpy) ----
 class InMemoryVectorStore(VectorStore):
-    def __init__(self):
-        self.db: Dict[str, List[Tuple[List[float], str, Dict[str, Any]]]] = {}
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self.embedder = get_embedder(dim)
+        self.db: Dict[str, _Collection] = {}
 
     def _embed(self, text: str) -> List[float]:
-        # hashing bag-of-ngrams ringan
-        dim = 256
-        v = [0.0] * dim
-        t = text.lower()
-        for i in range(len(t) - 3):
-            h = hash(t[i : i + 4]) % dim
-            v[h] += 1.0
-        n = math.sqrt(sum(x * x for x in v)) or 1.0
-        return [x / n for x in v]
+        # hashing bag-of-ngrams ringan (stabil lintas proses)
+        return self.embedder.embed(text).tolist()
+
+    def _embed_matrix(self, texts: List[str]) -> np.ndarray:
+        return self.embedder.embed_many(texts)
 
     def add(
         self,
@@ -40,21 +95,37 @@ class InMemoryVectorStore(VectorStore):
         collection: str = "default",
     ):
         metas = metas or [{} for _ in texts]
-        col = self.db.setdefault(collection, [])
-        for txt, meta in zip(texts, metas):
-            col.append((self._embed(txt[:4000]), txt[:4000], meta))
+        pairs = list(zip(texts, metas))
+        if not pairs:
+            return
+        clipped = [txt[:4000] for txt, _ in pairs]
+        col = self.db.get(collection)
+        if col is None:
+            col = self.db[collection] = _Collection(self.dim)
+        col.append(self._embed_matrix(clipped), clipped, [m for _, m in pairs])
 
     def search(
         self, query: str, k: int = 8, collection: str = "default"
     ) -> List[Tuple[str, float, Dict[str, Any]]]:
-        col = self.db.get(collection, [])
-        if not col:
-            return []
-        qv = self._embed(query)
+        return self.search_many([query], k, collection)[0]
 
-        def cos(a, b):
-            return sum(x * y for x, y in zip(a, b))
+    def search_many(
+        self, queries: List[str], k: int = 8, collection: str = "default"
+    ) -> List[List[Tuple[str, float, Dict[str, Any]]]]:
+        """Batch query: satu matmul (Q x N) + argpartition top-k per baris."""
+        col = self.db.get(collection)
+        if col is None or col.n == 0 or not queries:
+            return [[] for _ in queries]
+        q = self._embed_matrix(queries)
+        scores = q @ col.view().T
+        idx = _topk(scores, k)
+        out = []
+        for row, ids in enumerate(idx):
+            out.append(
+                [(col.texts[i], float(scores[row, i]), col.metas[i]) for i in ids.tolist()]
+            )
+        return out
 
-        scored = [(txt, float(cos(qv, v)), meta) for (v, txt, meta) in col]
-        scored.sort(key=lambda t: t[1], reverse=True)
-        return scored[:k]
+    def count(self, collection: str = "default") -> int:
+        col = self.db.get(collection)
+        return col.n if col else 0
@@ -1,9 +1,12 @@
 CREATE EXTENSION IF NOT EXISTS vector;
 CREATE TABLE IF NOT EXISTS vectors (
   id BIGSERIAL PRIMARY KEY,
+  collection TEXT NOT NULL DEFAULT 'default',
   v vector(256) NOT NULL,
   text TEXT NOT NULL,
   meta JSONB
 );
--- Opsional: index approximate
--- CREATE INDEX IF NOT EXISTS vectors_v_idx ON vectors USING ivfflat (v vector_cosine_ops) WITH (lists = 100);
+CREATE INDEX IF NOT EXISTS vectors_collection_idx ON vectors (collection);
+-- Opsional: index approximate (PGVectorStore index_type=ivfflat|hnsw membuat ini otomatis)
+-- CREATE INDEX IF NOT EXISTS vectors_v_ivfflat_idx ON vectors USING ivfflat (v vector_cosine_ops) WITH (lists = 100);
+-- CREATE INDEX IF NOT EXISTS vectors_v_hnsw_idx ON vectors USING hnsw (v vector_cosine_ops) WITH (m = 16, ef_construction = 64);
@@ -0,0 +1,84 @@
+import threading
+
+from javu_agi.accounting import Accounting
+
+
+def test_concurrent_spend_is_batched_and_read_through(tmp_path):
+    acct = Accounting(str(tmp_path / "budget.db"), flush_items=64, flush_interval_s=0.05)
+    acct.add_spend("u1", 1.0)
+    assert acct.spent_today("u1") == 1.0  # belum di-flush tetap terlihat
+
+    def work():
+        for _ in range(100):
+            acct.add_spend("u1", 0.01)
+            acct.log_usage(str(tmp_path / "usage.jsonl"), {"user": "u1"})
+
+    ts = [threading.Thread(target=work) for _ in range(8)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    assert acct.flush()
+    assert abs(acct.spent_today("u1") - 9.0) < 1e-9
+    st = acct.stats()
+    assert st["pending"] == 0 and st["flushes"] < st["spend_adds"]
+    assert sum(1 for _ in open(tmp_path / "usage.jsonl")) == 800
+    acct.close()
+    # DB yang sama dibuka ulang: nilai tersimpan
+    again = Accounting(str(tmp_path / "budget.db"))
+    assert abs(again.spent_today("u1") - 9.0) < 1e-9
+    again.close()
+
+
+def test_journal_replayed_after_crash(tmp_path):
+    db = str(tmp_path / "budget.db")
+    crashed = Accounting(db, flush_items=10_000, flush_interval_s=3600)
+    for _ in range(5):
+        crashed.add_spend("u2", 0.5)
+    # proses mati sebelum flush: writer tidak sempat menulis ke DB, flock journal lepas
+    crashed._journal.close()
+    recovered = Accounting(db)
+    assert recovered.stats()["replayed"] == 5
+    assert recovered.spent_today("u2") == 2.5
+    recovered.close()
+    # writer lama akhirnya flush: seq sudah diterapkan -> tidak dobel
+    crashed.flush()
+    assert Accounting(db).spent_today("u2") == 2.5
+
+
+def test_two_processes_share_db_without_losing_entries(tmp_path):
+    db = str(tmp_path / "budget.db")
+    a = Accounting(db, flush_items=10_000, flush_interval_s=3600, base_ttl_s=0.0)
+    b = Accounting(db, flush_items=10_000, flush_interval_s=3600, base_ttl_s=0.0)
+    for _ in range(3):
+        a.add_spend("u3", 1.0)
+        b.add_spend("u3", 2.0)
+    assert b.flush()
+    # journal a tidak boleh ikut dikosongkan oleh flush b
+    assert sum(1 for _ in open(a.journal_file)) == 3
+    assert a.flush()
+    assert a.spent_today("u3") == 9.0 and b.spent_today("u3") == 9.0
+    # proses ketiga start: journal a/b masih dikunci -> tidak di-replay
+    c = Accounting(db)
+    assert c.stats()["replayed"] == 0 and c.spent_today("u3") == 9.0
+    for x in (a, b, c):
+        x.close()
+
+
+def test_failed_flush_is_reported_and_retried(tmp_path, monkeypatch):
+    acct = Accounting(str(tmp_path / "budget.db"), flush_interval_s=0.5)
+    real = acct._write_spend
+    calls = {"n": 0}
+
+    def flaky(spend, own=True):
+        calls["n"] += 1
+        if calls["n"] == 1:
+            raise RuntimeError("disk full")
+        return real(spend, own)
+
+    monkeypatch.setattr(acct, "_write_spend", flaky)
+    acct.add_spend("u4", 1.5)
+    assert acct.flush(timeout=3.0) is False
+    assert acct.flush(timeout=3.0)
+    assert acct.spent_today("u4") == 1.5 and acct.stats()["errors"] == 1
+    acct.close()
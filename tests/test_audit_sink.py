@@ -0,0 +1,90 @@
+import gzip, json, os, threading, time
+
+from javu_agi.audit.audit_chain import AuditChain
+from javu_agi.audit.sink import AuditSink
+
+
+def _rows(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(l) for l in f]
+
+
+def test_group_commit_keeps_order_across_threads(tmp_path):
+    sink = AuditSink(flush_items=64, flush_interval_s=0.01, ring_size=32, block_s=0.001, compress=False)
+    p = str(tmp_path / "a.jsonl")
+
+    def work(t):
+        for i in range(200):
+            sink.log(p, {"t": t, "i": i})
+
+    ts = [threading.Thread(target=work, args=(t,)) for t in range(4)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    assert sink.flush()
+    rows = _rows(p)
+    assert len(rows) == 800
+    for t in range(4):
+        assert [r["i"] for r in rows if r["t"] == t] == list(range(200))
+    st = sink.stats()
+    assert st["flushes"] < 800 and st["dropped"] == 0
+    sink.close()
+
+
+def test_overflow_drop_and_rotation_compression(tmp_path):
+    sink = AuditSink(ring_size=2, flush_items=10_000, flush_interval_s=5, block_s=0.001, overflow="drop",
+                     segment_bytes=50, compress=True)
+    p = str(tmp_path / "b.jsonl")
+    for i in range(5):
+        sink.log(p, {"i": i, "pad": "x" * 20})
+    assert sink.stats()["dropped"] == 3
+    sink.close()
+    assert sink.stats()["rotated"] == 1 and sink.stats()["compressed"] == 1
+    seg = [f for f in os.listdir(tmp_path) if f.endswith(".gz")]
+    with gzip.open(tmp_path / seg[0], "rt") as f:
+        assert [json.loads(l)["i"] for l in f] == [0, 1]
+
+
+def test_audit_chain_through_sink_shares_head_across_instances(tmp_path):
+    sink = AuditSink(flush_interval_s=0.01, compress=False)
+    d = str(tmp_path / "chain")
+    chains = [AuditChain(d, sink=sink) for _ in range(3)]  # mis. wrapper, planner, EC
+
+    def work(ch, w):
+        for i in range(50):
+            ch.commit("tool:exec", {"w": w, "i": i})
+
+    ts = [threading.Thread(target=work, args=(c, w)) for w, c in enumerate(chains)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    assert chains[0].flush()
+    assert chains[0].verify(time.strftime("%Y%m%d"))
+    rows = _rows(os.path.join(d, time.strftime("%Y%m%d") + ".jsonl"))
+    assert len(rows) == 150 and open(chains[0].head_path).read() == rows[-1]["hash"]
+    assert sink.stats()["flushes"] < 150
+    sink.close()
+
+
+def _chain_worker(d, w):
+    ch = AuditChain(d, sync=True)
+    for i in range(25):
+        ch.commit("tool:exec", {"w": w, "i": i})
+
+
+def test_audit_chain_sync_mode_stays_valid_across_processes(tmp_path):
+    import multiprocessing as mp
+
+    d = str(tmp_path / "mp")
+    ctx = mp.get_context("fork")
+    ps = [ctx.Process(target=_chain_worker, args=(d, w)) for w in range(3)]
+    for p in ps:
+        p.start()
+    for p in ps:
+        p.join(30)
+    ch = AuditChain(d, sync=True)
+    assert ch.verify(time.strftime("%Y%m%d"))
+    rows = _rows(os.path.join(d, time.strftime("%Y%m%d") + ".jsonl"))
+    assert len(rows) == 75 and open(ch.head_path).read() == rows[-1]["hash"]
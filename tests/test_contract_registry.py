@@ -0,0 +1,63 @@
+import json, os, re
+
+from javu_agi.tools import tool_contracts as tc
+
+
+def _legacy_redact(payload):
+    s = json.dumps(payload, ensure_ascii=False)
+    for pat, rep in tc._PII.redact_rules.items():
+        s = re.sub(pat, rep, s)
+    return json.loads(s)
+
+
+def test_registry_memoized_and_reloaded_on_policy_change(tmp_path, monkeypatch):
+    pol = tmp_path / "policy.yaml"
+    pol.write_text("a: 1\n")
+    monkeypatch.setenv("CONTRACT_POLICY_FILES", str(pol))
+    monkeypatch.setattr(tc, "_RELOAD_CHECK_S", 0.0)
+    r1 = tc.reload_contracts(force=True)
+    assert tc.default_contracts() is r1 and r1.plan("web.get") is r1.plan("web.get")
+    monkeypatch.setenv("REQUIRE_APPROVAL", "1")
+    r2 = tc.default_contracts()
+    assert r2 is not r1
+    gate = tc.enforce_contract(r2, "drill_execute", {"depth_m": 10})
+    assert gate["ok"] and gate["approval_required"]
+    monkeypatch.delenv("REQUIRE_APPROVAL")
+    pol.write_text("a: 2\n")
+    os.utime(pol, ns=(0, 1))
+    assert tc.default_contracts() is not r2
+
+
+def test_compiled_redaction_matches_legacy():
+    cases = [
+        {"input": "tanpa data pribadi"},
+        {"input": "kartu 1234567890123456, hp 0812-345-6789"},
+        {"input": "email ab.1234567890123456@x.com dan 123-456-7890@y.io"},
+        {"n": 1234567890123456, "to": "budi@contoh.co.id"},
+    ]
+    for c in cases:
+        try:
+            want = _legacy_redact(c)
+        except ValueError:
+            want = ValueError
+        try:
+            got = tc._redact_payload(c)
+        except ValueError:
+            got = ValueError
+        assert got == want, c
+
+
+def test_shared_registry_read_only_and_sanitized_args_not_aliased():
+    import pytest
+
+    reg = tc.reload_contracts(force=True)
+    with pytest.raises(RuntimeError):
+        reg.register(tc.ToolContract(name="x.y"))
+    own = reg.copy()
+    own.register(tc.ToolContract(name="x.y"))
+    assert own.get("x.y") and reg.get("x.y") is None
+
+    args = {"url": "https://contoh.co.id"}
+    gate = tc.enforce_contract(reg, "web.get", args)
+    assert gate["ok"] and gate["args_sanitized"] == args
+    assert gate["args_sanitized"] is not args
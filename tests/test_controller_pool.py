@@ -0,0 +1,99 @@
+import threading
+
+import pytest
+
+from javu_agi.runtime.controller_pool import ControllerPool, PoolTimeout
+
+
+class _WM:
+    def __init__(self):
+        self.items = []
+
+
+class _Ctrl:
+    made = 0
+
+    def __init__(self):
+        _Ctrl.made += 1
+        self.wm = _WM()
+
+    def process(self, uid, prompt):
+        self.wm.items.append(prompt)
+        return prompt, {"n": len(self.wm.items)}
+
+
+def test_pool_reuses_resets_wm_and_recycles():
+    _Ctrl.made = 0
+    pool = ControllerPool(_Ctrl, size=2, max_uses=3, timeout_s=0.05)
+    for _ in range(3):
+        _, meta = pool.run("process", "u", "hi")
+        assert meta["n"] == 1  # WorkingMemory tidak bocor antar request
+    assert _Ctrl.made == 1
+    pool.run("process", "u", "hi")  # max_uses tercapai -> instance baru
+    assert _Ctrl.made == 2
+
+    with pytest.raises(ValueError):
+        with pool.lease():
+            raise ValueError("boom")
+    assert pool.stats()["total"] == 0  # controller rusak dibuang
+
+    with pool.lease(), pool.lease():
+        with pytest.raises(PoolTimeout):
+            pool.acquire()
+    pool.invalidate()
+    assert pool.stats()["idle"] == 0
+
+
+def test_pool_exclusive_under_threads():
+    pool = ControllerPool(_Ctrl, size=3)
+    busy, errors = set(), []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(50):
+            with pool.lease() as c:
+                with lock:
+                    if id(c) in busy:
+                        errors.append(id(c))
+                    busy.add(id(c))
+                with lock:
+                    busy.discard(id(c))
+
+    ts = [threading.Thread(target=worker) for _ in range(8)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    assert not errors and pool.stats()["total"] <= 3
+
+
+class _Router:
+    def __init__(self):
+        self.policy, self.strict_caps = None, False
+
+
+class _Ec(_Ctrl):
+    def __init__(self):
+        super().__init__()
+        self.router = _Router()
+        self.quota = object()
+        self._miss_ctr = 0
+
+
+def test_configure_reaches_every_controller_and_limits_are_shared():
+    pool = ControllerPool(_Ec, size=3)
+    pool.warm(2)
+    busy = pool.acquire()
+    busy._miss_ctr = 5
+
+    def _apply(ec):
+        ec.router.policy = "v2"
+        ec.router.strict_caps = True
+
+    pool.configure("router_policy", _apply)
+    pool.release(busy)
+    assert busy._miss_ctr == 0
+    with pool.lease() as a, pool.lease() as b, pool.lease() as c:
+        ecs = (a, b, c)
+        assert all(e.router.policy == "v2" and e.router.strict_caps for e in ecs)
+        assert len({id(e.quota) for e in ecs}) == 1  # limit per user tidak terpecah per instance
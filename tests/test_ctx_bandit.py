@@ -1,7 +1,7 @@
 from javu_agi.learn.policy_learner_ctx import ContextualPolicyLearner
 
-def test_linucb_update():
-    L = ContextualPolicyLearner(dim=8)
+def test_linucb_update(tmp_path):
+    L = ContextualPolicyLearner(path=str(tmp_path / "policy_ctx.json"), dim=8)
     x = [1,0.2,0.3,0.1,1,0,0,0]
     arm = L.choose(x)["arm"]
     L.record(arm, x, 1.0)
@@ -0,0 +1,29 @@
+import json
+import os
+
+from javu_agi.memory.episodic_memory import EpisodicMemory
+from javu_agi.memory.memory_schemas import Episode
+
+
+def test_indexed_store_and_legacy_import(tmp_path):
+    legacy = tmp_path / "episodic"
+    legacy.mkdir()
+    for i in range(3):
+        p = legacy / f"old{i}.json"
+        ep = Episode(episode_id=f"old{i}", user_id="u", prompt=f"lama {i}")
+        p.write_text(json.dumps(ep.dict(), default=str))
+        os.utime(p, (1000 + i, 1000 + i))
+
+    em = EpisodicMemory(path=tmp_path / "episodic.db", legacy_dir=legacy)
+    assert [e.episode_id for e in em.recall_recent(limit=2)] == ["old2", "old1"]
+    for i in range(5):
+        em.store(Episode(episode_id=f"e{i}", user_id="u", prompt=f"baru {i}", thoughts=["t"]))
+    assert em.recall_recent(limit=1)[0].episode_id == "e4"
+    assert len(em.list(limit=100)) == 8
+    assert em.recall_by_id("e2").prompt == "baru 2"
+    assert em.recall_by_id("nope") is None
+    assert em.delete_text("baru 2") == 1
+    assert em.recall_by_id("e2") is None
+
+    again = EpisodicMemory(path=tmp_path / "episodic.db", legacy_dir=legacy)
+    assert len(again.list(limit=100)) == 7  # import tidak diulang
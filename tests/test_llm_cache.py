@@ -0,0 +1,51 @@
+import time
+
+from javu_agi.cache.llm_cache import MemoryTier, SQLiteTier, TieredCache
+
+
+def test_memory_tier_lru_size_and_ttl():
+    t = MemoryTier(max_items=3, max_bytes=20, ttl_s=60)
+    for k in "abc":
+        t.set(k, b"12345")
+    t.get("a")  # a jadi most-recent
+    t.set("d", b"12345")
+    assert t.get("b") is None and t.get("a") == b"12345"
+    t.set("big", b"x" * 12)  # size-aware: buang LRU sampai <= 20 byte
+    assert t.stats()["bytes"] <= 20 and t.get("big")
+    t.set("old", b"1", ttl_s=-1)
+    assert t.get("old") is None
+
+
+def test_tiered_cache_l2_shared_and_metrics(tmp_path):
+    path = str(tmp_path / "llm_cache.db")
+    a = TieredCache(MemoryTier(), SQLiteTier(path))
+    val = {"text": "halo", "model": "m", "usage": {"in": 1, "out": 1}, "cost_usd": 0.0}
+    assert a.get("k") is None
+    a.set("k", val)
+    got = a.get("k")
+    assert got == val and got is not a.get("k")
+
+    b = TieredCache(MemoryTier(), SQLiteTier(path))  # proses lain: hit dari L2 lalu promote
+    assert b.get("k") == val and b.get("k") == val
+    st = b.stats()
+    assert st["hits_l2"] == 1 and st["hits_l1"] == 1 and st["hit_rate"] == 1.0
+    assert st["bytes_hit"] > 0 and a.stats()["misses"] == 1
+
+
+def test_sqlite_tier_evicts_lru_over_budget(tmp_path):
+    t = SQLiteTier(str(tmp_path / "c.db"), max_bytes=1000, evict_every=1)
+    for i in range(30):
+        t.set(f"k{i}", b"x" * 100, ttl_s=60)
+        time.sleep(0.001)
+    assert t.get("k0") is None and t.get("k29") == b"x" * 100
+
+
+def test_l2_promotion_keeps_remaining_ttl(tmp_path):
+    path = str(tmp_path / "llm_cache.db")
+    a = TieredCache(MemoryTier(), SQLiteTier(path))
+    a.set("k", {"text": "halo"}, ttl_s=1)
+    b = TieredCache(MemoryTier(ttl_s=3600), SQLiteTier(path))
+    assert b.get("k") == {"text": "halo"}  # promote ke L1 dengan sisa <= 1 detik
+    time.sleep(1.1)
+    assert b.get("k") is None
+    assert b.stats()["misses"] == 1
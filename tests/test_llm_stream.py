@@ -0,0 +1,59 @@
+import pytest
+
+pytest.importorskip("requests")
+R = pytest.importorskip("javu_agi.llm_router")  # dependency opsional router
+LLMClient = pytest.importorskip("javu_agi.llm.client").LLMClient
+
+
+def test_sse_events_parse_openai_and_anthropic():
+    ev = LLMClient._sse('data: {"choices":[{"delta":{"content":"Hal"}}]}')
+    assert LLMClient._openai_event(ev) == {"delta": "Hal"}
+    assert LLMClient._sse("data: [DONE]") is None and LLMClient._sse(": ping") is None
+    ev = {"type": "message_delta", "usage": {"output_tokens": 7}}
+    assert LLMClient._anthropic_event(ev) == {"usage": {"out": 7}}
+
+
+def test_stream_yields_deltas_then_reconciled_done(monkeypatch, tmp_path):
+    monkeypatch.setattr(R, "USAGE_LOG_PATH", str(tmp_path / "usage.jsonl"))
+    monkeypatch.setattr(R, "STREAM_ACCOUNT_TOKENS", 1)
+    monkeypatch.setattr(R, "_redis", None)  # rpm/inflight gate tanpa server Redis
+    charged = []
+    monkeypatch.setattr(R, "budget_inc_usd", lambda d: charged.append(d) or sum(charged))
+
+    def fake(model, prompt, **kw):
+        yield {"delta": "halo "}
+        yield {"delta": "dunia"}
+        yield {"usage": {"in": 10, "out": 3}}
+
+    monkeypatch.setattr(R, "_stream_provider", fake)
+    evs = list(R.stream_and_generate("sapa aku", user_id="u-stream"))
+    assert [e["text"] for e in evs if e["type"] == "delta"] == ["halo ", "dunia"]
+    done = evs[-1]
+    assert done["type"] == "done" and done["text"] == "halo dunia"
+    assert done["usage"] == {"in": 10, "out": 3}
+    # biaya bertahap + selisih rekonsiliasi = biaya final
+    assert sum(charged) == pytest.approx(done["cost_usd"])
+    # jawaban lengkap masuk cache -> stream kedua satu delta utuh
+    again = list(R.stream_and_generate("sapa aku", user_id="u-stream"))
+    assert again[0]["text"] == "halo dunia" and again[-1]["cached"]
+
+
+def test_async_client_per_event_loop_closed_with_loop():
+    pytest.importorskip("httpx")
+    import asyncio
+
+    cli = LLMClient()
+    seen = []
+
+    async def use():
+        st = await cli._aclient()
+        assert st is await cli._aclient()
+        seen.append(st)
+
+    asyncio.run(use())
+    asyncio.run(use())
+    a, b = seen
+    assert a.http is not b.http and a.sems["openai"] is not b.sems["openai"]
+    # asyncio.run -> shutdown_asyncgens menutup client loop itu dan melepas entrinya
+    assert a.http.is_closed and b.http.is_closed
+    assert len(cli._loops) == 0
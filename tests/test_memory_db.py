@@ -0,0 +1,67 @@
+import numpy as np
+
+from javu_agi.memory_db import MemoryDB
+
+
+def test_recall_index_topk_user_filter_and_sidecar(tmp_path):
+    path = str(tmp_path / "memory.db")
+    db = MemoryDB(path)
+    rng = np.random.default_rng(0)
+    vecs = rng.standard_normal((200, 16)).astype(np.float32)
+    for i, v in enumerate(vecs):
+        eid = db.add_episode(f"u{i % 2}", "t", f"ep {i}", {})
+        db.add_vector(eid, "episodic", v)
+
+    hits = db.recall(vecs[10], k=3)
+    assert hits[0]["id"] == 11 and len(hits) == 3
+    assert hits[0]["score"] >= hits[1]["score"] >= hits[2]["score"]
+    assert all(h["user"] == "u1" for h in db.recall(vecs[10], k=5, user="u1"))
+
+    db.add_vector(11, "episodic", -vecs[10])  # replace -> index ikut update
+    assert db.recall(vecs[10], k=1)[0]["id"] != 11
+
+    db.save_index()
+    db2 = MemoryDB(path)
+    expect = [h["id"] for h in db.recall(vecs[20], k=3)]
+    assert [h["id"] for h in db2.recall(vecs[20], k=3)] == expect
+    db2.add_vector(12, "doc", vecs[11])  # writer lain: db harus reload
+    assert all(h["id"] != 12 for h in db.recall(vecs[11], k=3))
+
+
+def test_pack_compat_and_bulk_vectors(tmp_path):
+    import struct
+
+    from javu_agi.memory_db import _pack, _unpack
+
+    v = np.arange(8, dtype=np.float64) / 3
+    assert _pack(v) == struct.pack("8f", *v.astype(np.float32).tolist())
+    assert np.array_equal(_unpack(_pack(v)), v.astype(np.float32))
+
+    db = MemoryDB(str(tmp_path / "memory.db"))
+    mat = np.random.default_rng(1).standard_normal((50, 12)).astype(np.float32)
+    db.add_vectors(list(range(100, 150)), "doc", mat)
+    ids, loaded = db.load_vectors("doc")
+    assert ids.tolist() == list(range(100, 150))
+    assert loaded.shape == (50, 12) and np.array_equal(loaded, mat)
+
+
+def test_periodic_sidecar_save_runs_off_the_write_path(tmp_path, monkeypatch):
+    import os, threading, time
+
+    from javu_agi import memory_db
+
+    monkeypatch.setattr(memory_db, "INDEX_SAVE_EVERY", 5)
+    path = str(tmp_path / "memory.db")
+    db = MemoryDB(path)
+    vecs = np.random.default_rng(1).standard_normal((12, 8)).astype(np.float32)
+    db.recall(vecs[0], k=1)  # index ter-load -> add_vector update inkremental
+    for i, v in enumerate(vecs):
+        db.add_vector(db.add_episode("u", "t", f"ep {i}", {}), "episodic", v)
+    side = path + ".episodic.8.json"
+    deadline = time.time() + 5
+    while not os.path.exists(side) and time.time() < deadline:
+        time.sleep(0.01)
+    assert os.path.exists(side)
+    assert any(t.name == "memory-index-save" for t in threading.enumerate())
+    db.save_index()  # sisa update ditulis sinkron
+    assert [h["id"] for h in MemoryDB(path).recall(vecs[11], k=1)] == [12]
@@ -0,0 +1,65 @@
+import time
+
+import pytest
+
+from javu_agi.obs.model_latency import ModelLatency
+
+
+def test_quantile_and_pick_prefers_clearly_faster_model():
+    lat = ModelLatency(min_samples=5)
+    for i in range(10):
+        lat.record("slow", 2.0 + i * 0.1)
+        lat.record("fast", 0.5)
+        lat.record("meh", 1.8)
+    assert lat.quantile("slow", 0.95) == pytest.approx(2.9)
+    assert lat.quantile("unknown", 0.95) is None
+    assert lat.pick("slow", ["meh", "fast"]) == "fast"
+    # selisih kecil (di bawah ratio) -> tetap pilihan policy
+    assert lat.pick("meh", ["slow"]) == "meh"
+
+
+def test_errors_penalize_and_window_expires():
+    lat = ModelLatency(window_s=0.05, min_samples=4)
+    for _ in range(4):
+        lat.record("flaky", 0.1, ok=False)
+        lat.record("ok", 0.4)
+    assert lat.error_rate("flaky") == 1.0
+    assert lat.pick("flaky", ["ok"]) == "ok"
+    time.sleep(0.06)
+    assert lat.score("flaky") is None and lat.stats() == {}
+
+
+def test_router_hedge_takes_first_good_answer(monkeypatch):
+    R = pytest.importorskip("javu_agi.llm_router")  # dependency opsional router
+    monkeypatch.setattr(R, "ROUTER_HEDGE_MIN_S", 0.05)
+    monkeypatch.setattr(R, "ROUTER_HEDGE_DEFAULT_S", 0.05)
+
+    def fake(model, prompt, **kw):
+        time.sleep(1.0 if model == "slow" else 0.01)
+        return {"text": model, "usage": {"in": 1, "out": 1}}
+
+    monkeypatch.setattr(R, "_call_provider", fake)
+    t0 = time.perf_counter()
+    model, out = R._hedged_call("slow", "fast", "p", None, set())
+    assert (model, out["text"]) == ("fast", "fast")
+    assert time.perf_counter() - t0 < 0.5
+
+
+def test_router_hedge_not_fired_when_user_cap_covers_only_primary(monkeypatch):
+    R = pytest.importorskip("javu_agi.llm_router")  # dependency opsional router
+    monkeypatch.setattr(R, "ROUTER_HEDGE_MIN_S", 0.05)
+    monkeypatch.setattr(R, "ROUTER_HEDGE_DEFAULT_S", 0.05)
+    monkeypatch.setattr(R, "_est_call_usd", lambda prompt, model, max_tokens: 1.0)
+    monkeypatch.setattr(R, "_user_cap_left", lambda user_id: 0.6)  # cukup 1 call, tidak 2
+    calls = []
+
+    def fake(model, prompt, **kw):
+        calls.append(model)
+        time.sleep(0.2 if model == "slow" else 0.01)
+        return {"text": model, "usage": {"in": 1, "out": 1}}
+
+    monkeypatch.setattr(R, "_call_provider", fake)
+    before = R.get_model_stats()["hedge"]["skipped_cap"]
+    model, out = R._hedged_call("slow", "fast", "p", "u1", set(), max_tokens=16)
+    assert (model, calls) == ("slow", ["slow"])
+    assert R.get_model_stats()["hedge"]["skipped_cap"] == before + 1
@@ -0,0 +1,13 @@
+import pytest
+
+P = pytest.importorskip("javu_agi.llm.prompt_prefix")  # javu_agi.llm ikut memuat llm_router
+
+
+def test_prefix_is_memoized_and_hinted_by_length():
+    short = P.get_prefix("Kamu asisten.")
+    assert P.get_prefix("Kamu asisten.") is short
+    assert not short.hint("gpt-4o")
+    long = P.get_prefix("Prinsip: jujur, aman, membantu. " * 400)
+    assert long.hint("claude-sonnet") == P.PROMPT_CACHE
+    assert long.anthropic_blocks()[0]["cache_control"] == {"type": "ephemeral"}
+    assert P.get_prefix("") is None
@@ -0,0 +1,66 @@
+import time
+
+import pytest
+
+from javu_agi.router.provider_health import ProviderHealth, _MemoryBackend, _SqliteBackend
+
+
+def _health(backend, **kw):
+    return ProviderHealth(backend, max_fails=3, err_rate=0.5, cooldown_s=0.05, cache_ms=0, **kw)
+
+
+def test_trip_half_open_probe_and_recover():
+    h = _health(_MemoryBackend())
+    for _ in range(3):
+        h.record("openai", False)
+    assert not h.allow("openai") and h.is_open("openai")
+    time.sleep(0.06)
+    assert h.allow("openai")  # satu probe
+    assert not h.allow("openai")  # probe kedua ditolak
+    h.record("openai", False)
+    st = h.snapshot()["providers"]["openai"]
+    assert st["state"] == "open" and st["cooldown_s"] == 0.1
+    time.sleep(0.11)
+    assert h.allow("openai")
+    h.record("openai", True)
+    assert h.snapshot()["providers"]["openai"]["state"] == "closed" and h.allow("openai")
+
+
+def test_state_shared_between_instances_via_sqlite(tmp_path):
+    db = str(tmp_path / "health.db")
+    a, b = _health(_SqliteBackend(db)), _health(_SqliteBackend(db))
+    for _ in range(2):
+        a.record("anthropic", False)
+    b.record("anthropic", False)  # window dijumlah lintas worker
+    assert not a.allow("anthropic") and not b.allow("anthropic")
+
+
+def test_slow_calls_trip():
+    h = _health(_MemoryBackend(), slow_call_s=1.0, slow_rate=0.8)
+    for _ in range(3):
+        h.observe_latency("openai", 2.0)
+    assert h.is_open("openai")
+    assert h.snapshot()["counters"]["trips_slow"] == 1
+
+
+def test_redis_probe_slots_are_leased_atomically():
+    fakeredis = pytest.importorskip("fakeredis")
+    from javu_agi.router.provider_health import _RedisBackend
+
+    be = _RedisBackend(fakeredis.FakeRedis())
+    assert be.claim("openai", 2, 0.05) and be.claim("openai", 2, 0.05)
+    assert not be.claim("openai", 2, 0.05)
+    assert all(be.r.pttl(k) > 0 for k in be.r.scan_iter(match="llm:health:openai:probes:*"))
+    be.release("openai")
+    assert be.claim("openai", 2, 0.05) and not be.claim("openai", 2, 0.05)
+    time.sleep(0.08)  # lease habis walau pemegang slot mati tanpa release
+    assert be.claim("openai", 2, 0.05)
+
+
+def test_is_open_does_not_take_probe_slot():
+    h = _health(_MemoryBackend())
+    for _ in range(3):
+        h.record("openai", False)
+    time.sleep(0.06)
+    assert not h.is_open("openai") and not h.is_open("openai")
+    assert h.allow("openai") and not h.allow("openai")
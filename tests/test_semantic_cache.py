@@ -0,0 +1,75 @@
+from javu_agi.cache.semantic_cache import SemanticCache, tune_threshold
+from javu_agi.vector.store import InMemoryVectorStore
+
+
+def _cache(**kw):
+    logged = []
+    kw.setdefault("threshold", 0.9)
+    sc = SemanticCache(InMemoryVectorStore(), ["autonomy"], log=logged.append, **kw)
+    return sc, logged
+
+
+def test_near_duplicate_prompt_hits_same_scope_only():
+    sc, logged = _cache()
+    answers = {"k1": {"text": "jawaban"}}
+    p = "Buat rencana belajar python untuk pemula selama 4 minggu."
+    sc.remember("k1", p, "autonomy", "scope-a")
+    sc.commit("k1")
+    hit = sc.lookup("Buat rencana belajar python untuk pemula selama 4 minggu!", "autonomy", "scope-a", answers.get)
+    assert hit is not None and hit[0]["text"] == "jawaban" and hit[1] >= 0.9
+    # user/parameter lain -> tidak boleh bocor
+    assert sc.lookup(p, "autonomy", "scope-b", answers.get) is None
+    assert logged[0]["kind"] == "hit" and sc.stats()["hits"] == 1
+
+
+def test_other_scopes_do_not_crowd_out_top_k():
+    sc, _ = _cache(k=2)
+    p = "Buat rencana belajar python untuk pemula selama 4 minggu."
+    for i in range(5):  # user lain, prompt identik -> sim lebih tinggi dari entri scope ini
+        sc.remember(f"o{i}", p, "autonomy", f"other-{i}")
+        sc.commit(f"o{i}")
+    sc.remember("mine", "Buat rencana belajar python untuk pemula selama 4 minggu ya", "autonomy", "mine")
+    sc.commit("mine")
+    hit = sc.lookup(p, "autonomy", "mine", {"mine": {"text": "punyaku"}}.get)
+    assert hit is not None and hit[0]["text"] == "punyaku"
+
+
+def test_expired_answer_and_near_miss_are_recorded():
+    sc, logged = _cache(near=0.5)
+    sc.remember("k1", "ringkas artikel tentang energi surya", "autonomy", "s")
+    sc.commit("k1")
+    assert sc.lookup("ringkas artikel tentang energi angin", "autonomy", "s", lambda k: None) is None
+    assert [r["kind"] for r in logged] == ["near_miss"] * len(logged) and logged
+    assert sc.lookup("ringkas artikel tentang energi surya", "autonomy", "s", lambda k: None) is None
+    assert sc.stats()["stale"] == 1 and sc.stats()["pruned"] == 1
+    # entri yang sudah dipangkas tidak dicoba lagi
+    assert sc.lookup("ringkas artikel tentang energi surya", "autonomy", "s", lambda k: None) is None
+    assert sc.stats()["stale"] == 1
+
+
+def test_numbers_and_entities_must_match_exactly():
+    sc, _ = _cache(threshold=0.5)
+    answers = {"k1": {"text": "cuaca jakarta"}}
+    sc.remember("k1", "Prakiraan cuaca di Jakarta untuk 3 hari ke depan", "autonomy", "s")
+    sc.commit("k1")
+    assert sc.lookup("Prakiraan cuaca di Bandung untuk 3 hari ke depan", "autonomy", "s", answers.get) is None
+    assert sc.lookup("Prakiraan cuaca di Jakarta untuk 5 hari ke depan", "autonomy", "s", answers.get) is None
+    assert sc.stats()["anchor_mismatch"] == 2
+    assert sc.lookup("prakiraan cuaca di Jakarta untuk 3 hari ke depan!", "autonomy", "s", answers.get)
+
+
+def test_semantic_entry_ttl_prunes_before_fetch():
+    sc, _ = _cache(ttl_s=60)
+    sc.remember("k1", "daftar ibu kota negara asia tenggara", "autonomy", "s")
+    sc.commit("k1")
+    sc.store.db[sc._collection("autonomy", "s")].metas[0]["ts"] -= 120
+    fetched = []
+    assert sc.lookup("daftar ibu kota negara asia tenggara", "autonomy", "s", fetched.append) is None
+    assert fetched == [] and sc.stats()["pruned"] == 1
+
+
+def test_tune_threshold_from_labeled_rows():
+    rows = [{"sim": 0.99, "ok": True}, {"sim": 0.97, "ok": True}, {"sim": 0.95, "ok": False},
+            {"sim": 0.94, "ok": True}, {"sim": 0.90, "ok": False}]
+    assert tune_threshold(rows, 0.95) == 0.97
+    assert tune_threshold(rows, 0.75) == 0.94
@@ -0,0 +1,40 @@
+import json
+
+from javu_agi.memory.memory_schemas import SemanticFact
+from javu_agi.memory.memory_semantic import SemanticMemory
+
+
+def _fact(i, content):
+    return SemanticFact(fact_id=f"f{i}", content=content, source="t", confidence=0.9)
+
+
+def test_fts_bm25_and_crud(tmp_path):
+    legacy = tmp_path / "semantic.json"
+    legacy.write_text(json.dumps([_fact(0, "Jakarta ibu kota Indonesia").dict()], default=str))
+    sm = SemanticMemory(path=tmp_path / "semantic.db", legacy_file=legacy)
+    assert not legacy.exists() and (tmp_path / "semantic.json.migrated").exists()
+
+    sm.store(_fact(1, "Langit biru karena hamburan Rayleigh"))
+    sm.store(_fact(2, "Langit senja berwarna merah, langit sore"))
+    sm.store(_fact(3, "Kucing suka tidur"))
+    hits = sm.search("langit merah")
+    assert hits[0].fact_id == "f2"
+    assert {h.fact_id for h in hits} == {"f1", "f2"}
+    assert sm.search("indonesia")[0].fact_id == "f0"
+    assert len(sm.list(limit=10)) == 4
+
+    assert sm.update_text(old="Kucing suka tidur", new="Kucing suka ikan") == 1
+    assert sm.search("ikan")[0].fact_id == "f3"
+    assert sm.search("tidur") == []
+    assert sm.delete_text("Kucing suka ikan") == 1
+    assert sm.search("kucing") == []
+
+
+def test_restore_same_fact_id_replaces_fts_content(tmp_path):
+    sm = SemanticMemory(path=tmp_path / "semantic.db")
+    sm.store(_fact(1, "Ibu kota lama di Jakarta"))
+    sm.store(_fact(1, "Ibu kota baru di Nusantara"))
+    assert sm.search("jakarta") == []
+    hits = sm.search("nusantara")
+    assert [h.fact_id for h in hits] == ["f1"] and hits[0].content == "Ibu kota baru di Nusantara"
+    assert len(sm.list(limit=10)) == 1
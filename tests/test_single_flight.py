@@ -0,0 +1,70 @@
+import threading, time
+
+import pytest
+
+from javu_agi.cache.single_flight import SingleFlight, SQLiteLease
+
+
+def _run_threads(n, target):
+    ts = [threading.Thread(target=target) for _ in range(n)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    sf = SingleFlight()
+    calls, results = [], []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"text": "ok"}
+
+    _run_threads(10, lambda: results.append(sf.do("k", slow)))
+    assert len(calls) == 1 and all(r[0] == {"text": "ok"} for r in results)
+    assert sum(1 for _, leader in results if leader) == 1
+    st = sf.stats()
+    assert st["leaders"] == 1 and st["coalesced"] == 9 and st["inflight"] == 0
+
+
+def test_waiters_receive_leader_error():
+    sf = SingleFlight()
+    errs = []
+
+    def boom():
+        time.sleep(0.05)
+        raise ValueError("provider down")
+
+    def call():
+        with pytest.raises(ValueError):
+            sf.do("k", boom)
+        errs.append(1)
+
+    _run_threads(4, call)
+    assert len(errs) == 4
+    assert sf.do("k", lambda: 1) == (1, True)  # key dilepas setelah error
+
+
+def test_sqlite_lease_coalesces_across_instances(tmp_path):
+    path = str(tmp_path / "flight.db")
+    shared = {}  # pengganti shared cache (L2)
+    a = SingleFlight(SQLiteLease(path), poll_s=0.01)
+    b = SingleFlight(SQLiteLease(path), poll_s=0.01)
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        shared["k"] = {"text": "ok"}
+        return shared["k"]
+
+    out = {}
+    t = threading.Thread(target=lambda: out.setdefault("a", a.do("k", slow, peek=shared.get)))
+    t.start()
+    time.sleep(0.05)
+    out["b"] = b.do("k", slow, peek=shared.get)
+    t.join()
+    assert len(calls) == 1 and out["b"] == ({"text": "ok"}, False)
+    assert b.stats()["remote_hits"] == 1
@@ -0,0 +1,24 @@
+import os
+
+import pytest
+
+from benchmarks.ec_importtime_report import MissingDependency, check_budget, measure
+
+# budget cold-start import executive_controller; naikkan lewat env kalau mesin CI lambat
+BUDGET_MS = float(os.getenv("EC_IMPORT_BUDGET_MS", "4000"))
+
+
+def test_check_budget_flags_regression():
+    res = {"module": "m", "total_ms": 130.0}
+    assert check_budget(res, budget_ms=200) == []
+    assert check_budget(res, budget_ms=100)
+    assert check_budget(res, baseline={"total_ms": 100.0}, tolerance=1.2)
+    assert not check_budget(res, baseline={"total_ms": 120.0}, tolerance=1.2)
+
+
+def test_executive_controller_cold_import_within_budget():
+    try:
+        res = measure("javu_agi.executive_controller", runs=1)
+    except MissingDependency as e:
+        pytest.skip(str(e))  # dependency pihak ketiga tidak terpasang; error kode repo tetap gagal
+    assert not check_budget(res, budget_ms=BUDGET_MS)
@@ -0,0 +1,96 @@
+import threading, time
+
+from javu_agi.runtime.step_dag import StepScheduler, infer_deps
+
+
+def test_infer_deps_explicit_refs_and_barrier():
+    steps = [
+        {"id": "a", "tool": "search", "cmd": "harga beras"},
+        {"tool": "search", "cmd": "harga jagung"},
+        {"tool": "summarize", "cmd": "ringkas {{step_0}} dan $step1"},
+        {"tool": "shell", "cmd": "echo done"},
+        {"tool": "search", "cmd": "lanjut", "depends_on": ["a"]},
+    ]
+    d = infer_deps(steps)
+    assert d[0] == set() and d[1] == set()
+    assert d[2] == {0, 1}
+    assert d[3] == {0, 1, 2}  # tool non read-only = barrier
+    assert d[4] == {0, 3}
+
+
+def test_scheduler_runs_concurrently_and_drains_in_order():
+    sched = StepScheduler(parallelism=4, tool_limits={})
+    steps = [{"tool": "search", "cmd": f"q{i}"} for i in range(4)]
+    deps = infer_deps(steps)
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def run(tool, cmd):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05 if cmd == "q0" else 0.01)
+        with lock:
+            active[0] -= 1
+        return {"code": 0, "stdout": cmd}
+
+    for i, s in enumerate(steps):
+        assert sched.can_defer(i, s, deps)
+        sched.submit(i, s["tool"], s["cmd"], run, s["tool"], s["cmd"])
+    assert not sched.can_defer(4, {"tool": "search"}, deps + [set()])  # slot penuh
+    out = [(i, r["stdout"]) for i, _, _, r in sched.drain()]
+    assert out == [(0, "q0"), (1, "q1"), (2, "q2"), (3, "q3")]
+    assert peak[0] > 1
+
+
+def test_tool_limit_and_pending_dependency():
+    sched = StepScheduler(parallelism=4, tool_limits={"search": 1})
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def run(cmd):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.01)
+        with lock:
+            active[0] -= 1
+        return {"code": 0}
+
+    for i in range(3):
+        sched.submit(i, "search", f"q{i}", run, f"q{i}")
+    assert not sched.can_defer(3, {"tool": "summarize"}, [set(), set(), set(), {1}])
+    assert len(list(sched.drain())) == 3 and peak[0] == 1
+    assert StepScheduler(parallelism=1).can_defer(0, {"tool": "search"}, [set()]) is False
+
+
+def test_blocked_mid_plan_commits_finished_steps_in_order(tmp_path):
+    # bentuk loop EXECUTE di ExecutiveController._maybe_plan_and_execute: step 2 diblok gate
+    # (policy/dp budget) saat step 0-1 masih jalan di latar -> keduanya tetap ter-commit urut
+    from javu_agi.resume_journal import journal_path, load_journal, write_journal
+
+    jpath = journal_path(str(tmp_path), "ep")
+    steps = [{"tool": "search", "cmd": "q0"}, {"tool": "search", "cmd": "q1"}, {"tool": "search", "cmd": "q2"}]
+    deps = infer_deps(steps)
+    sched = StepScheduler(parallelism=4, tool_limits={})
+    audit, journal = [], []
+
+    def run(tool, cmd):
+        time.sleep(0.05 if cmd == "q0" else 0.0)
+        return {"code": 0, "stdout": cmd}
+
+    def commit(i, tool, cmd, res):
+        audit.append(("tool:exec", i, res["stdout"]))
+        write_journal(jpath, {"i": i, "tool": tool, "cmd": cmd, "code": res["code"]})
+        journal.append(load_journal(jpath)["i"])
+
+    def loop():
+        for i, s in enumerate(steps):
+            if i == 2:
+                sched.settle(commit)
+                return {"status": "blocked", "reason": "policy"}
+            if sched.can_defer(i, s, deps):
+                sched.submit(i, s["tool"], s["cmd"], run, s["tool"], s["cmd"])
+
+    assert loop()["status"] == "blocked"
+    assert audit == [("tool:exec", 0, "q0"), ("tool:exec", 1, "q1")]
+    assert journal == [0, 1] and load_journal(jpath)["i"] == 1
+    assert sched.pending() == set()
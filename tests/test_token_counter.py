@@ -0,0 +1,40 @@
+from javu_agi import token_counter as T
+
+
+def test_model_mapping_and_messages():
+    assert T.encoding_for("gpt-4o-mini") == "o200k_base"
+    assert T.encoding_for("claude-sonnet-3.5") == "cl100k_base"
+    assert T.encoding_for("unknown-model") == T.DEFAULT_ENCODING
+    assert T.count_tokens("") == 0
+    msgs = [{"role": "system", "content": "Kamu asisten."}, {"role": "user", "content": "Halo"}]
+    assert T.count_messages(msgs, "gpt-4o") > T.count_tokens("Kamu asisten. Halo", "gpt-4o")
+
+
+def test_indonesian_and_code_not_underestimated():
+    c = T._Heuristic("o200k_base")
+    indo = "Saya ingin menggunakan aplikasi ini untuk mengelola keuangan perusahaan."
+    code = 'if (x[0] != y) { return {"a": 1}; }'
+    assert c.count(indo) >= len(indo) // 4
+    assert c.count(code) > len(code) // 4
+
+
+def test_long_text_is_memoized():
+    sysp = "Kamu adalah asisten yang membantu dan jujur. " * 20
+    n = T.count_tokens(sysp, "gpt-4o")
+    hits = T.stats()["memo_hits"]
+    assert T.count_tokens(sysp, "gpt-4o") == n
+    assert T.stats()["memo_hits"] == hits + 1
+
+
+def test_missing_vocab_uses_heuristic_without_download(tmp_path, monkeypatch):
+    import sys, types
+
+    calls = []
+    fake = types.ModuleType("tiktoken")
+    fake.get_encoding = lambda name: calls.append(name)
+    monkeypatch.setitem(sys.modules, "tiktoken", fake)
+    monkeypatch.setattr(T, "VOCAB_DIR", str(tmp_path))
+    monkeypatch.setattr(T, "_counters", {})
+    monkeypatch.delenv("TOKENIZER_ALLOW_DOWNLOAD", raising=False)
+    c = T.get_counter("gpt-4o")
+    assert c.name == "heuristic" and calls == []
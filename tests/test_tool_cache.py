@@ -0,0 +1,51 @@
+import time
+
+from javu_agi.cache.tool_cache import ToolCache
+from javu_agi.tools.tool_contracts import default_contracts
+
+
+def _cache(tmp_path, **kw):
+    return ToolCache(str(tmp_path / "tc.sqlite"), contracts=default_contracts(), **kw)
+
+
+def test_lru_eviction_by_items_and_bytes(tmp_path):
+    c = _cache(tmp_path, max_items=3, max_bytes=10_000, ttl_by_class={})
+    for i in range(3):
+        c.put("search", f"q{i}", "x")
+        time.sleep(0.002)
+    assert c.get("search", "q0") == "x"  # q0 jadi paling baru dipakai
+    c.put("search", "q3", "x")
+    assert c.get("search", "q1") is None and c.get("search", "q0") == "x"
+    c.put("search", "big", "y" * 9_990)
+    st = c.stats()
+    assert st["bytes"] <= 10_000 and st["by_class"]["search"]["evict"] >= 2
+
+
+def test_ttl_per_class_and_skillgraph_tag_shares_entry(tmp_path):
+    c = _cache(tmp_path, ttl_by_class={"web": 0.01})
+    c.put("web.get", "https://a.example", "page")
+    c.put("search", "harga beras", "ok")
+    time.sleep(0.02)
+    assert c.get("web.get", "https://a.example") is None
+    assert c.get("search", "harga beras  # cache:0123abcd") == "ok"
+
+
+def test_only_pure_tools_cached(tmp_path):
+    c = _cache(tmp_path)
+    assert not c.put("bash", "rm -rf tmp", "done")
+    assert not c.put("slack.list_messages", "#general", "[]")
+    assert not c.put("shell", "date", "Sen 18 Okt")  # tanpa contract & tidak di allowlist
+    assert c.get("bash", "rm -rf tmp") is None
+    assert c.put("bash", "__SEEN__", "1", marker=True) and c.get("bash", "__SEEN__", marker=True) == "1"
+    st = c.stats()["by_class"]
+    assert st["bash"]["bypass"] == 1 and c.stats()["hit_rate"] == 0.0
+
+
+def test_purity_memo_follows_registry_version(tmp_path):
+    from javu_agi.tools import tool_contracts as tc
+
+    c = ToolCache(str(tmp_path / "tc.sqlite"))
+    r1 = tc.reload_contracts(force=True)
+    assert c.is_pure("web.get") and c._pure_reg is r1
+    r2 = tc.reload_contracts(force=True)
+    assert c.is_pure("web.get") and c._pure_reg is r2 and r2 is not r1
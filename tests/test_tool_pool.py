@@ -0,0 +1,82 @@
+import os
+import time
+
+import pytest
+
+from javu_agi.runtime.tool_pool import ToolNotPicklable, ToolTimeout, ToolWorkerPool
+
+
+def _echo(x):
+    return x, os.getpid()
+
+
+def _sleep(s):
+    time.sleep(s)
+    return "done"
+
+
+def _boom():
+    raise ValueError("rusak")
+
+
+@pytest.fixture
+def pool():
+    p = ToolWorkerPool(size=2, max_tasks=3, max_rss_mb=0)
+    yield p
+    p.close()
+
+
+def test_workers_are_reused_then_recycled(pool):
+    pids = [pool.run(_echo, ("x",))[1][1] for _ in range(4)]
+    assert pids[0] == pids[1] == pids[2] and pids[3] != pids[0]
+    assert pool.stats()["recycled"] == 1
+
+
+def test_large_result_and_errors(pool):
+    status, (out, _) = pool.run(_echo, ("a" * (8 << 20),))
+    assert status == "ok" and len(out) == 8 << 20
+    status, msg = pool.run(_boom)
+    assert status == "err" and "rusak" in msg
+
+
+def test_timeout_kills_worker_and_pool_recovers(pool):
+    with pytest.raises(ToolTimeout):
+        pool.run(_sleep, (5,), timeout_s=0.2)
+    assert pool.stats()["timeouts"] == 1
+    assert pool.run(_sleep, (0,)) == ("ok", "done")
+
+
+def _explode_on_load():
+    raise AttributeError("kelas hasil tidak ada di parent")
+
+
+class _LoadFails:
+    def __reduce__(self):
+        return (_explode_on_load, ())
+
+
+def _bad_result():
+    return _LoadFails()
+
+
+def test_unreadable_result_is_error_not_rerun(pool):
+    status, msg = pool.run(_bad_result)
+    assert status == "err" and "unpicklable result" in msg
+    assert pool.stats()["tasks"] == 1 and pool.run(_echo, ("ok",))[0] == "ok"
+
+
+def test_unpicklable_task_raises_before_dispatch(pool):
+    with pytest.raises(ToolNotPicklable):
+        pool.run(lambda: 1)
+    assert pool.stats()["tasks"] == 0
+
+
+def test_rss_is_growth_over_worker_baseline():
+    big = b"\x01" * (64 << 20)  # parent besar: halaman warisan fork bukan pertumbuhan worker
+    p = ToolWorkerPool(size=1, max_tasks=0, max_rss_mb=32)
+    try:
+        pids = {p.run(_echo, ("x",))[1][1] for _ in range(3)}
+        assert len(pids) == 1 and p.stats()["recycled"] == 0
+    finally:
+        p.close()
+    del big